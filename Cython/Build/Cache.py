@@ -0,0 +1,289 @@
+"""
+A persistent, content addressed cache for the output of the Cython compiler.
+
+Cache entries are keyed by a fingerprint of everything that can influence
+the generated code: the source file, all transitively cimported .pxd and
+included .pxi files, the compiler directives and options, and the Cython
+version.  On a hit, the previously generated .c/.cpp file (and any .h,
+_api.h, .pxi and .dep files written alongside it) are restored without
+running the compiler pipeline.
+"""
+
+import os, zipfile
+
+try:
+    import hashlib
+except ImportError:
+    import md5 as hashlib
+
+import Cython
+from Cython.Compiler import Options
+
+# Files written next to the generated C file, identified by the suffix
+# that replaces the '.c'/'.cpp' extension.
+output_suffixes = ('.c', '.cpp', '.h', '_api.h', '.pxi', '.dep')
+
+# Compilation options that have an effect on the generated code.
+fingerprinted_options = (
+    'cplus',
+    'compiler_directives',
+    'language_level',
+    'emit_linenums',
+    'relative_path_in_code_position_comments',
+    'generate_pxi',
+    'recursive',
+    )
+
+# Global settings in Cython.Compiler.Options that change the generated code.
+fingerprinted_globals = (
+    'cache_builtins',
+    'embed_pos_in_docstring',
+    'gcc_branch_hints',
+    'pre_import',
+    'docstrings',
+    'generate_cleanup_code',
+    'convert_range',
+    'lookup_module_cpdef',
+    'init_local_none',
+    'c_line_in_traceback',
+    'embed',
+    'disable_function_redefinition',
+    )
+
+default_cache_size = 100 * 1024 * 1024
+
+
+class Cache(object):
+    """
+    A directory of zip archives, one per fingerprint.
+
+    hits, misses, stores and evictions count the cache operations of this
+    instance, save_stats() adds them to the totals kept in the cache
+    directory.
+    """
+
+    stats_file_name = 'stats.txt'
+    stat_names = ('hits', 'misses', 'stores', 'evictions')
+    entry_suffix = '.zip'
+
+    def __init__(self, path, cache_size=None):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        if cache_size is None:
+            cache_size = default_cache_size
+        self.cache_size = cache_size
+        self.hits = self.misses = self.stores = self.evictions = 0
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+    def file_hash(self, filename):
+        f = open(filename, 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+        return hashlib.md5(data).hexdigest()
+
+    def transitive_fingerprint(self, dependency_tree, filename, options,
+                               full_module_name=None):
+        """
+        Returns a hex digest of the source file, its transitive
+        dependencies and the options that affect the generated code,
+        or None if the file can not be cached.
+        """
+        if options.annotate or Options.annotate or options.gdb_debug:
+            # These write additional output files that we do not cache.
+            return None
+        try:
+            m = hashlib.md5(Cython.__version__.encode('UTF-8'))
+            m.update(self.file_hash(filename).encode('UTF-8'))
+            dependencies = list(dependency_tree.all_dependencies(filename))
+            dependencies.sort()
+            for dependency in dependencies:
+                if dependency != filename and os.path.isfile(dependency):
+                    m.update(os.path.basename(dependency).encode('UTF-8'))
+                    m.update(self.file_hash(dependency).encode('UTF-8'))
+        except EnvironmentError:
+            return None
+        if full_module_name is None:
+            full_module_name = dependency_tree.fully_qualifeid_name(filename)
+        settings = [full_module_name]
+        if options.emit_linenums or not options.relative_path_in_code_position_comments:
+            # absolute paths end up in the generated code
+            settings.append(os.path.abspath(filename))
+        for name in fingerprinted_options:
+            value = getattr(options, name, None)
+            if isinstance(value, dict):
+                value = sorted_items(value)
+            settings.append((name, value))
+        for name in fingerprinted_globals:
+            settings.append((name, getattr(Options, name, None)))
+        m.update(repr(settings).encode('UTF-8'))
+        return m.hexdigest()
+
+    def entry_path(self, fingerprint):
+        return os.path.join(self.path, fingerprint + self.entry_suffix)
+
+    def lookup_cache(self, fingerprint):
+        """
+        Returns the path of the cache entry for the fingerprint, or None.
+        """
+        if fingerprint is None:
+            return None
+        path = self.entry_path(fingerprint)
+        if os.path.exists(path):
+            return path
+        return None
+
+    def load_from_cache(self, c_file, fingerprint):
+        """
+        Restores the cached output files for c_file.  Returns the list of
+        restored files, or None on a cache miss.
+        """
+        path = self.lookup_cache(fingerprint)
+        if path is None:
+            self.misses += 1
+            return None
+        base = os.path.splitext(c_file)[0]
+        restored = []
+        try:
+            archive = zipfile.ZipFile(path, 'r')
+            try:
+                for suffix in archive.namelist():
+                    if suffix not in output_suffixes:
+                        continue
+                    output_file = base + suffix
+                    if os.path.exists(output_file):
+                        # never write into hard linked files
+                        os.unlink(output_file)
+                    f = open(output_file, 'wb')
+                    try:
+                        f.write(archive.read(suffix))
+                    finally:
+                        f.close()
+                    restored.append(output_file)
+            finally:
+                archive.close()
+        except (EnvironmentError, zipfile.BadZipfile):
+            # broken entry, pretend we never had it
+            self.remove_entry(path)
+            self.misses += 1
+            return None
+        # update the access time for the LRU eviction
+        os.utime(path, None)
+        self.hits += 1
+        return restored
+
+    def store_to_cache(self, fingerprint, output_files):
+        """
+        Stores the given compiler output files (the C file first) under
+        the fingerprint.  Returns True on success.
+        """
+        if fingerprint is None or not output_files:
+            return False
+        base = os.path.splitext(output_files[0])[0]
+        path = self.entry_path(fingerprint)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            archive = zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED)
+            try:
+                for output_file in output_files:
+                    if not output_file or not output_file.startswith(base):
+                        continue
+                    suffix = output_file[len(base):]
+                    if suffix in output_suffixes and os.path.exists(output_file):
+                        archive.write(output_file, suffix)
+            finally:
+                archive.close()
+            if os.path.exists(path):
+                os.unlink(path)
+            os.rename(tmp_path, path)
+        except EnvironmentError:
+            self.remove_entry(tmp_path)
+            return False
+        self.stores += 1
+        return True
+
+    def store_result(self, fingerprint, result):
+        return self.store_to_cache(fingerprint, [
+            result.c_file, result.h_file, result.api_file,
+            result.i_file, result.dep_file])
+
+    def remove_entry(self, path):
+        try:
+            os.unlink(path)
+        except EnvironmentError:
+            pass
+
+    def cleanup_cache(self, ratio=.85):
+        """
+        Evicts the least recently used entries until the cache is
+        below ratio * cache_size, if it has grown beyond cache_size.
+        """
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.path):
+            if not name.endswith(self.entry_suffix):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                st = os.stat(path)
+            except EnvironmentError:
+                continue
+            total_size += st.st_size
+            entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+        if total_size <= self.cache_size:
+            return
+        entries.sort()
+        while entries and total_size > ratio * self.cache_size:
+            time, size, path = entries.pop(0)
+            self.remove_entry(path)
+            total_size -= size
+            self.evictions += 1
+
+    def load_stats(self):
+        stats = {}
+        for name in self.stat_names:
+            stats[name] = 0
+        try:
+            f = open(os.path.join(self.path, self.stats_file_name))
+            try:
+                for line in f:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        name = name.strip()
+                        if name in stats:
+                            stats[name] = int(value)
+            finally:
+                f.close()
+        except (EnvironmentError, ValueError):
+            pass
+        return stats
+
+    def save_stats(self):
+        """
+        Adds the counters of this instance to the persistent totals.
+        """
+        stats = self.load_stats()
+        for name in self.stat_names:
+            stats[name] += getattr(self, name)
+            setattr(self, name, 0)
+        try:
+            f = open(os.path.join(self.path, self.stats_file_name), 'w')
+            try:
+                for name in self.stat_names:
+                    f.write("%s: %d\n" % (name, stats[name]))
+            finally:
+                f.close()
+        except EnvironmentError:
+            pass
+        return stats
+
+    def format_stats(self):
+        return "%d cache hits, %d misses, %d stored, %d evicted" % (
+            self.hits, self.misses, self.stores, self.evictions)
+
+
+def sorted_items(d):
+    items = d.items()
+    items.sort()
+    return items
@@ -2,11 +2,19 @@ from glob import glob
 import re, os, sys
 from cython import set
 
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
 
 from distutils.extension import Extension
 
 from Cython import Utils
 from Cython.Compiler.Main import Context, CompilationOptions, default_options
+from Cython.Compiler.Scanning import FileSourceDescriptor
+from Cython.Compiler.PxdCache import PxdCache, file_stamp
+from Cython.Build.Cache import Cache
 
 # Unfortunately, Python 2.3 doesn't support decorators.
 def cached_method(f):
@@ -231,7 +239,7 @@ def parse_dependencies(source_filename):
     if '\t' in source:
         source = source.replace('\t', ' ')
     # TODO: pure mode
-    dependancy = re.compile(r"(cimport +([0-9a-zA-Z_.]+)\b)|(from +([0-9a-zA-Z_.]+) +cimport)|(include +'([^']+)')|(cdef +extern +from +'([^']+)')")
+    dependancy = re.compile(r"(cimport +([0-9a-zA-Z_.]+)\b)|(from +([0-9a-zA-Z_.]+) +cimport)|(include +['\"]([^'\"]+)['\"])|(cdef +extern +from +['\"]([^'\"]+)['\"])")
     cimports = []
     includes = []
     externs  = []
@@ -249,31 +257,105 @@ def parse_dependencies(source_filename):
 
 
 class DependencyTree(object):
+    """
+    The dependency graph of the compiled sources.
 
-    def __init__(self, context):
+    If a cache file is given, the results of scanning each file are kept
+    there, keyed by the size and modification time of the files, and only
+    files that have changed since are scanned again.  The cimports and
+    includes are resolved again on each run, as new files may change what
+    they resolve to.
+    """
+
+    def __init__(self, context, cache_file=None):
         self.context = context
         self._transitive_cache = {}
+        self.scanned = {}  # {absolute path : (stamp, parse_dependencies() result)}
+        self.cache_file = None
+        self.cache_modified = False
+        if cache_file is not None:
+            self.load_cache(cache_file)
+
+    def load_cache(self, cache_file):
+        import Cython
+        self.cache_file = cache_file
+        try:
+            f = open(cache_file, 'rb')
+        except EnvironmentError:
+            return
+        try:
+            try:
+                data = pickle.load(f)
+            except Exception:
+                # an outdated or broken cache, just start over
+                return
+        finally:
+            f.close()
+        if data.get('version') != Cython.__version__:
+            return
+        self.scanned.update(data['scanned'])
+
+    def save_cache(self):
+        import Cython
+        if self.cache_file is None or not self.cache_modified:
+            return
+        data = {'version': Cython.__version__,
+                'scanned': self.scanned}
+        dir = os.path.dirname(self.cache_file)
+        if dir and not os.path.exists(dir):
+            os.makedirs(dir)
+        tmp_file = '%s.%d.tmp' % (self.cache_file, os.getpid())
+        f = open(tmp_file, 'wb')
+        try:
+            pickle.dump(data, f, 2)
+        finally:
+            f.close()
+        if os.path.exists(self.cache_file):
+            os.unlink(self.cache_file)
+        os.rename(tmp_file, self.cache_file)
+        self.cache_modified = False
 
     #@cached_method
     def parse_dependencies(self, source_filename):
-        return parse_dependencies(source_filename)
+        key = os.path.abspath(source_filename)
+        stamp = file_stamp(key)
+        scanned = self.scanned.get(key)
+        if scanned is not None and scanned[0] == stamp:
+            return scanned[1]
+        result = parse_dependencies(source_filename)
+        self.scanned[key] = (stamp, result)
+        self.cache_modified = True
+        return result
     parse_dependencies = cached_method(parse_dependencies)
 
     #@cached_method
-    def cimports_and_externs(self, filename):
-        cimports, includes, externs = self.parse_dependencies(filename)[:3]
-        cimports = set(cimports)
-        externs = set(externs)
-        for include in includes:
+    def included_files(self, filename):
+        # This is messy because included files are textually included, resolving
+        # cimports (but not includes) relative to the including file.
+        all = set()
+        for include in self.parse_dependencies(filename)[1]:
             include_path = os.path.join(os.path.dirname(filename), include)
             if not os.path.exists(include_path):
                 include_path = self.context.find_include_file(include, None)
             if include_path:
-                a, b = self.cimports_and_externs(include_path)
-                cimports.update(a)
-                externs.update(b)
+                if '.' + os.path.sep in include_path:
+                    include_path = os.path.normpath(include_path)
+                all.add(include_path)
+                all.update(self.included_files(include_path))
             else:
                 print("Unable to locate '%s' referenced from '%s'" % (filename, include))
+        return all
+    included_files = cached_method(included_files)
+
+    #@cached_method
+    def cimports_and_externs(self, filename):
+        cimports, includes, externs = self.parse_dependencies(filename)[:3]
+        cimports = set(cimports)
+        externs = set(externs)
+        for include in self.included_files(filename):
+            a, b = self.cimports_and_externs(include)
+            cimports.update(a)
+            externs.update(b)
         return tuple(cimports), tuple(externs)
     cimports_and_externs = cached_method(cimports_and_externs)
 
@@ -298,12 +380,15 @@ class DependencyTree(object):
     def find_pxd(self, module, filename=None):
         if module[0] == '.':
             raise NotImplementedError("New relative imports.")
+        pos = None
         if filename is not None:
             relative = '.'.join(self.package(filename) + tuple(module.split('.')))
             pxd = self.context.find_pxd_file(relative, None)
             if pxd:
                 return pxd
-        return self.context.find_pxd_file(module, None)
+            # like the compiler, also look next to the root package
+            pos = (FileSourceDescriptor(filename), 1, 0)
+        return self.context.find_pxd_file(module, pos)
     find_pxd = cached_method(find_pxd)
 
     #@cached_method
@@ -323,7 +408,7 @@ class DependencyTree(object):
 
     def immediate_dependencies(self, filename):
         all = list(self.cimported_files(filename))
-        for extern in sum(self.cimports_and_externs(filename), ()):
+        for extern in self.cimports_and_externs(filename)[1]:
             all.append(os.path.normpath(os.path.join(os.path.dirname(filename), extern)))
         return tuple(all)
 
@@ -339,8 +424,24 @@ class DependencyTree(object):
     def newest_dependency(self, filename):
         return self.transitive_merge(filename, self.extract_timestamp, max)
 
+    def extract_dependencies(self, filename):
+        # The file itself, its included files and its extern headers.
+        all = set([filename])
+        all.update(self.included_files(filename))
+        all.update(self.immediate_dependencies(filename))
+        return all
+
+    def all_dependencies(self, filename):
+        return self.transitive_merge(filename, self.extract_dependencies, set.union)
+
     def distutils_info0(self, filename):
-        return self.parse_dependencies(filename)[3]
+        # merge() changes the info, so the scanned one is copied
+        info = DistutilsInfo()
+        for key, value in self.parse_dependencies(filename)[3].values.items():
+            if isinstance(value, list):
+                value = list(value)
+            info.values[key] = value
+        return info
 
     def distutils_info(self, filename, aliases=None, base=None):
         return (self.transitive_merge(filename, self.distutils_info0, DistutilsInfo.merge)
@@ -380,13 +481,42 @@ class DependencyTree(object):
         finally:
             del stack[node]
 
+def write_depfile(dependency_tree, source, c_file):
+    """
+    Writes a gcc style depfile c_file + '.dep' for make and ninja, that
+    lists the source file and every existing file it depends on.
+    """
+    abs_source = os.path.abspath(source)
+    dependencies = [depfile_path(path) for path in dependency_tree.all_dependencies(source)
+                    if os.path.abspath(path) != abs_source and os.path.isfile(path)]
+    dependencies.sort()
+    f = open(c_file + '.dep', 'w')
+    try:
+        f.write("%s: %s" % (depfile_path(c_file), depfile_path(source)))
+        for path in dependencies:
+            f.write(" \\\n  %s" % path)
+        f.write("\n")
+    finally:
+        f.close()
+
+def depfile_path(path):
+    # Paths below the current directory are written relative to it,
+    # as build tools usually refer to them.
+    cwd = os.path.join(os.getcwd(), '')
+    path = os.path.normpath(path)
+    if path.startswith(cwd):
+        path = path[len(cwd):]
+    return path.replace('\\', '/').replace(' ', '\\ ').replace('#', '\\#').replace('$', '$$')
+
 _dep_tree = None
-def create_dependency_tree(ctx=None):
+def create_dependency_tree(ctx=None, cache_file=None):
     global _dep_tree
     if _dep_tree is None:
         if ctx is None:
             ctx = Context(["."], CompilationOptions(default_options))
-        _dep_tree = DependencyTree(ctx)
+        _dep_tree = DependencyTree(ctx, cache_file)
+    elif cache_file is not None and _dep_tree.cache_file != cache_file:
+        _dep_tree.load_cache(cache_file)
     return _dep_tree
 
 # This may be useful for advanced users?
@@ -443,18 +573,48 @@ def create_extension_list(patterns, exclude=[], ctx=None, aliases=None):
     return module_list
 
 # This is the user-exposed entry point.
-def cythonize(module_list, exclude=[], nthreads=0, aliases=None, quiet=False, **options):
+def cythonize(module_list, exclude=[], nthreads=0, aliases=None, quiet=False,
+              cache=None, cache_size=None, dependency_cache=None, **options):
+    """
+    Compiles the .pyx/.py sources of the given extensions (or glob patterns)
+    to C if they or their dependencies have changed.
+
+    If cache is a directory name (or a Cache instance), generated files
+    are looked up by a fingerprint of their sources and options before
+    running the compiler, and newly generated files are stored there.
+
+    The scanned dependencies of the sources are kept in the file
+    dependency_cache (by default in the cache directory, if any), so
+    that only changed files are scanned again by later runs.
+
+    Analysed .pxd files are shared between the compiled modules unless
+    pxd_cache=None is passed.  Pass a PxdCache with a directory to keep
+    them for later runs.
+
+    Pass depfile=True to write a gcc style depfile next to each
+    generated C file.
+
+    Pass profile_pipeline=<file> to collect the time spent in each
+    compiler phase for all compiled modules in one file, see
+    Cython.Compiler.PipelineProfiler.
+    """
     if 'include_path' not in options:
         options['include_path'] = ['.']
+    if 'pxd_cache' not in options:
+        options['pxd_cache'] = PxdCache()
     c_options = CompilationOptions(**options)
     cpp_options = CompilationOptions(**options); cpp_options.cplus = True
     ctx = c_options.create_context()
+    if cache is not None and not isinstance(cache, Cache):
+        cache = Cache(cache, cache_size)
+    if dependency_cache is None and cache is not None:
+        dependency_cache = os.path.join(cache.path, 'dependencies.pickle')
+    deps = create_dependency_tree(ctx, dependency_cache)
     module_list = create_extension_list(
         module_list,
         exclude=exclude,
         ctx=ctx,
         aliases=aliases)
-    deps = create_dependency_tree(ctx)
     to_compile = []
     for m in module_list:
         new_sources = []
@@ -468,7 +628,7 @@ def cythonize(module_list, exclude=[], nthreads=0, aliases=None, quiet=False, **
                     c_file = base + '.c'
                     options = c_options
                 if os.path.exists(c_file):
-                    c_timestamp = os.path.getmtime(c_file)
+                    c_timestamp = Utils.generated_time(c_file)
                 else:
                     c_timestamp = -1
                 # Priority goes first to modified files, second to direct
@@ -480,33 +640,52 @@ def cythonize(module_list, exclude=[], nthreads=0, aliases=None, quiet=False, **
                     dep_timestamp, dep = deps.newest_dependency(source)
                     priority = 2 - (dep in deps.immediate_dependencies(source))
                 if c_timestamp < dep_timestamp:
+                    fingerprint = None
+                    if cache is not None:
+                        fingerprint = cache.transitive_fingerprint(
+                            deps, source, options)
+                        if cache.load_from_cache(c_file, fingerprint):
+                            if not quiet:
+                                print("Found compiled %s in cache" % source)
+                            if options.depfile:
+                                write_depfile(deps, source, c_file)
+                            new_sources.append(c_file)
+                            continue
                     if not quiet:
                         if source == dep:
                             print("Compiling %s because it changed." % source)
                         else:
                             print("Compiling %s because it depends on %s." % (source, dep))
-                    to_compile.append((priority, source, c_file, options))
+                    to_compile.append((priority, source, c_file, options, fingerprint, cache))
                 new_sources.append(c_file)
             else:
                 new_sources.append(source)
         m.sources = new_sources
+    deps.save_cache()
     to_compile.sort()
     if nthreads:
         # Requires multiprocessing (or Python >= 2.6)
         try:
             import multiprocessing
             pool = multiprocessing.Pool(nthreads)
-            pool.map(cythonize_one_helper, to_compile)
+            stored = pool.map(cythonize_one_helper, to_compile)
+            if cache is not None:
+                # the workers stored into their own copies of the cache
+                cache.stores += len(filter(None, stored))
         except ImportError:
             print("multiprocessing required for parallel cythonization")
             nthreads = 0
     if not nthreads:
-        for priority, pyx_file, c_file, options in to_compile:
-            cythonize_one(pyx_file, c_file, options)
+        for args in to_compile:
+            cythonize_one(*args[1:])
+    if cache is not None:
+        cache.cleanup_cache()
+        if not quiet:
+            print("Compilation cache: %s" % cache.format_stats())
+        cache.save_stats()
     return module_list
 
-# TODO: Share context? Issue: pyx processing leaks into pxd module
-def cythonize_one(pyx_file, c_file, options=None):
+def cythonize_one(pyx_file, c_file, options=None, fingerprint=None, cache=None):
     from Cython.Compiler.Main import compile, default_options
     from Cython.Compiler.Errors import CompileError, PyrexError
 
@@ -524,6 +703,13 @@ def cythonize_one(pyx_file, c_file, options=None):
         any_failures = 1
     if any_failures:
         raise CompileError(None, pyx_file)
+    result = result[os.path.abspath(pyx_file)]
+    if not result.c_file_changed:
+        # The compiler left the C file alone, mark it as up to date
+        # without making the C compiler rebuild it.
+        Utils.touch_stamp_file(c_file)
+    if cache is not None and fingerprint is not None:
+        return cache.store_result(fingerprint, result)
 
 def cythonize_one_helper(m):
     return cythonize_one(*m[1:])
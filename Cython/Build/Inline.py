@@ -8,7 +8,7 @@ except ImportError:
     import md5 as hashlib
 
 from distutils.core import Distribution, Extension
-from distutils.command.build_ext import build_ext
+from Cython.Distutils.build_ext import build_ext
 
 import Cython
 from Cython.Compiler.Main import Context, CompilationOptions, default_options
@@ -0,0 +1,253 @@
+#
+#   Exporting the build of extension modules as a ninja build file
+#
+#   The build statements cythonize each .pyx/.py source, compile the C
+#   files and link the extension modules in place, like
+#   "setup.py build_ext --inplace".  Cython and the C compiler write
+#   depfiles, so ninja rebuilds exactly what depends on a changed .pxd,
+#   .pxi or header file, and Cython leaves unchanged C files untouched
+#   (restat) so that their objects are not rebuilt.  Run
+#
+#       python -m Cython.Build.Ninja [-o build.ninja] <pattern>...
+#
+#   and then ninja.  Only Unix style (gcc compatible) compilers are
+#   supported.
+#
+
+import os, sys, re
+from distutils import sysconfig
+
+from Cython.Build.Dependencies import create_extension_list
+
+usage = """\
+Usage: python -m Cython.Build.Ninja [options] <pattern>...
+
+Options:
+  -o, --output <file>            Write the build file to <file> (default: build.ninja)
+  -b, --build-dir <directory>    Put object files into <directory> (default: build)
+  -I, --include-dir <directory>  Search for include files in <directory>
+  -x, --exclude <pattern>        Skip the sources that match the pattern
+"""
+
+def ninja_escape(path):
+    # Escapes a path in a build statement.
+    return path.replace('$', '$$').replace(' ', '$ ').replace(':', '$:')
+
+_shell_safe = re.compile(r'^[-\w./=+,:@%]+$')
+
+def shell_quote(arg):
+    if _shell_safe.match(arg):
+        return arg
+    return "'%s'" % arg.replace("'", "'\\''")
+
+def command_line(args):
+    # Joins arguments to a command line in a variable.
+    return ' '.join([shell_quote(arg) for arg in args]).replace('$', '$$')
+
+
+def compiler_config():
+    """
+    Returns the compile and link commands that distutils would use,
+    as a dict of argument lists.
+    """
+    (cc, cxx, cflags, ccshared, ldshared, so_ext) = sysconfig.get_config_vars(
+        'CC', 'CXX', 'CFLAGS', 'CCSHARED', 'LDSHARED', 'SO')
+    if not so_ext:
+        so_ext = sysconfig.get_config_var('EXT_SUFFIX')
+    cc = os.environ.get('CC', cc)
+    cxx = os.environ.get('CXX', cxx)
+    ldshared = os.environ.get('LDSHARED', ldshared)
+    cflags = cflags + ' ' + os.environ.get('CFLAGS', '')
+    ldshared = ldshared.split()
+    cxx = cxx.split()
+    return {
+        'cc': cc.split(),
+        'cxx': cxx,
+        'cflags': cflags.split() + ccshared.split(),
+        'ldshared': ldshared,
+        # distutils replaces the compiler in LDSHARED when linking C++
+        'ldshared_cxx': cxx[:1] + ldshared[1:],
+        'python_include': sysconfig.get_python_inc(),
+        'so_ext': so_ext,
+        }
+
+
+class NinjaWriter(object):
+    """
+    Writes the rules and build statements for a list of extensions,
+    as returned by create_extension_list().
+    """
+
+    def __init__(self, f, build_dir='build', include_path=None,
+                 python=None, config=None):
+        if include_path is None:
+            include_path = ['.']
+        if python is None:
+            python = sys.executable
+        if config is None:
+            config = compiler_config()
+        self.f = f
+        self.build_dir = build_dir
+        self.include_path = include_path
+        self.python = python
+        self.config = config
+        self.outputs = []
+
+    def line(self, text=''):
+        self.f.write(text + '\n')
+
+    def variable(self, name, value, indent=0):
+        self.line('%s%s = %s' % ('  ' * indent, name, value))
+
+    def rule(self, name, command, description, depfile=None, restat=False):
+        self.line('rule %s' % name)
+        self.variable('command', command, 1)
+        self.variable('description', description, 1)
+        if depfile is not None:
+            self.variable('depfile', depfile, 1)
+            self.variable('deps', 'gcc', 1)
+        if restat:
+            self.variable('restat', '1', 1)
+        self.line()
+
+    def build(self, outputs, rule, inputs, variables=()):
+        if not isinstance(outputs, list):
+            outputs = [outputs]
+        self.line('build %s: %s %s' % (
+            ' '.join(map(ninja_escape, outputs)), rule,
+            ' '.join(map(ninja_escape, inputs))))
+        for name, value in variables:
+            self.variable(name, value, 1)
+
+    def write_header(self):
+        config = self.config
+        self.line('# Generated by Cython.Build.Ninja')
+        self.line()
+        self.variable('builddir', ninja_escape(self.build_dir))
+        self.variable('cython', command_line([
+            self.python, '-c',
+            'from Cython.Compiler.Main import main; main(command_line=1)']))
+        self.variable('cython_flags', command_line(
+            ['-I%s' % path for path in self.include_path]))
+        self.variable('cc', command_line(config['cc']))
+        self.variable('cxx', command_line(config['cxx']))
+        self.variable('cflags', command_line(
+            config['cflags'] + ['-I%s' % config['python_include']]))
+        self.variable('ldshared', command_line(config['ldshared']))
+        self.variable('ldshared_cxx', command_line(config['ldshared_cxx']))
+        self.line()
+        self.rule('cython', '$cython $cython_flags $extra_flags --depfile $in -o $out',
+                  'CYTHON $in', depfile='$out.dep', restat=True)
+        self.rule('cc', '$cc -MMD -MF $out.d $cflags $extra_flags -c $in -o $out',
+                  'CC $out', depfile='$out.d')
+        self.rule('cxx', '$cxx -MMD -MF $out.d $cflags $extra_flags -c $in -o $out',
+                  'CXX $out', depfile='$out.d')
+        self.rule('link', '$ldshared $in $extra_flags -o $out', 'LINK $out')
+        self.rule('link_cxx', '$ldshared_cxx $in $extra_flags -o $out', 'LINK $out')
+
+    def write_extension(self, ext):
+        cplus = ext.language == 'c++'
+        compile_flags = []
+        for name, value in ext.define_macros:
+            if value is None:
+                compile_flags.append('-D%s' % name)
+            else:
+                compile_flags.append('-D%s=%s' % (name, value))
+        for name in ext.undef_macros:
+            compile_flags.append('-U%s' % name)
+        for path in ext.include_dirs:
+            compile_flags.append('-I%s' % path)
+        compile_flags.extend(ext.extra_compile_args or [])
+        objects = []
+        for source in ext.sources:
+            base, ext_type = os.path.splitext(source)
+            if ext_type in ('.pyx', '.py'):
+                if cplus:
+                    c_file = base + '.cpp'
+                    variables = [('extra_flags', '--cplus')]
+                else:
+                    c_file = base + '.c'
+                    variables = []
+                self.build(c_file, 'cython', [source], variables)
+                source = c_file
+                ext_type = os.path.splitext(c_file)[1]
+            obj = os.path.join(self.build_dir, 'temp',
+                               os.path.splitdrive(source)[1].lstrip(os.sep) + '.o')
+            if ext_type in ('.cpp', '.cc', '.cxx', '.c++') or cplus:
+                rule = 'cxx'
+            else:
+                rule = 'cc'
+            self.build(obj, rule, [source], [('extra_flags', command_line(compile_flags))])
+            objects.append(obj)
+        link_flags = list(ext.extra_objects)
+        for path in ext.library_dirs:
+            link_flags.append('-L%s' % path)
+        for path in ext.runtime_library_dirs:
+            link_flags.append('-Wl,-R%s' % path)
+        for name in ext.libraries:
+            link_flags.append('-l%s' % name)
+        link_flags.extend(ext.extra_link_args or [])
+        output = ext.name.replace('.', os.sep) + self.config['so_ext']
+        if cplus:
+            rule = 'link_cxx'
+        else:
+            rule = 'link'
+        self.build(output, rule, objects, [('extra_flags', command_line(link_flags))])
+        self.outputs.append(output)
+        self.line()
+
+    def write_footer(self):
+        self.build('all', 'phony', self.outputs)
+        self.line('default all')
+
+
+def write_ninja_file(module_list, f, build_dir='build', include_path=None,
+                     python=None):
+    """
+    Writes a ninja build file for the extensions in module_list (as
+    returned by create_extension_list) to the file object f.
+    """
+    writer = NinjaWriter(f, build_dir, include_path, python)
+    writer.write_header()
+    for ext in module_list:
+        writer.write_extension(ext)
+    writer.write_footer()
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    output = 'build.ninja'
+    build_dir = 'build'
+    include_path = []
+    exclude = []
+    patterns = []
+    while args:
+        option = args.pop(0)
+        if option in ('-o', '--output') and args:
+            output = args.pop(0)
+        elif option in ('-b', '--build-dir') and args:
+            build_dir = args.pop(0)
+        elif option in ('-I', '--include-dir') and args:
+            include_path.append(args.pop(0))
+        elif option in ('-x', '--exclude') and args:
+            exclude.append(args.pop(0))
+        elif option.startswith('-'):
+            if option not in ('-h', '--help'):
+                sys.stderr.write("Unknown option: %s\n" % option)
+            sys.stderr.write(usage)
+            sys.exit(option not in ('-h', '--help'))
+        else:
+            patterns.append(option)
+    if not patterns:
+        sys.stderr.write(usage)
+        sys.exit(1)
+    module_list = create_extension_list(patterns, exclude=exclude)
+    f = open(output, 'w')
+    try:
+        write_ninja_file(module_list, f, build_dir, ['.'] + include_path)
+    finally:
+        f.close()
+
+if __name__ == '__main__':
+    main()
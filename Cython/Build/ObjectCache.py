@@ -0,0 +1,226 @@
+"""
+A persistent, content addressed cache for compiled object files and
+linked extension modules.
+
+Object files are keyed by a hash of the C source, the header files that
+it includes from the include directories, and the compiler command line.
+Extension modules are keyed by a hash of their object files and the
+linker command line.  Headers that are not found in the include
+directories (system headers) are not hashed, like the compiler itself.
+"""
+
+import os, re, shutil
+
+try:
+    import hashlib
+except ImportError:
+    import md5 as hashlib
+
+from Cython.Build.Cache import Cache
+from Cython.Compiler.PxdCache import file_stamp
+
+default_object_cache_size = 500 * 1024 * 1024
+
+include_re = re.compile(r'^[ \t]*#[ \t]*include[ \t]*[<"]([^>"\n]+)[>"]', re.M)
+
+
+class ObjectCache(Cache):
+    """
+    A directory of object files and extension modules, one per
+    fingerprint.
+    """
+
+    stats_file_name = 'object_stats.txt'
+    entry_suffix = '.obj'
+
+    def __init__(self, path, cache_size=None):
+        if cache_size is None:
+            cache_size = default_object_cache_size
+        Cache.__init__(self, path, cache_size)
+        self.headers = {} # {path : (stamp, hash, [included names])}
+
+    def scan_file(self, filename):
+        # Returns the hash of the file and the names that it includes.
+        stamp = file_stamp(filename)
+        scanned = self.headers.get(filename)
+        if scanned is not None and scanned[0] == stamp:
+            return scanned[1:]
+        f = open(filename, 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+        includes = include_re.findall(data.decode('ISO-8859-1'))
+        scanned = self.headers[filename] = (
+            stamp, hashlib.md5(data).hexdigest(), includes)
+        return scanned[1:]
+
+    def find_header(self, name, directory, include_dirs):
+        for dir in [directory] + list(include_dirs):
+            path = os.path.join(dir, name)
+            if os.path.isfile(path):
+                return os.path.normpath(path)
+        return None
+
+    def source_fingerprint(self, source, include_dirs, settings):
+        """
+        Returns a hex digest of the C source, the headers it includes
+        (transitively) and the compiler settings, or None if the source
+        can not be read.
+        """
+        try:
+            file_hash, includes = self.scan_file(source)
+            m = hashlib.md5(file_hash.encode('UTF-8'))
+            seen = {}
+            stack = [(name, os.path.dirname(source)) for name in includes]
+            while stack:
+                name, directory = stack.pop()
+                header = self.find_header(name, directory, include_dirs)
+                if header is None or header in seen:
+                    continue
+                seen[header] = True
+                header_hash, header_includes = self.scan_file(header)
+                m.update(('%s:%s' % (header, header_hash)).encode('UTF-8'))
+                directory = os.path.dirname(header)
+                stack.extend([(name, directory) for name in header_includes])
+        except EnvironmentError:
+            return None
+        m.update(repr([os.path.abspath(source)] + list(settings)).encode('UTF-8'))
+        return m.hexdigest()
+
+    def link_fingerprint(self, objects, library_files, settings):
+        """
+        Returns a hex digest of the object files, the stamps of the
+        libraries and the linker settings, or None if an object file
+        can not be read.
+        """
+        try:
+            m = hashlib.md5()
+            for obj in objects:
+                m.update(self.file_hash(obj).encode('UTF-8'))
+            for library_file in library_files:
+                m.update(repr((library_file, file_stamp(library_file))).encode('UTF-8'))
+        except EnvironmentError:
+            return None
+        m.update(repr(list(settings)).encode('UTF-8'))
+        return m.hexdigest()
+
+    def load_file(self, fingerprint, output_file):
+        """
+        Copies the cached file for the fingerprint to output_file.
+        Returns True on a hit.
+        """
+        path = self.lookup_cache(fingerprint)
+        if path is None:
+            self.misses += 1
+            return False
+        try:
+            directory = os.path.dirname(output_file)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            if os.path.exists(output_file):
+                # never write into hard linked files
+                os.unlink(output_file)
+            shutil.copyfile(path, output_file)
+            shutil.copymode(path, output_file)
+        except EnvironmentError:
+            self.misses += 1
+            return False
+        # update the access time for the LRU eviction
+        os.utime(path, None)
+        self.hits += 1
+        return True
+
+    def store_file(self, fingerprint, output_file):
+        """
+        Stores a compiled file under the fingerprint.  Returns True on
+        success.
+        """
+        if fingerprint is None or not os.path.exists(output_file):
+            return False
+        path = self.entry_path(fingerprint)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            shutil.copyfile(output_file, tmp_path)
+            shutil.copymode(output_file, tmp_path)
+            if os.path.exists(path):
+                os.unlink(path)
+            os.rename(tmp_path, path)
+        except EnvironmentError:
+            self.remove_entry(tmp_path)
+            return False
+        self.stores += 1
+        return True
+
+
+def compiler_settings(compiler):
+    # The parts of the command line that a distutils compiler keeps.
+    settings = [compiler.__class__.__name__]
+    for name in ('compiler_so', 'compiler_cxx', 'compile_options',
+                 'compile_options_debug', 'linker_so', 'ldflags_shared',
+                 'ldflags_shared_debug'):
+        settings.append((name, getattr(compiler, name, None)))
+    settings.append(compiler.macros)
+    settings.append(compiler.include_dirs)
+    return settings
+
+def cache_compiler_output(compiler, cache):
+    """
+    Makes compiler.compile() and compiler.link() look up their output
+    in the ObjectCache before running the compiler or the linker, and
+    store new output in it.
+    """
+    compile = compiler.compile
+    link = compiler.link
+
+    def compile_cached(sources, output_dir=None, macros=None, include_dirs=None,
+                       debug=0, extra_preargs=None, extra_postargs=None, depends=None):
+        objects = compiler.object_filenames(sources, output_dir=output_dir)
+        all_include_dirs = list(include_dirs or ()) + list(compiler.include_dirs)
+        settings = compiler_settings(compiler) + [
+            macros, include_dirs, debug, extra_preargs, extra_postargs]
+        missing = []
+        for source, obj in zip(sources, objects):
+            fingerprint = cache.source_fingerprint(source, all_include_dirs, settings)
+            if fingerprint is None or not cache.load_file(fingerprint, obj):
+                missing.append((source, obj, fingerprint))
+        if missing:
+            compile([source for source, obj, fingerprint in missing],
+                    output_dir=output_dir, macros=macros, include_dirs=include_dirs,
+                    debug=debug, extra_preargs=extra_preargs,
+                    extra_postargs=extra_postargs, depends=depends)
+            for source, obj, fingerprint in missing:
+                cache.store_file(fingerprint, obj)
+        return objects
+
+    def link_cached(target_desc, objects, output_filename, output_dir=None,
+                    libraries=None, library_dirs=None, runtime_library_dirs=None,
+                    export_symbols=None, debug=0, extra_preargs=None,
+                    extra_postargs=None, build_temp=None, target_lang=None):
+        if output_dir is not None:
+            output_file = os.path.join(output_dir, output_filename)
+        else:
+            output_file = output_filename
+        all_library_dirs = list(library_dirs or ()) + list(compiler.library_dirs)
+        library_files = []
+        for library in list(libraries or ()) + list(compiler.libraries):
+            library_file = compiler.find_library_file(all_library_dirs, library)
+            if library_file:
+                library_files.append(library_file)
+        settings = compiler_settings(compiler) + [
+            target_desc, os.path.basename(output_file), libraries, library_dirs,
+            compiler.libraries, compiler.library_dirs,
+            runtime_library_dirs, compiler.runtime_library_dirs,
+            compiler.objects, export_symbols, debug, extra_preargs,
+            extra_postargs, target_lang]
+        fingerprint = cache.link_fingerprint(
+            list(objects) + list(compiler.objects), library_files, settings)
+        if fingerprint is not None and cache.load_file(fingerprint, output_file):
+            return
+        link(target_desc, objects, output_filename, output_dir, libraries,
+             library_dirs, runtime_library_dirs, export_symbols, debug,
+             extra_preargs, extra_postargs, build_temp, target_lang)
+        cache.store_file(fingerprint, output_file)
+
+    compiler.compile = compile_cached
+    compiler.link = link_cached
@@ -0,0 +1,87 @@
+import os, shutil, tempfile
+
+from Cython.Build.Cache import Cache
+from Cython.Build.Dependencies import DependencyTree
+from Cython.Compiler.Main import CompilationOptions, default_options, compile
+from Cython.TestUtils import CythonTest
+
+class TestCache(CythonTest):
+
+    def setUp(self):
+        CythonTest.setUp(self)
+        self.temp_dir = tempfile.mkdtemp(prefix='cache_test_')
+        self.src_dir = os.path.join(self.temp_dir, 'src')
+        self.cache_dir = os.path.join(self.temp_dir, 'cache')
+        os.mkdir(self.src_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        CythonTest.tearDown(self)
+
+    def write(self, name, content):
+        path = os.path.join(self.src_dir, name)
+        f = open(path, 'w')
+        f.write(content)
+        f.close()
+        return path
+
+    def fingerprint(self, cache, filename, **kwds):
+        options = CompilationOptions(default_options, include_path=[self.src_dir], **kwds)
+        deps = DependencyTree(options.create_context())
+        return cache.transitive_fingerprint(deps, filename, options)
+
+    def test_fingerprint_dependencies(self):
+        cache = Cache(self.cache_dir)
+        self.write('a.pxd', 'cdef int x\n')
+        pyx = self.write('b.pyx', 'cimport a\ninclude "c.pxi"\n')
+        self.write('c.pxi', 'x = 1\n')
+        fingerprint = self.fingerprint(cache, pyx)
+        self.assertEqual(fingerprint, self.fingerprint(cache, pyx))
+        self.write('a.pxd', 'cdef long x\n')
+        fingerprint_pxd = self.fingerprint(cache, pyx)
+        self.assertNotEqual(fingerprint, fingerprint_pxd)
+        self.write('c.pxi', 'x = 2\n')
+        fingerprint_pxi = self.fingerprint(cache, pyx)
+        self.assertNotEqual(fingerprint_pxd, fingerprint_pxi)
+        self.assertNotEqual(fingerprint_pxi, self.fingerprint(cache, pyx, cplus=True))
+        self.assertNotEqual(fingerprint_pxi, self.fingerprint(
+                cache, pyx, compiler_directives={'boundscheck': False}))
+
+    def test_store_and_load(self):
+        cache = Cache(self.cache_dir)
+        c_file = self.write('a.c', 'int x;\n')
+        h_file = self.write('a.h', 'extern int x;\n')
+        self.assertEqual(None, cache.load_from_cache(c_file, 'f00'))
+        self.assert_(cache.store_to_cache('f00', [c_file, h_file]))
+        os.unlink(c_file)
+        os.unlink(h_file)
+        restored = cache.load_from_cache(c_file, 'f00')
+        restored.sort()
+        self.assertEqual([c_file, h_file], restored)
+        self.assertEqual('extern int x;\n', open(h_file).read())
+        self.assertEqual((1, 1, 1), (cache.hits, cache.misses, cache.stores))
+        cache.save_stats()
+        self.assertEqual(1, cache.load_stats()['hits'])
+        self.assertEqual(0, cache.hits)
+
+    def test_eviction(self):
+        cache = Cache(self.cache_dir, cache_size=1)
+        c_file = self.write('a.c', 'int x;\n')
+        cache.store_to_cache('f00', [c_file])
+        cache.store_to_cache('f01', [c_file])
+        cache.cleanup_cache()
+        self.assertEqual(2, cache.evictions)
+        self.assertEqual(None, cache.lookup_cache('f00'))
+
+    def test_compile(self):
+        pyx = self.write('mod.pyx', 'def f(x):\n    return x + 1\n')
+        c_file = pyx[:-4] + '.c'
+        result = compile(pyx, cache=self.cache_dir)
+        self.assertEqual(0, result.num_errors)
+        c_code = open(c_file).read()
+        os.unlink(c_file)
+        result = compile(pyx, cache=self.cache_dir)
+        self.assertEqual(0, result.num_errors)
+        self.assertEqual(c_code, open(c_file).read())
+        stats = Cache(self.cache_dir).load_stats()
+        self.assertEqual((1, 1, 1), (stats['hits'], stats['misses'], stats['stores']))
@@ -0,0 +1,118 @@
+import os, shutil, tempfile
+
+from Cython.Build import Dependencies
+from Cython.Build.Dependencies import DependencyTree
+from Cython.Compiler.Main import CompilationOptions, default_options
+from Cython.TestUtils import CythonTest
+
+class TestDependencyCache(CythonTest):
+
+    def setUp(self):
+        CythonTest.setUp(self)
+        self.temp_dir = tempfile.mkdtemp(prefix='dependency_test_')
+        self.cache_file = os.path.join(self.temp_dir, 'cache', 'dependencies.pickle')
+        self.parsed = []
+        self._parse_dependencies = Dependencies.parse_dependencies
+        def parse_dependencies(filename):
+            self.parsed.append(os.path.basename(filename))
+            return self._parse_dependencies(filename)
+        Dependencies.parse_dependencies = parse_dependencies
+
+    def tearDown(self):
+        Dependencies.parse_dependencies = self._parse_dependencies
+        shutil.rmtree(self.temp_dir)
+        CythonTest.tearDown(self)
+
+    def write(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        f = open(path, 'w')
+        f.write(content)
+        f.close()
+        return path
+
+    def tree(self, include_path=None):
+        if include_path is None:
+            include_path = [self.temp_dir]
+        options = CompilationOptions(default_options, include_path=include_path)
+        return DependencyTree(options.create_context(), self.cache_file)
+
+    def test_cached_scan(self):
+        a = self.write('a.pxd', '# distutils: libraries = m\ncimport b\n')
+        b = self.write('b.pxd', 'include "c.pxi"\n')
+        c = self.write('c.pxi', 'cdef extern from "d.h":\n    pass\n')
+        pyx = self.write('mod.pyx', 'cimport a\n')
+        deps = self.tree()
+        all = deps.all_dependencies(pyx)
+        self.assertEqual(['m'], deps.distutils_info(pyx).values['libraries'])
+        deps.save_cache()
+        self.assertEqual(4, len(self.parsed))
+
+        del self.parsed[:]
+        deps = self.tree()
+        self.assertEqual(all, deps.all_dependencies(pyx))
+        self.assertEqual(['m'], deps.distutils_info(pyx).values['libraries'])
+        self.assertEqual([], self.parsed)
+
+        self.write('b.pxd', 'include "c.pxi"\ncimport e\n')
+        os.utime(b, (0, 0))
+        e = self.write('e.pxd', '')
+        deps = self.tree()
+        self.assertEqual(all.union([e]), deps.all_dependencies(pyx))
+        self.parsed.sort()
+        self.assertEqual(['b.pxd', 'e.pxd'], self.parsed)
+
+    def test_new_file_changes_resolution(self):
+        inc = os.path.join(self.temp_dir, 'inc')
+        os.mkdir(inc)
+        inc_foo = self.write(os.path.join('inc', 'foo.pxd'), '')
+        pyx = self.write('mod.pyx', 'cimport foo\n')
+        include_path = [self.temp_dir, inc]
+        deps = self.tree(include_path)
+        self.assertEqual(set([pyx, inc_foo]), deps.all_dependencies(pyx))
+        deps.save_cache()
+
+        foo = self.write('foo.pxd', '')
+        deps = self.tree(include_path)
+        self.assertEqual(set([pyx, foo]), deps.all_dependencies(pyx))
+
+
+class TestDepfile(CythonTest):
+
+    def setUp(self):
+        CythonTest.setUp(self)
+        self.temp_dir = tempfile.mkdtemp(prefix='depfile_test_')
+        self.old_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.temp_dir)
+        CythonTest.tearDown(self)
+
+    def write(self, name, content):
+        f = open(name, 'w')
+        f.write(content)
+        f.close()
+
+    def test_depfile(self):
+        from Cython.Compiler.Main import compile
+        self.write('a.pxd', 'include "b.pxi"\n')
+        self.write('b.pxi', 'cdef extern from "c.h":\n    int c\n')
+        self.write('c.h', '')
+        self.write('my mod.pyx', 'cimport a\ncdef extern from "missing.h":\n    pass\n')
+        self.write('mod.pyx', 'cimport a\n')
+        result = compile('mod.pyx', include_path=['.'], depfile=True)
+        self.assertEqual(0, result.num_errors)
+        self.assertEqual('mod.c: mod.pyx \\\n  a.pxd \\\n  b.pxi \\\n  c.h\n',
+                         self.read('mod.c.dep'))
+
+        deps = DependencyTree(CompilationOptions(default_options, include_path=['.']).create_context())
+        Dependencies.write_depfile(deps, 'my mod.pyx', 'my mod.c')
+        self.assertEqual('my\\ mod.c: my\\ mod.pyx \\\n  a.pxd \\\n  b.pxi \\\n  c.h\n',
+                         self.read('my mod.c.dep'))
+
+    def read(self, name):
+        f = open(name)
+        content = f.read()
+        f.close()
+        return content
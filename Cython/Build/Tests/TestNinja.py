@@ -0,0 +1,53 @@
+from StringIO import StringIO
+import unittest
+
+from distutils.extension import Extension
+
+from Cython.Build.Ninja import NinjaWriter, ninja_escape, command_line
+
+config = {
+    'cc': ['gcc'],
+    'cxx': ['g++'],
+    'cflags': ['-O2', '-fPIC'],
+    'ldshared': ['gcc', '-shared'],
+    'ldshared_cxx': ['g++', '-shared'],
+    'python_include': '/usr/include/python',
+    'so_ext': '.so',
+    }
+
+class TestNinja(unittest.TestCase):
+
+    def write(self, *module_list):
+        f = StringIO()
+        writer = NinjaWriter(f, build_dir='build', python='python', config=config)
+        writer.write_header()
+        for ext in module_list:
+            writer.write_extension(ext)
+        writer.write_footer()
+        return f.getvalue()
+
+    def test_escape(self):
+        self.assertEqual('a$ b$:c$$d', ninja_escape('a b:c$d'))
+        self.assertEqual("-DA=1 '-DB=a b' '$$HOME'", command_line(['-DA=1', '-DB=a b', '$HOME']))
+
+    def test_extension(self):
+        ninja = self.write(Extension('pkg.mod', ['pkg/mod.pyx', 'pkg/helper.c'],
+                                     define_macros=[('A', '1'), ('B', None)],
+                                     include_dirs=['inc'], libraries=['m']))
+        self.assertTrue('cflags = -O2 -fPIC -I/usr/include/python\n' in ninja)
+        self.assertTrue('build pkg/mod.c: cython pkg/mod.pyx\n' in ninja)
+        self.assertTrue('build build/temp/pkg/mod.c.o: cc pkg/mod.c\n'
+                        '  extra_flags = -DA=1 -DB -Iinc\n' in ninja)
+        self.assertTrue('build build/temp/pkg/helper.c.o: cc pkg/helper.c\n' in ninja)
+        self.assertTrue('build pkg/mod.so: link build/temp/pkg/mod.c.o build/temp/pkg/helper.c.o\n'
+                        '  extra_flags = -lm\n' in ninja)
+        self.assertTrue(ninja.endswith('build all: phony pkg/mod.so\ndefault all\n'))
+
+    def test_cplus(self):
+        ninja = self.write(Extension('mod', ['mod.pyx'], language='c++'))
+        self.assertTrue('build mod.cpp: cython mod.pyx\n  extra_flags = --cplus\n' in ninja)
+        self.assertTrue('build build/temp/mod.cpp.o: cxx mod.cpp\n' in ninja)
+        self.assertTrue('build mod.so: link_cxx build/temp/mod.cpp.o\n' in ninja)
+
+if __name__ == '__main__':
+    unittest.main()
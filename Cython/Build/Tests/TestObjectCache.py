@@ -0,0 +1,103 @@
+import os, shutil, tempfile, unittest
+
+from distutils.ccompiler import CCompiler
+
+from Cython.Build.ObjectCache import ObjectCache, cache_compiler_output
+
+class FakeCompiler(CCompiler):
+    # "Compiles" by copying the source, "links" by concatenating objects.
+
+    compiler_type = 'fake'
+    src_extensions = ['.c']
+    obj_extension = '.o'
+    shared_lib_extension = '.so'
+    static_lib_extension = '.a'
+    shared_lib_format = static_lib_format = 'lib%s%s'
+    executables = {'compiler_so': ['fakecc']}
+
+    def __init__(self):
+        CCompiler.__init__(self)
+        self.compiled = []
+        self.linked = []
+
+    def compile(self, sources, output_dir=None, **kwds):
+        objects = self.object_filenames(sources, output_dir=output_dir)
+        for source, obj in zip(sources, objects):
+            self.compiled.append(os.path.basename(source))
+            copy(source, obj)
+        return objects
+
+    def link(self, target_desc, objects, output_filename, output_dir=None, *args):
+        self.linked.append(output_filename)
+        f = open(os.path.join(output_dir, output_filename), 'w')
+        for obj in objects:
+            f.write(open(obj).read())
+        f.close()
+
+def copy(source, target):
+    if not os.path.exists(os.path.dirname(target)):
+        os.makedirs(os.path.dirname(target))
+    shutil.copyfile(source, target)
+
+
+class TestObjectCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix='object_cache_test_')
+        self.cache_dir = os.path.join(self.temp_dir, 'cache')
+        self.include_dir = os.path.join(self.temp_dir, 'include')
+        os.mkdir(self.include_dir)
+        self.write('include/header.h', '#include "nested.h"\n#include <stdio.h>\n')
+        self.write('include/nested.h', 'int x;\n')
+        self.write('a.c', '#include "header.h"\nint a;\n')
+        self.write('b.c', 'int b;\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, content):
+        f = open(os.path.join(self.temp_dir, name), 'w')
+        f.write(content)
+        f.close()
+
+    def build(self, **kwds):
+        compiler = FakeCompiler()
+        cache = ObjectCache(self.cache_dir)
+        cache_compiler_output(compiler, cache)
+        sources = [os.path.join(self.temp_dir, name) for name in ('a.c', 'b.c')]
+        build_dir = os.path.join(self.temp_dir, 'build')
+        objects = compiler.compile(sources, output_dir=build_dir,
+                                   include_dirs=[self.include_dir], **kwds)
+        compiler.link_shared_object(objects, 'ext.so', output_dir=self.temp_dir)
+        f = open(os.path.join(self.temp_dir, 'ext.so'))
+        self.assertEqual('#include "header.h"\nint a;\nint b;\n', f.read())
+        f.close()
+        return compiler, cache
+
+    def test_cached(self):
+        compiler, cache = self.build()
+        self.assertEqual(['a.c', 'b.c'], compiler.compiled)
+        self.assertEqual(['ext.so'], compiler.linked)
+        self.assertEqual(3, cache.stores)
+
+        os.unlink(os.path.join(self.temp_dir, 'ext.so'))
+        shutil.rmtree(os.path.join(self.temp_dir, 'build'))
+        compiler, cache = self.build()
+        self.assertEqual([], compiler.compiled)
+        self.assertEqual([], compiler.linked)
+        self.assertEqual(3, cache.hits)
+
+    def test_header_changed(self):
+        self.build()
+        self.write('include/nested.h', 'int y;\n')
+        compiler, cache = self.build()
+        self.assertEqual(['a.c'], compiler.compiled)
+        self.assertEqual([], compiler.linked)
+
+    def test_command_line_changed(self):
+        self.build()
+        compiler, cache = self.build(macros=[('NDEBUG', None)])
+        self.assertEqual(['a.c', 'b.c'], compiler.compiled)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os, shutil, tempfile, threading, time, unittest
+
+from distutils.dist import Distribution
+from distutils.errors import CompileError
+from distutils.extension import Extension
+
+from Cython.Build.Tests.TestObjectCache import FakeCompiler
+from Cython.Distutils import build_ext
+
+class SlowCompiler(FakeCompiler):
+    # Records how many sources it compiles at the same time.
+
+    def __init__(self):
+        FakeCompiler.__init__(self)
+        self.lock = threading.Lock()
+        self.running = self.max_running = 0
+
+    def compile(self, sources, output_dir=None, **kwds):
+        self.lock.acquire()
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.lock.release()
+        try:
+            time.sleep(0.2)
+            for source in sources:
+                if 'broken' in source:
+                    raise CompileError(source)
+            return FakeCompiler.compile(self, sources, output_dir=output_dir, **kwds)
+        finally:
+            self.lock.acquire()
+            self.running -= 1
+            self.lock.release()
+
+
+class TestParallelBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix='parallel_build_test_')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def build(self, extensions):
+        for ext in extensions:
+            for name in ext.sources:
+                f = open(name, 'w')
+                f.write('/* %s */\n' % os.path.basename(name))
+                f.close()
+        command = build_ext(Distribution())
+        command.initialize_options()
+        command.build_temp = os.path.join(self.temp_dir, 'build')
+        command.build_lib = self.temp_dir
+        command.parallel = 4
+        command.finalize_options()
+        command.compiler = SlowCompiler()
+        command.extensions = extensions
+        try:
+            command.build_extensions_parallel()
+        finally:
+            self.compiler = command.compiler
+
+    def sources(self, *names):
+        return [os.path.join(self.temp_dir, name + '.c') for name in names]
+
+    def test_sources_of_one_extension(self):
+        self.build([Extension('ext', self.sources('a', 'b', 'c'))])
+        self.assertEqual(3, self.compiler.max_running)
+        self.assertEqual(['ext.so'], [os.path.basename(name) for name in self.compiler.linked])
+        f = open(os.path.join(self.temp_dir, 'ext.so'))
+        self.assertEqual('/* a.c */\n/* b.c */\n/* c.c */\n', f.read())
+        f.close()
+
+    def test_failed_source(self):
+        extensions = [Extension('bad', self.sources('a', 'broken')),
+                      Extension('good', self.sources('b', 'c'))]
+        self.assertRaises(CompileError, self.build, extensions)
+        self.assertEqual(['good.so'], [os.path.basename(name) for name in self.compiler.linked])
+        compiled = self.compiler.compiled[:]
+        compiled.sort()
+        self.assertEqual(['a.c', 'b.c', 'c.c'], compiled)
+
+if __name__ == '__main__':
+    unittest.main()
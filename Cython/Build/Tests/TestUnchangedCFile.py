@@ -0,0 +1,53 @@
+import os, shutil, tempfile, time, unittest
+
+from distutils.dist import Distribution
+from distutils.extension import Extension
+
+from Cython.Build.Dependencies import cythonize
+from Cython.Distutils import build_ext
+from Cython.Utils import stamp_file_path
+
+class TestUnchangedCFile(unittest.TestCase):
+    # Running Cython again without changing the C file must not change
+    # its modification time, but must still mark it as up to date.
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix='unchanged_c_file_test_')
+        self.pyx_file = os.path.join(self.temp_dir, 'a.pyx')
+        self.c_file = os.path.join(self.temp_dir, 'a.c')
+        f = open(self.pyx_file, 'w')
+        f.write('x = 1\n')
+        f.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def check_regeneration(self, run_cython):
+        run_cython()
+        os.utime(self.c_file, (1000, 1000))
+        os.utime(self.pyx_file, (2000, 2000))
+        run_cython()
+        self.assertEqual(1000, os.path.getmtime(self.c_file))
+        stamp = stamp_file_path(self.c_file)
+        self.assert_(os.path.getmtime(stamp) > 2000)
+        stamp_time = int(time.time()) + 1000
+        os.utime(stamp, (stamp_time, stamp_time))
+        run_cython()
+        self.assertEqual(stamp_time, os.path.getmtime(stamp))
+
+    def test_build_ext(self):
+        def run_cython():
+            command = build_ext(Distribution())
+            command.initialize_options()
+            command.inplace = 1
+            command.finalize_options()
+            command.cython_sources([self.pyx_file], Extension('a', [self.pyx_file]))
+        self.check_regeneration(run_cython)
+
+    def test_cythonize(self):
+        def run_cython():
+            cythonize([Extension('a', [self.pyx_file])], quiet=True)
+        self.check_regeneration(run_cython)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -333,7 +333,8 @@ def put_assign_to_buffer(lhs_cname, rhs_cname, buffer_aux, buffer_type,
 
     code.putln("}") # Release stack
 
-def put_buffer_lookup_code(entry, index_signeds, index_cnames, directives, pos, code):
+def put_buffer_lookup_code(entry, index_signeds, index_cnames, directives, pos, code,
+                           in_bounds=None):
     """
     Generates code to process indices and calculate an offset into
     a buffer. Returns a C string which gives a pointer which can be
@@ -345,25 +346,52 @@ def put_buffer_lookup_code(entry, index_signeds, index_cnames, directives, pos,
     body. The lookup however is delegated to a inline function that is instantiated
     once per ndim (lookup with suboffsets tend to get quite complicated).
 
+    Indices that are known to be within bounds can be passed as in_bounds
+    to skip their checks, and known non-negative indices as unsigned.
     """
     bufaux = entry.buffer_aux
     bufstruct = bufaux.buffer_info_var.cname
     negative_indices = directives['wraparound'] and entry.type.negative_indices
 
-    if directives['boundscheck']:
+    put_bounds_check_code(index_signeds, index_cnames,
+                          [shape.cname for shape in bufaux.shapevars],
+                          directives['boundscheck'], negative_indices, pos, code,
+                          in_bounds=in_bounds)
+
+    if entry.type.mode == 'full':
+        suboffset_cnames = [o.cname for o in bufaux.suboffsetvars]
+    else:
+        suboffset_cnames = None
+    return get_buffer_lookup_code(entry.type.mode, entry.type.buffer_ptr_type,
+                                  "%s.buf" % bufstruct, index_cnames,
+                                  [s.cname for s in bufaux.stridevars],
+                                  suboffset_cnames, code)
+
+def put_bounds_check_code(index_signeds, index_cnames, shape_cnames,
+                          boundscheck, negative_indices, pos, code, nogil=False,
+                          in_bounds=None):
+    """
+    Generates code to wrap around negative indices and to check the
+    indices against the shape.  The index temps are modified in place.
+    With nogil, the IndexError is raised after acquiring the GIL.
+    Indices flagged in in_bounds are known to be valid and not checked.
+    """
+    checks = [(dim, signed, cname, shape) for dim, (signed, cname, shape)
+              in enumerate(zip(index_signeds, index_cnames, shape_cnames))
+              if not (in_bounds and in_bounds[dim])]
+    if boundscheck and checks:
         # Check bounds and fix negative indices.
         # We allocate a temporary which is initialized to -1, meaning OK (!).
         # If an error occurs, the temp is set to the dimension index the
         # error is occuring at.
         tmp_cname = code.funcstate.allocate_temp(PyrexTypes.c_int_type, manage_ref=False)
         code.putln("%s = -1;" % tmp_cname)
-        for dim, (signed, cname, shape) in enumerate(zip(index_signeds, index_cnames,
-                                                         bufaux.shapevars)):
+        for dim, signed, cname, shape in checks:
             if signed != 0:
                 # not unsigned, deal with negative index
                 code.putln("if (%s < 0) {" % cname)
                 if negative_indices:
-                    code.putln("%s += %s;" % (cname, shape.cname))
+                    code.putln("%s += %s;" % (cname, shape))
                     code.putln("if (%s) %s = %d;" % (
                         code.unlikely("%s < 0" % cname), tmp_cname, dim))
                 else:
@@ -375,32 +403,42 @@ def put_buffer_lookup_code(entry, index_signeds, index_cnames, directives, pos,
             else:
                 cast = "(size_t)"
             code.putln("if (%s) %s = %d;" % (
-                code.unlikely("%s >= %s%s" % (cname, cast, shape.cname)),
+                code.unlikely("%s >= %s%s" % (cname, cast, shape)),
                 tmp_cname, dim))
-        code.globalstate.use_utility_code(raise_indexerror_code)
+        if nogil:
+            code.globalstate.use_utility_code(raise_indexerror_nogil_code)
+            raise_function = '__Pyx_RaiseBufferIndexErrorNogil'
+        else:
+            code.globalstate.use_utility_code(raise_indexerror_code)
+            raise_function = '__Pyx_RaiseBufferIndexError'
         code.putln("if (%s) {" % code.unlikely("%s != -1" % tmp_cname))
-        code.putln('__Pyx_RaiseBufferIndexError(%s);' % tmp_cname)
+        code.putln('%s(%s);' % (raise_function, tmp_cname))
         code.putln(code.error_goto(pos))
         code.putln('}')
         code.funcstate.release_temp(tmp_cname)
     elif negative_indices:
         # Only fix negative indices.
-        for signed, cname, shape in zip(index_signeds, index_cnames,
-                                        bufaux.shapevars):
+        for dim, signed, cname, shape in checks:
             if signed != 0:
-                code.putln("if (%s < 0) %s += %s;" % (cname, cname, shape.cname))
+                code.putln("if (%s < 0) %s += %s;" % (cname, cname, shape))
 
+def get_buffer_lookup_code(mode, ptr_type, buf_code, index_cnames,
+                           stride_cnames, suboffset_cnames, code):
+    """
+    Returns a C expression for the pointer to the item at the given
+    indices, for a buffer of the given access mode ('full', 'strided',
+    'c' or 'fortran') whose data starts at buf_code.
+    """
     # Create buffer lookup and return it
     # This is done via utility macros/inline functions, which vary
     # according to the access mode used.
     params = []
-    nd = entry.type.ndim
-    mode = entry.type.mode
+    nd = len(index_cnames)
     if mode == 'full':
-        for i, s, o in zip(index_cnames, bufaux.stridevars, bufaux.suboffsetvars):
+        for i, s, o in zip(index_cnames, stride_cnames, suboffset_cnames):
             params.append(i)
-            params.append(s.cname)
-            params.append(o.cname)
+            params.append(s)
+            params.append(o)
         funcname = "__Pyx_BufPtrFull%dd" % nd
         funcgen = buf_lookup_full_code
     else:
@@ -415,9 +453,9 @@ def put_buffer_lookup_code(entry, index_signeds, index_cnames, directives, pos,
             funcgen = buf_lookup_fortran_code
         else:
             assert False
-        for i, s in zip(index_cnames, bufaux.stridevars):
+        for i, s in zip(index_cnames, stride_cnames):
             params.append(i)
-            params.append(s.cname)
+            params.append(s)
 
     # Make sure the utility code is available
     if funcname not in code.globalstate.utility_codes:
@@ -426,11 +464,10 @@ def put_buffer_lookup_code(entry, index_signeds, index_cnames, directives, pos,
         defcode = code.globalstate['utility_code_def']
         funcgen(protocode, defcode, name=funcname, nd=nd)
 
-    ptr_type = entry.type.buffer_ptr_type
-    ptrcode = "%s(%s, %s.buf, %s)" % (funcname,
-                                      ptr_type.declaration_code(""),
-                                      bufstruct,
-                                      ", ".join(params))
+    ptrcode = "%s(%s, %s, %s)" % (funcname,
+                                  ptr_type.declaration_code(""),
+                                  buf_code,
+                                  ", ".join(params))
     return ptrcode
 
 
@@ -501,6 +538,12 @@ def use_py2_buffer_functions(env):
     # Emulation of PyObject_GetBuffer and PyBuffer_Release for Python 2.
     # For >= 2.6 we do double mode -- use the new buffer interface on objects
     # which has the right tp_flags set, but emulation otherwise.
+    # Buffers and memoryview slices share the functions, so they are
+    # only generated once per module.
+    env = env.global_scope()
+    if env.py2_buffer_functions_used:
+        return
+    env.py2_buffer_functions_used = 1
 
     # Search all types for __getbuffer__ overloads
     types = []
@@ -547,6 +590,12 @@ def use_py2_buffer_functions(env):
 
         static void __Pyx_ReleaseBuffer(Py_buffer *view) {
           PyObject* obj = view->obj;
+          #if PY_VERSION_HEX >= 0x02060000
+          if (obj && (Py_TYPE(obj)->tp_flags & Py_TPFLAGS_HAVE_NEWBUFFER)) {
+              PyBuffer_Release(view);
+              return;
+          }
+          #endif
           if (obj) {
     """)
     if len(types) > 0:
@@ -677,6 +726,23 @@ static void __Pyx_RaiseBufferIndexError(int axis) {
 
 """)
 
+raise_indexerror_nogil_code = UtilityCode(
+proto = """\
+static void __Pyx_RaiseBufferIndexErrorNogil(int axis); /*proto*/
+""",
+impl = """\
+static void __Pyx_RaiseBufferIndexErrorNogil(int axis) {
+  #ifdef WITH_THREAD
+  PyGILState_STATE gilstate = PyGILState_Ensure();
+  #endif
+  __Pyx_RaiseBufferIndexError(axis);
+  #ifdef WITH_THREAD
+  PyGILState_Release(gilstate);
+  #endif
+}
+
+""", requires=[raise_indexerror_code])
+
 parse_typestring_repeat_code = UtilityCode(
 proto = """
 """,
@@ -706,15 +772,21 @@ static void __Pyx_RaiseBufferFallbackError(void) {
 # exporter.
 #
 # The alignment code is copied from _struct.c in Python.
-acquire_utility_code = UtilityCode(proto="""
+buffer_format_check_code = UtilityCode(proto="""
 /* Run-time type information about structs used with buffers */
 struct __Pyx_StructField_;
 
+#define __Pyx_BUFFMT_CACHE_SIZE 4
+#define __Pyx_BUFFMT_CACHE_MAXLEN 32
+
 typedef struct {
   const char* name; /* for error messages only */
   struct __Pyx_StructField_* fields;
   size_t size;     /* sizeof(type) */
   char typegroup; /* _R_eal, _C_omplex, Signed _I_nt, _U_nsigned int, _S_truct, _P_ointer, _O_bject */
+  /* format strings already found to match this type, filled at run-time */
+  int num_valid_formats;
+  char valid_formats[__Pyx_BUFFMT_CACHE_SIZE][__Pyx_BUFFMT_CACHE_MAXLEN];
 } __Pyx_TypeInfo;
 
 typedef struct __Pyx_StructField_ {
@@ -728,15 +800,6 @@ typedef struct {
   size_t parent_offset;
 } __Pyx_BufFmt_StackElem;
 
-
-static CYTHON_INLINE int  __Pyx_GetBufferAndValidate(Py_buffer* buf, PyObject* obj, __Pyx_TypeInfo* dtype, int flags, int nd, int cast, __Pyx_BufFmt_StackElem* stack);
-static CYTHON_INLINE void __Pyx_SafeReleaseBuffer(Py_buffer* info);
-""", impl="""
-static CYTHON_INLINE int __Pyx_IsLittleEndian(void) {
-  unsigned int n = 1;
-  return *(unsigned char*)(&n) != 0;
-}
-
 typedef struct {
   __Pyx_StructField root;
   __Pyx_BufFmt_StackElem* head;
@@ -747,6 +810,18 @@ typedef struct {
   char packmode;
 } __Pyx_BufFmt_Context;
 
+static void __Pyx_BufFmt_Init(__Pyx_BufFmt_Context* ctx,
+                              __Pyx_BufFmt_StackElem* stack,
+                              __Pyx_TypeInfo* type); /*proto*/
+static const char* __Pyx_BufFmt_CheckString(__Pyx_BufFmt_Context* ctx, const char* ts); /*proto*/
+static int __Pyx_BufFmt_CheckCachedString(__Pyx_BufFmt_StackElem* stack,
+                                          __Pyx_TypeInfo* type, const char* ts); /*proto*/
+""", impl="""
+static CYTHON_INLINE int __Pyx_IsLittleEndian(void) {
+  unsigned int n = 1;
+  return *(unsigned char*)(&n) != 0;
+}
+
 static void __Pyx_BufFmt_Init(__Pyx_BufFmt_Context* ctx,
                               __Pyx_BufFmt_StackElem* stack,
                               __Pyx_TypeInfo* type) {
@@ -1129,6 +1204,32 @@ static const char* __Pyx_BufFmt_CheckString(__Pyx_BufFmt_Context* ctx, const cha
   }
 }
 
+/* Validates a format string against a type like __Pyx_BufFmt_CheckString,
+   but remembers short format strings that matched in the type info, so
+   that acquiring buffers of the same format again skips the parsing. */
+static int __Pyx_BufFmt_CheckCachedString(__Pyx_BufFmt_StackElem* stack,
+                                          __Pyx_TypeInfo* type, const char* ts) {
+  __Pyx_BufFmt_Context ctx;
+  size_t len;
+  int i;
+  for (i = 0; i < type->num_valid_formats; i++) {
+    if (strcmp(type->valid_formats[i], ts) == 0) return 0;
+  }
+  __Pyx_BufFmt_Init(&ctx, stack, type);
+  if (!__Pyx_BufFmt_CheckString(&ctx, ts)) return -1;
+  len = strlen(ts);
+  if (type->num_valid_formats < __Pyx_BUFFMT_CACHE_SIZE && len < __Pyx_BUFFMT_CACHE_MAXLEN) {
+    memcpy(type->valid_formats[type->num_valid_formats], ts, len + 1);
+    type->num_valid_formats++;
+  }
+  return 0;
+}
+""")
+
+acquire_utility_code = UtilityCode(proto="""
+static CYTHON_INLINE int  __Pyx_GetBufferAndValidate(Py_buffer* buf, PyObject* obj, __Pyx_TypeInfo* dtype, int flags, int nd, int cast, __Pyx_BufFmt_StackElem* stack);
+static CYTHON_INLINE void __Pyx_SafeReleaseBuffer(Py_buffer* info);
+""", impl="""
 static CYTHON_INLINE void __Pyx_ZeroBuffer(Py_buffer* buf) {
   buf->buf = NULL;
   buf->obj = NULL;
@@ -1151,9 +1252,7 @@ static CYTHON_INLINE int __Pyx_GetBufferAndValidate(Py_buffer* buf, PyObject* ob
     goto fail;
   }
   if (!cast) {
-    __Pyx_BufFmt_Context ctx;
-    __Pyx_BufFmt_Init(&ctx, stack, dtype);
-    if (!__Pyx_BufFmt_CheckString(&ctx, buf->format)) goto fail;
+    if (__Pyx_BufFmt_CheckCachedString(stack, dtype, buf->format) < 0) goto fail;
   }
   if ((unsigned)buf->itemsize != dtype->size) {
     PyErr_Format(PyExc_ValueError,
@@ -1175,5 +1274,27 @@ static CYTHON_INLINE void __Pyx_SafeReleaseBuffer(Py_buffer* info) {
   if (info->suboffsets == __Pyx_minusones) info->suboffsets = NULL;
   __Pyx_ReleaseBuffer(info);
 }
-""")
+""", requires=[buffer_format_check_code])
 
+dtype_match_utility_code = UtilityCode(proto="""
+static int __Pyx_BufferDtypeMatches(PyObject *obj, __Pyx_TypeInfo *dtype, int ndim, __Pyx_BufFmt_StackElem *stack); /*proto*/
+""", impl="""
+/* Used by fused functions to find the specialisation for a buffer argument. */
+static int __Pyx_BufferDtypeMatches(PyObject *obj, __Pyx_TypeInfo *dtype, int ndim, __Pyx_BufFmt_StackElem *stack) {
+  Py_buffer buf;
+  int matches;
+  if (obj == Py_None)
+    return 1;
+  if (__Pyx_GetBuffer(obj, &buf, PyBUF_FORMAT | PyBUF_STRIDES) == -1) {
+    PyErr_Clear();
+    return 0;
+  }
+  matches = (buf.ndim == ndim &&
+             (unsigned)buf.itemsize == dtype->size &&
+             __Pyx_BufFmt_CheckCachedString(stack, dtype, buf.format) == 0);
+  __Pyx_ReleaseBuffer(&buf);
+  if (!matches)
+    PyErr_Clear();
+  return matches;
+}
+""", requires=[buffer_format_check_code])
@@ -38,6 +38,11 @@ Options:
   -2                             Compile based on Python-2 syntax and code semantics.
   -3                             Compile based on Python-3 syntax and code semantics.
   --fast-fail                    Abort the compilation on the first error
+  --cache <directory>            Reuse generated C files from a compilation cache
+  --cache-size <bytes>           Maximum size of the compilation cache
+  --pxd-cache <directory>        Store analysed .pxd files for reuse by later compilations
+  --profile-pipeline <file>      Append the time spent in each compiler phase to a JSON file
+  -M, --depfile                  Write a gcc style depfile (<c file>.dep) for make and ninja
   -X, --directive <name>=<value>[,<name=value,...] Overrides a compiler directive
 """
 
@@ -125,13 +130,24 @@ def parse_command_line(args):
                 options.language_level = 3
             elif option == "--fast-fail":
                 Options.fast_fail = True
+            elif option == "--cache":
+                options.cache = pop_arg()
+            elif option == "--cache-size":
+                options.cache_size = int(pop_arg())
+            elif option == "--pxd-cache":
+                from PxdCache import PxdCache
+                options.pxd_cache = PxdCache(pop_arg())
+            elif option in ("-M", "--depfile"):
+                options.depfile = True
+            elif option == "--profile-pipeline":
+                options.profile_pipeline = os.path.abspath(pop_arg())
             elif option == "--disable-function-redefinition":
                 Options.disable_function_redefinition = True
             elif option in ("-X", "--directive"):
                 try:
                     options.compiler_directives = Options.parse_directive_list(
                         pop_arg(), relaxed_bool=True,
-                        current_settings=options.compiler_directives)
+                        current_settings=dict(options.compiler_directives))
                 except ValueError, e:
                     sys.stderr.write("Error in compiler directive: %s\n" % e.args[0])
                     sys.exit(1)
@@ -28,11 +28,14 @@ cdef class FunctionState:
 
     cdef public bint in_try_finally
     cdef public object exc_vars
+    cdef public object closure_temps
+    cdef public list yield_labels
 
     cdef public list temps_allocated
     cdef public dict temps_free
     cdef public dict temps_used_type
     cdef public size_t temp_counter
+    cdef public list collect_temps_stack
 
     @cython.locals(n=size_t)
     cpdef new_label(self, name=*)
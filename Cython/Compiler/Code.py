@@ -96,6 +96,9 @@ class FunctionState(object):
     # label_counter    integer         counter for naming labels
     # in_try_finally   boolean         inside try of try...finally
     # exc_vars         (string * 3)    exception variables for reraise, or None
+    # closure_temps    ClosureTempAllocator or None  closure fields that keep
+    #                                  temps alive across yields of a generator
+    # yield_labels     [(integer, string)]  resume points of a generator
 
     # Not used for now, perhaps later
     def __init__(self, owner, names_taken=cython.set()):
@@ -112,11 +115,14 @@ class FunctionState(object):
 
         self.in_try_finally = 0
         self.exc_vars = None
+        self.closure_temps = None
+        self.yield_labels = []
 
         self.temps_allocated = [] # of (name, type, manage_ref)
         self.temps_free = {} # (type, manage_ref) -> list of free vars with same type/managed status
         self.temps_used_type = {} # name -> (type, manage_ref)
         self.temp_counter = 0
+        self.collect_temps_stack = []
 
     # labels
 
@@ -173,6 +179,12 @@ class FunctionState(object):
         self.set_all_labels(new_labels)
         return old_labels
 
+    def new_yield_label(self):
+        label = self.new_label('resume_from_yield')
+        num_and_label = (len(self.yield_labels) + 1, label)
+        self.yield_labels.append(num_and_label)
+        return num_and_label
+
     def use_label(self, lbl):
         self.labels_used.add(lbl)
 
@@ -192,13 +204,15 @@ class FunctionState(object):
         handling clauses. Otherwise the caller has to deal with any reference
         counting of the variable.
 
-        If not type.is_pyobject, then manage_ref will be ignored, but it
+        Memoryview slices are reference counted like Python objects.
+
+        Otherwise, manage_ref will be ignored, but it
         still has to be passed. It is recommended to pass False by convention
         if it is known that type will never be a Python object.
 
         A C string referring to the variable is returned.
         """
-        if not type.is_pyobject:
+        if not type.is_pyobject and not type.is_memoryviewslice:
             # Make manage_ref canonical, so that manage_ref will always mean
             # a decref is needed.
             manage_ref = False
@@ -212,6 +226,8 @@ class FunctionState(object):
                 if not result in self.names_taken: break
             self.temps_allocated.append((result, type, manage_ref))
         self.temps_used_type[result] = (type, manage_ref)
+        if self.collect_temps_stack:
+            self.collect_temps_stack[-1].add(result)
         if DebugFlags.debug_temp_code_comments:
             self.owner.putln("/* %s allocated */" % result)
         return result
@@ -270,6 +286,55 @@ class FunctionState(object):
                 if manage_ref
                 for cname in freelist]
 
+    def start_collecting_temps(self):
+        """
+        Starts collecting the names of all temps that are allocated, until
+        the matching stop_collecting_temps().  This is used by parallel
+        loops, whose temps must be private to each thread.
+        """
+        self.collect_temps_stack.append(cython.set())
+
+    def stop_collecting_temps(self):
+        """
+        Returns the set of temp names allocated since the matching
+        start_collecting_temps().  They also count as allocated by an
+        enclosing collection.
+        """
+        collected = self.collect_temps_stack.pop()
+        if self.collect_temps_stack:
+            self.collect_temps_stack[-1].update(collected)
+        return collected
+
+
+class ClosureTempAllocator(object):
+    """
+    Allocates fields of a generator's closure class that keep the
+    values of temps alive while the generator is suspended.  Fields
+    are reused between yields, but never while a generator holds
+    them.
+    """
+    def __init__(self, klass):
+        self.klass = klass
+        self.temps_allocated = {}
+        self.temps_free = {}
+        self.temps_count = 0
+
+    def reset(self):
+        for type, cnames in self.temps_allocated.items():
+            self.temps_free[type] = list(cnames)
+
+    def allocate_temp(self, type):
+        if not type in self.temps_allocated:
+            self.temps_allocated[type] = []
+            self.temps_free[type] = []
+        elif self.temps_free[type]:
+            return self.temps_free[type].pop(0)
+        cname = '%s%d' % (Naming.codewriter_temp_prefix, self.temps_count)
+        self.klass.declare_var(pos=None, name=cname, cname=cname, type=type, is_cdef=True)
+        self.temps_allocated[type].append(cname)
+        self.temps_count += 1
+        return cname
+
 
 class IntConst(object):
     """Global info about a Python integer constant held by GlobalState.
@@ -1133,6 +1198,8 @@ class CCodeWriter(object):
             dll_linkage = dll_linkage))
         if entry.init is not None:
             self.put_safe(" = %s" % entry.type.literal_code(entry.init))
+        elif entry.type.is_memoryviewslice:
+            self.put(" = __Pyx_MEMVIEWSLICE_INIT")
         self.putln(";")
 
     def put_temp_declarations(self, func_context):
@@ -1140,6 +1207,8 @@ class CCodeWriter(object):
             decl = type.declaration_code(name)
             if type.is_pyobject:
                 self.putln("%s = NULL;" % decl)
+            elif type.is_memoryviewslice:
+                self.putln("%s = __Pyx_MEMVIEWSLICE_INIT;" % decl)
             else:
                 self.putln("%s;" % decl)
 
@@ -1180,13 +1249,17 @@ class CCodeWriter(object):
         self.putln("__Pyx_XGOTREF(%s);" % cname)
 
     def put_incref(self, cname, type, nanny=True):
-        if nanny:
+        if type.is_memoryviewslice:
+            self.put_incref_memoryviewslice(cname)
+        elif nanny:
             self.putln("__Pyx_INCREF(%s);" % self.as_pyobject(cname, type))
         else:
             self.putln("Py_INCREF(%s);" % self.as_pyobject(cname, type))
 
     def put_decref(self, cname, type, nanny=True):
-        if nanny:
+        if type.is_memoryviewslice:
+            self.put_xdecref_memoryviewslice(cname)
+        elif nanny:
             self.putln("__Pyx_DECREF(%s);" % self.as_pyobject(cname, type))
         else:
             self.putln("Py_DECREF(%s);" % self.as_pyobject(cname, type))
@@ -1208,12 +1281,16 @@ class CCodeWriter(object):
             self.putln("__Pyx_XGIVEREF(%s);" % self.entry_as_pyobject(entry))
 
     def put_var_incref(self, entry):
-        if entry.type.is_pyobject:
+        if entry.type.is_memoryviewslice:
+            self.put_incref_memoryviewslice(entry.cname)
+        elif entry.type.is_pyobject:
             self.putln("__Pyx_INCREF(%s);" % self.entry_as_pyobject(entry))
 
     def put_decref_clear(self, cname, type, nanny=True):
         from PyrexTypes import py_object_type, typecast
-        if nanny:
+        if type.is_memoryviewslice:
+            self.put_xdecref_memoryviewslice(cname, clear=True)
+        elif nanny:
             self.putln("__Pyx_DECREF(%s); %s = 0;" % (
                 typecast(py_object_type, type, cname), cname))
         else:
@@ -1221,13 +1298,17 @@ class CCodeWriter(object):
                 typecast(py_object_type, type, cname), cname))
 
     def put_xdecref(self, cname, type, nanny=True):
-        if nanny:
+        if type.is_memoryviewslice:
+            self.put_xdecref_memoryviewslice(cname)
+        elif nanny:
             self.putln("__Pyx_XDECREF(%s);" % self.as_pyobject(cname, type))
         else:
             self.putln("Py_XDECREF(%s);" % self.as_pyobject(cname, type))
 
     def put_xdecref_clear(self, cname, type, nanny=True):
-        if nanny:
+        if type.is_memoryviewslice:
+            self.put_xdecref_memoryviewslice(cname, clear=True)
+        elif nanny:
             self.putln("__Pyx_XDECREF(%s); %s = 0;" % (
                 self.as_pyobject(cname, type), cname))
         else:
@@ -1235,26 +1316,44 @@ class CCodeWriter(object):
                 self.as_pyobject(cname, type), cname))
 
     def put_var_decref(self, entry):
-        if entry.type.is_pyobject:
+        if entry.type.is_memoryviewslice:
+            self.put_xdecref_memoryviewslice(entry.cname)
+        elif entry.type.is_pyobject:
             if entry.init_to_none is False:  # FIXME: 0 and False are treated differently???
                 self.putln("__Pyx_XDECREF(%s);" % self.entry_as_pyobject(entry))
             else:
                 self.putln("__Pyx_DECREF(%s);" % self.entry_as_pyobject(entry))
 
     def put_var_decref_clear(self, entry):
-        if entry.type.is_pyobject:
+        if entry.type.is_memoryviewslice:
+            self.put_xdecref_memoryviewslice(entry.cname, clear=True)
+        elif entry.type.is_pyobject:
             self.putln("__Pyx_DECREF(%s); %s = 0;" % (
                 self.entry_as_pyobject(entry), entry.cname))
 
     def put_var_xdecref(self, entry):
-        if entry.type.is_pyobject:
+        if entry.type.is_memoryviewslice:
+            self.put_xdecref_memoryviewslice(entry.cname)
+        elif entry.type.is_pyobject:
             self.putln("__Pyx_XDECREF(%s);" % self.entry_as_pyobject(entry))
 
     def put_var_xdecref_clear(self, entry):
-        if entry.type.is_pyobject:
+        if entry.type.is_memoryviewslice:
+            self.put_xdecref_memoryviewslice(entry.cname, clear=True)
+        elif entry.type.is_pyobject:
             self.putln("__Pyx_XDECREF(%s); %s = 0;" % (
                 self.entry_as_pyobject(entry), entry.cname))
 
+    def put_incref_memoryviewslice(self, cname):
+        self.putln("__Pyx_INC_MEMVIEW(&%s);" % cname)
+
+    def put_xdecref_memoryviewslice(self, cname, clear=False):
+        # A memoryview slice may always be None (without memview).
+        if clear:
+            self.putln("__Pyx_XDEC_MEMVIEW(&%s); %s.memview = NULL;" % (cname, cname))
+        else:
+            self.putln("__Pyx_XDEC_MEMVIEW(&%s);" % cname)
+
     def put_var_decrefs(self, entries, used_only = 0):
         for entry in entries:
             if not used_only or entry.used:
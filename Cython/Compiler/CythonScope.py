@@ -23,22 +23,26 @@ class CythonScope(ModuleScope):
             return type
 
 def create_cython_scope(context):
-    create_utility_scope(context)
-    return CythonScope(context)
+    utility_scope = create_utility_scope(context)
+    cython_scope = CythonScope(context)
+    cython_scope.utility_scope = utility_scope
+    return cython_scope
 
 
 def create_utility_scope(context):
+    # The utility scope of the context is kept by its cython scope, the
+    # module global only refers to the last one created.
     global utility_scope
-    utility_scope = ModuleScope(u'utility', None, context)
+    scope = ModuleScope(u'utility', None, context)
 
     # These are used to optimize isinstance in FinalOptimizePhase
-    type_object = utility_scope.declare_typedef('PyTypeObject',
-                                                base_type = c_void_type,
-                                                pos = None,
-                                                cname = 'PyTypeObject')
+    type_object = scope.declare_typedef('PyTypeObject',
+                                        base_type = c_void_type,
+                                        pos = None,
+                                        cname = 'PyTypeObject')
     type_object.is_void = True
 
-    utility_scope.declare_cfunction(
+    scope.declare_cfunction(
                 'PyObject_TypeCheck',
                 CFuncType(c_bint_type, [CFuncTypeArg("o", py_object_type, None),
                                         CFuncTypeArg("t", c_ptr_type(type_object), None)]),
@@ -46,4 +50,5 @@ def create_utility_scope(context):
                 defining = 1,
                 cname = 'PyObject_TypeCheck')
 
-    return utility_scope
+    utility_scope = scope
+    return scope
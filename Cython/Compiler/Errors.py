@@ -102,35 +102,88 @@ class NoElementTreeInstalledException(PyrexError):
     implementation was found
     """
 
-listing_file = None
-num_errors = 0
-echo_file = None
+class ErrorState(object):
+    #  The error reporting state of one compilation.  Each thread has
+    #  a current ErrorState that the functions below report to, see
+    #  install_state().
+    #
+    #  listing_file     file                Errors are listed here
+    #  echo_file        file                ... and echoed here
+    #  num_errors       int                 Number of reported errors
+    #  error_stack      [[CompileError]]    Held errors, see hold_errors()
+    #  warn_once_seen   {string : True}     Messages of warn_once()
+
+    def __init__(self, listing_file = None, echo_file = None):
+        self.listing_file = listing_file
+        self.echo_file = echo_file
+        self.num_errors = 0
+        self.error_stack = []
+        self.warn_once_seen = {}
+
+    def reset(self):
+        self.warn_once_seen.clear()
+        del self.error_stack[:]
+
+    def write(self, line):
+        if self.listing_file:
+            self.listing_file.write(line)
+        if self.echo_file:
+            self.echo_file.write(line)
+
+    def close_listing_file(self):
+        if self.listing_file:
+            self.listing_file.close()
+            self.listing_file = None
+
+
+try:
+    from threading import local as _thread_local
+except ImportError:
+    # no threads
+    class _thread_local(object):
+        pass
+
+_current = _thread_local()
+
+# Used by threads that have not installed a state of their own.
+default_state = ErrorState()
+
+def current_state():
+    state = getattr(_current, 'state', None)
+    if state is None:
+        state = default_state
+    return state
+
+def install_state(state):
+    # Makes state the current ErrorState of this thread and returns
+    # the previous one (or None), which should be reinstalled when
+    # the compilation is done.
+    previous = getattr(_current, 'state', None)
+    _current.state = state
+    return previous
 
 def open_listing_file(path, echo_to_stderr = 1):
     # Begin a new error listing. If path is None, no file
     # is opened, the error counter is just reset.
-    global listing_file, num_errors, echo_file
+    state = current_state()
     if path is not None:
-        listing_file = open_new_file(path)
+        state.listing_file = open_new_file(path)
     else:
-        listing_file = None
+        state.listing_file = None
     if echo_to_stderr:
-        echo_file = sys.stderr
+        state.echo_file = sys.stderr
     else:
-        echo_file = None
-    num_errors = 0
+        state.echo_file = None
+    state.num_errors = 0
 
 def close_listing_file():
-    global listing_file
-    if listing_file:
-        listing_file.close()
-        listing_file = None
+    current_state().close_listing_file()
 
 def report_error(err):
-    if error_stack:
-        error_stack[-1].append(err)
+    state = current_state()
+    if state.error_stack:
+        state.error_stack[-1].append(err)
     else:
-        global num_errors
         # See Main.py for why dual reporting occurs. Quick fix for now.
         if err.reported: return
         err.reported = True
@@ -139,15 +192,15 @@ def report_error(err):
             # Python <= 2.5 does this for non-ASCII Unicode exceptions
             line = format_error(getattr(err, 'message_only', "[unprintable exception message]"),
                                 getattr(err, 'position', None)) + u'\n'
-        if listing_file:
-            try: listing_file.write(line)
+        if state.listing_file:
+            try: state.listing_file.write(line)
             except UnicodeEncodeError:
-                listing_file.write(line.encode('ASCII', 'replace'))
-        if echo_file:
-            try: echo_file.write(line)
+                state.listing_file.write(line.encode('ASCII', 'replace'))
+        if state.echo_file:
+            try: state.echo_file.write(line)
             except UnicodeEncodeError:
-                echo_file.write(line.encode('ASCII', 'replace'))
-        num_errors = num_errors + 1
+                state.echo_file.write(line.encode('ASCII', 'replace'))
+        state.num_errors = state.num_errors + 1
         if Options.fast_fail:
             raise AbortError, "fatal errors"
 
@@ -166,58 +219,41 @@ def message(position, message, level=1):
     if level < LEVEL:
         return
     warn = CompileWarning(position, message)
-    line = "note: %s\n" % warn
-    if listing_file:
-        listing_file.write(line)
-    if echo_file:
-        echo_file.write(line)
+    current_state().write("note: %s\n" % warn)
     return warn
 
 def warning(position, message, level=0):
     if level < LEVEL:
         return
     warn = CompileWarning(position, message)
-    line = "warning: %s\n" % warn
-    if listing_file:
-        listing_file.write(line)
-    if echo_file:
-        echo_file.write(line)
+    current_state().write("warning: %s\n" % warn)
     return warn
 
-_warn_once_seen = {}
 def warn_once(position, message, level=0):
-    if level < LEVEL or message in _warn_once_seen:
+    state = current_state()
+    if level < LEVEL or message in state.warn_once_seen:
         return
     warn = CompileWarning(position, message)
-    line = "warning: %s\n" % warn
-    if listing_file:
-        listing_file.write(line)
-    if echo_file:
-        echo_file.write(line)
-    _warn_once_seen[message] = True
+    state.write("warning: %s\n" % warn)
+    state.warn_once_seen[message] = True
     return warn
 
 
 # These functions can be used to momentarily suppress errors.
 
-error_stack = []
-
 def hold_errors():
-    error_stack.append([])
+    current_state().error_stack.append([])
 
 def release_errors(ignore=False):
-    held_errors = error_stack.pop()
+    held_errors = current_state().error_stack.pop()
     if not ignore:
         for err in held_errors:
             report_error(err)
 
 def held_errors():
-    return error_stack[-1]
-
+    return current_state().error_stack[-1]
 
-# this module needs a redesign to support parallel cythonisation, but
-# for now, the following works at least in sequential compiler runs
 
 def reset():
-    _warn_once_seen.clear()
-    del error_stack[:]
+    # Clears the held errors and warnings of the current state.
+    current_state().reset()
@@ -460,10 +460,12 @@ class ExprNode(Node):
     # ---------------- Code Generation -----------------
 
     def make_owned_reference(self, code):
-        #  If result is a pyobject, make sure we own
-        #  a reference to it.
+        #  If result is a pyobject or a memoryview slice,
+        #  make sure we own a reference to it.
         if self.type.is_pyobject and not self.result_in_temp():
             code.put_incref(self.result(), self.ctype())
+        elif self.type.is_memoryviewslice and not self.result_in_temp():
+            code.put_incref_memoryviewslice(self.result())
 
     def generate_evaluation_code(self, code):
         code.mark_pos(self.pos)
@@ -494,6 +496,8 @@ class ExprNode(Node):
         if self.is_temp:
             if self.type.is_pyobject:
                 code.put_decref_clear(self.result(), self.ctype())
+            elif self.type.is_memoryviewslice:
+                code.put_xdecref_memoryviewslice(self.result(), clear=True)
         else:
             # Already done if self.is_temp
             self.generate_subexpr_disposal_code(code)
@@ -508,6 +512,8 @@ class ExprNode(Node):
         if self.is_temp:
             if self.type.is_pyobject:
                 code.putln("%s = 0;" % self.result())
+            elif self.type.is_memoryviewslice:
+                code.putln("%s.memview = NULL;" % self.result())
         else:
             self.generate_subexpr_disposal_code(code)
 
@@ -929,7 +935,34 @@ class FloatNode(ConstNode):
     def compile_time_value(self, denv):
         return float(self.value)
 
+    def coerce_to(self, dst_type, env):
+        if dst_type.is_pyobject and self.type.is_float:
+            # use a cached Python float object instead of a new one
+            # on each evaluation
+            node = FloatNode(self.pos, value=self.value,
+                             constant_result=self.constant_result,
+                             type=PyrexTypes.py_object_type)
+            return ConstNode.coerce_to(node, dst_type, env)
+        return ConstNode.coerce_to(self, dst_type, env)
+
+    def generate_evaluation_code(self, code):
+        if self.type.is_pyobject:
+            self.result_code = code.get_py_const(py_object_type, 'float_', cleanup_level=2)
+            code = code.get_cached_constants_writer()
+            code.mark_pos(self.pos)
+            code.putln("%s = PyFloat_FromDouble(%s); %s" % (
+                self.result_code,
+                self.get_constant_c_result_code(),
+                code.error_goto_if_null(self.result_code, self.pos)))
+            code.put_gotref(self.result_code)
+            code.put_giveref(self.result_code)
+
     def calculate_result_code(self):
+        if self.type.is_pyobject:
+            return self.result_code
+        return self.get_constant_c_result_code()
+
+    def get_constant_c_result_code(self):
         strval = self.value
         assert isinstance(strval, (str, unicode))
         cmpval = repr(float(strval))
@@ -1349,7 +1382,13 @@ class NameNode(AtomicExprNode):
         if not entry:
             entry = env.lookup(self.name)
         if entry and entry.is_type:
-            return entry.type
+            type = entry.type
+            if type.is_fused:
+                type = env.specialize_fused(type)
+                if type.is_fused:
+                    error(self.pos, "Fused types not allowed here")
+                    type = PyrexTypes.error_type
+            return type
         else:
             return None
 
@@ -1525,12 +1564,26 @@ class NameNode(AtomicExprNode):
             else: # entry.is_pyglobal
                 namespace = entry.scope.namespace_cname
             code.globalstate.use_utility_code(get_name_interned_utility_code)
-            code.putln(
-                '%s = __Pyx_GetName(%s, %s); %s' % (
-                self.result(),
-                namespace,
-                interned_cname,
-                code.error_goto_if_null(self.result(), self.pos)))
+            if (code.globalstate.directives['cache_globals'] and
+                    not entry.is_builtin and entry.scope.is_module_scope):
+                # each lookup site keeps its own cache slot
+                code.globalstate.use_utility_code(get_module_global_cached_utility_code)
+                code.putln("{")
+                code.putln("static __Pyx_GlobalLookupCache __pyx_global_cache = {0, 0, 0};")
+                code.putln(
+                    '%s = __Pyx_GetModuleGlobalName(%s, %s, &__pyx_global_cache); %s' % (
+                    self.result(),
+                    namespace,
+                    interned_cname,
+                    code.error_goto_if_null(self.result(), self.pos)))
+                code.putln("}")
+            else:
+                code.putln(
+                    '%s = __Pyx_GetName(%s, %s); %s' % (
+                    self.result(),
+                    namespace,
+                    interned_cname,
+                    code.error_goto_if_null(self.result(), self.pos)))
             code.put_gotref(self.py_result())
 
         elif entry.is_local and False:
@@ -1622,6 +1675,9 @@ class NameNode(AtomicExprNode):
                             code.put_decref(self.result(), self.ctype())
                     if entry.is_cglobal:
                         code.put_giveref(rhs.py_result())
+            elif self.type.is_memoryviewslice:
+                rhs.make_owned_reference(code)
+                code.put_xdecref_memoryviewslice(self.result())
 
             code.putln('%s = %s;' % (self.result(),
                                      rhs.result_as(self.ctype())))
@@ -1754,8 +1810,10 @@ class IteratorNode(ExprNode):
     #  Implements result = iter(sequence)
     #
     #  sequence   ExprNode
+    #  reversed   bool       iterate a list or tuple backwards
 
     type = py_object_type
+    reversed = False
 
     subexprs = ['sequence']
 
@@ -1792,10 +1850,20 @@ class IteratorNode(ExprNode):
                 "if (PyList_CheckExact(%s) || PyTuple_CheckExact(%s)) {" % (
                     self.sequence.py_result(),
                     self.sequence.py_result()))
+        if self.reversed:
+            if self.sequence.type is list_type:
+                init_value = "PyList_GET_SIZE(%s) - 1" % self.sequence.py_result()
+            elif self.sequence.type is tuple_type:
+                init_value = "PyTuple_GET_SIZE(%s) - 1" % self.sequence.py_result()
+            else:
+                raise InternalError("reversed iteration over non-sequence")
+        else:
+            init_value = "0"
         if is_builtin_sequence or may_be_a_sequence:
             code.putln(
-                "%s = 0; %s = %s; __Pyx_INCREF(%s);" % (
+                "%s = %s; %s = %s; __Pyx_INCREF(%s);" % (
                     self.counter_cname,
+                    init_value,
                     self.result(),
                     self.sequence.py_result(),
                     self.result()))
@@ -1845,19 +1913,31 @@ class NextNode(AtomicExprNode):
                 code.putln(
                     "if (likely(Py%s_CheckExact(%s))) {" % (
                         prefix, self.iterator.py_result()))
+            if self.iterator.reversed:
+                # lists may shrink while we iterate over them
+                code.putln(
+                    "if (%s < 0 || %s >= Py%s_GET_SIZE(%s)) break;" % (
+                        self.iterator.counter_cname,
+                        self.iterator.counter_cname,
+                        prefix,
+                        self.iterator.py_result()))
+                inc_dec = '--'
+            else:
+                code.putln(
+                    "if (%s >= Py%s_GET_SIZE(%s)) break;" % (
+                        self.iterator.counter_cname,
+                        prefix,
+                        self.iterator.py_result()))
+                inc_dec = '++'
             code.putln(
-                "if (%s >= Py%s_GET_SIZE(%s)) break;" % (
-                    self.iterator.counter_cname,
-                    prefix,
-                    self.iterator.py_result()))
-            code.putln(
-                "%s = Py%s_GET_ITEM(%s, %s); __Pyx_INCREF(%s); %s++;" % (
+                "%s = Py%s_GET_ITEM(%s, %s); __Pyx_INCREF(%s); %s%s;" % (
                     self.result(),
                     prefix,
                     self.iterator.py_result(),
                     self.iterator.counter_cname,
                     self.result(),
-                    self.iterator.counter_cname))
+                    self.iterator.counter_cname,
+                    inc_dec))
             if len(type_checks) > 1:
                 code.put("} else ")
         if len(type_checks) == 1:
@@ -1984,13 +2064,26 @@ class IndexNode(ExprNode):
     #  index    ExprNode
     #  indices  [ExprNode]
     #  is_buffer_access boolean Whether this is a buffer access.
+    #  memslice_index   boolean Whether this is an item of a memoryview slice
+    #  memslice_slice   boolean Whether this is a slice of a memoryview slice
+    #  memslice_axes    [tuple] The axes of a memoryview slice index
+    #  nonneg_indices   [boolean] or None   Buffer indices known not to be negative
+    #  in_bounds_indices [boolean] or None  Buffer indices known to be within the shape
     #
     #  indices is used on buffer access, index on non-buffer access.
     #  The former contains a clean list of index parameters, the
     #  latter whatever Python object is needed for index access.
+    #  Memoryview slice indices also keep their axes, see MemoryView.
 
     subexprs = ['base', 'index', 'indices']
     indices = None
+    is_buffer_access = False
+    nonneg_indices = None
+    in_bounds_indices = None
+    memslice_index = False
+    memslice_slice = False
+    memslice_axes = None
+    memslice_index_temps = None
 
     def __init__(self, pos, index, *args, **kw):
         ExprNode.__init__(self, pos, index=index, *args, **kw)
@@ -2037,6 +2130,8 @@ class IndexNode(ExprNode):
 
     def infer_type(self, env):
         base_type = self.base.infer_type(env)
+        if base_type.is_memoryviewslice:
+            return self.infer_memoryviewslice_type(base_type)
         if isinstance(self.index, SliceNode):
             # slicing!
             if base_type.is_string:
@@ -2078,6 +2173,24 @@ class IndexNode(ExprNode):
             # TODO: Handle buffers (hopefully without too much redundancy).
             return py_object_type
 
+    def infer_memoryviewslice_type(self, base_type):
+        if self.memslice_axes is not None:
+            return self.type
+        if isinstance(self.index, TupleNode):
+            indices = self.index.args
+        else:
+            indices = [self.index]
+        ndim = 0
+        for index in indices:
+            if isinstance(index, SliceNode):
+                ndim += 1
+            elif isinstance(index, EllipsisNode):
+                ndim += base_type.ndim - len(indices) + 1
+        ndim += base_type.ndim - len(indices)
+        if ndim <= 0:
+            return base_type.dtype
+        return PyrexTypes.MemoryViewSliceType(base_type.dtype, ndim)
+
     def analyse_types(self, env):
         self.analyse_base_and_index_types(env, getting = 1)
 
@@ -2101,6 +2214,10 @@ class IndexNode(ExprNode):
             self.type = PyrexTypes.error_type
             return
 
+        if self.base.type.is_memoryviewslice:
+            self.analyse_memoryviewslice_index(env, setting)
+            return
+
         is_slice = isinstance(self.index, SliceNode)
         # Potentially overflowing index value.
         if not is_slice and isinstance(self.index, IntNode) and Utils.long_literal(self.index.value):
@@ -2217,9 +2334,62 @@ class IndexNode(ExprNode):
                             base_type)
                     self.type = PyrexTypes.error_type
 
+    def analyse_memoryviewslice_index(self, env, setting):
+        import MemoryView
+        base_type = self.base.type
+        if self.memslice_axes is None:
+            if isinstance(self.index, TupleNode):
+                indices = self.index.args
+            else:
+                indices = [self.index]
+            axes = MemoryView.unellipsify(self.pos, indices, base_type.ndim)
+            if axes is None:
+                self.type = PyrexTypes.error_type
+                return
+            self.memslice_axes = []
+            for axis in axes:
+                if axis[0] == 'index':
+                    index = axis[1]
+                    index.analyse_types(env)
+                    if index.type.is_pyobject:
+                        index = index.coerce_to(PyrexTypes.c_py_ssize_t_type, env)
+                    elif not index.type.is_int:
+                        error(index.pos, "Invalid index type '%s'" % index.type)
+                    self.memslice_axes.append(('index', index))
+                else:
+                    parts = []
+                    for node in axis[1:]:
+                        if node is not None:
+                            node.analyse_types(env)
+                            node = node.coerce_to(PyrexTypes.c_py_ssize_t_type, env)
+                        parts.append(node)
+                    self.memslice_axes.append(('slice',) + tuple(parts))
+            self.indices = MemoryView.axis_nodes(self.memslice_axes)
+            self.index = None
+        self.buffer_type = base_type
+        self.in_nogil_context = env.nogil
+        if not [axis for axis in self.memslice_axes if axis[0] == 'slice']:
+            self.type = base_type.dtype
+            self.is_buffer_access = True
+            self.memslice_index = True
+        else:
+            self.memslice_slice = True
+            if setting:
+                # assigning copies into the slice, whatever its layout
+                self.type = MemoryView.get_sliced_type(
+                    PyrexTypes.MemoryViewSliceType(base_type.dtype, base_type.ndim),
+                    self.memslice_axes)
+            else:
+                self.type = MemoryView.get_sliced_type(base_type, self.memslice_axes)
+                self.is_temp = True
+            self.type.create_declaration_utility_code(env)
+
     gil_message = "Indexing Python object"
 
     def nogil_check(self, env):
+        if self.memslice_index:
+            # memoryview slices raise index errors with the GIL
+            return
         if self.is_buffer_access:
             if env.directives['boundscheck']:
                 error(self.pos, "Cannot check buffer index bounds without gil; use boundscheck(False) directive")
@@ -2263,7 +2433,7 @@ class IndexNode(ExprNode):
 
     def generate_subexpr_evaluation_code(self, code):
         self.base.generate_evaluation_code(code)
-        if not self.indices:
+        if self.indices is None:
             self.index.generate_evaluation_code(code)
         else:
             for i in self.indices:
@@ -2271,7 +2441,7 @@ class IndexNode(ExprNode):
 
     def generate_subexpr_disposal_code(self, code):
         self.base.generate_disposal_code(code)
-        if not self.indices:
+        if self.indices is None:
             self.index.generate_disposal_code(code)
         else:
             for i in self.indices:
@@ -2279,14 +2449,25 @@ class IndexNode(ExprNode):
 
     def free_subexpr_temps(self, code):
         self.base.free_temps(code)
-        if not self.indices:
+        if self.indices is None:
             self.index.free_temps(code)
         else:
             for i in self.indices:
                 i.free_temps(code)
+        if self.memslice_index_temps:
+            import MemoryView
+            MemoryView.release_index_temps(code, self.memslice_index_temps)
+            self.memslice_index_temps = None
 
     def generate_result_code(self, code):
-        if self.is_buffer_access:
+        if self.memslice_slice:
+            import MemoryView
+            if code.globalstate.directives['nonecheck']:
+                self.put_nonecheck(code)
+            MemoryView.put_slice_code(code, self.result(), self.base.result(),
+                                      self.memslice_axes, code.globalstate.directives,
+                                      self.pos, self.in_nogil_context)
+        elif self.is_buffer_access:
             if code.globalstate.directives['nonecheck']:
                 self.put_nonecheck(code)
             self.buffer_ptr_code = self.buffer_lookup_code(code)
@@ -2386,9 +2567,24 @@ class IndexNode(ExprNode):
             # Simple case
             code.putln("*%s %s= %s;" % (ptrexpr, op, rhs.result()))
 
+    def generate_memoryviewslice_setslice_code(self, rhs, code):
+        # Copies the items of rhs into the sliced items.  The
+        # temporary slice borrows the buffer of the base.
+        import MemoryView
+        if code.globalstate.directives['nonecheck']:
+            self.put_nonecheck(code)
+        dst = code.funcstate.allocate_temp(self.type, manage_ref=False)
+        MemoryView.put_slice_code(code, dst, self.base.result(), self.memslice_axes,
+                                  code.globalstate.directives, self.pos,
+                                  self.in_nogil_context, owned=False)
+        MemoryView.put_assign_to_slice_contents(code, dst, rhs.result(), self.type, self.pos)
+        code.funcstate.release_temp(dst)
+
     def generate_assignment_code(self, rhs, code):
         self.generate_subexpr_evaluation_code(code)
-        if self.is_buffer_access:
+        if self.memslice_slice:
+            self.generate_memoryviewslice_setslice_code(rhs, code)
+        elif self.is_buffer_access:
             self.generate_buffer_setitem_code(rhs, code)
         elif self.type.is_pyobject:
             self.generate_setitem_code(rhs.py_result(), code)
@@ -2424,7 +2620,24 @@ class IndexNode(ExprNode):
         self.generate_subexpr_disposal_code(code)
         self.free_subexpr_temps(code)
 
+    def buffer_index_signeds(self):
+        # indices known not to be negative need no wraparound
+        index_signeds = [i.type.signed for i in self.indices]
+        if self.nonneg_indices:
+            for dim, nonneg in enumerate(self.nonneg_indices):
+                if nonneg:
+                    index_signeds[dim] = 0
+        return index_signeds
+
     def buffer_lookup_code(self, code):
+        if self.memslice_index:
+            import MemoryView
+            self.memslice_index_temps = MemoryView.put_index_temps(code, self.indices)
+            return MemoryView.get_item_pointer_code(
+                code, self.base.result(), self.buffer_type,
+                self.buffer_index_signeds(), self.memslice_index_temps,
+                code.globalstate.directives, self.pos, self.in_nogil_context,
+                self.in_bounds_indices)
         # Assign indices to temps
         index_temps = [code.funcstate.allocate_temp(i.type, manage_ref=False) for i in self.indices]
         for temp, index in zip(index_temps, self.indices):
@@ -2434,12 +2647,16 @@ class IndexNode(ExprNode):
         # The above could happen because child_attrs is wrong somewhere so that
         # options are not propagated.
         return Buffer.put_buffer_lookup_code(entry=self.base.entry,
-                                             index_signeds=[i.type.signed for i in self.indices],
+                                             index_signeds=self.buffer_index_signeds(),
                                              index_cnames=index_temps,
                                              directives=code.globalstate.directives,
                                              pos=self.pos, code=code)
 
     def put_nonecheck(self, code):
+        if self.base.type.is_memoryviewslice:
+            import MemoryView
+            MemoryView.put_nonecheck(code, self.base.result(), self.pos)
+            return
         code.globalstate.use_utility_code(raise_noneindex_error_utility_code)
         code.putln("if (%s) {" % code.unlikely("%s == Py_None") % self.base.result_as(PyrexTypes.py_object_type))
         code.putln("__Pyx_RaiseNoneIndexingError();")
@@ -2462,6 +2679,8 @@ class SliceIndexNode(ExprNode):
         elif base_type in (bytes_type, str_type, unicode_type,
                            list_type, tuple_type):
             return base_type
+        elif base_type.is_memoryviewslice:
+            return PyrexTypes.MemoryViewSliceType(base_type.dtype, base_type.ndim)
         return py_object_type
 
     def calculate_constant_result(self):
@@ -2491,6 +2710,9 @@ class SliceIndexNode(ExprNode):
         # when assigning, we must accept any Python type
         if self.type.is_pyobject:
             self.type = py_object_type
+        elif self.type.is_memoryviewslice:
+            # assigning copies into the slice, whatever its layout
+            self.type = PyrexTypes.MemoryViewSliceType(self.type.dtype, self.type.ndim)
 
     def analyse_types(self, env):
         self.base.analyse_types(env)
@@ -2508,6 +2730,8 @@ class SliceIndexNode(ExprNode):
             # array types can result in invalid type casts in the C
             # code
             self.type = PyrexTypes.CPtrType(base_type.base_type)
+        elif base_type.is_memoryviewslice:
+            self.type = base_type
         else:
             self.base = self.base.coerce_to_pyobject(env)
             self.type = py_object_type
@@ -2519,12 +2743,31 @@ class SliceIndexNode(ExprNode):
             self.start = self.start.coerce_to(c_int, env)
         if self.stop:
             self.stop = self.stop.coerce_to(c_int, env)
+        if base_type.is_memoryviewslice:
+            self.memslice_axes = [('slice', self.start, self.stop, None)] + [
+                ('slice', None, None, None)] * (base_type.ndim - 1)
+            self.in_nogil_context = env.nogil
         self.is_temp = 1
 
-    nogil_check = Node.gil_error
     gil_message = "Slicing Python object"
 
+    def nogil_check(self, env):
+        if not self.type.is_memoryviewslice:
+            self.gil_error()
+
+    def put_memoryviewslice_nonecheck(self, code):
+        import MemoryView
+        if code.globalstate.directives['nonecheck']:
+            MemoryView.put_nonecheck(code, self.base.result(), self.pos)
+
     def generate_result_code(self, code):
+        if self.type.is_memoryviewslice:
+            import MemoryView
+            self.put_memoryviewslice_nonecheck(code)
+            MemoryView.put_slice_code(code, self.result(), self.base.result(),
+                                      self.memslice_axes, code.globalstate.directives,
+                                      self.pos, self.in_nogil_context)
+            return
         if not self.type.is_pyobject:
             error(self.pos,
                   "Slicing is not currently supported for '%s'." % self.type)
@@ -2558,7 +2801,17 @@ class SliceIndexNode(ExprNode):
 
     def generate_assignment_code(self, rhs, code):
         self.generate_subexpr_evaluation_code(code)
-        if self.type.is_pyobject:
+        if self.type.is_memoryviewslice:
+            # copies into the slice, which borrows the buffer of the base
+            import MemoryView
+            self.put_memoryviewslice_nonecheck(code)
+            dst = code.funcstate.allocate_temp(self.type, manage_ref=False)
+            MemoryView.put_slice_code(code, dst, self.base.result(), self.memslice_axes,
+                                      code.globalstate.directives, self.pos,
+                                      self.in_nogil_context, owned=False)
+            MemoryView.put_assign_to_slice_contents(code, dst, rhs.result(), self.type, self.pos)
+            code.funcstate.release_temp(dst)
+        elif self.type.is_pyobject:
             code.put_error_if_neg(self.pos,
                 "__Pyx_PySequence_SetSlice(%s, %s, %s, %s)" % (
                     self.base.py_result(),
@@ -2783,6 +3036,8 @@ class SimpleCallNode(CallNode):
     #  wrapper_call   bool                 used internally
     #  has_optional_args   bool            used internally
     #  nogil          bool                 used internally
+    #  py_method_call bool                 call obj.method(...) without
+    #                                      creating a bound method
 
     subexprs = ['self', 'coerced_self', 'function', 'args', 'arg_tuple']
 
@@ -2793,6 +3048,7 @@ class SimpleCallNode(CallNode):
     has_optional_args = False
     nogil = False
     analysed = False
+    py_method_call = False
 
     def compile_time_value(self, denv):
         function = self.function.compile_time_value(denv)
@@ -2932,6 +3188,9 @@ class SimpleCallNode(CallNode):
                 return
             self.function.entry = entry
             self.function.type = entry.type
+            if self.function.is_attribute and entry.is_cmethod:
+                # the vtable slot of the chosen overload, e.g. of a fused method
+                self.function.member = entry.cname
             func_type = self.function_type()
         else:
             func_type = self.function_type()
@@ -2957,6 +3216,10 @@ class SimpleCallNode(CallNode):
                 # from the function, so we create an owned temp
                 # reference to it
                 arg = arg.coerce_to_temp(env)
+            elif arg.type.is_memoryviewslice and arg.is_attribute:
+                # same for the buffer of a memoryview slice, which
+                # does not need the GIL
+                arg = arg.coerce_to_temp(env)
             self.args[i] = arg
         for i in range(max_nargs, actual_nargs):
             arg = self.args[i]
@@ -2975,6 +3238,9 @@ class SimpleCallNode(CallNode):
         if self.type.is_pyobject:
             self.result_ctype = py_object_type
             self.is_temp = 1
+        elif self.type.is_memoryviewslice:
+            # the function returns an owned reference
+            self.is_temp = 1
         elif func_type.exception_value is not None \
                  or func_type.exception_check:
             self.is_temp = 1
@@ -3022,6 +3288,45 @@ class SimpleCallNode(CallNode):
             ', '.join(arg_list_code))
         return result
 
+    def generate_evaluation_code(self, code):
+        if not self.py_method_call:
+            ExprNode.generate_evaluation_code(self, code)
+            return
+        # only the object of the attribute is evaluated, the method
+        # is looked up from its type where possible
+        code.mark_pos(self.pos)
+        code.globalstate.use_utility_code(py_method_call_utility_code)
+        function = self.function
+        self_arg = function.obj
+        self_arg.generate_evaluation_code(code)
+        method = code.funcstate.allocate_temp(py_object_type, manage_ref=True)
+        is_unbound = code.funcstate.allocate_temp(PyrexTypes.c_int_type, manage_ref=False)
+        # the method is looked up before the arguments are evaluated
+        code.putln("%s = __Pyx_PyObject_GetMethod(%s, %s, &%s); %s" % (
+            method,
+            self_arg.py_result(),
+            code.intern_identifier(function.attribute),
+            is_unbound,
+            code.error_goto_if_null(method, self.pos)))
+        code.put_gotref(method)
+        self.arg_tuple.generate_evaluation_code(code)
+        self.allocate_temp_result(code)
+        code.putln("%s = __Pyx_PyObject_CallMethod(%s, %s ? %s : NULL, %s); %s" % (
+            self.result(),
+            method,
+            is_unbound,
+            self_arg.py_result(),
+            self.arg_tuple.py_result(),
+            code.error_goto_if_null(self.result(), self.pos)))
+        code.put_gotref(self.py_result())
+        self.arg_tuple.generate_disposal_code(code)
+        self.arg_tuple.free_temps(code)
+        code.put_decref_clear(method, py_object_type)
+        code.funcstate.release_temp(method)
+        code.funcstate.release_temp(is_unbound)
+        self_arg.generate_disposal_code(code)
+        self_arg.free_temps(code)
+
     def generate_result_code(self, code):
         func_type = self.function_type()
         if func_type.is_pyobject:
@@ -3052,6 +3357,11 @@ class SimpleCallNode(CallNode):
             exc_checks = []
             if self.type.is_pyobject and self.is_temp:
                 exc_checks.append("!%s" % self.result())
+            elif self.type.is_memoryviewslice and self.is_temp:
+                if self.nogil:
+                    exc_checks.append("(!%s.memview && __Pyx_ErrOccurredWithGIL())" % self.result())
+                else:
+                    exc_checks.append("(!%s.memview && PyErr_Occurred())" % self.result())
             else:
                 exc_val = func_type.exception_value
                 exc_check = func_type.exception_check
@@ -3503,6 +3813,8 @@ class AttributeNode(ExprNode):
                 if entry.is_variable or entry.is_cmethod:
                     self.type = entry.type
                     self.member = entry.cname
+                    if entry.utility_code:
+                        env.use_utility_code(entry.utility_code)
                     return
                 else:
                     # If it's not a variable or C method, it must be a Python
@@ -3621,6 +3933,9 @@ class AttributeNode(ExprNode):
                 code.put_giveref(rhs.py_result())
                 code.put_gotref(select_code)
                 code.put_decref(select_code, self.ctype())
+            elif self.type.is_memoryviewslice:
+                rhs.make_owned_reference(code)
+                code.put_xdecref_memoryviewslice(select_code)
             code.putln(
                 "%s = %s;" % (
                     select_code,
@@ -4202,6 +4517,8 @@ class ScopedExprNode(ExprNode):
         # must free all local Python references at each exit point
         old_loop_labels = tuple(code.new_loop_labels())
         old_error_label = code.new_error_label()
+        old_return_label = code.return_label
+        code.return_label = code.new_label('return')
 
         generate_inner_evaluation_code(code)
 
@@ -4212,7 +4529,8 @@ class ScopedExprNode(ExprNode):
         # error/loop body exit points
         exit_scope = code.new_label('exit_scope')
         code.put_goto(exit_scope)
-        for label, old_label in ([(code.error_label, old_error_label)] +
+        for label, old_label in ([(code.error_label, old_error_label),
+                                  (code.return_label, old_return_label)] +
                                  list(zip(code.get_loop_labels(), old_loop_labels))):
             if code.label_used(label):
                 code.put_label(label)
@@ -4224,6 +4542,7 @@ class ScopedExprNode(ExprNode):
 
         code.set_loop_labels(old_loop_labels)
         code.error_label = old_error_label
+        code.return_label = old_return_label
 
 
 class ComprehensionNode(ScopedExprNode):
@@ -4281,7 +4600,8 @@ class ComprehensionAppendNode(Node):
 
     def generate_execution_code(self, code):
         if self.target.type is list_type:
-            function = "PyList_Append"
+            code.globalstate.use_utility_code(list_comp_append_utility_code)
+            function = "__Pyx_ListComp_Append"
         elif self.target.type is set_type:
             function = "PySet_Add"
         else:
@@ -4303,6 +4623,66 @@ class ComprehensionAppendNode(Node):
     def annotate(self, code):
         self.expr.annotate(code)
 
+class ComprehensionPreallocNode(Node):
+    # Reserves space in the result list of a list comprehension right
+    # before its loop starts, when the number of iterations is known
+    # at that point.  This is only a hint, appending more or fewer
+    # items than reserved is safe.
+    #
+    # target     ComprehensionNode  the list comprehension
+    # sequence   ExprNode or None   a list or tuple that the loop iterates over
+    # start      ExprNode or None   start value of a loop over a range
+    # stop       ExprNode or None   stop value of a loop over a range
+    # step       integer            absolute step size of the range
+    #
+    # None of the nodes are children, they must be usable without
+    # evaluation at this point (simple names, literals or temps).
+
+    child_attrs = []
+
+    sequence = None
+    start = None
+    stop = None
+    step = 1
+
+    def analyse_expressions(self, env):
+        pass
+
+    def size_code(self):
+        if self.sequence is not None:
+            if self.sequence.type is tuple_type:
+                size_func = "PyTuple_GET_SIZE"
+            else:
+                size_func = "PyList_GET_SIZE"
+            return "(likely(%s != Py_None) ? %s(%s) : 0)" % (
+                self.sequence.result(), size_func, self.sequence.result())
+        bounds = []
+        for bound in (self.start, self.stop):
+            if bound.is_literal:
+                bounds.append(bound.get_constant_c_result_code())
+            else:
+                bounds.append(bound.result())
+        return "__Pyx_RangeLengthHint(%s, %s, %s)" % (
+            bounds[0], bounds[1], self.step)
+
+    def generate_execution_code(self, code):
+        code.globalstate.use_utility_code(list_comp_prealloc_utility_code)
+        target = self.target.result()
+        status = code.funcstate.allocate_temp(PyrexTypes.c_int_type, manage_ref=False)
+        # the target list gets replaced by a preallocated one
+        code.put_giveref(target)
+        code.putln("%s = __Pyx_ListComp_Preallocate(&%s, %s);" % (
+            status, target, self.size_code()))
+        code.put_gotref(target)
+        code.putln(code.error_goto_if_neg(status, self.pos))
+        code.funcstate.release_temp(status)
+
+    def generate_function_definitions(self, env, code):
+        pass
+
+    def annotate(self, code):
+        pass
+
 class DictComprehensionAppendNode(ComprehensionAppendNode):
     child_attrs = ['key_expr', 'value_expr']
 
@@ -4354,6 +4734,7 @@ class GeneratorExpressionNode(ScopedExprNode):
         if not self.has_local_scope:
             self.loop.analyse_expressions(env)
         self.is_temp = True
+        error(self.pos, "Generator expressions are not supported")
 
     def analyse_scoped_expressions(self, env):
         if self.has_local_scope:
@@ -4373,21 +4754,27 @@ class InlinedGeneratorExpressionNode(GeneratorExpressionNode):
     # expressions.
     #
     # loop           ForStatNode      the for-loop, not containing any YieldExprNodes
-    # result_node    ResultRefNode    the reference to the result value temp
+    # result_node    ResultRefNode    the reference to the result value temp,
+    #                                 None if the loop only runs for its side effects
     # orig_func      String           the name of the builtin function this node replaces
 
     child_attrs = ["loop"]
     loop_analysed = False
 
     def infer_type(self, env):
+        if self.result_node is None:
+            return PyrexTypes.c_void_type
         return self.result_node.infer_type(env)
 
     def analyse_types(self, env):
         if not self.has_local_scope:
             self.loop_analysed = True
             self.loop.analyse_expressions(env)
-        self.type = self.result_node.type
-        self.is_temp = True
+        if self.result_node is None:
+            self.type = PyrexTypes.c_void_type
+        else:
+            self.type = self.result_node.type
+            self.is_temp = True
 
     def analyse_scoped_expressions(self, env):
         self.loop_analysed = True
@@ -4404,8 +4791,13 @@ class InlinedGeneratorExpressionNode(GeneratorExpressionNode):
             return self
         return GeneratorExpressionNode.coerce_to(self, dst_type, env)
 
+    def calculate_result_code(self):
+        # only used when there is no result value
+        return ""
+
     def generate_result_code(self, code):
-        self.result_node.result_code = self.result()
+        if self.result_node is not None:
+            self.result_node.result_code = self.result()
         self.loop.generate_execution_code(code)
 
 
@@ -4954,26 +5346,77 @@ class YieldExprNode(ExprNode):
     #
     # arg         ExprNode   the value to return from the generator
     # label_name  string     name of the C label used for this yield
+    # label_num   integer    C label number for this yield
+    # generator_scope  Scope   local scope of the generator function
 
     subexprs = ['arg']
     type = py_object_type
+    label_num = 0
 
     def analyse_types(self, env):
         self.is_temp = 1
+        scope = env
+        while scope is not None and not scope.is_generator:
+            scope = scope.outer_scope
+        self.generator_scope = scope
         if self.arg is not None:
             self.arg.analyse_types(env)
             if not self.arg.type.is_pyobject:
                 self.arg = self.arg.coerce_to_pyobject(env)
-        error(self.pos, "Generators are not supported")
 
-    def generate_result_code(self, code):
-        self.label_name = code.new_label('resume_from_yield')
+    gil_message = "Yielding a value"
+
+    def generate_evaluation_code(self, code):
+        self.label_num, self.label_name = code.funcstate.new_yield_label()
         code.use_label(self.label_name)
-        code.putln("/* FIXME: save temporary variables */")
-        code.putln("/* FIXME: return from function, yielding value */")
+        if self.arg:
+            self.arg.generate_evaluation_code(code)
+            self.arg.make_owned_reference(code)
+            code.putln(
+                "%s = %s;" % (
+                    Naming.retval_cname,
+                    self.arg.result_as(py_object_type)))
+            self.arg.generate_post_assignment_code(code)
+            self.arg.free_temps(code)
+        else:
+            code.put_init_to_py_none(Naming.retval_cname, py_object_type)
+        # closure variables are only moved into the closure after
+        # type analysis, so look them up here
+        py_closure_entries = [
+            entry for entry in self.generator_scope.var_entries
+            if entry.in_closure and entry.type.is_pyobject]
+        # temps that are still in use are kept in the closure
+        saved = []
+        code.funcstate.closure_temps.reset()
+        for cname, type, manage_ref in code.funcstate.temps_in_use():
+            save_cname = code.funcstate.closure_temps.allocate_temp(type)
+            saved.append((cname, save_cname, type, manage_ref))
+            if type.is_pyobject and manage_ref:
+                code.put_xgiveref(cname)
+            code.putln('%s->%s = %s;' % (Naming.cur_scope_cname, save_cname, cname))
+        for entry in py_closure_entries:
+            code.put_var_xgiveref(entry)
+        code.put_xgiveref(Naming.retval_cname)
+        code.put_finish_refcount_context()
+        code.putln("/* return from generator, yielding value */")
+        code.putln("%s->resume_label = %d;" % (Naming.generator_cname, self.label_num))
+        code.putln("return %s;" % Naming.retval_cname)
         code.put_label(self.label_name)
-        code.putln("/* FIXME: restore temporary variables and  */")
-        code.putln("/* FIXME: extract sent value from closure */")
+        for entry in py_closure_entries:
+            code.put_var_xgotref(entry)
+        for cname, save_cname, type, manage_ref in saved:
+            code.putln('%s = %s->%s;' % (cname, Naming.cur_scope_cname, save_cname))
+            if type.is_pyobject:
+                code.putln('%s->%s = 0;' % (Naming.cur_scope_cname, save_cname))
+                if manage_ref:
+                    code.put_xgotref(cname)
+            elif type.is_memoryviewslice:
+                code.putln('%s->%s.memview = NULL;' % (Naming.cur_scope_cname, save_cname))
+        # the sent value is NULL when an exception was thrown in
+        code.putln(code.error_goto_if_null(Naming.sent_value_cname, self.pos))
+        self.allocate_temp_result(code)
+        code.putln('%s = %s;' % (self.result(), Naming.sent_value_cname))
+        code.put_incref(self.result(), py_object_type)
 
 
 #-------------------------------------------------------------------
@@ -5716,6 +6159,39 @@ def c_binop_constructor(operator):
         return CBinopNode(pos, operator=operator, **operands)
     return make_binop_node
 
+def py_constant_operand(operand1, operand2):
+    #  For an operation between a Python object and a Python int or
+    #  float literal, returns (kind, order, C value of the literal),
+    #  where kind is 'Int' or 'Float' and order is 'ObjC' if the
+    #  literal is the second operand and 'CObj' if it is the first.
+    #  Only small int literals are considered, so that they are exact
+    #  as C long and as C double.  Long literals (1L) are left alone,
+    #  as the result must be a Python long.
+    for constant, order in ((operand2, 'ObjC'), (operand1, 'CObj')):
+        if not constant.type.is_pyobject:
+            continue
+        value = constant.constant_result
+        if (isinstance(constant, IntNode) and isinstance(value, (int, long))
+                and not constant.longness):
+            if -2**30 <= value <= 2**30:
+                return 'Int', order, str(int(value))
+        elif isinstance(constant, FloatNode) and isinstance(value, float):
+            return 'Float', order, constant.get_constant_c_result_code()
+    return None
+
+def py_constant_operand_roles(order, op_name='', c_op=''):
+    #  Template values for the constant operand utility code.
+    if order == 'ObjC':
+        obj, a, b = 'op1', 'objval', 'cval'
+    else:
+        obj, a, b = 'op2', 'cval', 'objval'
+    if c_op == '-':
+        no_overflow = '((x^a) >= 0 || (x^~b) >= 0)'
+    else:
+        no_overflow = '((x^a) >= 0 || (x^b) >= 0)'
+    return dict(order=order, op_name=op_name, c_op=c_op, obj=obj, a=a, b=b,
+                no_overflow=no_overflow)
+
 class NumBinopNode(BinopNode):
     #  Binary operation taking numeric arguments.
 
@@ -5799,6 +6275,35 @@ class NumBinopNode(BinopNode):
         "**":       "PyNumber_Power"
     }
 
+    py_constant_fast_paths = {
+        "+":        "Add",
+        "-":        "Subtract",
+    }
+
+    def generate_result_code(self, code):
+        if self.operand1.type.is_pyobject and self.operator in self.py_constant_fast_paths:
+            fast_path = py_constant_operand(self.operand1, self.operand2)
+            if fast_path is not None:
+                kind, order, c_value = fast_path
+                op_name = self.py_constant_fast_paths[self.operator]
+                code.globalstate.use_utility_code(
+                    py_number_constant_binop_utility_code[kind].specialize(
+                        **py_constant_operand_roles(order, op_name, self.operator)))
+                code.putln(
+                    "%s = __Pyx_Py%s_%s%s(%s, %s, %s, %d); %s" % (
+                        self.result(),
+                        kind,
+                        op_name,
+                        order,
+                        self.operand1.py_result(),
+                        self.operand2.py_result(),
+                        c_value,
+                        bool(self.inplace),
+                        code.error_goto_if_null(self.result(), self.pos)))
+                code.put_gotref(self.py_result())
+                return
+        BinopNode.generate_result_code(self, code)
+
 class IntBinopNode(NumBinopNode):
     #  Binary operation taking integer arguments.
 
@@ -6505,10 +7010,23 @@ class CmpNode(object):
                     error_clause(result_code, self.pos)))
         elif (operand1.type.is_pyobject
             and op not in ('is', 'is_not')):
-                code.putln("%s = PyObject_RichCompare(%s, %s, %s); %s" % (
+                fast_path = py_constant_operand(operand1, operand2)
+                if fast_path is not None:
+                    kind, order, c_value = fast_path
+                    code.globalstate.use_utility_code(
+                        py_number_constant_richcmp_utility_code[kind].specialize(
+                            **py_constant_operand_roles(order)))
+                    function = "__Pyx_Py%s_RichCompare%s" % (kind, order)
+                    extra_arg = ", %s" % c_value
+                else:
+                    function = "PyObject_RichCompare"
+                    extra_arg = ""
+                code.putln("%s = %s(%s, %s%s, %s); %s" % (
                         result_code,
+                        function,
                         operand1.py_result(),
                         operand2.py_result(),
+                        extra_arg,
                         richcmp_constants[op],
                         code.error_goto_if_null(result_code, self.pos)))
                 code.put_gotref(result_code)
@@ -6649,6 +7167,7 @@ class PrimaryCmpNode(ExprNode, CmpNode):
     child_attrs = ['operand1', 'operand2', 'cascade']
 
     cascade = None
+    memslice_none_operand = None
 
     def infer_type(self, env):
         # TODO: Actually implement this (after merging with -unstable).
@@ -6675,6 +7194,10 @@ class PrimaryCmpNode(ExprNode, CmpNode):
         if self.cascade:
             self.cascade.analyse_types(env)
 
+        if self.operand1.type.is_memoryviewslice or self.operand2.type.is_memoryviewslice:
+            self.analyse_memoryviewslice_comparison(env)
+            return
+
         if self.operator in ('in', 'not_in'):
             if self.is_c_string_contains():
                 self.is_pycmp = False
@@ -6730,6 +7253,20 @@ class PrimaryCmpNode(ExprNode, CmpNode):
         if self.is_pycmp or self.cascade:
             self.is_temp = 1
 
+    def analyse_memoryviewslice_comparison(self, env):
+        # Only "is None" and "is not None" are supported, they test
+        # whether the slice has a buffer.
+        self.type = PyrexTypes.c_bint_type
+        if self.operator in ('is', 'is_not') and not self.cascade:
+            if isinstance(self.operand2, NoneNode):
+                self.memslice_none_operand = self.operand1
+                return
+            elif isinstance(self.operand1, NoneNode):
+                self.memslice_none_operand = self.operand2
+                return
+        self.invalid_types_error(self.operand1, self.operator, self.operand2)
+        self.type = PyrexTypes.error_type
+
     def analyse_cpp_comparison(self, env):
         type1 = self.operand1.type
         type2 = self.operand2.type
@@ -6762,7 +7299,12 @@ class PrimaryCmpNode(ExprNode, CmpNode):
             return self.operand1.check_const() and self.operand2.check_const()
 
     def calculate_result_code(self):
-        if self.operand1.type.is_complex:
+        if self.memslice_none_operand is not None:
+            if self.operator == 'is':
+                return "(!%s.memview)" % self.memslice_none_operand.result()
+            else:
+                return "(%s.memview != 0)" % self.memslice_none_operand.result()
+        elif self.operand1.type.is_complex:
             if self.operator == "!=":
                 negation = "!"
             else:
@@ -7313,6 +7855,8 @@ class CoerceToTempNode(CoercionNode):
             self.result(), self.arg.result_as(self.ctype())))
         if self.type.is_pyobject and self.use_managed_ref:
             code.put_incref(self.result(), self.ctype())
+        elif self.type.is_memoryviewslice and self.use_managed_ref:
+            code.put_incref_memoryviewslice(self.result())
 
 
 class CloneNode(CoercionNode):
@@ -7427,6 +7971,280 @@ static PyObject *__Pyx_GetName(PyObject *dict, PyObject *name) {
 
 #------------------------------------------------------------------------------------
 
+get_module_global_cached_utility_code = UtilityCode(
+proto = """
+typedef struct {
+#if PY_VERSION_HEX < 0x03030000
+    PyDictEntry *table;
+    Py_ssize_t mask;
+    PyDictEntry *entry;
+#else
+    void *unused[3];
+#endif
+} __Pyx_GlobalLookupCache;
+
+static CYTHON_INLINE PyObject *__Pyx_GetModuleGlobalName(PyObject *module, PyObject *name, __Pyx_GlobalLookupCache *cache); /*proto*/
+""",
+impl = """
+static CYTHON_INLINE PyObject *__Pyx_GetModuleGlobalName(PyObject *module, PyObject *name, __Pyx_GlobalLookupCache *cache) {
+#if PY_VERSION_HEX < 0x03030000
+    /* The cached dict slot stays valid as long as the dict table was not
+       reallocated and the slot still holds the name.  Its value is then
+       always the current one, so no version counter is needed. */
+    PyDictObject *dict = (PyDictObject*) PyModule_GetDict(module);
+    PyDictEntry *entry = cache->entry;
+    #if PY_VERSION_HEX < 0x03020000
+    long hash;
+    #else
+    Py_hash_t hash;
+    #endif
+    if (likely(entry && dict->ma_table == cache->table && dict->ma_mask == cache->mask
+               && entry->me_key == name && entry->me_value)) {
+        Py_INCREF(entry->me_value);
+        return entry->me_value;
+    }
+    if (likely(dict)) {
+        hash = PyObject_Hash(name);
+        if (unlikely(hash == -1)) return NULL;
+        entry = dict->ma_lookup(dict, name, hash);
+        if (unlikely(!entry)) return NULL;
+        if (likely(entry->me_value)) {
+            cache->table = dict->ma_table;
+            cache->mask = dict->ma_mask;
+            cache->entry = entry;
+            Py_INCREF(entry->me_value);
+            return entry->me_value;
+        }
+    }
+#endif
+    return __Pyx_GetName(module, name);
+}
+""",
+requires = [get_name_interned_utility_code])
+
+#------------------------------------------------------------------------------------
+
+py_number_constant_binop_utility_code = {
+'Int' : UtilityCode(
+proto = """
+static PyObject* __Pyx_PyInt_%(op_name)s%(order)s(PyObject *op1, PyObject *op2, long cval, int inplace); /*proto*/
+""",
+impl = """
+static PyObject* __Pyx_PyInt_%(op_name)s%(order)s(PyObject *op1, PyObject *op2, long cval, int inplace) {
+    PyObject *obj = %(obj)s;
+    long objval, a, b, x;
+    #if PY_MAJOR_VERSION < 3
+    if (likely(PyInt_CheckExact(obj))) {
+        objval = PyInt_AS_LONG(obj);
+        a = %(a)s; b = %(b)s;
+        x = (long)((unsigned long)a %(c_op)s b);
+        if (likely(%(no_overflow)s))
+            return PyInt_FromLong(x);
+    } else
+    #endif
+    #if PY_VERSION_HEX >= 0x02070000
+    if (likely(PyLong_CheckExact(obj))) {
+        int overflow;
+        objval = PyLong_AsLongAndOverflow(obj, &overflow);
+        if (likely(!overflow)) {
+            a = %(a)s; b = %(b)s;
+            x = (long)((unsigned long)a %(c_op)s b);
+            if (likely(%(no_overflow)s))
+                return PyLong_FromLong(x);
+        }
+    } else
+    #endif
+    if (PyFloat_CheckExact(obj)) {
+        double fobjval = PyFloat_AS_DOUBLE(obj), fcval = (double)cval;
+        double result = f%(a)s %(c_op)s f%(b)s;
+        return PyFloat_FromDouble(result);
+    }
+    return (inplace ? PyNumber_InPlace%(op_name)s : PyNumber_%(op_name)s)(op1, op2);
+}
+"""),
+'Float' : UtilityCode(
+proto = """
+static PyObject* __Pyx_PyFloat_%(op_name)s%(order)s(PyObject *op1, PyObject *op2, double cval, int inplace); /*proto*/
+""",
+impl = """
+static PyObject* __Pyx_PyFloat_%(op_name)s%(order)s(PyObject *op1, PyObject *op2, double cval, int inplace) {
+    PyObject *obj = %(obj)s;
+    double objval;
+    if (likely(PyFloat_CheckExact(obj))) {
+        objval = PyFloat_AS_DOUBLE(obj);
+    } else
+    #if PY_MAJOR_VERSION < 3
+    if (likely(PyInt_CheckExact(obj))) {
+        objval = (double)PyInt_AS_LONG(obj);
+    } else
+    #endif
+    if (likely(PyLong_CheckExact(obj))) {
+        objval = PyLong_AsDouble(obj);
+        if (unlikely(objval == -1.0 && PyErr_Occurred())) return NULL;
+    } else {
+        return (inplace ? PyNumber_InPlace%(op_name)s : PyNumber_%(op_name)s)(op1, op2);
+    }
+    return PyFloat_FromDouble(%(a)s %(c_op)s %(b)s);
+}
+"""),
+}
+
+py_number_constant_richcmp_utility_code = {
+'Int' : UtilityCode(
+proto = """
+static PyObject* __Pyx_PyInt_RichCompare%(order)s(PyObject *op1, PyObject *op2, long cval, int op); /*proto*/
+""",
+impl = """
+static PyObject* __Pyx_PyInt_RichCompare%(order)s(PyObject *op1, PyObject *op2, long cval, int op) {
+    PyObject *obj = %(obj)s;
+    long objval = 0;
+    int is_c_long = 0;
+    #if PY_MAJOR_VERSION < 3
+    if (likely(PyInt_CheckExact(obj))) {
+        objval = PyInt_AS_LONG(obj);
+        is_c_long = 1;
+    } else
+    #endif
+    #if PY_VERSION_HEX >= 0x02070000
+    if (likely(PyLong_CheckExact(obj))) {
+        int overflow;
+        objval = PyLong_AsLongAndOverflow(obj, &overflow);
+        is_c_long = !overflow;
+    } else
+    #endif
+    if (PyFloat_CheckExact(obj)) {
+        double fobjval = PyFloat_AS_DOUBLE(obj), fcval = (double)cval;
+        double a = f%(a)s, b = f%(b)s;
+        switch (op) {
+            case Py_LT: return __Pyx_PyBool_FromLong(a < b);
+            case Py_LE: return __Pyx_PyBool_FromLong(a <= b);
+            case Py_EQ: return __Pyx_PyBool_FromLong(a == b);
+            case Py_NE: return __Pyx_PyBool_FromLong(a != b);
+            case Py_GT: return __Pyx_PyBool_FromLong(a > b);
+            case Py_GE: return __Pyx_PyBool_FromLong(a >= b);
+        }
+    }
+    if (is_c_long) {
+        long a = %(a)s, b = %(b)s;
+        switch (op) {
+            case Py_LT: return __Pyx_PyBool_FromLong(a < b);
+            case Py_LE: return __Pyx_PyBool_FromLong(a <= b);
+            case Py_EQ: return __Pyx_PyBool_FromLong(a == b);
+            case Py_NE: return __Pyx_PyBool_FromLong(a != b);
+            case Py_GT: return __Pyx_PyBool_FromLong(a > b);
+            case Py_GE: return __Pyx_PyBool_FromLong(a >= b);
+        }
+    }
+    return PyObject_RichCompare(op1, op2, op);
+}
+"""),
+'Float' : UtilityCode(
+proto = """
+static PyObject* __Pyx_PyFloat_RichCompare%(order)s(PyObject *op1, PyObject *op2, double cval, int op); /*proto*/
+""",
+impl = """
+static PyObject* __Pyx_PyFloat_RichCompare%(order)s(PyObject *op1, PyObject *op2, double cval, int op) {
+    PyObject *obj = %(obj)s;
+    if (likely(PyFloat_CheckExact(obj))) {
+        double objval = PyFloat_AS_DOUBLE(obj);
+        double a = %(a)s, b = %(b)s;
+        switch (op) {
+            case Py_LT: return __Pyx_PyBool_FromLong(a < b);
+            case Py_LE: return __Pyx_PyBool_FromLong(a <= b);
+            case Py_EQ: return __Pyx_PyBool_FromLong(a == b);
+            case Py_NE: return __Pyx_PyBool_FromLong(a != b);
+            case Py_GT: return __Pyx_PyBool_FromLong(a > b);
+            case Py_GE: return __Pyx_PyBool_FromLong(a >= b);
+        }
+    }
+    return PyObject_RichCompare(op1, op2, op);
+}
+"""),
+}
+
+#------------------------------------------------------------------------------------
+
+py_method_call_utility_code = UtilityCode(
+proto = """
+static PyObject *__Pyx_PyObject_GetMethod(PyObject *obj, PyObject *name, int *is_unbound); /*proto*/
+static PyObject *__Pyx_PyObject_CallMethod(PyObject *method, PyObject *self, PyObject *args); /*proto*/
+""",
+impl = """
+static PyTypeObject *__Pyx_MethodDescrType(void) {
+    /* PyMethodDescr_Type is not part of the public C-API */
+    static PyTypeObject *method_descr_type = NULL;
+    if (unlikely(!method_descr_type)) {
+        PyObject *descr = PyDict_GetItemString(PyList_Type.tp_dict, "append");
+        if (descr)
+            method_descr_type = Py_TYPE(descr);
+    }
+    return method_descr_type;
+}
+
+/* Returns the plain function or method descriptor that obj.name would
+   be bound from and sets is_unbound, or else the attribute value. */
+static PyObject *__Pyx_PyObject_GetMethod(PyObject *obj, PyObject *name, int *is_unbound) {
+    PyTypeObject *tp = Py_TYPE(obj);
+    PyObject *descr;
+    PyObject **dictptr;
+    *is_unbound = 0;
+    if (likely(tp->tp_getattro == PyObject_GenericGetAttr && tp->tp_dict)) {
+        descr = _PyType_Lookup(tp, name);
+        if (descr && (PyFunction_Check(descr) || (Py_TYPE(descr) == __Pyx_MethodDescrType() &&
+                PyObject_TypeCheck(obj, ((PyMethodDescrObject*)descr)->d_type)))) {
+            dictptr = _PyObject_GetDictPtr(obj);
+            if (!dictptr || !*dictptr || !PyDict_GetItem(*dictptr, name)) {
+                Py_INCREF(descr);
+                *is_unbound = 1;
+                return descr;
+            }
+        }
+    }
+    return PyObject_GetAttr(obj, name);
+}
+
+static PyObject *__Pyx_PyObject_CallMethod(PyObject *method, PyObject *self, PyObject *args) {
+    PyObject *self_args, *result;
+    Py_ssize_t i, nargs;
+    if (!self)
+        return PyObject_Call(method, args, NULL);
+    nargs = PyTuple_GET_SIZE(args);
+    if (Py_TYPE(method) == __Pyx_MethodDescrType()) {
+        PyMethodDef *def = ((PyMethodDescrObject*)method)->d_method;
+        switch (def->ml_flags & (METH_VARARGS | METH_KEYWORDS | METH_NOARGS | METH_O)) {
+            case METH_NOARGS:
+                if (nargs == 0)
+                    return (*def->ml_meth)(self, NULL);
+                break;
+            case METH_O:
+                if (nargs == 1)
+                    return (*def->ml_meth)(self, PyTuple_GET_ITEM(args, 0));
+                break;
+            case METH_VARARGS:
+                return (*def->ml_meth)(self, args);
+            case METH_VARARGS | METH_KEYWORDS:
+                return (*(PyCFunctionWithKeywords)def->ml_meth)(self, args, NULL);
+        }
+        /* argument errors are reported by the generic call below */
+    }
+    self_args = PyTuple_New(nargs + 1);
+    if (unlikely(!self_args))
+        return NULL;
+    Py_INCREF(self);
+    PyTuple_SET_ITEM(self_args, 0, self);
+    for (i = 0; i < nargs; i++) {
+        PyObject *arg = PyTuple_GET_ITEM(args, i);
+        Py_INCREF(arg);
+        PyTuple_SET_ITEM(self_args, i + 1, arg);
+    }
+    result = PyObject_Call(method, self_args, NULL);
+    Py_DECREF(self_args);
+    return result;
+}
+""")
+
+#------------------------------------------------------------------------------------
+
 import_utility_code = UtilityCode(
 proto = """
 static PyObject *__Pyx_Import(PyObject *name, PyObject *from_list); /*proto*/
@@ -7791,6 +8609,48 @@ static CYTHON_INLINE void __Pyx_RaiseNoneNotIterableError(void) {
 
 #------------------------------------------------------------------------------------
 
+list_comp_append_utility_code = UtilityCode(
+proto = """
+static CYTHON_INLINE int __Pyx_ListComp_Append(PyObject* list, PyObject* x) {
+    PyListObject* L = (PyListObject*) list;
+    Py_ssize_t len = Py_SIZE(list);
+    if (likely(L->allocated > len)) {
+        Py_INCREF(x);
+        PyList_SET_ITEM(list, len, x);
+        Py_SIZE(list) = len+1;
+        return 0;
+    }
+    return PyList_Append(list, x);
+}
+""")
+
+list_comp_prealloc_utility_code = UtilityCode(
+proto = """
+static int __Pyx_ListComp_Preallocate(PyObject** list, Py_ssize_t size); /*proto*/
+
+static CYTHON_INLINE Py_ssize_t __Pyx_RangeLengthHint(Py_ssize_t start, Py_ssize_t stop, Py_ssize_t step) {
+    /* unsigned arithmetic: a range that is too long for Py_ssize_t gives a negative hint */
+    return (stop > start) ? (Py_ssize_t) (((size_t)stop - (size_t)start - 1) / (size_t)step + 1) : 0;
+}
+""",
+impl = """
+static int __Pyx_ListComp_Preallocate(PyObject** list, Py_ssize_t size) {
+    PyObject* prealloc;
+    if (size <= 0 || Py_SIZE(*list) != 0)
+        return 0;
+    prealloc = PyList_New(size);
+    if (unlikely(!prealloc))
+        return -1;
+    /* keep the allocated item array but start out empty */
+    Py_SIZE(prealloc) = 0;
+    Py_DECREF(*list);
+    *list = prealloc;
+    return 0;
+}
+""")
+
+#------------------------------------------------------------------------------------
+
 getitem_dict_utility_code = UtilityCode(
 proto = """
 #if PY_MAJOR_VERSION >= 3
@@ -39,7 +39,7 @@ def dumptree(t):
 
 def abort_on_errors(node):
     # Stop the pipeline if there are any errors.
-    if Errors.num_errors != 0:
+    if Errors.current_state().num_errors != 0:
         raise AbortError, "pipeline break"
     return node
 
@@ -68,8 +68,12 @@ class Context(object):
     #  include_directories   [string]
     #  future_directives     [object]
     #  language_level        int     currently 2 or 3 for Python 2/3
+    #  pxd_cache             PxdCache or None   Analysed pxds shared between contexts
+    #  main_module_name      string  Name of the module being compiled
+    #  profiler              PipelineProfiler or None   Records the phases run
 
-    def __init__(self, include_directories, compiler_directives, cpp=False, language_level=2):
+    def __init__(self, include_directories, compiler_directives, cpp=False,
+                 language_level=2, pxd_cache=None):
         import Builtin, CythonScope
         self.modules = {"__builtin__" : Builtin.builtin_scope}
         self.modules["cython"] = CythonScope.create_cython_scope(self)
@@ -77,6 +81,9 @@ class Context(object):
         self.future_directives = set()
         self.compiler_directives = compiler_directives
         self.cpp = cpp
+        self.pxd_cache = pxd_cache
+        self.main_module_name = None
+        self.profiler = None
 
         self.pxds = {} # full name -> node tree
 
@@ -102,6 +109,7 @@ class Context(object):
         from ParseTreeTransforms import AnalyseDeclarationsTransform, AnalyseExpressionsTransform
         from ParseTreeTransforms import CreateClosureClasses, MarkClosureVisitor, DecoratorTransform
         from ParseTreeTransforms import InterpretCompilerDirectives, TransformBuiltinMethods
+        from ParseTreeTransforms import ParallelRangeTransform
         from ParseTreeTransforms import ExpandInplaceOperators
         from TypeInference import MarkAssignments, MarkOverflowingArithmetic
         from ParseTreeTransforms import AlignFunctionDefinitions, GilCheck
@@ -110,7 +118,7 @@ class Context(object):
         from Optimize import FlattenInListTransform, SwitchTransform, IterationTransform
         from Optimize import EarlyReplaceBuiltinCalls, OptimizeBuiltinCalls
         from Optimize import ConstantFolding, FinalOptimizePhase
-        from Optimize import DropRefcountingTransform
+        from Optimize import DropRefcountingTransform, BufferIndexRangeTransform
         from Buffer import IntroduceBufferAuxiliaryVars
         from ModuleNode import check_c_declarations, check_c_declarations_pxd
 
@@ -131,6 +139,7 @@ class Context(object):
             PostParse(self),
             _specific_post_parse,
             InterpretCompilerDirectives(self, self.compiler_directives),
+            ParallelRangeTransform(self),
             _align_function_definitions,
             MarkClosureVisitor(self),
             ConstantFolding(),
@@ -151,6 +160,7 @@ class Context(object):
             ExpandInplaceOperators(self),
             OptimizeBuiltinCalls(self),  ## Necessary?
             IterationTransform(),
+            BufferIndexRangeTransform(),
             SwitchTransform(),
             DropRefcountingTransform(),
             FinalOptimizePhase(self),
@@ -221,7 +231,13 @@ class Context(object):
 
     def process_pxd(self, source_desc, scope, module_name):
         pipeline = self.create_pxd_pipeline(scope, module_name)
-        result = self.run_pipeline(pipeline, source_desc)
+        if self.profiler is not None:
+            self.profiler.enter_module(module_name, 'pxd')
+        try:
+            result = self.run_pipeline(pipeline, source_desc)
+        finally:
+            if self.profiler is not None:
+                self.profiler.exit_module()
         return result
 
     def nonfatal_error(self, exc):
@@ -237,7 +253,10 @@ class Context(object):
                         if DebugFlags.debug_verbose_pipeline:
                             t = time()
                             print "Entering pipeline phase %r" % phase
-                        data = phase(data)
+                        if self.profiler is not None:
+                            data = self.profiler.run_phase(phase, data)
+                        else:
+                            data = phase(data)
                         if DebugFlags.debug_verbose_pipeline:
                             print "    %.3f seconds" % (time() - t)
             except CompileError, err:
@@ -246,7 +265,7 @@ class Context(object):
                 error = err
         except InternalError, err:
             # Only raise if there was not an earlier error
-            if Errors.num_errors == 0:
+            if Errors.current_state().num_errors == 0:
                 raise
             error = err
         except AbortError, err:
@@ -307,6 +326,13 @@ class Context(object):
                         pass
                     else:
                         error(pos, "'%s.pxd' not found" % module_name)
+            if pxd_pathname and self.pxd_cache is not None:
+                shared_scope = self.pxd_cache.lookup(
+                    self, scope.qualified_name, pxd_pathname)
+                if shared_scope is not None:
+                    if debug_find_module:
+                        print("Context.find_module: Reusing %s" % pxd_pathname)
+                    return shared_scope
             if pxd_pathname:
                 try:
                     if debug_find_module:
@@ -315,11 +341,14 @@ class Context(object):
                     if not pxd_pathname.endswith(rel_path):
                         rel_path = pxd_pathname # safety measure to prevent printing incorrect paths
                     source_desc = FileSourceDescriptor(pxd_pathname, rel_path)
+                    num_errors = Errors.current_state().num_errors
                     err, result = self.process_pxd(source_desc, scope, module_name)
                     if err:
                         raise err
                     (pxd_codenodes, pxd_scope) = result
                     self.pxds[module_name] = (pxd_codenodes, pxd_scope)
+                    if self.pxd_cache is not None and Errors.current_state().num_errors == num_errors:
+                        self.pxd_cache.store(self, pxd_scope, pxd_codenodes, pxd_pathname)
                 except CompileError:
                     pass
         return scope
@@ -431,7 +460,7 @@ class Context(object):
         c_path = Utils.replace_suffix(source_path, ".c")
         if not os.path.exists(c_path):
             return 1
-        c_time = Utils.modification_time(c_path)
+        c_time = Utils.generated_time(c_path)
         if Utils.file_newer_than(source_path, c_time):
             return 1
         pos = [source_path]
@@ -505,7 +534,7 @@ class Context(object):
             #import traceback
             #traceback.print_exc()
             error((source_desc, 0, 0), "Decoding error, missing or incorrect coding=<encoding-name> at top of source (%s)" % msg)
-        if Errors.num_errors > 0:
+        if Errors.current_state().num_errors > 0:
             raise CompileError
         return tree
 
@@ -529,21 +558,24 @@ class Context(object):
         return ".".join(names)
 
     def setup_errors(self, options, result):
-        Errors.reset() # clear any remaining error state
+        # Returns a new ErrorState for the compilation.
         if options.use_listing_file:
-            result.listing_file = Utils.replace_suffix(source, ".lis")
-            path = result.listing_file
+            result.listing_file = Utils.replace_suffix(result.main_source_file, ".lis")
+            listing_file = Utils.open_new_file(result.listing_file)
+        else:
+            listing_file = None
+        if options.errors_to_stderr:
+            echo_file = sys.stderr
         else:
-            path = None
-        Errors.open_listing_file(path=path,
-                                 echo_to_stderr=options.errors_to_stderr)
+            echo_file = None
+        return Errors.ErrorState(listing_file, echo_file)
 
-    def teardown_errors(self, err, options, result):
+    def teardown_errors(self, errors, err, options, result):
         source_desc = result.compilation_source.source_desc
         if not isinstance(source_desc, FileSourceDescriptor):
             raise RuntimeError("Only file sources for code supported")
-        Errors.close_listing_file()
-        result.num_errors = Errors.num_errors
+        errors.close_listing_file()
+        result.num_errors = errors.num_errors
         if result.num_errors > 0:
             err = True
         if err and result.c_file:
@@ -558,6 +590,7 @@ def create_parse(context):
         source_desc = compsrc.source_desc
         full_module_name = compsrc.full_module_name
         initial_pos = (source_desc, 1, 0)
+        context.main_module_name = full_module_name
         scope = context.find_module(full_module_name, pos = initial_pos, need_pxd = 0)
         tree = context.parse(source_desc, scope, pxd = 0, full_module_name = full_module_name)
         tree.compilation_source = compsrc
@@ -587,6 +620,7 @@ def run_pipeline(source, options, full_module_name = None):
 
     # Set up source object
     cwd = os.getcwd()
+    source_path = source
     abs_path = os.path.abspath(source)
     source_ext = os.path.splitext(source)[1]
     full_module_name = full_module_name or context.extract_module_name(source, options)
@@ -602,17 +636,70 @@ def run_pipeline(source, options, full_module_name = None):
     # Set up result object
     result = create_default_resultobj(source, options)
 
+    dependency_tree = None
+    if options.cache or options.depfile:
+        from Cython.Build.Dependencies import DependencyTree, write_depfile
+        dependency_tree = DependencyTree(context)
+
+    # Look up the generated code in the compilation cache
+    cache = fingerprint = None
+    if options.cache:
+        from Cython.Build.Cache import Cache
+        cache = Cache(options.cache, options.cache_size)
+        fingerprint = cache.transitive_fingerprint(
+            dependency_tree, abs_path, options, full_module_name)
+        if fingerprint is not None and cache.load_from_cache(result.c_file, fingerprint):
+            load_result_from_cache(result)
+            if options.depfile:
+                write_depfile(dependency_tree, source_path, result.c_file)
+            cache.save_stats()
+            return result
+
     # Get pipeline
     if source_ext.lower() == '.py':
         pipeline = context.create_py_pipeline(options, result)
     else:
         pipeline = context.create_pyx_pipeline(options, result)
 
-    context.setup_errors(options, result)
-    err, enddata = context.run_pipeline(pipeline, source)
-    context.teardown_errors(err, options, result)
+    if options.profile_pipeline:
+        from PipelineProfiler import PipelineProfiler
+        context.profiler = PipelineProfiler()
+        context.profiler.enter_module(full_module_name, source_ext.lower()[1:])
+
+    # Errors are reported to the ErrorState of the compilation, so that
+    # several compilations can run in different threads.
+    errors = context.setup_errors(options, result)
+    previous_errors = Errors.install_state(errors)
+    try:
+        err, enddata = context.run_pipeline(pipeline, source)
+    finally:
+        Errors.install_state(previous_errors)
+    context.teardown_errors(errors, err, options, result)
+
+    if context.profiler is not None:
+        context.profiler.save(options.profile_pipeline, full_module_name, abs_path)
+
+    if options.depfile and result.c_file and not result.num_errors:
+        write_depfile(dependency_tree, source_path, result.c_file)
+
+    if cache is not None:
+        if fingerprint is not None and result.c_file and not result.num_errors:
+            cache.store_result(fingerprint, result)
+            cache.cleanup_cache()
+        cache.save_stats()
+    if options.pxd_cache is not None:
+        options.pxd_cache.save()
     return result
 
+def load_result_from_cache(result):
+    # Fill in the output files restored from the compilation cache.
+    result.num_errors = 0
+    for name, suffix in [('h_file', '.h'), ('api_file', '_api.h'),
+                         ('i_file', '.pxi'), ('dep_file', '.dep')]:
+        path = Utils.replace_suffix(result.c_file, suffix)
+        if os.path.exists(path):
+            setattr(result, name, path)
+
 
 #------------------------------------------------------------------------
 #
@@ -648,6 +735,13 @@ class CompilationOptions(object):
     compiler_directives  dict      Overrides for pragma options (see Options.py)
     evaluate_tree_assertions boolean  Test support: evaluate parse tree assertions
     language_level    integer   The Python language level: 2 or 3
+    cache             string    Directory of the compilation cache, or None
+    cache_size        integer   Maximum size of the compilation cache in bytes
+    pxd_cache         PxdCache  Share analysed .pxd files between compilations
+    profile_pipeline  string    Append the time spent in each compiler phase
+                                to this file (see PipelineProfiler.py)
+    depfile           boolean   Write a gcc style depfile (<c file>.dep) listing
+                                the files that the C file depends on
 
     cplus             boolean   Compile as c++ code
     """
@@ -664,7 +758,7 @@ class CompilationOptions(object):
 
     def create_context(self):
         return Context(self.include_path, self.compiler_directives,
-                      self.cplus, self.language_level)
+                      self.cplus, self.language_level, self.pxd_cache)
 
 
 class CompilationResult(object):
@@ -675,10 +769,14 @@ class CompilationResult(object):
     h_file           string or None   The generated C header file
     i_file           string or None   The generated .pxi file
     api_file         string or None   The generated C API .h file
+    dep_file         string or None   The generated .dep file
+    c_file_changed   boolean          False if the C file was left untouched
+                                      because the generated code did not change
     listing_file     string or None   File of error messages
     object_file      string or None   Result of compiling the C file
     extension_file   string or None   Result of linking the object file
     num_errors       integer          Number of compilation errors
+    utility_code_count integer or None Number of utility code blocks in c_file
     compilation_source CompilationSource
     """
 
@@ -687,10 +785,13 @@ class CompilationResult(object):
         self.h_file = None
         self.i_file = None
         self.api_file = None
+        self.dep_file = None
         self.listing_file = None
         self.object_file = None
         self.extension_file = None
         self.main_source_file = None
+        self.utility_code_count = None
+        self.c_file_changed = True
 
 
 class CompilationResultSet(dict):
@@ -784,7 +885,12 @@ def setuptools_main():
     return main(command_line = 1)
 
 def main(command_line = 0):
-    args = sys.argv[1:]
+    if run_main(sys.argv[1:], command_line):
+        sys.exit(1)
+
+def run_main(args, command_line = 0):
+    # Compile the sources given in args, which are parsed as a command line
+    # if command_line is true.  Returns true if there were failures.
     any_failures = 0
     if command_line:
         from CmdLine import parse_command_line
@@ -804,8 +910,7 @@ def main(command_line = 0):
     except (EnvironmentError, PyrexError), e:
         sys.stderr.write(str(e) + '\n')
         any_failures = 1
-    if any_failures:
-        sys.exit(1)
+    return any_failures
 
 
 
@@ -834,4 +939,9 @@ default_options = dict(
     relative_path_in_code_position_comments = True,
     language_level = 2,
     gdb_debug = False,
+    cache = None,
+    cache_size = None,
+    pxd_cache = None,
+    profile_pipeline = None,
+    depfile = False,
 )
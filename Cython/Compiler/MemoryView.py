@@ -0,0 +1,618 @@
+#
+#   Typed memoryview slices
+#
+#   A memoryview slice (e.g. "double[:, ::1]") is a C struct that is
+#   passed around by value.  It points to a reference counted holder
+#   for the acquired buffer (or for a copy of the data), so slicing,
+#   copying the struct and passing it to nogil functions does not need
+#   the GIL.  Only the final release of a buffer acquires it.
+#
+
+from Errors import CompileError, error
+from Code import UtilityCode
+import PyrexTypes
+
+max_ndim = 8
+
+valid_dtype_description = "numeric or struct type"
+
+def valid_dtype(dtype):
+    dtype = dtype.resolve()
+    if dtype.is_pyobject or dtype.is_ptr or dtype.is_error:
+        return False
+    return (dtype.is_int or dtype.is_float or dtype.is_complex or
+            dtype.is_struct and dtype.is_complete())
+
+def get_axes_contig(env, axes):
+    # Returns the contiguity ('C', 'F' or None) declared by the axes of
+    # a memoryview slice type, e.g. "[:, ::1]".  Only one axis may be
+    # declared with unit stride ('::1'), and it must be the first or
+    # the last one.
+    import ExprNodes
+    contig_axis = None
+    ndim = len(axes)
+    for i, axis in enumerate(axes):
+        if not isinstance(axis, ExprNodes.SliceNode):
+            raise CompileError(axis.pos,
+                "An axis specification in a memoryview slice declaration must be ':' or '::1'.")
+        if not (isinstance(axis.start, ExprNodes.NoneNode) and
+                isinstance(axis.stop, ExprNodes.NoneNode)):
+            raise CompileError(axis.pos,
+                "Only the step of an axis can be specified in a memoryview slice declaration.")
+        if isinstance(axis.step, ExprNodes.NoneNode):
+            continue
+        try:
+            step = axis.step.compile_time_value(env)
+        except CompileError:
+            step = None
+        if step != 1:
+            raise CompileError(axis.step.pos,
+                "Only a step of 1 ('::1') is supported in a memoryview slice declaration.")
+        if contig_axis is not None:
+            raise CompileError(axis.pos,
+                "Only one axis can be declared contiguous ('::1').")
+        if i not in (0, ndim - 1):
+            raise CompileError(axis.pos,
+                "Only the first or the last axis can be declared contiguous ('::1').")
+        contig_axis = i
+    if contig_axis is None:
+        return None
+    elif contig_axis == ndim - 1:
+        return 'C'
+    else:
+        return 'F'
+
+def contig_axis_index(slice_type):
+    # The axis with unit stride, or -1.
+    if slice_type.contig == 'C':
+        return slice_type.ndim - 1
+    elif slice_type.contig == 'F':
+        return 0
+    else:
+        return -1
+
+#
+# Indexing
+#
+# The axes of an index into a memoryview slice are given as a list of
+# ('index', node) and ('slice', start, stop, step) tuples, one per axis
+# of the sliced type.  The nodes of a slice may be None.
+#
+
+def unellipsify(pos, indices, ndim):
+    # Expands a single Ellipsis in the index nodes to full slices and
+    # appends full slices for the remaining axes.
+    import ExprNodes
+    result = []
+    seen_ellipsis = False
+    for index in indices:
+        if isinstance(index, ExprNodes.EllipsisNode):
+            if seen_ellipsis:
+                error(index.pos, "More than one Ellipsis in memoryview slice index")
+                continue
+            seen_ellipsis = True
+            nfull = ndim - len(indices) + 1
+            result.extend([None] * nfull)
+        else:
+            result.append(index)
+    if len(result) > ndim:
+        error(pos, "Too many indices for memoryview slice of %d dimensions" % ndim)
+        return None
+    result.extend([None] * (ndim - len(result)))
+    axes = []
+    for index in result:
+        if index is None:
+            axes.append(('slice', None, None, None))
+        elif isinstance(index, ExprNodes.SliceNode):
+            parts = []
+            for node in (index.start, index.stop, index.step):
+                if isinstance(node, ExprNodes.NoneNode):
+                    node = None
+                parts.append(node)
+            axes.append(('slice',) + tuple(parts))
+        else:
+            axes.append(('index', index))
+    return axes
+
+def is_unit_step(step):
+    # Whether the step of a slice is known to be 1 at compile time.
+    return step is None or step.has_constant_result() and step.constant_result == 1
+
+def get_sliced_type(slice_type, axes):
+    # Returns the type of indexing slice_type with the axes, or the
+    # dtype if all axes are indexed.
+    ndim = len([axis for axis in axes if axis[0] == 'slice'])
+    if ndim == 0:
+        return slice_type.dtype
+    contig = None
+    if slice_type.contig == 'C':
+        axis = axes[-1]
+        if axis[0] == 'slice' and is_unit_step(axis[3]):
+            contig = 'C'
+    elif slice_type.contig == 'F':
+        axis = axes[0]
+        if axis[0] == 'slice' and is_unit_step(axis[3]):
+            contig = 'F'
+    if ndim == 1 and contig == 'F':
+        contig = 'C'
+    return PyrexTypes.MemoryViewSliceType(slice_type.dtype, ndim, contig)
+
+def axis_nodes(axes):
+    # The index nodes in the axes, in evaluation order.
+    nodes = []
+    for axis in axes:
+        for node in axis[1:]:
+            if node is not None:
+                nodes.append(node)
+    return nodes
+
+def put_nonecheck(code, slice_cname, pos):
+    code.globalstate.use_utility_code(raise_none_memviewslice_index_code)
+    code.putln("if (%s) {" % code.unlikely("!%s.memview" % slice_cname))
+    code.putln("__Pyx_RaiseNoneMemviewSliceIndexError();")
+    code.putln(code.error_goto(pos))
+    code.putln("}")
+
+def put_index_temps(code, index_nodes):
+    # The bounds checks modify the indices, so they are copied into temps.
+    temps = []
+    for node in index_nodes:
+        temp = code.funcstate.allocate_temp(node.type, manage_ref=False)
+        code.putln("%s = %s;" % (temp, node.result()))
+        temps.append(temp)
+    return temps
+
+def release_index_temps(code, temps):
+    for temp in temps:
+        code.funcstate.release_temp(temp)
+
+def get_item_pointer_code(code, slice_cname, slice_type, index_signeds,
+                          index_temps, directives, pos, nogil, in_bounds=None):
+    """
+    Generates the index checks for accessing an item of a memoryview
+    slice and returns a C expression for the pointer to the item.
+    The index temps are modified in place.
+    """
+    import Buffer
+    ndim = slice_type.ndim
+    Buffer.put_bounds_check_code(
+        index_signeds, index_temps,
+        ["%s.shape[%d]" % (slice_cname, i) for i in range(ndim)],
+        directives['boundscheck'], directives['wraparound'], pos, code, nogil,
+        in_bounds)
+    mode = {'C': 'c', 'F': 'fortran', None: 'strided'}[slice_type.contig]
+    return Buffer.get_buffer_lookup_code(
+        mode, PyrexTypes.c_ptr_type(slice_type.dtype),
+        "%s.data" % slice_cname, index_temps,
+        ["%s.strides[%d]" % (slice_cname, i) for i in range(ndim)],
+        None, code)
+
+def put_slice_code(code, dst, src, axes, directives, pos, nogil, owned=True):
+    """
+    Generates code that makes the memoryview slice dst a view of the
+    axes of src.  With owned, dst gets its own acquisition of
+    the buffer, otherwise it borrows the one of src.
+    """
+    code.globalstate.use_utility_code(memviewslice_slice_code)
+    import Buffer
+    code.putln("%s.data = %s.data;" % (dst, src))
+    index_axes = [(i, axis) for i, axis in enumerate(axes) if axis[0] == 'index']
+    if index_axes:
+        index_nodes = [axis[1] for i, axis in index_axes]
+        index_temps = put_index_temps(code, index_nodes)
+        Buffer.put_bounds_check_code(
+            [node.type.signed for node in index_nodes], index_temps,
+            ["%s.shape[%d]" % (src, i) for i, axis in index_axes],
+            directives['boundscheck'], directives['wraparound'], pos, code, nogil)
+        for (i, axis), temp in zip(index_axes, index_temps):
+            code.putln("%s.data += %s * %s.strides[%d];" % (dst, temp, src, i))
+        release_index_temps(code, index_temps)
+    new_axis = 0
+    for i, axis in enumerate(axes):
+        if axis[0] == 'index':
+            continue
+        start, stop, step = axis[1:]
+        if start is None and stop is None and step is None:
+            code.putln("%s.shape[%d] = %s.shape[%d];" % (dst, new_axis, src, i))
+            code.putln("%s.strides[%d] = %s.strides[%d];" % (dst, new_axis, src, i))
+        else:
+            args = []
+            for node in (start, stop, step):
+                if node is None:
+                    args.append("0")
+                else:
+                    args.append(node.result())
+            for node in (start, stop, step):
+                args.append(str(int(node is not None)))
+            code.putln(code.error_goto_if(
+                "__Pyx_memviewslice_slice_axis(&%s, %d, %s.shape[%d], %s.strides[%d], %s) < 0" % (
+                    dst, new_axis, src, i, src, i, ", ".join(args)), pos))
+        new_axis += 1
+    code.putln("%s.memview = %s.memview;" % (dst, src))
+    if owned:
+        code.putln("__Pyx_INC_MEMVIEW(&%s);" % dst)
+
+def put_assign_to_slice_contents(code, dst, src, slice_type, pos):
+    # Copies the items of the memoryview slice src into the ones of dst.
+    code.globalstate.use_utility_code(memviewslice_copy_code)
+    code.putln(code.error_goto_if_neg(
+        "__Pyx_CopyMemviewSliceContents(&%s, &%s, %d, sizeof(%s))" % (
+            src, dst, slice_type.ndim, slice_type.dtype.declaration_code("")), pos))
+
+#
+# Utility code
+#
+
+class MemoryViewSliceFromPyUtilityCode(object):
+    # Generates the function that acquires a memoryview slice of the
+    # given type from a Python object.  Dedups by function name.
+
+    def __init__(self, slice_type):
+        self.type = slice_type
+        self.header = "static __Pyx_memviewslice %s(PyObject *obj)" % slice_type.from_py_function
+
+    def __eq__(self, other):
+        return isinstance(other, MemoryViewSliceFromPyUtilityCode) and self.header == other.header
+    def __hash__(self):
+        return hash(self.header)
+
+    def put_code(self, output):
+        import Buffer
+        output.use_utility_code(memviewslice_declare_code)
+        output.use_utility_code(Buffer.buffer_format_check_code)
+        output.use_utility_code(memviewslice_from_py_code)
+        code = output['utility_code_def']
+        proto = output['utility_code_proto']
+        dtype = self.type.dtype
+        typeinfo = Buffer.get_type_information_cname(code, dtype)
+        proto.putln("%s; /*proto*/" % self.header)
+        code.putln("%s {" % self.header)
+        code.putln("__Pyx_memviewslice result;")
+        code.putln("__Pyx_BufFmt_StackElem stack[%d];" % dtype.struct_nesting_depth())
+        code.putln("__Pyx_GetMemviewSlice(obj, &result, &%s, %d, %d, stack);" % (
+            typeinfo, self.type.ndim, contig_axis_index(self.type)))
+        code.putln("return result;")
+        code.putln("}")
+        code.putln("")
+
+
+memviewslice_declare_code = UtilityCode(
+proto_block = 'utility_code_proto_before_types',
+proto = """
+/* Holds the acquired buffer (or copied data) of memoryview slices */
+typedef struct {
+  Py_buffer view;
+  void (*release)(Py_buffer *); /* NULL for copies */
+  volatile long acquisition_count;
+} __Pyx_memview;
+
+typedef struct {
+  __Pyx_memview *memview;
+  char *data;
+  Py_ssize_t shape[%(max_ndim)d];
+  Py_ssize_t strides[%(max_ndim)d];
+} __Pyx_memviewslice;
+
+#define __Pyx_MEMVIEWSLICE_INIT {0, 0, {0}, {0}}
+
+#if defined(__GNUC__) && (__GNUC__ > 4 || (__GNUC__ == 4 && __GNUC_MINOR__ >= 1))
+  #define __pyx_atomic_incr(value) __sync_fetch_and_add(value, 1)
+  #define __pyx_atomic_decr(value) __sync_fetch_and_sub(value, 1)
+#elif defined(_MSC_VER)
+  #include <intrin.h>
+  #define __pyx_atomic_incr(value) (_InterlockedIncrement(value) - 1)
+  #define __pyx_atomic_decr(value) (_InterlockedDecrement(value) + 1)
+#else
+  #define __pyx_atomic_incr(value) ((*(value))++)
+  #define __pyx_atomic_decr(value) ((*(value))--)
+#endif
+
+static void __Pyx_ReleaseMemview(__Pyx_memview *memview); /*proto*/
+
+static CYTHON_INLINE void __Pyx_INC_MEMVIEW(__Pyx_memviewslice *slice) {
+  if (slice->memview)
+    __pyx_atomic_incr(&slice->memview->acquisition_count);
+}
+
+static CYTHON_INLINE void __Pyx_XDEC_MEMVIEW(__Pyx_memviewslice *slice) {
+  __Pyx_memview *memview = slice->memview;
+  if (memview && __pyx_atomic_decr(&memview->acquisition_count) == 1)
+    __Pyx_ReleaseMemview(memview);
+}
+""" % {'max_ndim': max_ndim},
+impl = """
+static void __Pyx_ReleaseMemview(__Pyx_memview *memview) {
+  if (memview->release) {
+    #ifdef WITH_THREAD
+    PyGILState_STATE gilstate = PyGILState_Ensure();
+    #endif
+    memview->release(&memview->view);
+    #ifdef WITH_THREAD
+    PyGILState_Release(gilstate);
+    #endif
+  } else {
+    free(memview->view.buf);
+  }
+  free(memview);
+}
+""")
+
+raise_none_memviewslice_index_code = UtilityCode(
+proto = """
+static void __Pyx_RaiseNoneMemviewSliceIndexError(void); /*proto*/
+""",
+impl = """
+static void __Pyx_RaiseNoneMemviewSliceIndexError(void) {
+  #ifdef WITH_THREAD
+  PyGILState_STATE gilstate = PyGILState_Ensure();
+  #endif
+  PyErr_SetString(PyExc_TypeError, "Cannot index None memoryview slice");
+  #ifdef WITH_THREAD
+  PyGILState_Release(gilstate);
+  #endif
+}
+""")
+
+memviewslice_from_py_code = UtilityCode(
+proto = """
+static int __Pyx_GetMemviewSlice(PyObject *obj, __Pyx_memviewslice *slice,
+                                 __Pyx_TypeInfo *dtype, int ndim, int contig_axis,
+                                 __Pyx_BufFmt_StackElem *stack); /*proto*/
+""",
+impl = """
+static int __Pyx_GetMemviewSlice(PyObject *obj, __Pyx_memviewslice *slice,
+                                 __Pyx_TypeInfo *dtype, int ndim, int contig_axis,
+                                 __Pyx_BufFmt_StackElem *stack) {
+  __Pyx_memview *memview;
+  Py_buffer *buf;
+  Py_ssize_t stride;
+  int i;
+  memset(slice, 0, sizeof(__Pyx_memviewslice));
+  if (obj == Py_None)
+    return 0;
+  memview = (__Pyx_memview *) malloc(sizeof(__Pyx_memview));
+  if (!memview) {
+    PyErr_NoMemory();
+    return -1;
+  }
+  buf = &memview->view;
+  if (__Pyx_GetBuffer(obj, buf, PyBUF_FORMAT | PyBUF_STRIDES | PyBUF_WRITABLE) == -1) {
+    free(memview);
+    return -1;
+  }
+  memview->release = __Pyx_ReleaseBuffer;
+  memview->acquisition_count = 1;
+  if (buf->ndim != ndim) {
+    PyErr_Format(PyExc_ValueError,
+                 "Buffer has wrong number of dimensions (expected %d, got %d)",
+                 ndim, buf->ndim);
+    goto fail;
+  }
+  if (__Pyx_BufFmt_CheckCachedString(stack, dtype, buf->format) < 0) goto fail;
+  if ((unsigned)buf->itemsize != dtype->size) {
+    PyErr_Format(PyExc_ValueError,
+      "Item size of buffer (%"PY_FORMAT_SIZE_T"d byte%s) does not match size of '%s' (%"PY_FORMAT_SIZE_T"d byte%s)",
+      buf->itemsize, (buf->itemsize > 1) ? "s" : "",
+      dtype->name,
+      dtype->size, (dtype->size > 1) ? "s" : "");
+    goto fail;
+  }
+  if (buf->suboffsets) {
+    for (i = 0; i < ndim; i++) {
+      if (buf->suboffsets[i] >= 0) {
+        PyErr_SetString(PyExc_ValueError,
+                        "Buffers with indirect dimensions are not supported");
+        goto fail;
+      }
+    }
+  }
+  stride = buf->itemsize;
+  for (i = ndim - 1; i >= 0; i--) {
+    slice->shape[i] = buf->shape[i];
+    if (buf->strides) {
+      slice->strides[i] = buf->strides[i];
+    } else {
+      slice->strides[i] = stride;
+      stride *= buf->shape[i];
+    }
+  }
+  if (contig_axis >= 0 && slice->shape[contig_axis] > 1 &&
+      slice->strides[contig_axis] != buf->itemsize) {
+    PyErr_Format(PyExc_ValueError,
+                 "Buffer is not contiguous in dimension %d", contig_axis);
+    goto fail;
+  }
+  slice->memview = memview;
+  slice->data = (char *) buf->buf;
+  return 0;
+fail:
+  __Pyx_ReleaseBuffer(buf);
+  free(memview);
+  return -1;
+}
+""")
+
+memviewslice_slice_code = UtilityCode(
+proto = """
+static int __Pyx_memviewslice_slice_axis(__Pyx_memviewslice *dst, int new_axis,
+                                         Py_ssize_t shape, Py_ssize_t stride,
+                                         Py_ssize_t start, Py_ssize_t stop, Py_ssize_t step,
+                                         int have_start, int have_stop, int have_step); /*proto*/
+""",
+impl = """
+static int __Pyx_memviewslice_slice_axis(__Pyx_memviewslice *dst, int new_axis,
+                                         Py_ssize_t shape, Py_ssize_t stride,
+                                         Py_ssize_t start, Py_ssize_t stop, Py_ssize_t step,
+                                         int have_start, int have_stop, int have_step) {
+  Py_ssize_t new_shape;
+  if (!have_step) {
+    step = 1;
+  } else if (step == 0) {
+    #ifdef WITH_THREAD
+    PyGILState_STATE gilstate = PyGILState_Ensure();
+    #endif
+    PyErr_SetString(PyExc_ValueError, "slice step cannot be zero");
+    #ifdef WITH_THREAD
+    PyGILState_Release(gilstate);
+    #endif
+    return -1;
+  }
+  /* Clip the bounds like Python does */
+  if (have_start) {
+    if (start < 0) {
+      start += shape;
+      if (start < 0) start = (step < 0) ? -1 : 0;
+    } else if (start >= shape) {
+      start = (step < 0) ? shape - 1 : shape;
+    }
+  } else {
+    start = (step < 0) ? shape - 1 : 0;
+  }
+  if (have_stop) {
+    if (stop < 0) {
+      stop += shape;
+      if (stop < 0) stop = (step < 0) ? -1 : 0;
+    } else if (stop >= shape) {
+      stop = (step < 0) ? shape - 1 : shape;
+    }
+  } else {
+    stop = (step < 0) ? -1 : shape;
+  }
+  if ((step < 0 && stop >= start) || (step > 0 && start >= stop)) {
+    new_shape = 0;
+  } else if (step < 0) {
+    new_shape = (stop - start + 1) / step + 1;
+  } else {
+    new_shape = (stop - start - 1) / step + 1;
+  }
+  dst->data += start * stride;
+  dst->shape[new_axis] = new_shape;
+  dst->strides[new_axis] = stride * step;
+  return 0;
+}
+""")
+
+memviewslice_copy_code = UtilityCode(
+proto = """
+static __Pyx_memviewslice __Pyx_CopyMemviewSlice(__Pyx_memviewslice src, int ndim, size_t itemsize); /*proto*/
+static int __Pyx_CopyMemviewSliceContents(__Pyx_memviewslice *src, __Pyx_memviewslice *dst,
+                                          int ndim, size_t itemsize); /*proto*/
+""",
+impl = """
+static void __pyx_copy_strided(char *src_data, Py_ssize_t *src_strides,
+                               char *dst_data, Py_ssize_t *dst_strides,
+                               Py_ssize_t *shape, int ndim, size_t itemsize) {
+  Py_ssize_t i;
+  Py_ssize_t extent = shape[0];
+  Py_ssize_t src_stride = src_strides[0];
+  Py_ssize_t dst_stride = dst_strides[0];
+  if (ndim == 1) {
+    if (src_stride == (Py_ssize_t)itemsize && dst_stride == (Py_ssize_t)itemsize) {
+      memcpy(dst_data, src_data, itemsize * extent);
+    } else {
+      for (i = 0; i < extent; i++) {
+        memcpy(dst_data, src_data, itemsize);
+        src_data += src_stride;
+        dst_data += dst_stride;
+      }
+    }
+  } else {
+    for (i = 0; i < extent; i++) {
+      __pyx_copy_strided(src_data, src_strides + 1, dst_data, dst_strides + 1,
+                         shape + 1, ndim - 1, itemsize);
+      src_data += src_stride;
+      dst_data += dst_stride;
+    }
+  }
+}
+
+static void __pyx_memviewslice_raise(PyObject *exc_type, const char *msg) {
+  #ifdef WITH_THREAD
+  PyGILState_STATE gilstate = PyGILState_Ensure();
+  #endif
+  PyErr_SetString(exc_type, msg);
+  #ifdef WITH_THREAD
+  PyGILState_Release(gilstate);
+  #endif
+}
+
+/* Returns a C contiguous copy of the slice, with a new acquisition */
+static __Pyx_memviewslice __Pyx_CopyMemviewSlice(__Pyx_memviewslice src, int ndim, size_t itemsize) {
+  __Pyx_memviewslice dst;
+  __Pyx_memview *memview;
+  Py_ssize_t size = itemsize;
+  int i;
+  memset(&dst, 0, sizeof(__Pyx_memviewslice));
+  if (!src.memview) {
+    __pyx_memviewslice_raise(PyExc_AttributeError, "'NoneType' object has no attribute 'copy'");
+    return dst;
+  }
+  for (i = ndim - 1; i >= 0; i--) {
+    dst.shape[i] = src.shape[i];
+    dst.strides[i] = size;
+    size *= src.shape[i];
+  }
+  memview = (__Pyx_memview *) malloc(sizeof(__Pyx_memview));
+  if (memview)
+    memset(memview, 0, sizeof(__Pyx_memview));
+  dst.data = (char *) malloc(size ? size : 1);
+  if (!memview || !dst.data) {
+    free(memview);
+    free(dst.data);
+    dst.data = NULL;
+    __pyx_memviewslice_raise(PyExc_MemoryError, "Cannot allocate memoryview slice copy");
+    return dst;
+  }
+  memview->view.buf = dst.data;
+  memview->view.len = size;
+  memview->view.itemsize = itemsize;
+  memview->view.ndim = ndim;
+  memview->acquisition_count = 1;
+  if (size)
+    __pyx_copy_strided(src.data, src.strides, dst.data, dst.strides, src.shape, ndim, itemsize);
+  dst.memview = memview;
+  return dst;
+}
+
+static int __Pyx_CopyMemviewSliceContents(__Pyx_memviewslice *src, __Pyx_memviewslice *dst,
+                                          int ndim, size_t itemsize) {
+  __Pyx_memviewslice tmp;
+  int i;
+  if (!src->memview || !dst->memview) {
+    __pyx_memviewslice_raise(PyExc_TypeError, "Cannot copy from or to None memoryview slice");
+    return -1;
+  }
+  for (i = 0; i < ndim; i++) {
+    if (src->shape[i] != dst->shape[i]) {
+      __pyx_memviewslice_raise(PyExc_ValueError, "memoryview slice shapes do not match");
+      return -1;
+    }
+    if (!src->shape[i])
+      return 0;
+  }
+  if (src->memview == dst->memview) {
+    /* The slices may overlap, copy through a temporary */
+    tmp = __Pyx_CopyMemviewSlice(*src, ndim, itemsize);
+    if (!tmp.memview)
+      return -1;
+    __pyx_copy_strided(tmp.data, tmp.strides, dst->data, dst->strides, tmp.shape, ndim, itemsize);
+    __Pyx_XDEC_MEMVIEW(&tmp);
+  } else {
+    __pyx_copy_strided(src->data, src->strides, dst->data, dst->strides, src->shape, ndim, itemsize);
+  }
+  return 0;
+}
+""")
+
+copy_function_codes = {}
+
+def get_copy_function_code(slice_type):
+    # The utility code of the copy() method of the slice type.
+    name = slice_type.copy_function
+    utility_code = copy_function_codes.get(name)
+    if utility_code is None:
+        utility_code = copy_function_codes[name] = UtilityCode(
+            proto = "#define %s(slice) __Pyx_CopyMemviewSlice(slice, %d, sizeof(%s))\n" % (
+                name, slice_type.ndim, slice_type.dtype.declaration_code("")),
+            requires = [memviewslice_copy_code])
+    return utility_code
@@ -8,7 +8,7 @@ cython.declare(Naming=object, Options=object, PyrexTypes=object, TypeSlots=objec
                error=object, warning=object, py_object_type=object, UtilityCode=object,
                escape_byte_string=object, EncodedString=object)
 
-import os, time
+import os, re, time
 from PyrexTypes import CPtrType
 import Future
 
@@ -24,10 +24,14 @@ import DebugFlags
 
 from Errors import error, warning
 from PyrexTypes import py_object_type
-from Cython.Utils import open_new_file, replace_suffix
+from Cython.Utils import open_new_file, replace_suffix, OutputFile
 from Code import UtilityCode
 from StringEncoding import escape_byte_string, EncodedString
 
+# The first line of the C file, see generate_module_preamble().  An
+# unchanged C file is not rewritten just because its time stamp differs.
+generation_time = re.compile(r'/\* Generated by Cython [^\n]* on [^\n]* \*/\n')
+
 
 def check_c_declarations_pxd(module_node):
     module_node.scope.check_c_classes_pxd()
@@ -85,6 +89,7 @@ class ModuleNode(Nodes.Node, Nodes.BlockNode):
         modules = self.referenced_modules
         if len(modules) > 1 or env.included_files:
             dep_file = replace_suffix(result.c_file, ".dep")
+            result.dep_file = dep_file
             f = open(dep_file, "w")
             try:
                 for module in modules:
@@ -139,7 +144,7 @@ class ModuleNode(Nodes.Node, Nodes.BlockNode):
             h_code.putln("")
             h_code.putln("#endif")
 
-            f = open_new_file(result.h_file)
+            f = OutputFile(result.h_file)
             try:
                 h_code.copyto(f)
             finally:
@@ -226,7 +231,7 @@ class ModuleNode(Nodes.Node, Nodes.BlockNode):
             h_code.putln("")
             h_code.putln("#endif")
 
-            f = open_new_file(result.api_file)
+            f = OutputFile(result.api_file)
             try:
                 h_code.copyto(f)
             finally:
@@ -303,12 +308,14 @@ class ModuleNode(Nodes.Node, Nodes.BlockNode):
             globalstate.use_utility_code(utilcode)
         globalstate.finalize_main_c_code()
 
-        f = open_new_file(result.c_file)
+        f = OutputFile(result.c_file, ignore=generation_time)
         rootwriter.copyto(f)
         if options.gdb_debug:
             self._serialize_lineno_map(env, rootwriter)
         f.close()
         result.c_file_generated = 1
+        result.c_file_changed = f.changed
+        result.utility_code_count = len(globalstate.utility_codes)
         if Options.annotate or options.annotate:
             self.annotate(rootwriter)
             rootwriter.save_annotation(result.main_source_file, result.c_file)
@@ -1043,7 +1050,15 @@ class ModuleNode(Nodes.Node, Nodes.BlockNode):
             if entry.type.is_pyobject:
                 py_attrs.append(entry)
         need_self_cast = type.vtabslot_cname or py_attrs
+        freelist_size = self.freelist_size(scope)
         code.putln("")
+        if freelist_size:
+            freelist_name = scope.mangle_internal("freelist")
+            freecount_name = scope.mangle_internal("freecount")
+            code.putln("static %s;" % type.declaration_code(
+                "%s[%d]" % (freelist_name, freelist_size)))
+            code.putln("static int %s = 0;" % freecount_name)
+            code.putln("")
         code.putln(
             "static PyObject *%s(PyTypeObject *t, PyObject *a, PyObject *k) {"
                 % scope.mangle_internal("tp_new"))
@@ -1051,7 +1066,22 @@ class ModuleNode(Nodes.Node, Nodes.BlockNode):
             code.putln(
                 "%s;"
                     % scope.parent_type.declaration_code("p"))
-        if base_type:
+        if freelist_size:
+            # reuse a deallocated object of exactly this type if there
+            # is one, subtypes always go through tp_alloc
+            code.putln("PyObject *o;")
+            code.putln("if (likely((%s > 0) & (t == %s))) {" % (
+                freecount_name, type.typeptr_cname))
+            code.putln("o = (PyObject*)%s[--%s];" % (
+                freelist_name, freecount_name))
+            code.putln("memset(o, 0, sizeof(%s));" % type.declaration_code("", deref=True))
+            code.putln("(void) PyObject_INIT(o, t);")
+            if scope.needs_gc():
+                code.putln("PyObject_GC_Track(o);")
+            code.putln("} else {")
+            code.putln("o = (*t->tp_alloc)(t, 0);")
+            code.putln("}")
+        elif base_type:
             tp_new = TypeSlots.get_base_slot_function(scope, tp_slot)
             if tp_new is None:
                 tp_new = "%s->tp_new" % base_type.typeptr_cname
@@ -1113,29 +1143,54 @@ class ModuleNode(Nodes.Node, Nodes.BlockNode):
             "static void %s(PyObject *o) {"
                 % scope.mangle_internal("tp_dealloc"))
         py_attrs = []
+        memviewslice_attrs = []
         weakref_slot = scope.lookup_here("__weakref__")
         for entry in scope.var_entries:
             if entry.type.is_pyobject and entry is not weakref_slot:
                 py_attrs.append(entry)
-        if py_attrs or weakref_slot in scope.var_entries:
+            elif entry.type.is_memoryviewslice:
+                memviewslice_attrs.append(entry)
+        if py_attrs or memviewslice_attrs or weakref_slot in scope.var_entries:
             self.generate_self_cast(scope, code)
         self.generate_usr_dealloc_call(scope, code)
         if weakref_slot in scope.var_entries:
             code.putln("if (p->__weakref__) PyObject_ClearWeakRefs(o);")
         for entry in py_attrs:
             code.put_xdecref("p->%s" % entry.cname, entry.type, nanny=False)
+        for entry in memviewslice_attrs:
+            code.put_xdecref_memoryviewslice("p->%s" % entry.cname)
+        freelist_size = self.freelist_size(scope)
         if base_type:
             tp_dealloc = TypeSlots.get_base_slot_function(scope, tp_slot)
             if tp_dealloc is None:
                 tp_dealloc = "%s->tp_dealloc" % base_type.typeptr_cname
             code.putln(
                     "%s(o);" % tp_dealloc)
+        elif freelist_size:
+            freelist_name = scope.mangle_internal("freelist")
+            freecount_name = scope.mangle_internal("freecount")
+            code.putln("if ((%s < %d) & (Py_TYPE(o) == %s)) {" % (
+                freecount_name, freelist_size, scope.parent_type.typeptr_cname))
+            if scope.needs_gc():
+                code.putln("PyObject_GC_UnTrack(o);")
+            code.putln("%s[%s++] = %s;" % (
+                freelist_name, freecount_name, scope.parent_type.cast_code("o")))
+            code.putln("} else {")
+            code.putln("(*Py_TYPE(o)->tp_free)(o);")
+            code.putln("}")
         else:
             code.putln(
                     "(*Py_TYPE(o)->tp_free)(o);")
         code.putln(
             "}")
 
+    def freelist_size(self, scope):
+        # Number of deallocated objects that are kept for reuse
+        # (the 'freelist' directive), only for types without base type.
+        if scope.parent_type.base_type or not scope.directives:
+            return 0
+        return scope.directives.get('freelist', 0)
+
     def generate_usr_dealloc_call(self, scope, code):
         entry = scope.lookup_here("__dealloc__")
         if entry:
@@ -1857,6 +1912,8 @@ class ModuleNode(Nodes.Node, Nodes.BlockNode):
                         code.putln("Py_DECREF(%s); %s = 0;" % (
                             code.entry_as_pyobject(entry), entry.cname))
         code.putln("__Pyx_CleanupGlobals();")
+        code.globalstate.use_utility_code(Nodes.code_object_cache_cleanup_utility_code)
+        code.putln("__Pyx_CleanupCodeObjectCache();")
         if Options.generate_cleanup_code >= 3:
             code.putln("/*--- Type import cleanup code ---*/")
             for type, _ in env.types_imported.items():
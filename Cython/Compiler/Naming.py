@@ -48,6 +48,9 @@ convert_func_prefix = pyrex_prefix + "convert_"
 closure_scope_prefix = pyrex_prefix + "scope_"
 closure_class_prefix = pyrex_prefix + "scope_struct_"
 lambda_func_prefix = pyrex_prefix + "lambda_"
+genbody_prefix    = pyrex_prefix + "gb_"
+fused_func_prefix = pyrex_prefix + "fuse_"
+override_cache_prefix = pyrex_prefix + "override_cache_"
 module_is_main   = pyrex_prefix + "module_is_main_"
 
 args_cname       = pyrex_prefix + "args"
@@ -87,6 +90,8 @@ import_star      = pyrex_prefix + "import_star"
 import_star_set  = pyrex_prefix + "import_star_set"
 outer_scope_cname= pyrex_prefix + "outer_scope"
 cur_scope_cname  = pyrex_prefix + "cur_scope"
+generator_cname  = pyrex_prefix + "generator"
+sent_value_cname = pyrex_prefix + "sent_value"
 enc_scope_cname  = pyrex_prefix + "enc_scope"
 frame_cname      = pyrex_prefix + "frame"
 frame_code_cname = pyrex_prefix + "frame_code"
@@ -100,17 +105,6 @@ file_c_macro = "__FILE__"
 
 extern_c_macro  = pyrex_prefix.upper() + "EXTERN_C"
 
-exc_type_name   = pyrex_prefix + "exc_type"
-exc_value_name  = pyrex_prefix + "exc_value"
-exc_tb_name     = pyrex_prefix + "exc_tb"
-exc_lineno_name = pyrex_prefix + "exc_lineno"
-
-exc_vars = (exc_type_name, exc_value_name, exc_tb_name)
-
-exc_save_vars = (pyrex_prefix + 'save_exc_type',
-                 pyrex_prefix + 'save_exc_value',
-                 pyrex_prefix + 'save_exc_tb')
-
 api_name        = pyrex_prefix + "capi__"
 
 h_guard_prefix   = "__PYX_HAVE__"
@@ -15,15 +15,15 @@ cython.declare(sys=object, os=object, time=object, copy=object,
 import sys, os, time, copy
 
 import Builtin
-from Errors import error, warning, InternalError
+from Errors import error, warning, InternalError, CompileError
 import Naming
 import PyrexTypes
 import TypeSlots
 from PyrexTypes import py_object_type, error_type, CFuncType
 from Symtab import ModuleScope, LocalScope, ClosureScope, \
-    StructOrUnionScope, PyClassScope, CClassScope, CppClassScope
+    StructOrUnionScope, PyClassScope, CClassScope, CppClassScope, Entry
 from Cython.Utils import open_new_file, replace_suffix
-from Code import UtilityCode
+from Code import UtilityCode, ClosureTempAllocator
 from StringEncoding import EncodedString, escape_byte_string, split_string_literal
 import Options
 import ControlFlow
@@ -584,6 +584,10 @@ class CFuncDeclaratorNode(CDeclaratorNode):
             and self.exception_check != '+':
                 error(self.pos,
                     "Exception clause not allowed for function returning Python object")
+        elif return_type.is_memoryviewslice \
+            and self.exception_value and self.exception_check != '+':
+                error(self.pos,
+                    "Exception value not allowed for function returning memoryview slice")
         else:
             if self.exception_value:
                 self.exception_value.analyse_const_expression(env)
@@ -607,6 +611,9 @@ class CFuncDeclaratorNode(CDeclaratorNode):
                             error(self.exception_value.pos,
                                   "Exception value incompatible with function return type")
             exc_check = self.exception_check
+            if return_type.is_memoryviewslice and not exc_check:
+                # errors are signalled by a slice without memview
+                exc_check = True
         if return_type.is_array:
             error(self.pos,
                 "Function cannot return an array")
@@ -766,6 +773,11 @@ class CSimpleBaseTypeNode(CBaseTypeNode):
                 entry = scope.lookup(self.name)
                 if entry and entry.is_type:
                     type = entry.type
+                    if type.is_fused:
+                        type = env.specialize_fused(type)
+                        if type.is_fused:
+                            error(self.pos, "Fused types not allowed here")
+                            type = PyrexTypes.error_type
                 elif could_be_name:
                     if self.is_self_arg and env.is_c_class_scope:
                         type = env.parent_type
@@ -895,6 +907,36 @@ class TemplatedTypeNode(CBaseTypeNode):
 
         return self.type
 
+class MemoryViewSliceTypeNode(CBaseTypeNode):
+    #  A typed memoryview slice, e.g. double[:, ::1]
+    #
+    #  base_type_node   CBaseTypeNode
+    #  axes             [SliceNode]
+
+    child_attrs = ['base_type_node', 'axes']
+
+    def analyse(self, env, could_be_name = False):
+        base_type = self.base_type_node.analyse(env)
+        if base_type.is_error: return base_type
+
+        import MemoryView
+        if not MemoryView.valid_dtype(base_type):
+            error(self.base_type_node.pos,
+                  "Invalid base type for memoryview slice: %s" % base_type)
+            return PyrexTypes.error_type
+        if len(self.axes) > MemoryView.max_ndim:
+            error(self.pos, "More than %d dimensions not supported for memoryview slices"
+                  % MemoryView.max_ndim)
+            return PyrexTypes.error_type
+        try:
+            contig = MemoryView.get_axes_contig(env, self.axes)
+        except CompileError, e:
+            error(e.position, e.message_only)
+            return PyrexTypes.error_type
+        self.type = PyrexTypes.MemoryViewSliceType(base_type, len(self.axes), contig)
+        self.type.create_declaration_utility_code(env)
+        return self.type
+
 class CComplexBaseTypeNode(CBaseTypeNode):
     # base_type   CBaseTypeNode
     # declarator  CDeclaratorNode
@@ -907,6 +949,29 @@ class CComplexBaseTypeNode(CBaseTypeNode):
         return type
 
 
+class FusedTypeNode(CBaseTypeNode):
+    #  The member types of a "ctypedef fused" statement.
+    #
+    #  name     string
+    #  types    [CBaseTypeNode]
+
+    child_attrs = ["types"]
+
+    def analyse(self, env, could_be_name = False):
+        types = []
+        for type_node in self.types:
+            type = type_node.analyse(env)
+            if type.is_error:
+                continue
+            for seen in types:
+                if type.same_as(seen):
+                    error(type_node.pos, "Type specified multiple times")
+                    break
+            else:
+                types.append(type)
+        return PyrexTypes.FusedType(types, name=self.name)
+
+
 class CVarDefNode(StatNode):
     #  C variable definition or forward/extern function declaration.
     #
@@ -1141,8 +1206,13 @@ class CTypeDefNode(StatNode):
         name_declarator, type = self.declarator.analyse(base, env)
         name = name_declarator.name
         cname = name_declarator.cname
-        entry = env.declare_typedef(name, type, self.pos,
-            cname = cname, visibility = self.visibility)
+        if type.is_fused:
+            # fused types only exist at compile time
+            entry = env.declare_type(name, type, self.pos,
+                cname = cname, visibility = self.visibility, defining = 0)
+        else:
+            entry = env.declare_typedef(name, type, self.pos,
+                cname = cname, visibility = self.visibility)
         if self.in_pxd and not env.in_cinclude:
             entry.defined_in_pxd = 1
 
@@ -1160,13 +1230,98 @@ class FuncDefNode(StatNode, BlockNode):
     #  entry           Symtab.Entry
     #  needs_closure   boolean        Whether or not this function has inner functions/classes/yield
     #  needs_outer_scope boolean      Whether or not this function requires outer scope
+    #  is_generator    boolean        Whether or not this function contains 'yield'
     #  directive_locals { string : NameNode } locals defined by cython.locals(...)
+    #  owns_memoryviewslice_args boolean  Memoryview slice arguments are converted, not borrowed
+    #  fused_to_specific { FusedType : PyrexType } or None
+    #                                 Specific types, if this is a specialisation of a fused function
+    #  specializations [FuncDefNode] or None  Specialisations, if this is a fused function
+    #  fused_dispatcher FusedDefNode or None  def function dispatching to the specialisations
 
     py_func = None
     assmt = None
     needs_closure = False
     needs_outer_scope = False
+    is_generator = False
+    owns_memoryviewslice_args = False
     modifiers = []
+    fused_to_specific = None
+    specializations = None
+    fused_dispatcher = None
+
+    def find_fused_types(self, env, nodes):
+        # Return the fused types named in the given unanalysed
+        # declaration nodes that are not specialised yet, in order
+        # of first appearance.
+        import ExprNodes
+        fused_types = []
+        nodes = list(nodes)
+        while nodes:
+            node = nodes.pop(0)
+            if isinstance(node, list):
+                nodes[0:0] = node
+                continue
+            if node is None:
+                continue
+            entry = None
+            if isinstance(node, CSimpleBaseTypeNode):
+                if node.name and not node.is_basic_c_type:
+                    scope = env
+                    for name in node.module_path:
+                        entry = scope.lookup(name)
+                        scope = entry and entry.as_module
+                        if not scope:
+                            break
+                    entry = scope and scope.lookup(node.name)
+            elif isinstance(node, ExprNodes.NameNode):
+                entry = env.lookup(node.name)
+            if entry and entry.is_type and env.specialize_fused(entry.type).is_fused:
+                if entry.type not in fused_types:
+                    fused_types.append(entry.type)
+            nodes[0:0] = [getattr(node, attr, None) for attr in node.child_attrs]
+        return fused_types
+
+    def analyse_fused_declarations(self, env, fused_types):
+        # Analyse a copy of this function for every combination of
+        # the member types of its fused types.  The copies replace
+        # this node in AnalyseDeclarationsTransform.
+        specializations = []
+        combinations = PyrexTypes.fused_type_combinations(fused_types)
+        for i in range(len(combinations)):
+            node = copy.deepcopy(self)
+            node.fused_to_specific = combinations[i]
+            node.set_fused_index(i)
+            old_fused_to_specific = env.fused_to_specific
+            env.fused_to_specific = node.fused_to_specific
+            try:
+                node.analyse_declarations(env)
+            finally:
+                env.fused_to_specific = old_fused_to_specific
+            specializations.append(node)
+        self.specializations = specializations
+
+    def set_fused_index(self, index):
+        # Called on the copy of a fused function that will become
+        # its specialisation number 'index'.
+        pass
+
+    def declare_fused_dispatcher(self, env, name, py_funcs, is_wrapper):
+        # Declare the def function that calls the first of the
+        # given specialised def functions matching its arguments.
+        self_arg = None
+        first_arg = py_funcs[0].args and py_funcs[0].args[0]
+        if first_arg and first_arg.is_self_arg:
+            self_arg = CArgDeclNode(self.pos, name = first_arg.name,
+                type = py_object_type, base_type = None, declarator = None,
+                default = None, not_none = 0, or_none = 0, kw_only = 0)
+        self.fused_dispatcher = FusedDefNode(self.pos,
+            name = name, args = self_arg and [self_arg] or [],
+            star_arg = None, starstar_arg = None,
+            doc = self.doc, decorators = self.decorators,
+            is_wrapper = is_wrapper,
+            body = FusedDispatchNode(self.pos,
+                specializations = py_funcs, self_arg = self_arg))
+        self.fused_dispatcher.analyse_declarations(env)
 
     def analyse_default_values(self, env):
         genv = env.global_scope()
@@ -1202,6 +1357,8 @@ class FuncDefNode(StatNode, BlockNode):
                               outer_scope=genv,
                               parent_scope=env)
         lenv.return_type = self.return_type
+        lenv.is_generator = self.is_generator
+        lenv.fused_to_specific = self.fused_to_specific
         type = self.entry.type
         if type.is_cfunction:
             lenv.nogil = type.nogil and not type.with_gil
@@ -1223,6 +1380,8 @@ class FuncDefNode(StatNode, BlockNode):
         self.body.generate_function_definitions(lenv, code)
         # generate lambda function definitions
         self.generate_lambda_definitions(lenv, code)
+        if self.is_generator:
+            self.generate_generator_body_function(env, code)
 
         is_getbuffer_slot = (self.entry.name == "__getbuffer__" and
                              self.entry.scope.is_c_class_scope)
@@ -1290,6 +1449,8 @@ class FuncDefNode(StatNode, BlockNode):
         if not self.return_type.is_void:
             if self.return_type.is_pyobject:
                 init = " = NULL"
+            elif self.return_type.is_memoryviewslice:
+                init = " = __Pyx_MEMVIEWSLICE_INIT"
             code.putln(
                 "%s%s;" %
                     (self.return_type.declaration_code(Naming.retval_cname),
@@ -1355,6 +1516,9 @@ class FuncDefNode(StatNode, BlockNode):
             if entry.type.is_pyobject:
                 if (acquire_gil or entry.assignments) and not entry.in_closure:
                     code.put_var_incref(entry)
+            elif entry.type.is_memoryviewslice and not entry.in_closure:
+                if entry.assignments and not self.owns_memoryviewslice_args:
+                    code.put_var_incref(entry)
         # ----- Initialise local variables
         for entry in lenv.var_entries:
             if entry.type.is_pyobject and entry.init_to_none and entry.used:
@@ -1374,26 +1538,32 @@ class FuncDefNode(StatNode, BlockNode):
         # -------------------------
         # ----- Function body -----
         # -------------------------
-        self.body.generate_execution_code(code)
-
-        # ----- Default return value
-        code.putln("")
-        if self.return_type.is_pyobject:
-            #if self.return_type.is_extension_type:
-            #    lhs = "(PyObject *)%s" % Naming.retval_cname
-            #else:
-            lhs = Naming.retval_cname
-            code.put_init_to_py_none(lhs, self.return_type)
+        if self.is_generator:
+            # the body runs whenever the generator is resumed
+            self.generate_generator_creation_code(code)
         else:
-            val = self.return_type.default_value
-            if val:
-                code.putln("%s = %s;" % (Naming.retval_cname, val))
+            self.body.generate_execution_code(code)
+
+            # ----- Default return value
+            code.putln("")
+            if self.return_type.is_pyobject:
+                #if self.return_type.is_extension_type:
+                #    lhs = "(PyObject *)%s" % Naming.retval_cname
+                #else:
+                lhs = Naming.retval_cname
+                code.put_init_to_py_none(lhs, self.return_type)
+            else:
+                val = self.return_type.default_value
+                if val:
+                    code.putln("%s = %s;" % (Naming.retval_cname, val))
         # ----- Error cleanup
         if code.error_label in code.labels_used:
             code.put_goto(code.return_label)
             code.put_label(code.error_label)
             for cname, type in code.funcstate.all_managed_temps():
                 code.put_xdecref(cname, type)
+            if self.return_type.is_memoryviewslice:
+                code.put_xdecref_memoryviewslice(Naming.retval_cname, clear=True)
 
             # Clean up buffers -- this calls a Python function
             # so need to save and restore error state
@@ -1409,6 +1579,13 @@ class FuncDefNode(StatNode, BlockNode):
 
             err_val = self.error_value()
             exc_check = self.caller_will_check_exceptions()
+            if lenv.nogil:
+                # errors in nogil functions are raised with the GIL,
+                # e.g. index errors of memoryview slices
+                code.putln("{")
+                code.putln("#ifdef WITH_THREAD")
+                code.putln("PyGILState_STATE __pyx_gilstate_save = PyGILState_Ensure();")
+                code.putln("#endif")
             if err_val is not None or exc_check:
                 # TODO: Fix exception tracing (though currently unused by cProfile).
                 # code.globalstate.use_utility_code(get_exception_tuple_utility_code)
@@ -1422,6 +1599,11 @@ class FuncDefNode(StatNode, BlockNode):
                         self.entry.qualified_name)
                 env.use_utility_code(unraisable_exception_utility_code)
                 env.use_utility_code(restore_exception_utility_code)
+            if lenv.nogil:
+                code.putln("#ifdef WITH_THREAD")
+                code.putln("PyGILState_Release(__pyx_gilstate_save);")
+                code.putln("#endif")
+                code.putln("}")
             default_retval = self.return_type.default_value
             if err_val is None and default_retval:
                 err_val = default_retval
@@ -1458,6 +1640,9 @@ class FuncDefNode(StatNode, BlockNode):
                     code.put_var_decref(entry)
                 elif entry.in_closure and self.needs_closure:
                     code.put_giveref(entry.cname)
+            elif entry.type.is_memoryviewslice:
+                if entry.used and not entry.in_closure:
+                    code.put_var_xdecref(entry)
         # Decref any increfed args
         for entry in lenv.arg_entries:
             if entry.type.is_pyobject:
@@ -1465,6 +1650,9 @@ class FuncDefNode(StatNode, BlockNode):
                     code.put_var_giveref(entry)
                 elif acquire_gil or entry.assignments:
                     code.put_var_decref(entry)
+            elif entry.type.is_memoryviewslice and not entry.in_closure:
+                if entry.assignments or self.owns_memoryviewslice_args:
+                    code.put_var_xdecref(entry)
         if self.needs_closure:
             code.put_decref(Naming.cur_scope_cname, lenv.scope_class.type)
 
@@ -1624,6 +1812,11 @@ class CFuncDefNode(FuncDefNode):
         return self.entry.name
 
     def analyse_declarations(self, env):
+        if self.fused_to_specific is None:
+            fused_types = self.find_fused_types(env, [self.base_type, self.declarator])
+            if fused_types:
+                self.analyse_fused_declarations(env, fused_types)
+                return
         self.directive_locals.update(env.directives['locals'])
         base_type = self.base_type.analyse(env)
         # The 2 here is because we need both function and argument names.
@@ -1653,6 +1846,8 @@ class CFuncDefNode(FuncDefNode):
             defining = self.body is not None,
             api = self.api, modifiers = self.modifiers)
         self.entry.inline_func_in_pxd = self.inline_in_pxd
+        if self.fused_to_specific is not None:
+            self.entry.qualified_name = env.qualify_name(self.fused_name)
         self.return_type = type.return_type
 
         if self.overridable and not env.is_module_scope:
@@ -1672,15 +1867,39 @@ class CFuncDefNode(FuncDefNode):
                                    body = py_func_body,
                                    is_wrapper = 1)
             self.py_func.is_module_scope = env.is_module_scope
+            self.py_func.fused_to_specific = self.fused_to_specific
             self.py_func.analyse_declarations(env)
             self.entry.as_variable = self.py_func.entry
             # Reset scope entry the above cfunction
             env.entries[name] = self.entry
-            if not env.is_module_scope or Options.lookup_module_cpdef:
+            # Python overrides of fused functions are not looked for,
+            # their specialisations are only called by the dispatcher.
+            if self.fused_to_specific is None and (
+                    not env.is_module_scope or Options.lookup_module_cpdef):
                 self.override = OverrideCheckNode(self.pos, py_func = self.py_func)
                 self.body = StatListNode(self.pos, stats=[self.override, self.body])
         self.create_local_scope(env)
 
+    def set_fused_index(self, index):
+        declarator = self.declarator
+        while not isinstance(declarator, CNameDeclaratorNode):
+            declarator = declarator.base
+        self.fused_name = declarator.name
+        declarator.name = EncodedString(
+            "%s%d%s" % (Naming.fused_func_prefix, index, declarator.name))
+
+    def analyse_fused_declarations(self, env, fused_types):
+        FuncDefNode.analyse_fused_declarations(self, env, fused_types)
+        name = self.specializations[0].fused_name
+        entries = [node.entry for node in self.specializations]
+        if self.overridable:
+            self.declare_fused_dispatcher(env, name,
+                [node.py_func for node in self.specializations], is_wrapper = 1)
+            entries[0].as_variable = self.fused_dispatcher.entry
+        # Calls from Cython code pick the best matching specialisation.
+        entries[0].overloaded_alternatives = entries[1:]
+        env.entries[name] = entries[0]
+
     def call_self_node(self, omit_optional_args=0, is_module_scope=0):
         import ExprNodes
         args = self.type.args
@@ -1877,6 +2096,10 @@ class DefNode(FuncDefNode):
     # return_type_annotation
     #               ExprNode or None       the Py3 return type annotation
     #
+    # genbody_cname string                 C name of the body function of a generator
+    # generic_args  boolean                Always take the arguments as (args, kwds),
+    #                                        as fused functions dispatch them
+    #
     #  The following subnode is constructed internally
     #  when the def statement is inside a Python class definition.
     #
@@ -1895,6 +2118,8 @@ class DefNode(FuncDefNode):
     entry = None
     acquire_gil = 0
     self_in_stararg = 0
+    owns_memoryviewslice_args = True
+    generic_args = False
 
     def __init__(self, pos, **kwds):
         FuncDefNode.__init__(self, pos, **kwds)
@@ -1973,6 +2198,16 @@ class DefNode(FuncDefNode):
                             directive_locals = getattr(cfunc, 'directive_locals', {}))
 
     def analyse_declarations(self, env):
+        if self.fused_to_specific is None:
+            if env.is_module_scope or env.is_c_class_scope or env.is_py_class_scope:
+                fused_types = self.find_fused_types(env,
+                    [[arg.base_type, arg.declarator] for arg in self.args
+                     if not hasattr(arg, 'name')])
+                if fused_types:
+                    self.analyse_fused_declarations(env, fused_types)
+                    return
+        else:
+            self.generic_args = True
         self.is_classmethod = self.is_staticmethod = False
         if self.decorators:
             for decorator in self.decorators:
@@ -1998,8 +2233,14 @@ class DefNode(FuncDefNode):
             self.declare_pyfunction(env)
         self.analyse_signature(env)
         self.return_type = self.entry.signature.return_type()
+        if self.is_generator and not self.return_type.is_pyobject:
+            error(self.pos, "Special method %s cannot be a generator" % self.name)
         self.create_local_scope(env)
 
+    def analyse_fused_declarations(self, env, fused_types):
+        FuncDefNode.analyse_fused_declarations(self, env, fused_types)
+        self.declare_fused_dispatcher(env, self.name, self.specializations, is_wrapper = 0)
+
     def analyse_argument_types(self, env):
         directive_locals = self.directive_locals = env.directives['locals']
         allow_none_for_extension_args = env.directives['allow_none_for_extension_args']
@@ -2056,7 +2297,8 @@ class DefNode(FuncDefNode):
     def analyse_signature(self, env):
         if self.entry.is_special:
             self.entry.trivial_signature = len(self.args) == 1 and not (self.star_arg or self.starstar_arg)
-        elif not env.directives['always_allow_keywords'] and not (self.star_arg or self.starstar_arg):
+        elif not (env.directives['always_allow_keywords'] or self.generic_args or
+                  self.star_arg or self.starstar_arg):
             # Use the simpler calling signature for zero- and one-argument functions.
             if self.entry.signature is TypeSlots.pyfunction_signature:
                 if len(self.args) == 0:
@@ -2145,10 +2387,21 @@ class DefNode(FuncDefNode):
     def declare_pyfunction(self, env):
         #print "DefNode.declare_pyfunction:", self.name, "in", env ###
         name = self.name
-        entry = env.lookup_here(name)
-        if entry and entry.type.is_cfunction and not self.is_wrapper:
-            warning(self.pos, "Overriding cdef method with def method.", 5)
-        entry = env.declare_pyfunction(name, self.pos, allow_redefine=not self.is_wrapper)
+        if self.fused_to_specific is not None:
+            # Specialisations of fused functions are only called by
+            # their dispatcher, so they are not declared in the scope.
+            entry = Entry(name, name, py_object_type, self.pos)
+            entry.scope = env
+            entry.qualified_name = env.qualify_name(name)
+            if env.is_c_class_scope:
+                entry.signature = TypeSlots.pymethod_signature
+            else:
+                entry.signature = TypeSlots.pyfunction_signature
+        else:
+            entry = env.lookup_here(name)
+            if entry and entry.type.is_cfunction and not self.is_wrapper:
+                warning(self.pos, "Overriding cdef method with def method.", 5)
+            entry = env.declare_pyfunction(name, self.pos, allow_redefine=not self.is_wrapper)
         self.entry = entry
         prefix = env.next_id(env.scope_prefix)
 
@@ -2156,7 +2409,9 @@ class DefNode(FuncDefNode):
             Naming.pyfunc_prefix + prefix + name
         entry.pymethdef_cname = \
             Naming.pymethdef_prefix + prefix + name
-        if Options.docstrings:
+        if self.is_generator:
+            self.genbody_cname = Naming.genbody_prefix + prefix + name
+        if Options.docstrings and self.fused_to_specific is None:
             entry.doc = embed_position(self.pos, self.doc)
             entry.doc_cname = \
                 Naming.funcdoc_prefix + prefix + name
@@ -2226,6 +2481,8 @@ class DefNode(FuncDefNode):
 
     def needs_assignment_synthesis(self, env, code=None):
         # Should enable for module level as well, that will require more testing...
+        if self.fused_to_specific is not None:
+            return False
         if self.entry.is_anonymous:
             return True
         if env.is_module_scope:
@@ -2397,6 +2654,8 @@ class DefNode(FuncDefNode):
             for arg in self.args:
                 if arg.type.is_pyobject and arg.entry.in_closure:
                     code.put_var_xdecref_clear(arg.entry)
+                elif arg.type.is_memoryviewslice:
+                    code.put_var_xdecref_clear(arg.entry)
             if self.needs_closure:
                 code.put_decref(Naming.cur_scope_cname, self.local_scope.scope_class.type)
             code.put_finish_refcount_context()
@@ -2881,12 +3140,220 @@ class DefNode(FuncDefNode):
             elif not arg.accept_none and arg.type.is_pyobject:
                 self.generate_arg_none_check(arg, code)
 
+    def generate_generator_creation_code(self, code):
+        code.globalstate.use_utility_code(generator_utility_code)
+        code.putln("%s = __Pyx_Generator_New(%s, (PyObject *)%s); %s" % (
+            Naming.retval_cname,
+            self.genbody_cname,
+            Naming.cur_scope_cname,
+            code.error_goto_if_null(Naming.retval_cname, self.pos)))
+        code.put_gotref(Naming.retval_cname)
+
+    def generate_generator_body_function(self, env, code):
+        # The body of a generator runs in its own C function, which
+        # is called each time the generator is resumed.  All local
+        # state lives in the closure, and the function continues
+        # after the yield from which it last returned.
+        lenv = self.local_scope
+        closure_type = lenv.scope_class.type
+        code.enter_cfunc_scope()
+        code.funcstate.closure_temps = ClosureTempAllocator(closure_type.scope)
+        code.mark_pos(self.pos)
+        code.putln("")
+        code.putln("static PyObject *%s(__pyx_GeneratorObject *%s, PyObject *%s) {" % (
+            self.genbody_cname, Naming.generator_cname, Naming.sent_value_cname))
+        code.putln("CYTHON_UNUSED %s = (%s)%s->closure;" % (
+            closure_type.declaration_code(Naming.cur_scope_cname),
+            closure_type.declaration_code(''),
+            Naming.generator_cname))
+        code.putln("PyObject *%s = NULL;" % Naming.retval_cname)
+        for entry in lenv.var_entries:
+            if not entry.in_closure:
+                code.put_var_declaration(entry)
+        tempvardecl_code = code.insertion_point()
+        code.put_setup_refcount_context(self.entry.name)
+        resume_code = code.insertion_point()
+        py_closure_entries = [
+            entry for entry in lenv.var_entries
+            if entry.in_closure and entry.type.is_pyobject]
+        first_run_label = code.new_label('first_run')
+        code.use_label(first_run_label)
+        code.put_label(first_run_label)
+        for entry in py_closure_entries:
+            code.put_var_xgotref(entry)
+        code.putln(code.error_goto_if_null(Naming.sent_value_cname, self.pos))
+        self.body.generate_execution_code(code)
+        # ----- Error cleanup
+        code.putln("")
+        if code.error_label in code.labels_used:
+            code.put_goto(code.return_label)
+            code.put_label(code.error_label)
+            for cname, type in code.funcstate.all_managed_temps():
+                code.put_xdecref(cname, type)
+            code.putln('__Pyx_AddTraceback("%s");' % self.entry.qualified_name)
+        # ----- Return NULL when done, StopIteration is raised by the caller
+        code.put_label(code.return_label)
+        for entry in py_closure_entries:
+            code.put_var_xgiveref(entry)
+        code.put_finish_refcount_context()
+        code.putln("return NULL;")
+        code.putln("}")
+        # ----- Jump to the point of resumption
+        resume_code.putln("switch (%s->resume_label) {" % Naming.generator_cname)
+        resume_code.putln("case 0: goto %s;" % first_run_label)
+        for i, label in code.funcstate.yield_labels:
+            resume_code.putln("case %d: goto %s;" % (i, label))
+        resume_code.putln("default: /* finished */")
+        resume_code.put_finish_refcount_context()
+        resume_code.putln("return NULL;")
+        resume_code.putln("}")
+        tempvardecl_code.put_temp_declarations(code.funcstate)
+        code.exit_cfunc_scope()
+
     def error_value(self):
         return self.entry.signature.error_value
 
     def caller_will_check_exceptions(self):
         return 1
 
+class FusedDefNode(DefNode):
+    # The def function of a fused function.  It passes its
+    # arguments on unparsed to the first specialisation whose
+    # argument types match them.
+
+    generic_args = True
+
+    def generate_argument_parsing_code(self, env, code):
+        pass
+
+
+class FusedDispatchNode(StatNode):
+    # Body of a FusedDefNode.
+    #
+    # specializations  [DefNode]          specialised def functions
+    # self_arg         CArgDeclNode or None
+    #                                     'self' of an extension type method
+
+    child_attrs = []
+
+    def analyse_expressions(self, env):
+        first = self.specializations[0]
+        self.fused_args = []
+        for i in range(len(first.args)):
+            types = [node.args[i].type for node in self.specializations]
+            for type in types[1:]:
+                if not type.same_as(types[0]):
+                    self.fused_args.append(i)
+                    break
+        for node in self.specializations:
+            for i in self.fused_args:
+                if node.args[i].type.is_buffer or node.args[i].type.is_memoryviewslice:
+                    import Buffer
+                    Buffer.use_py2_buffer_functions(env)
+                    env.use_utility_code(Buffer.dtype_match_utility_code)
+
+    def type_match_code(self, code, type, candidates, arg_code, strict):
+        # Return a C condition checking whether the object for an
+        # argument selects the specialisation where it has the given
+        # type.  A non-strict match only needs to be convertible.
+        if type.is_buffer or type.is_memoryviewslice:
+            import Buffer
+            return "__Pyx_BufferDtypeMatches(%s, &%s, %d, __pyx_fused_stack)" % (
+                arg_code, Buffer.get_type_information_cname(code, type.dtype), type.ndim)
+        elif type.is_extension_type:
+            return "PyObject_TypeCheck(%s, %s)" % (arg_code, type.typeptr_cname)
+        elif type.is_builtin_type:
+            return "%s(%s)" % (type.type_check_function(exact=False), arg_code)
+        elif type is PyrexTypes.c_bint_type:
+            if strict:
+                return "PyBool_Check(%s)" % arg_code
+            return "1"
+        elif not type.is_numeric:
+            return "1"
+        # Python ints, floats and complex numbers select the widest C
+        # type of the nearest kind, but convert to any wider kind.
+        checks = ["PyInt_Check(%s) || PyLong_Check(%s)" % (arg_code, arg_code),
+                  "PyFloat_Check(%s)" % arg_code,
+                  "PyComplex_Check(%s)" % arg_code]
+        def kind(type):
+            return type.is_complex and 2 or type.is_float and 1 or 0
+        first_kind = 0
+        if strict:
+            same_kind = []
+            for other in candidates:
+                if other.is_numeric and other is not PyrexTypes.c_bint_type:
+                    if kind(other) == kind(type):
+                        same_kind.append(other)
+                    elif kind(other) < kind(type):
+                        first_kind = max(first_kind, kind(other) + 1)
+            if not type.same_as(reduce(PyrexTypes.widest_numeric_type, same_kind)):
+                return "0"
+        return "(%s)" % " || ".join(checks[first_kind:kind(type) + 1])
+
+    def generate_execution_code(self, code):
+        first = self.specializations[0]
+        code.putln("{")
+        code.putln("PyObject *__pyx_fused_args[%d];" % len(self.fused_args))
+        code.putln("PyObject *(*__pyx_fused_func)(PyObject *, PyObject *, PyObject *) = 0;")
+        depth = 0
+        for node in self.specializations:
+            for i in self.fused_args:
+                type = node.args[i].type
+                if type.is_buffer or type.is_memoryviewslice:
+                    depth = max(depth, type.dtype.struct_nesting_depth())
+        if depth:
+            code.putln("__Pyx_BufFmt_StackElem __pyx_fused_stack[%d];" % depth)
+        # Missing arguments (NULL) are left for the specialisation to report.
+        position = 0
+        for i in range(len(first.args)):
+            arg = first.args[i]
+            if arg.is_generic and i in self.fused_args:
+                keyword = "(%s ? PyDict_GetItem(%s, %s) : NULL)" % (
+                    Naming.kwds_cname, Naming.kwds_cname,
+                    code.intern_identifier(arg.name))
+                if arg.kw_only:
+                    value = keyword
+                else:
+                    value = "(PyTuple_GET_SIZE(%s) > %d) ? PyTuple_GET_ITEM(%s, %d) : %s" % (
+                        Naming.args_cname, position, Naming.args_cname, position, keyword)
+                code.putln("__pyx_fused_args[%d] = %s;" % (self.fused_args.index(i), value))
+            if arg.is_generic and not arg.kw_only:
+                position += 1
+        else_ = ""
+        for strict in (1, 0):
+            for node in self.specializations:
+                conditions = []
+                for n in range(len(self.fused_args)):
+                    i = self.fused_args[n]
+                    candidates = [other.args[i].type for other in self.specializations]
+                    arg_code = "__pyx_fused_args[%d]" % n
+                    condition = self.type_match_code(
+                        code, node.args[i].type, candidates, arg_code, strict)
+                    if condition == "0":
+                        break
+                    elif condition != "1":
+                        conditions.append("(!%s || %s)" % (arg_code, condition))
+                else:
+                    code.putln("%sif (%s) %s = %s;" % (
+                        else_, " && ".join(conditions) or "1",
+                        "__pyx_fused_func", node.entry.func_cname))
+                    else_ = "else "
+        code.putln("%s{" % else_)
+        code.putln('PyErr_SetString(PyExc_TypeError, "No matching signature found");')
+        code.putln(code.error_goto(self.pos))
+        code.putln("}")
+        if self.self_arg is not None:
+            self_code = self.self_arg.hdr_cname
+        else:
+            self_code = Naming.self_cname
+        code.putln("%s = __pyx_fused_func(%s, %s, %s); %s" % (
+            Naming.retval_cname, self_code, Naming.args_cname, Naming.kwds_cname,
+            code.error_goto_if_null(Naming.retval_cname, self.pos)))
+        code.put_gotref(Naming.retval_cname)
+        code.put_goto(code.return_label)
+        code.putln("}")
+
+
 class OverrideCheckNode(StatNode):
     # A Node for dispatching to the def method if it
     # is overriden.
@@ -2928,8 +3395,16 @@ class OverrideCheckNode(StatNode):
         code.putln("/* Check if overriden in Python */")
         if self.py_func.is_module_scope:
             code.putln("else {")
+            cache_cname = None
         else:
-            code.putln("else if (unlikely(Py_TYPE(%s)->tp_dictoffset != 0)) {" % self_arg)
+            # remembers the last receiver type known not to override the method
+            code.globalstate.use_utility_code(override_check_cache_utility_code)
+            cache_cname = Naming.override_cache_prefix + self.py_func.entry.func_cname
+            code.globalstate['decls'].putln(
+                "static __Pyx_OverrideCheckCache %s = {0, 0};" % cache_cname)
+            code.putln("else if (unlikely(Py_TYPE(%s)->tp_dictoffset != 0) && "
+                       "!__Pyx_OverrideCheckCached(%s, %s, &%s)) {" % (
+                self_arg, self_arg, interned_attr_cname, cache_cname))
         func_node_temp = code.funcstate.allocate_temp(py_object_type, manage_ref=True)
         self.func_node.set_cname(func_node_temp)
         # need to get attribute manually--scope would return cdef method
@@ -2943,6 +3418,9 @@ class OverrideCheckNode(StatNode):
         code.putln("if (!%s || %s) {" % (is_builtin_function_or_method, is_overridden))
         self.body.generate_execution_code(code)
         code.putln("}")
+        if cache_cname:
+            code.putln("__Pyx_OverrideCheckStore(%s, %s, &%s);" % (
+                self_arg, interned_attr_cname, cache_cname))
         code.put_decref_clear(func_node_temp, PyrexTypes.py_object_type)
         code.funcstate.release_temp(func_node_temp)
         code.putln("}")
@@ -3240,6 +3718,10 @@ class CClassDefNode(ClassDefNode):
         self.scope = scope = self.entry.type.scope
         if scope is not None:
             scope.directives = env.directives
+            if scope.directives['freelist'] < 0:
+                error(self.pos, "freelist size must not be negative")
+            elif scope.directives['freelist'] and self.base_type:
+                error(self.pos, "freelist is not supported for extension types with a base class")
 
         if self.doc and Options.docstrings:
             scope.doc = embed_position(self.pos, self.doc)
@@ -3617,6 +4099,8 @@ class InPlaceAssignmentNode(AssignmentNode):
     def analyse_types(self, env):
         self.rhs.analyse_types(env)
         self.lhs.analyse_target_types(env)
+        if self.lhs.type.is_memoryviewslice:
+            error(self.pos, "In-place operators not allowed on memoryview slices")
 
     def generate_execution_code(self, code):
         import ExprNodes
@@ -3848,15 +4332,23 @@ class ReturnStatNode(StatNode):
     #
     #  value         ExprNode or None
     #  return_type   PyrexType
+    #  in_generator  boolean       return from a generator function
 
     child_attrs = ["value"]
 
+    in_generator = False
+
     def analyse_expressions(self, env):
         return_type = env.return_type
         self.return_type = return_type
         if not return_type:
             error(self.pos, "Return not inside a function body")
             return
+        if env.is_generator:
+            self.in_generator = True
+            if self.value:
+                error(self.value.pos, "'return' with argument inside generator")
+                self.value = None
         if self.value:
             self.value.analyse_types(env)
             if return_type.is_void or return_type.is_returncode:
@@ -3881,7 +4373,13 @@ class ReturnStatNode(StatNode):
         if not self.return_type:
             # error reported earlier
             return
-        if self.return_type.is_pyobject:
+        if self.in_generator:
+            # generators signal their end by returning NULL
+            for cname, type in code.funcstate.temps_holding_reference():
+                code.put_decref_clear(cname, type)
+            code.put_goto(code.return_label)
+            return
+        if self.return_type.is_pyobject or self.return_type.is_memoryviewslice:
             code.put_xdecref(Naming.retval_cname,
                              self.return_type)
         if self.value:
@@ -4217,6 +4715,133 @@ class SwitchStatNode(StatNode):
         if self.else_clause is not None:
             self.else_clause.annotate(code)
 
+class StringSwitchCaseNode(StatNode):
+    # Generated in the optimization of an if-elif-else node
+    #
+    # condition     ExprNode      the original C boolean condition
+    # values        [bytes]       the string literals that the condition
+    #                             compares to, as (ASCII) byte strings
+    # body          StatNode
+
+    child_attrs = ['condition', 'body']
+
+    def generate_function_definitions(self, env, code):
+        self.condition.generate_function_definitions(env, code)
+        self.body.generate_function_definitions(env, code)
+
+    def annotate(self, code):
+        self.condition.annotate(code)
+        self.body.annotate(code)
+
+class StringSwitchStatNode(StatNode):
+    # Generated in the optimization of an if-elif-else node whose
+    # conditions compare an object to string literals.  Objects of
+    # the exact string type of the literals are dispatched in C on
+    # their length and a character, followed by a single equality
+    # check.  Anything else evaluates the original conditions in order.
+    #
+    # test          ExprNode      the compared object, a simple value
+    # kind          string        'Unicode', 'Bytes' or 'Str'
+    # cases         [StringSwitchCaseNode]
+    # else_clause   StatNode or None
+
+    child_attrs = ['test', 'cases', 'else_clause']
+
+    def generate_execution_code(self, code):
+        code.mark_pos(self.pos)
+        code.globalstate.use_utility_code(string_switch_utility_code)
+        prefix = "__Pyx_%sSwitch_" % self.kind
+        case_index = code.funcstate.allocate_temp(PyrexTypes.c_int_type, manage_ref=False)
+        code.putln("%s = -1;" % case_index)
+        self.test.generate_evaluation_code(code)
+        test = self.test.py_result()
+        code.putln("if (likely(%sCheckExact(%s))) {" % (prefix, test))
+        self.generate_dispatch_code(code, prefix, test, case_index)
+        code.putln("} else {")
+        for i, case in enumerate(self.cases):
+            case.condition.generate_evaluation_code(code)
+            code.putln("if (%s) {" % case.condition.result())
+            case.condition.generate_disposal_code(code)
+            case.condition.free_temps(code)
+            code.putln("%s = %d;" % (case_index, i))
+            code.putln("} else {")
+        code.putln("}" * (len(self.cases) + 1))
+        self.test.generate_disposal_code(code)
+        self.test.free_temps(code)
+        code.putln("switch (%s) {" % case_index)
+        for i, case in enumerate(self.cases):
+            code.putln("case %d:" % i)
+            case.body.generate_execution_code(code)
+            code.putln("break;")
+        if self.else_clause is not None:
+            code.putln("default:")
+            self.else_clause.generate_execution_code(code)
+            code.putln("break;")
+        code.putln("}")
+        code.funcstate.release_temp(case_index)
+
+    def generate_dispatch_code(self, code, prefix, test, case_index):
+        # group the literals by their length, then by the character
+        # that separates most of the literals of the same length
+        by_length = {}
+        for i, case in enumerate(self.cases):
+            for value in case.values:
+                by_length.setdefault(len(value), []).append((value, i))
+        lengths = list(by_length.keys())
+        lengths.sort()
+        code.putln("switch (%sSize(%s)) {" % (prefix, test))
+        for length in lengths:
+            code.putln("case %d:" % length)
+            entries = by_length[length]
+            if length == 0:
+                code.putln("%s = %d;" % (case_index, entries[0][1]))
+                code.putln("break;")
+                continue
+            position = self.find_best_position(entries, length)
+            buckets = {}
+            for value, i in entries:
+                buckets.setdefault(ord(value[position:position+1]), []).append((value, i))
+            chars = list(buckets.keys())
+            chars.sort()
+            if len(chars) > 1:
+                code.putln("switch (%sChar(%s, %d)) {" % (prefix, test, position))
+            for char in chars:
+                if len(chars) > 1:
+                    code.putln("case %d:" % char)
+                for value, i in buckets[char]:
+                    code.putln('if (%sEquals(%s, "%s", %d)) %s = %d;' % (
+                        prefix, test, escape_byte_string(value), length, case_index, i))
+                if len(chars) > 1:
+                    code.putln("break;")
+            if len(chars) > 1:
+                code.putln("}")
+            code.putln("break;")
+        code.putln("}")
+
+    def find_best_position(self, entries, length):
+        best_position, best_count = 0, 0
+        for position in range(length):
+            count = len(set([value[position:position+1] for value, i in entries]))
+            if count > best_count:
+                best_position, best_count = position, count
+                if count == len(entries):
+                    break
+        return best_position
+
+    def generate_function_definitions(self, env, code):
+        self.test.generate_function_definitions(env, code)
+        for case in self.cases:
+            case.generate_function_definitions(env, code)
+        if self.else_clause is not None:
+            self.else_clause.generate_function_definitions(env, code)
+
+    def annotate(self, code):
+        self.test.annotate(code)
+        for case in self.cases:
+            case.annotate(code)
+        if self.else_clause is not None:
+            self.else_clause.annotate(code)
+
 class LoopNode(object):
 
     def analyse_control_flow(self, env):
@@ -4388,6 +5013,7 @@ class ForFromStatNode(LoopNode, StatNode):
     #  Used internally:
     #
     #  from_range         bool
+    #  runtime_step_sign  bool   (from_range) loop direction is the sign of step
     #  is_py_target       bool
     #  loopvar_node       ExprNode (usually a NameNode or temp node)
     #  py_loopvar_node    PyTempNode or None
@@ -4397,6 +5023,7 @@ class ForFromStatNode(LoopNode, StatNode):
     loopvar_node = None
     py_loopvar_node = None
     from_range = False
+    runtime_step_sign = False
 
     gil_message = "For-loop using object bounds or target"
 
@@ -4480,11 +5107,23 @@ class ForFromStatNode(LoopNode, StatNode):
             loopvar_name = code.funcstate.allocate_temp(self.target.type, False)
         else:
             loopvar_name = self.loopvar_node.result()
+        if self.runtime_step_sign:
+            code.putln("if (unlikely(%s == 0)) {" % step)
+            code.putln('PyErr_SetString(PyExc_ValueError, "range() step argument must not be zero"); %s' %
+                       code.error_goto(self.pos))
+            code.putln("}")
+            condition = "(%s > 0) ? (%s < %s) : (%s > %s)" % (
+                step,
+                loopvar_name, self.bound2.result(),
+                loopvar_name, self.bound2.result())
+        else:
+            condition = "%s %s %s" % (
+                loopvar_name, self.relation2, self.bound2.result())
         code.putln(
-            "for (%s = %s%s; %s %s %s; %s%s) {" % (
+            "for (%s = %s%s; %s; %s%s) {" % (
                 loopvar_name,
                 self.bound1.result(), offset,
-                loopvar_name, self.relation2, self.bound2.result(),
+                condition,
                 loopvar_name, incop))
         if self.py_loopvar_node:
             self.py_loopvar_node.generate_evaluation_code(code)
@@ -4575,6 +5214,282 @@ class ForFromStatNode(LoopNode, StatNode):
             self.else_clause.annotate(code)
 
 
+class ParallelRangeNode(LoopNode, StatNode):
+    #  for name in cython.parallel.prange(...): run as an OpenMP
+    #  parallel loop when the C compiler supports OpenMP
+    #
+    #  target        NameNode
+    #  start         ExprNode
+    #  stop          ExprNode
+    #  step          ExprNode
+    #  body          StatNode
+    #  else_clause   StatNode or None
+    #  schedule      string or None     'static', 'dynamic', 'guided' or 'runtime'
+    #  chunksize     ExprNode or None
+    #  num_threads   ExprNode or None
+    #  assignments   {string : [string or None]}  names assigned in the body,
+    #                                             with their in-place operators
+    #                                             (None for a plain assignment)
+    #
+    #  Used internally:
+    #
+    #  step_value    integer
+    #  lastprivates  [Entry]
+    #  reductions    [(string, Entry)]
+
+    child_attrs = ["target", "start", "stop", "step", "chunksize", "num_threads",
+                   "body", "else_clause"]
+
+    schedule = None
+    chunksize = None
+    num_threads = None
+    step_value = 1
+
+    # OpenMP reduction operator of each in-place operator
+    reduction_operators = {
+        '+': '+', '-': '+', '*': '*', '&': '&', '|': '|', '^': '^',
+    }
+
+    gil_message = "prange() using object bounds or target"
+
+    def nogil_check(self, env):
+        for x in (self.target, self.start, self.stop):
+            if x.type.is_pyobject:
+                self.gil_error()
+
+    def analyse_declarations(self, env):
+        self.target.analyse_target_declaration(env)
+        self.body.analyse_declarations(env)
+        if self.else_clause:
+            self.else_clause.analyse_declarations(env)
+
+    def analyse_expressions(self, env):
+        self.target.analyse_target_types(env)
+        target_type = self.target.type
+        if not env.nogil:
+            error(self.pos, "prange() can only be used without the GIL")
+        if not target_type.is_int:
+            error(self.target.pos, "prange() loop variable must be a C integer")
+            target_type = PyrexTypes.c_py_ssize_t_type
+        step = self.step.constant_result
+        if (not self.step.has_constant_result() or
+                not isinstance(step, (int, long)) or not step):
+            error(self.step.pos,
+                  "prange() step must be a non-zero compile time integer constant")
+        else:
+            self.step_value = step
+        self.step.analyse_types(env)
+        self.start.analyse_types(env)
+        self.start = self.start.coerce_to(target_type, env)
+        if not self.start.is_literal:
+            self.start = self.start.coerce_to_temp(env)
+        self.stop.analyse_types(env)
+        self.stop = self.stop.coerce_to(target_type, env)
+        if not self.stop.is_literal:
+            self.stop = self.stop.coerce_to_temp(env)
+        if self.chunksize is not None:
+            self.chunksize.analyse_types(env)
+            self.chunksize = self.chunksize.coerce_to(PyrexTypes.c_int_type, env)
+            if not self.chunksize.is_literal:
+                self.chunksize = self.chunksize.coerce_to_temp(env)
+        if self.num_threads is not None:
+            self.num_threads.analyse_types(env)
+            self.num_threads = self.num_threads.coerce_to(PyrexTypes.c_int_type, env)
+            if not self.num_threads.is_literal:
+                self.num_threads = self.num_threads.coerce_to_temp(env)
+        self.analyse_sharing(env)
+        self.body.analyse_expressions(env)
+        if self.else_clause:
+            self.else_clause.analyse_expressions(env)
+
+    def analyse_sharing(self, env):
+        # Variables that the body assigns are private to each thread.
+        # Those that are only updated in place become reductions, the
+        # others take the value of the last iteration (like the target).
+        self.lastprivates = []
+        self.reductions = []
+        names = self.assignments.keys()
+        names.sort()
+        for name in names:
+            entry = env.lookup(name)
+            if entry is None or entry is self.target.entry or entry.type.is_pyobject:
+                continue
+            if not (entry.is_local or entry.is_arg) or entry.in_closure or entry.from_closure:
+                error(self.pos, "prange() body can only assign local C variables, not '%s'" % name)
+                continue
+            operators = self.assignments[name]
+            if None in operators:
+                self.lastprivates.append(entry)
+                continue
+            reduction_operators = cython.set()
+            for operator in operators:
+                reduction_operators.add(self.reduction_operators.get(operator))
+            if None in reduction_operators:
+                error(self.pos, "'%s' can not be a reduction in prange(), "
+                      "only +, -, *, &, | and ^ are supported" % name)
+            elif len(reduction_operators) > 1:
+                error(self.pos, "Conflicting reduction operators for '%s' in prange()" % name)
+            elif not entry.type.is_numeric:
+                error(self.pos, "Reduction variable '%s' must have a C numeric type" % name)
+            else:
+                self.reductions.append((reduction_operators.pop(), entry))
+
+    def generate_execution_code(self, code):
+        old_loop_labels = code.new_loop_labels()
+        self.start.generate_evaluation_code(code)
+        self.stop.generate_evaluation_code(code)
+        for arg in (self.chunksize, self.num_threads):
+            if arg is not None:
+                arg.generate_evaluation_code(code)
+        target = self.target.result()
+        start = self.start.result()
+        stop = self.stop.result()
+        step = self.step_value
+        count = code.funcstate.allocate_temp(self.target.type, False)
+        index = code.funcstate.allocate_temp(self.target.type, False)
+        if step > 0:
+            code.putln("if (%s < %s) {" % (start, stop))
+            code.putln("%s = (%s - %s - 1) / %s + 1;" % (count, stop, start, step))
+        else:
+            code.putln("if (%s > %s) {" % (start, stop))
+            code.putln("%s = (%s - %s - 1) / %s + 1;" % (count, start, stop, -step))
+        region_code = code.insertion_point()
+        code.putln("#ifdef _OPENMP")
+        pragma_code = code.insertion_point()
+        code.putln("#endif")
+        code.putln("for (%s = 0; %s < %s; %s++) {" % (index, index, count, index))
+        skip_code = code.insertion_point()
+        # shared with all threads, so allocated outside of the private temps
+        error_flag = code.funcstate.allocate_temp(PyrexTypes.c_int_type, False)
+        exc_vars = [code.funcstate.allocate_temp(PyrexTypes.py_object_type, False)
+                    for i in range(3)]
+        code.funcstate.start_collecting_temps()
+        old_error_label = code.new_error_label()
+        our_error_label = code.error_label
+        code.putln("%s = %s + %s * %s;" % (target, start, index, step))
+        self.body.generate_execution_code(code)
+        code.put_label(code.continue_label)
+        code.error_label = old_error_label
+        private_temps = list(code.funcstate.stop_collecting_temps())
+        private_temps.sort()
+        error_used = code.label_used(our_error_label)
+        if error_used:
+            self.generate_error_handling_code(
+                code, our_error_label, error_flag, exc_vars)
+        code.putln("}")
+        if not error_used:
+            pragma_code.putln("#pragma omp parallel for%s" % self.omp_clauses(
+                self.omp_parallel_clauses(private_temps) + self.omp_for_clauses()))
+        else:
+            # Each thread keeps a thread state of its own while the loop
+            # runs, so that the first exception raised in it can be
+            # passed on to the thread that started the loop.
+            region_code.putln("%s = 0;" % error_flag)
+            region_code.putln("#ifdef _OPENMP")
+            region_code.putln("#pragma omp parallel%s" % self.omp_clauses(
+                self.omp_parallel_clauses(private_temps)))
+            region_code.putln("#endif")
+            region_code.putln("{")
+            region_code.putln("#ifdef WITH_THREAD")
+            region_code.putln("PyGILState_STATE __pyx_gilstate_save = PyGILState_Ensure();")
+            region_code.putln("Py_BEGIN_ALLOW_THREADS")
+            region_code.putln("#endif")
+            pragma_code.putln("#pragma omp for%s" % self.omp_clauses(
+                self.omp_for_clauses()))
+            skip_code.putln("if (%s) continue;" % error_flag)
+            code.putln("#ifdef WITH_THREAD")
+            code.putln("Py_END_ALLOW_THREADS")
+            code.putln("PyGILState_Release(__pyx_gilstate_save);")
+            code.putln("#endif")
+            code.putln("}")
+            code.putln("if (unlikely(%s)) {" % error_flag)
+            code.putln("#ifdef WITH_THREAD")
+            code.putln("PyGILState_STATE __pyx_gilstate_save = PyGILState_Ensure();")
+            code.putln("#endif")
+            code.putln("PyErr_Restore(%s);" % ", ".join(exc_vars))
+            code.putln("#ifdef WITH_THREAD")
+            code.putln("PyGILState_Release(__pyx_gilstate_save);")
+            code.putln("#endif")
+            code.put_goto(code.error_label)
+            code.putln("}")
+        code.funcstate.release_temp(error_flag)
+        for exc_var in exc_vars:
+            code.funcstate.release_temp(exc_var)
+        code.putln("}")
+        break_label = code.break_label
+        code.set_loop_labels(old_loop_labels)
+        if self.else_clause:
+            code.putln("/*else*/ {")
+            self.else_clause.generate_execution_code(code)
+            code.putln("}")
+        code.put_label(break_label)
+        code.funcstate.release_temp(count)
+        code.funcstate.release_temp(index)
+        for arg in (self.start, self.stop, self.chunksize, self.num_threads):
+            if arg is not None:
+                arg.generate_disposal_code(code)
+                arg.free_temps(code)
+
+    def generate_error_handling_code(self, code, error_label, error_flag, exc_vars):
+        # Keeps the first exception raised in the body and makes the
+        # remaining iterations do nothing.  The GIL serialises the
+        # threads that get here.
+        code.putln("if (0) {")
+        code.put_label(error_label)
+        code.putln("{")
+        code.putln("#ifdef WITH_THREAD")
+        code.putln("PyGILState_STATE __pyx_gilstate_save = PyGILState_Ensure();")
+        code.putln("#endif")
+        code.putln("if (!%s) {" % error_flag)
+        code.putln("PyErr_Fetch(%s);" % ", ".join(["&%s" % var for var in exc_vars]))
+        code.putln("%s = 1;" % error_flag)
+        code.putln("} else {")
+        code.putln("PyErr_Clear();")
+        code.putln("}")
+        code.putln("#ifdef WITH_THREAD")
+        code.putln("PyGILState_Release(__pyx_gilstate_save);")
+        code.putln("#endif")
+        code.putln("}")
+        code.putln("}")
+
+    def omp_clauses(self, clauses):
+        return "".join([" " + clause for clause in clauses])
+
+    def omp_parallel_clauses(self, private_temps):
+        clauses = []
+        if private_temps:
+            clauses.append("private(%s)" % ", ".join(private_temps))
+        if self.num_threads is not None:
+            clauses.append("num_threads(%s)" % self.num_threads.result())
+        return clauses
+
+    def omp_for_clauses(self):
+        clauses = []
+        lastprivates = [self.target.result()] + [entry.cname for entry in self.lastprivates]
+        clauses.append("lastprivate(%s)" % ", ".join(lastprivates))
+        for operator, entry in self.reductions:
+            clauses.append("reduction(%s:%s)" % (operator, entry.cname))
+        if self.schedule is not None:
+            if self.chunksize is not None:
+                clauses.append("schedule(%s, %s)" % (self.schedule, self.chunksize.result()))
+            else:
+                clauses.append("schedule(%s)" % self.schedule)
+        return clauses
+
+    def generate_function_definitions(self, env, code):
+        self.body.generate_function_definitions(env, code)
+        if self.else_clause is not None:
+            self.else_clause.generate_function_definitions(env, code)
+
+    def annotate(self, code):
+        self.target.annotate(code)
+        self.start.annotate(code)
+        self.stop.annotate(code)
+        self.body.annotate(code)
+        if self.else_clause:
+            self.else_clause.annotate(code)
+
+
 class WithStatNode(StatNode):
     """
     Represents a Python with statement.
@@ -4652,13 +5567,14 @@ class TryExceptStatNode(StatNode):
         try_continue_label = code.new_label('try_continue')
         try_end_label = code.new_label('try_end')
 
+        # the saved exception state is kept in temps, so that it
+        # survives the yields of a generator; like the exception state
+        # of try-finally, it is not tracked by the refnanny
+        exc_save_vars = [code.funcstate.allocate_temp(py_object_type, False)
+                         for i in xrange(3)]
         code.putln("{")
-        code.putln("PyObject %s;" %
-                   ', '.join(['*%s' % var for var in Naming.exc_save_vars]))
         code.putln("__Pyx_ExceptionSave(%s);" %
-                   ', '.join(['&%s' % var for var in Naming.exc_save_vars]))
-        for var in Naming.exc_save_vars:
-            code.put_xgotref(var)
+                   ', '.join(['&%s' % var for var in exc_save_vars]))
         code.putln(
             "/*try:*/ {")
         code.return_label = try_return_label
@@ -4676,14 +5592,13 @@ class TryExceptStatNode(StatNode):
             self.else_clause.generate_execution_code(code)
             code.putln(
                 "}")
-        for var in Naming.exc_save_vars:
-            code.put_xdecref_clear(var, py_object_type)
+        for var in exc_save_vars:
+            code.put_xdecref_clear(var, py_object_type, nanny=False)
         code.put_goto(try_end_label)
         if code.label_used(try_return_label):
             code.put_label(try_return_label)
-            for var in Naming.exc_save_vars: code.put_xgiveref(var)
             code.putln("__Pyx_ExceptionReset(%s);" %
-                       ', '.join(Naming.exc_save_vars))
+                       ', '.join(exc_save_vars))
             code.put_goto(old_return_label)
         code.put_label(our_error_label)
         for temp_name, type in temps_to_clean_up:
@@ -4695,9 +5610,8 @@ class TryExceptStatNode(StatNode):
         if error_label_used or not self.has_default_clause:
             if error_label_used:
                 code.put_label(except_error_label)
-            for var in Naming.exc_save_vars: code.put_xgiveref(var)
             code.putln("__Pyx_ExceptionReset(%s);" %
-                       ', '.join(Naming.exc_save_vars))
+                       ', '.join(exc_save_vars))
             code.put_goto(old_error_label)
 
         for exit_label, old_label in zip(
@@ -4706,18 +5620,18 @@ class TryExceptStatNode(StatNode):
 
             if code.label_used(exit_label):
                 code.put_label(exit_label)
-                for var in Naming.exc_save_vars: code.put_xgiveref(var)
                 code.putln("__Pyx_ExceptionReset(%s);" %
-                           ', '.join(Naming.exc_save_vars))
+                           ', '.join(exc_save_vars))
                 code.put_goto(old_label)
 
         if code.label_used(except_end_label):
             code.put_label(except_end_label)
-            for var in Naming.exc_save_vars: code.put_xgiveref(var)
             code.putln("__Pyx_ExceptionReset(%s);" %
-                       ', '.join(Naming.exc_save_vars))
+                       ', '.join(exc_save_vars))
         code.put_label(try_end_label)
         code.putln("}")
+        for var in exc_save_vars:
+            code.funcstate.release_temp(var)
 
         code.return_label = old_return_label
         code.break_label = old_break_label
@@ -4963,33 +5877,38 @@ class TryFinallyStatNode(StatNode):
                 if new_label == new_error_label:
                     error_label_used = 1
                     error_label_case = i
+        # the state of the finally clause is kept in temps, so that
+        # it survives the yields of a generator
+        why_var = exc_vars = exc_lineno_var = None
         if cases_used:
-            code.putln(
-                    "int __pyx_why;")
+            why_var = code.funcstate.allocate_temp(PyrexTypes.c_int_type, False)
             if error_label_used and self.preserve_exception:
-                code.putln(
-                    "PyObject *%s, *%s, *%s;" % Naming.exc_vars)
-                code.putln(
-                    "int %s;" % Naming.exc_lineno_name)
-                exc_var_init_zero = ''.join(["%s = 0; " % var for var in Naming.exc_vars])
-                exc_var_init_zero += '%s = 0;' % Naming.exc_lineno_name
+                exc_vars = tuple([
+                    code.funcstate.allocate_temp(py_object_type, False)
+                    for i in xrange(3)])
+                exc_lineno_var = code.funcstate.allocate_temp(
+                    PyrexTypes.c_int_type, False)
+                exc_var_init_zero = ''.join(["%s = 0; " % var for var in exc_vars])
+                exc_var_init_zero += '%s = 0;' % exc_lineno_var
                 code.putln(exc_var_init_zero)
             else:
                 exc_var_init_zero = None
             code.use_label(catch_label)
             code.putln(
-                    "__pyx_why = 0; goto %s;" % catch_label)
+                    "%s = 0; goto %s;" % (why_var, catch_label))
             for i in cases_used:
                 new_label = new_labels[i]
                 #if new_label and new_label != "<try>":
                 if new_label == new_error_label and self.preserve_exception:
                     self.put_error_catcher(code,
-                        new_error_label, i+1, catch_label, temps_to_clean_up)
+                        new_error_label, i+1, catch_label, temps_to_clean_up,
+                        why_var, exc_vars, exc_lineno_var)
                 else:
                     code.put('%s: ' % new_label)
                     if exc_var_init_zero:
                         code.putln(exc_var_init_zero)
-                    code.putln("__pyx_why = %s; goto %s;" % (
+                    code.putln("%s = %s; goto %s;" % (
+                            why_var,
                             i+1,
                             catch_label))
             code.put_label(catch_label)
@@ -5003,8 +5922,8 @@ class TryFinallyStatNode(StatNode):
                 over_label = code.new_label()
                 code.put_goto(over_label);
                 code.put_label(finally_error_label)
-                code.putln("if (__pyx_why == %d) {" % (error_label_case + 1))
-                for var in Naming.exc_vars:
+                code.putln("if (%s == %d) {" % (why_var, error_label_case + 1))
+                for var in exc_vars:
                     code.putln("Py_XDECREF(%s);" % var)
                 code.putln("}")
                 code.put_goto(old_error_label)
@@ -5012,11 +5931,12 @@ class TryFinallyStatNode(StatNode):
             code.error_label = old_error_label
         if cases_used:
             code.putln(
-                "switch (__pyx_why) {")
+                "switch (%s) {" % why_var)
             for i in cases_used:
                 old_label = old_labels[i]
                 if old_label == old_error_label and self.preserve_exception:
-                    self.put_error_uncatcher(code, i+1, old_error_label)
+                    self.put_error_uncatcher(code, i+1, old_error_label,
+                        exc_vars, exc_lineno_var)
                 else:
                     code.use_label(old_label)
                     code.putln(
@@ -5027,42 +5947,46 @@ class TryFinallyStatNode(StatNode):
                 "}")
         code.putln(
             "}")
+        for var in (why_var, exc_lineno_var) + (exc_vars or ()):
+            if var is not None:
+                code.funcstate.release_temp(var)
 
     def generate_function_definitions(self, env, code):
         self.body.generate_function_definitions(env, code)
         self.finally_clause.generate_function_definitions(env, code)
 
-    def put_error_catcher(self, code, error_label, i, catch_label, temps_to_clean_up):
+    def put_error_catcher(self, code, error_label, i, catch_label, temps_to_clean_up,
+                          why_var, exc_vars, exc_lineno_var):
         code.globalstate.use_utility_code(restore_exception_utility_code)
         code.putln(
             "%s: {" %
                 error_label)
         code.putln(
-                "__pyx_why = %s;" %
-                    i)
+                "%s = %s;" % (
+                    why_var, i))
         for temp_name, type in temps_to_clean_up:
             code.put_xdecref_clear(temp_name, type)
         code.putln(
                 "__Pyx_ErrFetch(&%s, &%s, &%s);" %
-                    Naming.exc_vars)
+                    exc_vars)
         code.putln(
                 "%s = %s;" % (
-                    Naming.exc_lineno_name, Naming.lineno_cname))
+                    exc_lineno_var, Naming.lineno_cname))
         code.put_goto(catch_label)
         code.putln("}")
 
-    def put_error_uncatcher(self, code, i, error_label):
+    def put_error_uncatcher(self, code, i, error_label, exc_vars, exc_lineno_var):
         code.globalstate.use_utility_code(restore_exception_utility_code)
         code.putln(
             "case %s: {" %
                 i)
         code.putln(
                 "__Pyx_ErrRestore(%s, %s, %s);" %
-                    Naming.exc_vars)
+                    exc_vars)
         code.putln(
                 "%s = %s;" % (
-                    Naming.lineno_cname, Naming.exc_lineno_name))
-        for var in Naming.exc_vars:
+                    Naming.lineno_cname, exc_lineno_var))
+        for var in exc_vars:
             code.putln(
                 "%s = 0;" %
                     var)
@@ -5203,7 +6127,8 @@ class FromCImportStatNode(StatNode):
                             module_name = self.module_name)
                     else:
                         submodule_scope = env.context.find_module(name, relative_to = module_scope, pos = self.pos)
-                        if submodule_scope.parent_module is module_scope:
+                        # compare by name, the submodule may be shared between compilations
+                        if submodule_scope.qualified_name == module_scope.qualify_name(name):
                             env.declare_module(as_name or name, submodule_scope, self.pos)
                         else:
                             error(pos, "Name '%s' not declared in module '%s'"
@@ -6104,6 +7029,120 @@ requires=[raise_double_keywords_utility_code])
 
 #------------------------------------------------------------------------------------
 
+code_object_cache_utility_code = UtilityCode(
+proto = """
+typedef struct {
+    int code_line;
+    const char *funcname;
+    PyCodeObject* code_object;
+} __Pyx_CodeObjectCacheEntry;
+struct __Pyx_CodeObjectCache {
+    int count;
+    int max_count;
+    __Pyx_CodeObjectCacheEntry* entries;
+};
+static struct __Pyx_CodeObjectCache __pyx_code_cache = {0,0,NULL};
+
+static int __pyx_bisect_code_objects(__Pyx_CodeObjectCacheEntry* entries, int count, int code_line);
+static PyCodeObject *__pyx_find_code_object(int code_line, const char *funcname);
+static void __pyx_insert_code_object(int code_line, const char *funcname, PyCodeObject* code_object);
+""",
+impl = """
+/* Entries are sorted by code_line, different functions may share a line. */
+static int __pyx_bisect_code_objects(__Pyx_CodeObjectCacheEntry* entries, int count, int code_line) {
+    int start = 0, mid = 0, end = count - 1;
+    if (end >= 0 && code_line > entries[end].code_line) {
+        return count;
+    }
+    while (start < end) {
+        mid = (start + end) / 2;
+        if (code_line > entries[mid].code_line) {
+            start = mid + 1;
+        } else {
+            end = mid;
+        }
+    }
+    return start;
+}
+
+static PyCodeObject *__pyx_find_code_object(int code_line, const char *funcname) {
+    int pos;
+    if (unlikely(!code_line) || unlikely(!__pyx_code_cache.entries)) {
+        return NULL;
+    }
+    pos = __pyx_bisect_code_objects(__pyx_code_cache.entries, __pyx_code_cache.count, code_line);
+    for (; pos < __pyx_code_cache.count && __pyx_code_cache.entries[pos].code_line == code_line; pos++) {
+        if (__pyx_code_cache.entries[pos].funcname == funcname) {
+            Py_INCREF(__pyx_code_cache.entries[pos].code_object);
+            return __pyx_code_cache.entries[pos].code_object;
+        }
+    }
+    return NULL;
+}
+
+static void __pyx_insert_code_object(int code_line, const char *funcname, PyCodeObject* code_object) {
+    int pos, i;
+    __Pyx_CodeObjectCacheEntry* entries = __pyx_code_cache.entries;
+    if (unlikely(!code_line)) {
+        return;
+    }
+    if (unlikely(!entries)) {
+        entries = (__Pyx_CodeObjectCacheEntry*)PyMem_Malloc(64*sizeof(__Pyx_CodeObjectCacheEntry));
+        if (likely(entries)) {
+            __pyx_code_cache.entries = entries;
+            __pyx_code_cache.max_count = 64;
+            __pyx_code_cache.count = 1;
+            entries[0].code_line = code_line;
+            entries[0].funcname = funcname;
+            entries[0].code_object = code_object;
+            Py_INCREF(code_object);
+        }
+        return;
+    }
+    pos = __pyx_bisect_code_objects(__pyx_code_cache.entries, __pyx_code_cache.count, code_line);
+    if (__pyx_code_cache.count == __pyx_code_cache.max_count) {
+        int new_max = __pyx_code_cache.max_count + 64;
+        entries = (__Pyx_CodeObjectCacheEntry*)PyMem_Realloc(
+            __pyx_code_cache.entries, new_max*sizeof(__Pyx_CodeObjectCacheEntry));
+        if (unlikely(!entries)) {
+            return;
+        }
+        __pyx_code_cache.entries = entries;
+        __pyx_code_cache.max_count = new_max;
+    }
+    for (i=__pyx_code_cache.count; i>pos; i--) {
+        entries[i] = entries[i-1];
+    }
+    entries[pos].code_line = code_line;
+    entries[pos].funcname = funcname;
+    entries[pos].code_object = code_object;
+    __pyx_code_cache.count++;
+    Py_INCREF(code_object);
+}
+""")
+
+code_object_cache_cleanup_utility_code = UtilityCode(
+proto = """
+static void __Pyx_CleanupCodeObjectCache(void); /*proto*/
+""",
+impl = """
+static void __Pyx_CleanupCodeObjectCache(void) {
+    int i;
+    __Pyx_CodeObjectCacheEntry* entries = __pyx_code_cache.entries;
+    if (!entries) {
+        return;
+    }
+    __pyx_code_cache.entries = NULL;
+    for (i=0; i<__pyx_code_cache.count; i++) {
+        Py_DECREF(entries[i].code_object);
+    }
+    __pyx_code_cache.count = 0;
+    __pyx_code_cache.max_count = 0;
+    PyMem_Free(entries);
+}
+""",
+requires=[code_object_cache_utility_code])
+
 traceback_utility_code = UtilityCode(
 proto = """
 static void __Pyx_AddTraceback(const char *funcname); /*proto*/
@@ -6113,12 +7152,10 @@ impl = """
 #include "frameobject.h"
 #include "traceback.h"
 
-static void __Pyx_AddTraceback(const char *funcname) {
+static PyCodeObject* __Pyx_CreateCodeObjectForTraceback(const char *funcname) {
     PyObject *py_srcfile = 0;
     PyObject *py_funcname = 0;
-    PyObject *py_globals = 0;
     PyCodeObject *py_code = 0;
-    PyFrameObject *py_frame = 0;
 
     #if PY_MAJOR_VERSION < 3
     py_srcfile = PyString_FromString(%(FILENAME)s);
@@ -6141,8 +7178,6 @@ static void __Pyx_AddTraceback(const char *funcname) {
         #endif
     }
     if (!py_funcname) goto bad;
-    py_globals = PyModule_GetDict(%(GLOBALS)s);
-    if (!py_globals) goto bad;
     py_code = PyCode_New(
         0,            /*int argcount,*/
         #if PY_MAJOR_VERSION >= 3
@@ -6162,7 +7197,27 @@ static void __Pyx_AddTraceback(const char *funcname) {
         %(LINENO)s,   /*int firstlineno,*/
         %(EMPTY_BYTES)s  /*PyObject *lnotab*/
     );
-    if (!py_code) goto bad;
+bad:
+    Py_XDECREF(py_srcfile);
+    Py_XDECREF(py_funcname);
+    return py_code;
+}
+
+static void __Pyx_AddTraceback(const char *funcname) {
+    PyObject *py_globals = 0;
+    PyCodeObject *py_code = 0;
+    PyFrameObject *py_frame = 0;
+    /* the C line identifies the code position, fall back to the Cython line */
+    int code_line = %(CLINENO)s ? %(CLINENO)s : -%(LINENO)s;
+
+    py_code = __pyx_find_code_object(code_line, funcname);
+    if (!py_code) {
+        py_code = __Pyx_CreateCodeObjectForTraceback(funcname);
+        if (!py_code) goto bad;
+        __pyx_insert_code_object(code_line, funcname, py_code);
+    }
+    py_globals = PyModule_GetDict(%(GLOBALS)s);
+    if (!py_globals) goto bad;
     py_frame = PyFrame_New(
         PyThreadState_GET(), /*PyThreadState *tstate,*/
         py_code,             /*PyCodeObject *code,*/
@@ -6173,8 +7228,6 @@ static void __Pyx_AddTraceback(const char *funcname) {
     py_frame->f_lineno = %(LINENO)s;
     PyTraceBack_Here(py_frame);
 bad:
-    Py_XDECREF(py_srcfile);
-    Py_XDECREF(py_funcname);
     Py_XDECREF(py_code);
     Py_XDECREF(py_frame);
 }
@@ -6186,7 +7239,8 @@ bad:
     'GLOBALS': Naming.module_cname,
     'EMPTY_TUPLE' : Naming.empty_tuple,
     'EMPTY_BYTES' : Naming.empty_bytes,
-})
+},
+requires=[code_object_cache_utility_code])
 
 #------------------------------------------------------------------------------------
 
@@ -6217,6 +7271,52 @@ requires=[restore_exception_utility_code])
 
 #------------------------------------------------------------------------------------
 
+override_check_cache_utility_code = UtilityCode(
+proto = """
+typedef struct {
+    PyTypeObject *type;
+    unsigned int version_tag;
+} __Pyx_OverrideCheckCache;
+
+static CYTHON_INLINE int __Pyx_OverrideCheckCached(PyObject *obj, PyObject *name, __Pyx_OverrideCheckCache *cache); /*proto*/
+static void __Pyx_OverrideCheckStore(PyObject *obj, PyObject *name, __Pyx_OverrideCheckCache *cache); /*proto*/
+""",
+impl = """
+/* The version tag of a type changes whenever its or a base type's
+   dict is modified, so a cached type still does not override the
+   method as long as the tag is valid and unchanged.  The instance
+   dict is checked on each call. */
+static CYTHON_INLINE int __Pyx_InstanceDictHasName(PyObject *obj, PyObject *name) {
+    PyObject **dictptr = _PyObject_GetDictPtr(obj);
+    return dictptr && *dictptr && PyDict_GetItem(*dictptr, name);
+}
+
+static CYTHON_INLINE int __Pyx_OverrideCheckCached(PyObject *obj, PyObject *name, __Pyx_OverrideCheckCache *cache) {
+#if PY_VERSION_HEX >= 0x02060000
+    PyTypeObject *type = Py_TYPE(obj);
+    if (likely(cache->type == type && cache->version_tag == type->tp_version_tag &&
+               PyType_HasFeature(type, Py_TPFLAGS_VALID_VERSION_TAG))) {
+        return !__Pyx_InstanceDictHasName(obj, name);
+    }
+#endif
+    return 0;
+}
+
+static void __Pyx_OverrideCheckStore(PyObject *obj, PyObject *name, __Pyx_OverrideCheckCache *cache) {
+#if PY_VERSION_HEX >= 0x02060000
+    PyTypeObject *type = Py_TYPE(obj);
+    if (type->tp_getattro == PyObject_GenericGetAttr &&
+            PyType_HasFeature(type, Py_TPFLAGS_VALID_VERSION_TAG) &&
+            !__Pyx_InstanceDictHasName(obj, name)) {
+        cache->type = type;
+        cache->version_tag = type->tp_version_tag;
+    }
+#endif
+}
+""")
+
+#------------------------------------------------------------------------------------
+
 set_vtable_utility_code = UtilityCode(
 proto = """
 static int __Pyx_SetVtable(PyObject *dict, void *vtable); /*proto*/
@@ -6269,6 +7369,40 @@ bad:
 
 #------------------------------------------------------------------------------------
 
+string_switch_utility_code = UtilityCode(
+proto="""
+/* Access to the characters of exact string objects in string switches */
+#define __Pyx_UnicodeSwitch_CheckExact(o)      PyUnicode_CheckExact(o)
+#define __Pyx_UnicodeSwitch_Size(o)            PyUnicode_GET_SIZE(o)
+#define __Pyx_UnicodeSwitch_Char(o, i)         (PyUnicode_AS_UNICODE(o)[i])
+#define __Pyx_UnicodeSwitch_Equals(o, s, n)    __Pyx_UnicodeEqualsAscii(PyUnicode_AS_UNICODE(o), s, n)
+#define __Pyx_BytesSwitch_CheckExact(o)        PyBytes_CheckExact(o)
+#define __Pyx_BytesSwitch_Size(o)              PyBytes_GET_SIZE(o)
+#define __Pyx_BytesSwitch_Char(o, i)           ((unsigned char)PyBytes_AS_STRING(o)[i])
+#define __Pyx_BytesSwitch_Equals(o, s, n)      (memcmp(PyBytes_AS_STRING(o), s, n) == 0)
+#if PY_MAJOR_VERSION >= 3
+  #define __Pyx_StrSwitch_CheckExact(o)        __Pyx_UnicodeSwitch_CheckExact(o)
+  #define __Pyx_StrSwitch_Size(o)              __Pyx_UnicodeSwitch_Size(o)
+  #define __Pyx_StrSwitch_Char(o, i)           __Pyx_UnicodeSwitch_Char(o, i)
+  #define __Pyx_StrSwitch_Equals(o, s, n)      __Pyx_UnicodeSwitch_Equals(o, s, n)
+#else
+  #define __Pyx_StrSwitch_CheckExact(o)        __Pyx_BytesSwitch_CheckExact(o)
+  #define __Pyx_StrSwitch_Size(o)              __Pyx_BytesSwitch_Size(o)
+  #define __Pyx_StrSwitch_Char(o, i)           __Pyx_BytesSwitch_Char(o, i)
+  #define __Pyx_StrSwitch_Equals(o, s, n)      __Pyx_BytesSwitch_Equals(o, s, n)
+#endif
+
+static CYTHON_INLINE int __Pyx_UnicodeEqualsAscii(const Py_UNICODE *u, const char *s, Py_ssize_t length) {
+    Py_ssize_t i;
+    for (i = 0; i < length; i++) {
+        if (u[i] != (Py_UNICODE)(unsigned char)s[i]) return 0;
+    }
+    return 1;
+}
+""")
+
+#------------------------------------------------------------------------------------
+
 init_string_tab_utility_code = UtilityCode(
 proto = """
 static int __Pyx_InitStrings(__Pyx_StringTabEntry *t); /*proto*/
@@ -6464,3 +7598,223 @@ bad:
     'EMPTY_BYTES' : Naming.empty_bytes,
     "MODULE": Naming.module_cname,
 })
+
+#------------------------------------------------------------------------------------
+
+def put_generator_init_utility_code(code, pos):
+    code.putln(code.error_goto_if_neg("__Pyx_Generator_init()", pos))
+
+generator_utility_code = UtilityCode(
+proto="""
+struct __pyx_GeneratorObject;
+typedef PyObject *(*__pyx_generator_body_t)(struct __pyx_GeneratorObject *, PyObject *);
+
+typedef struct __pyx_GeneratorObject {
+    PyObject_HEAD
+    __pyx_generator_body_t body;
+    PyObject *closure;
+    int resume_label;
+    char is_running;
+} __pyx_GeneratorObject;
+
+static PyObject *__Pyx_Generator_New(__pyx_generator_body_t body, PyObject *closure); /*proto*/
+static int __Pyx_Generator_init(void); /*proto*/
+""",
+impl="""
+static PyObject *__Pyx_Generator_SendEx(__pyx_GeneratorObject *self, PyObject *value) {
+    PyObject *retval;
+    if (unlikely(self->is_running)) {
+        PyErr_SetString(PyExc_ValueError, "generator already executing");
+        return NULL;
+    }
+    if (unlikely(self->resume_label == -1)) {
+        /* exhausted, or re-raising an exception thrown in */
+        return NULL;
+    }
+    if (unlikely(self->resume_label == 0 && value && value != Py_None)) {
+        PyErr_SetString(PyExc_TypeError,
+                        "can't send non-None value to a just-started generator");
+        return NULL;
+    }
+    self->is_running = 1;
+    retval = self->body(self, value);
+    self->is_running = 0;
+    if (!retval) {
+        /* the generator has finished, release its local state */
+        self->resume_label = -1;
+        Py_CLEAR(self->closure);
+    }
+    return retval;
+}
+
+static PyObject *__Pyx_Generator_Next(PyObject *self) {
+    return __Pyx_Generator_SendEx((__pyx_GeneratorObject *) self, Py_None);
+}
+
+static PyObject *__Pyx_Generator_Send(PyObject *self, PyObject *value) {
+    PyObject *retval = __Pyx_Generator_SendEx((__pyx_GeneratorObject *) self, value);
+    if (!retval && !PyErr_Occurred())
+        PyErr_SetNone(PyExc_StopIteration);
+    return retval;
+}
+
+#if PY_VERSION_HEX >= 0x02050000
+static PyObject *__Pyx_Generator_Close(PyObject *self) {
+    __pyx_GeneratorObject *gen = (__pyx_GeneratorObject *) self;
+    PyObject *retval;
+    if (gen->resume_label == -1) {
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+    PyErr_SetNone(PyExc_GeneratorExit);
+    retval = __Pyx_Generator_SendEx(gen, NULL);
+    if (retval) {
+        Py_DECREF(retval);
+        PyErr_SetString(PyExc_RuntimeError, "generator ignored GeneratorExit");
+        return NULL;
+    }
+    if (!PyErr_Occurred() ||
+            PyErr_ExceptionMatches(PyExc_StopIteration) ||
+            PyErr_ExceptionMatches(PyExc_GeneratorExit)) {
+        PyErr_Clear();
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+    return NULL;
+}
+
+static PyObject *__Pyx_Generator_Throw(PyObject *self, PyObject *args) {
+    PyObject *typ;
+    PyObject *val = NULL;
+    PyObject *tb = NULL;
+    if (!PyArg_UnpackTuple(args, (char *)"throw", 1, 3, &typ, &val, &tb))
+        return NULL;
+    __Pyx_Raise(typ, val, tb);
+    return __Pyx_Generator_Send(self, NULL);
+}
+#endif
+
+static int __Pyx_Generator_traverse(PyObject *self, visitproc visit, void *arg) {
+    __pyx_GeneratorObject *gen = (__pyx_GeneratorObject *) self;
+    Py_VISIT(gen->closure);
+    return 0;
+}
+
+static int __Pyx_Generator_clear(PyObject *self) {
+    __pyx_GeneratorObject *gen = (__pyx_GeneratorObject *) self;
+    gen->resume_label = -1;
+    Py_CLEAR(gen->closure);
+    return 0;
+}
+
+static void __Pyx_Generator_dealloc(PyObject *self) {
+    __pyx_GeneratorObject *gen = (__pyx_GeneratorObject *) self;
+    PyObject_GC_UnTrack(self);
+#if PY_VERSION_HEX >= 0x02050000
+    if (gen->resume_label > 0) {
+        /* a suspended generator is closed to run its finally clauses */
+        PyObject *retval, *error_type, *error_value, *error_traceback;
+        Py_REFCNT(self) = 1;
+        PyObject_GC_Track(self);
+        PyErr_Fetch(&error_type, &error_value, &error_traceback);
+        retval = __Pyx_Generator_Close(self);
+        if (!retval)
+            PyErr_WriteUnraisable(self);
+        else
+            Py_DECREF(retval);
+        PyErr_Restore(error_type, error_value, error_traceback);
+        PyObject_GC_UnTrack(self);
+        if (--Py_REFCNT(self) != 0) {
+            /* resurrected by close() */
+            Py_ssize_t refcnt = Py_REFCNT(self);
+            _Py_NewReference(self);
+            Py_REFCNT(self) = refcnt;
+            PyObject_GC_Track(self);
+            return;
+        }
+    }
+#endif
+    Py_CLEAR(gen->closure);
+    PyObject_GC_Del(gen);
+}
+
+static PyMethodDef __pyx_Generator_methods[] = {
+    {__Pyx_NAMESTR("send"), (PyCFunction) __Pyx_Generator_Send, METH_O, 0},
+#if PY_VERSION_HEX >= 0x02050000
+    {__Pyx_NAMESTR("throw"), (PyCFunction) __Pyx_Generator_Throw, METH_VARARGS, 0},
+    {__Pyx_NAMESTR("close"), (PyCFunction) __Pyx_Generator_Close, METH_NOARGS, 0},
+#endif
+    {0, 0, 0, 0}
+};
+
+static PyTypeObject __pyx_GeneratorType = {
+    PyVarObject_HEAD_INIT(0, 0)
+    __Pyx_NAMESTR("generator"),           /*tp_name*/
+    sizeof(__pyx_GeneratorObject),        /*tp_basicsize*/
+    0,                                    /*tp_itemsize*/
+    (destructor) __Pyx_Generator_dealloc, /*tp_dealloc*/
+    0,                                    /*tp_print*/
+    0,                                    /*tp_getattr*/
+    0,                                    /*tp_setattr*/
+    0,                                    /*tp_compare / reserved*/
+    0,                                    /*tp_repr*/
+    0,                                    /*tp_as_number*/
+    0,                                    /*tp_as_sequence*/
+    0,                                    /*tp_as_mapping*/
+    0,                                    /*tp_hash*/
+    0,                                    /*tp_call*/
+    0,                                    /*tp_str*/
+    0,                                    /*tp_getattro*/
+    0,                                    /*tp_setattro*/
+    0,                                    /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT|Py_TPFLAGS_HAVE_GC, /*tp_flags*/
+    0,                                    /*tp_doc*/
+    (traverseproc) __Pyx_Generator_traverse, /*tp_traverse*/
+    (inquiry) __Pyx_Generator_clear,      /*tp_clear*/
+    0,                                    /*tp_richcompare*/
+    0,                                    /*tp_weaklistoffset*/
+    PyObject_SelfIter,                    /*tp_iter*/
+    (iternextfunc) __Pyx_Generator_Next,  /*tp_iternext*/
+    __pyx_Generator_methods,              /*tp_methods*/
+    0,                                    /*tp_members*/
+    0,                                    /*tp_getset*/
+    0,                                    /*tp_base*/
+    0,                                    /*tp_dict*/
+    0,                                    /*tp_descr_get*/
+    0,                                    /*tp_descr_set*/
+    0,                                    /*tp_dictoffset*/
+    0,                                    /*tp_init*/
+    0,                                    /*tp_alloc*/
+    0,                                    /*tp_new*/
+    0,                                    /*tp_free*/
+    0,                                    /*tp_is_gc*/
+    0,                                    /*tp_bases*/
+    0,                                    /*tp_mro*/
+    0,                                    /*tp_cache*/
+    0,                                    /*tp_subclasses*/
+    0,                                    /*tp_weaklist*/
+    0,                                    /*tp_del*/
+#if PY_VERSION_HEX >= 0x02060000
+    0,                                    /*tp_version_tag*/
+#endif
+};
+
+static PyObject *__Pyx_Generator_New(__pyx_generator_body_t body, PyObject *closure) {
+    __pyx_GeneratorObject *gen = PyObject_GC_New(__pyx_GeneratorObject, &__pyx_GeneratorType);
+    if (gen == NULL)
+        return NULL;
+    gen->body = body;
+    Py_INCREF(closure);
+    gen->closure = closure;
+    gen->resume_label = 0;
+    gen->is_running = 0;
+    PyObject_GC_Track(gen);
+    return (PyObject *) gen;
+}
+
+static int __Pyx_Generator_init(void) {
+    return PyType_Ready(&__pyx_GeneratorType);
+}
+""",
+init = put_generator_init_utility_code,
+requires = [raise_utility_code])
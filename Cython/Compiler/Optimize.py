@@ -47,6 +47,25 @@ def unwrap_node(node):
         node = node.expression
     return node
 
+def unwrap_temp_node(node):
+    while True:
+        node = unwrap_node(node)
+        if not isinstance(node, ExprNodes.CoerceToTempNode):
+            return node
+        node = node.arg
+
+def is_simple_value(node):
+    # a local variable or C attribute that can be evaluated repeatedly
+    node = unwrap_node(node)
+    while isinstance(node, ExprNodes.AttributeNode):
+        if node.is_py_attr:
+            return False
+        node = unwrap_node(node.obj)
+    if not isinstance(node, ExprNodes.NameNode) or node.entry is None:
+        return False
+    entry = node.entry
+    return not (entry.is_pyglobal or entry.is_builtin)
+
 def is_common_value(a, b):
     a = unwrap_node(a)
     b = unwrap_node(b)
@@ -62,6 +81,7 @@ class IterationTransform(Visitor.VisitorTransform):
     - for-in-dict loop becomes a while loop calling PyDict_Next()
     - for-in-enumerate is replaced by an external counter variable
     - for-in-range loop becomes a plain C for loop
+    - list comprehensions over loops of known length preallocate their result
     """
     PyDict_Next_func_type = PyrexTypes.CFuncType(
         PyrexTypes.c_bint_type, [
@@ -146,6 +166,60 @@ class IterationTransform(Visitor.VisitorTransform):
         self.visitchildren(node)
         return self._optimise_for_loop(node)
 
+    def visit_ComprehensionNode(self, node):
+        self.visitchildren(node)
+        if node.type is not Builtin.list_type:
+            return node
+        # the loop may be wrapped in a LetNode that holds the range() bound
+        parent, attr = node, 'loop'
+        loop = node.loop
+        let_ref = None
+        if isinstance(loop, UtilNodes.LetNode):
+            parent, attr = loop, 'body'
+            let_ref = loop.lazy_temp
+            loop = loop.body
+        if not isinstance(loop, Nodes.LoopNode) or loop.body is not node.append:
+            # filtered or nested loops, unknown number of items
+            return node
+
+        prealloc_node = None
+        if isinstance(loop, Nodes.ForFromStatNode):
+            if not loop.from_range:
+                return node
+            step = loop.step
+            if not isinstance(step, ExprNodes.IntNode) or \
+                    not isinstance(step.constant_result, (int, long)):
+                return node
+            bound1, bound2 = loop.bound1, loop.bound2
+            for bound in (bound1, bound2):
+                if bound is not let_ref and not bound.is_literal and \
+                       not (isinstance(bound, ExprNodes.NameNode) and is_simple_value(bound)):
+                    return node
+                if not bound.type.is_int or not bound.type.signed or \
+                       PyrexTypes.widest_numeric_type(
+                           bound.type, PyrexTypes.c_py_ssize_t_type) is not PyrexTypes.c_py_ssize_t_type:
+                    return node
+            if loop.relation1 in ('>=', '>'):
+                # counting down
+                bound1, bound2 = bound2, bound1
+            prealloc_node = ExprNodes.ComprehensionPreallocNode(
+                node.pos, target=node, start=bound1, stop=bound2,
+                step=abs(step.constant_result))
+        elif isinstance(loop, Nodes.ForInStatNode):
+            sequence = loop.iterator.sequence
+            if sequence.type not in (Builtin.list_type, Builtin.tuple_type):
+                return node
+            # the size hint is None safe, the loop checks for None itself
+            sequence = unwrap_coerced_node(sequence, (ExprNodes.NoneCheckNode,))
+            if not isinstance(sequence, ExprNodes.NameNode) or not is_simple_value(sequence):
+                return node
+            prealloc_node = ExprNodes.ComprehensionPreallocNode(
+                node.pos, target=node, sequence=sequence)
+        if prealloc_node is None:
+            return node
+        setattr(parent, attr, Nodes.StatListNode(loop.pos, stats=[prealloc_node, loop]))
+        return node
+
     def _optimise_for_loop(self, node):
         iterator = node.iterator.sequence
         if iterator.type is Builtin.dict_type:
@@ -190,20 +264,31 @@ class IterationTransform(Visitor.VisitorTransform):
                 node, dict_obj, keys, values)
 
         # enumerate() ?
-        if iterator.self is None and function.is_name and \
-               function.entry and function.entry.is_builtin and \
-               function.name == 'enumerate':
+        if self._is_builtin_call(iterator, ('enumerate',)):
             return self._transform_enumerate_iteration(node, iterator)
 
+        # reversed() ?
+        if self._is_builtin_call(iterator, ('reversed',)):
+            return self._transform_reversed_iteration(node, iterator)
+
+        # zip() ?
+        if self._is_builtin_call(iterator, ('zip',)):
+            return self._transform_zip_iteration(node, iterator)
+
         # range() iteration?
         if Options.convert_range and node.target.type.is_int:
-            if iterator.self is None and function.is_name and \
-                   function.entry and function.entry.is_builtin and \
-                   function.name in ('range', 'xrange'):
+            if self._is_builtin_call(iterator, ('range', 'xrange')):
                 return self._transform_range_iteration(node, iterator)
 
         return node
 
+    def _is_builtin_call(self, node, names):
+        if not isinstance(node, ExprNodes.SimpleCallNode) or node.self is not None:
+            return False
+        function = node.function
+        return function.is_name and function.entry and \
+               function.entry.is_builtin and function.name in names
+
     PyUnicode_AS_UNICODE_func_type = PyrexTypes.CFuncType(
         PyrexTypes.c_py_unicode_ptr_type, [
             PyrexTypes.CFuncTypeArg("s", Builtin.unicode_type, None)
@@ -224,9 +309,9 @@ class IterationTransform(Visitor.VisitorTransform):
             PyrexTypes.CFuncTypeArg("s", Builtin.bytes_type, None)
             ])
 
-    def _transform_string_iteration(self, node, slice_node):
+    def _transform_string_iteration(self, node, slice_node, reversed=False):
         if not node.target.type.is_int:
-            return self._transform_carray_iteration(node, slice_node)
+            return self._transform_carray_iteration(node, slice_node, reversed)
         if slice_node.type is Builtin.unicode_type:
             unpack_func = "PyUnicode_AS_UNICODE"
             len_func = "PyUnicode_GET_SIZE"
@@ -266,9 +351,10 @@ class IterationTransform(Visitor.VisitorTransform):
                     stop = len_node,
                     type = slice_base_node.type,
                     is_temp = 1,
-                    )))
+                    ),
+                reversed))
 
-    def _transform_carray_iteration(self, node, slice_node):
+    def _transform_carray_iteration(self, node, slice_node, reversed=False):
         neg_step = False
         if isinstance(slice_node, ExprNodes.SliceIndexNode):
             slice_base = slice_node.base
@@ -328,6 +414,9 @@ class IterationTransform(Visitor.VisitorTransform):
                 stop = None
             else:
                 stop = stop.coerce_to(PyrexTypes.c_py_ssize_t_type, self.current_scope)
+        if reversed and (neg_step or step is not None or stop is None):
+            # leave stepped slices to Python
+            return node
         if stop is None:
             if neg_step:
                 stop = ExprNodes.IntNode(
@@ -341,23 +430,47 @@ class IterationTransform(Visitor.VisitorTransform):
             ptr_type = ptr_type.element_ptr_type()
         carray_ptr = slice_base.coerce_to_simple(self.current_scope)
 
-        if start and start.constant_result != 0:
+        if reversed:
+            # run from the end of the slice back to its start
             start_ptr_node = ExprNodes.AddNode(
-                start.pos,
+                stop.pos,
                 operand1=carray_ptr,
                 operator='+',
-                operand2=start,
+                operand2=stop,
                 type=ptr_type)
+            if start and start.constant_result != 0:
+                stop_ptr_node = ExprNodes.AddNode(
+                    start.pos,
+                    operand1=ExprNodes.CloneNode(carray_ptr),
+                    operator='+',
+                    operand2=start,
+                    type=ptr_type
+                    ).coerce_to_simple(self.current_scope)
+            else:
+                stop_ptr_node = ExprNodes.CloneNode(carray_ptr)
+            relation1, relation2 = '>', '>='
         else:
-            start_ptr_node = carray_ptr
+            if start and start.constant_result != 0:
+                start_ptr_node = ExprNodes.AddNode(
+                    start.pos,
+                    operand1=carray_ptr,
+                    operator='+',
+                    operand2=start,
+                    type=ptr_type)
+            else:
+                start_ptr_node = carray_ptr
 
-        stop_ptr_node = ExprNodes.AddNode(
-            stop.pos,
-            operand1=ExprNodes.CloneNode(carray_ptr),
-            operator='+',
-            operand2=stop,
-            type=ptr_type
-            ).coerce_to_simple(self.current_scope)
+            stop_ptr_node = ExprNodes.AddNode(
+                stop.pos,
+                operand1=ExprNodes.CloneNode(carray_ptr),
+                operator='+',
+                operand2=stop,
+                type=ptr_type
+                ).coerce_to_simple(self.current_scope)
+            if neg_step:
+                relation1, relation2 = '>=', '>'
+            else:
+                relation1, relation2 = '<=', '<'
 
         counter = UtilNodes.TempHandle(ptr_type)
         counter_temp = counter.ref(node.target.pos)
@@ -400,9 +513,9 @@ class IterationTransform(Visitor.VisitorTransform):
 
         for_node = Nodes.ForFromStatNode(
             node.pos,
-            bound1=start_ptr_node, relation1=neg_step and '>=' or '<=',
+            bound1=start_ptr_node, relation1=relation1,
             target=counter_temp,
-            relation2=neg_step and '>' or '<', bound2=stop_ptr_node,
+            relation2=relation2, bound2=stop_ptr_node,
             step=step, body=body,
             else_clause=node.else_clause,
             from_range=True)
@@ -481,8 +594,158 @@ class IterationTransform(Visitor.VisitorTransform):
         # recurse into loop to check for further optimisations
         return UtilNodes.LetNode(temp, self._optimise_for_loop(node))
 
-    def _transform_range_iteration(self, node, range_function):
+    def _transform_reversed_iteration(self, node, reversed_function):
+        args = reversed_function.arg_tuple.args
+        if len(args) != 1:
+            # leave the error to Python
+            return node
+        arg = args[0]
+
+        # reversed(list/tuple) ?
+        if arg.type in (Builtin.list_type, Builtin.tuple_type):
+            node.iterator.sequence = arg.as_none_safe_node(
+                "argument to reversed() must be a sequence")
+            node.iterator.reversed = True
+            return node
+
+        if arg.type in (Builtin.bytes_type, Builtin.unicode_type):
+            return self._transform_string_iteration(node, arg, reversed=True)
+
+        # reversed(range()) ?
+        if Options.convert_range and node.target.type.is_int:
+            if self._is_builtin_call(arg, ('range', 'xrange')):
+                return self._transform_range_iteration(node, arg, reversed=True)
+
+        return node
+
+    PyList_GET_SIZE_func_type = PyrexTypes.CFuncType(
+        PyrexTypes.c_py_ssize_t_type, [
+            PyrexTypes.CFuncTypeArg("l", Builtin.list_type, None)
+            ])
+
+    PyTuple_GET_SIZE_func_type = PyrexTypes.CFuncType(
+        PyrexTypes.c_py_ssize_t_type, [
+            PyrexTypes.CFuncTypeArg("t", Builtin.tuple_type, None)
+            ])
+
+    def _transform_zip_iteration(self, node, zip_function):
+        """Transform
+
+        for a, b in zip(xs, ys):
+            BODY
+
+        over lists and tuples into
+
+        i = 0
+        while i < len(xs) and i < len(ys):
+            a = xs[i]
+            b = ys[i]
+            i += 1
+            BODY
+
+        The lengths are checked on each iteration as lists may change
+        their size in the loop body.  In Python 2, zip() copies all items
+        into a list before the loop starts, so lists are only handled
+        with language_level=3.
+        """
+        args = zip_function.arg_tuple.args
+        if not args or not node.target.is_sequence_constructor:
+            return node
+        targets = node.target.args
+        if len(targets) != len(args):
+            # leave the error to Python
+            return node
+        for target in targets:
+            if target.is_starred:
+                return node
+        if self.module_scope.context.language_level >= 3:
+            sequence_types = (Builtin.list_type, Builtin.tuple_type)
+        else:
+            sequence_types = (Builtin.tuple_type,)
+        for arg in args:
+            if arg.type not in sequence_types:
+                return node
+
+        pos = zip_function.pos
+        env = self.current_scope
+        sequences = []
+        for i in range(len(args)):
+            sequences.append(UtilNodes.LetRefNode(
+                args[i].as_none_safe_node(
+                    "zip argument #%d must support iteration" % (i+1))))
+        index = UtilNodes.LetRefNode(
+            ExprNodes.IntNode(pos, value='0',
+                              type=PyrexTypes.c_py_ssize_t_type,
+                              constant_result=0))
+
+        condition = None
+        items = []
+        for sequence in sequences:
+            if sequence.type is Builtin.list_type:
+                size_func = "PyList_GET_SIZE"
+                size_func_type = self.PyList_GET_SIZE_func_type
+            else:
+                size_func = "PyTuple_GET_SIZE"
+                size_func_type = self.PyTuple_GET_SIZE_func_type
+            in_range = ExprNodes.PrimaryCmpNode(
+                pos,
+                operand1 = index,
+                operator = '<',
+                operand2 = ExprNodes.PythonCapiCallNode(
+                    pos, size_func, size_func_type,
+                    args = [sequence],
+                    is_temp = False))
+            if condition is None:
+                condition = in_range
+            else:
+                condition = ExprNodes.BoolBinopNode(
+                    pos,
+                    operator = 'and',
+                    operand1 = condition,
+                    operand2 = in_range)
+            item = ExprNodes.IndexNode(pos, base=sequence, index=index)
+            item.analyse_types(env)
+            items.append(UtilNodes.LetRefNode(item))
+
+        # all items are looked up before any of the targets is assigned
+        fetch_items = Nodes.StatListNode(pos, stats = [
+            Nodes.SingleAssignmentNode(
+                target.pos,
+                lhs = target,
+                rhs = item.coerce_to(target.type, env))
+            for target, item in zip(targets, items) ])
+        for item in items[::-1]:
+            fetch_items = UtilNodes.LetNode(item, fetch_items)
+
+        increment = Nodes.SingleAssignmentNode(
+            pos,
+            lhs = index,
+            rhs = ExprNodes.AddNode(
+                pos,
+                operand1 = index,
+                operator = '+',
+                operand2 = ExprNodes.IntNode(pos, value='1',
+                                             type=PyrexTypes.c_py_ssize_t_type,
+                                             constant_result=1),
+                type = PyrexTypes.c_py_ssize_t_type,
+                is_temp = False))
+
+        loop_node = Nodes.WhileStatNode(
+            node.pos,
+            condition = condition.analyse_temp_boolean_expression(env),
+            body = Nodes.StatListNode(
+                node.body.pos,
+                stats = [fetch_items, increment, node.body]),
+            else_clause = node.else_clause)
+
+        loop_node = UtilNodes.LetNode(index, loop_node)
+        for sequence in sequences[::-1]:
+            loop_node = UtilNodes.LetNode(sequence, loop_node)
+        return loop_node
+
+    def _transform_range_iteration(self, node, range_function, reversed=False):
         args = range_function.arg_tuple.args
+        runtime_step_sign = False
         if len(args) < 3:
             step_pos = range_function.pos
             step_value = 1
@@ -492,15 +755,25 @@ class IterationTransform(Visitor.VisitorTransform):
             step = args[2]
             step_pos = step.pos
             if not isinstance(step.constant_result, (int, long)):
-                # cannot determine step direction
-                return node
-            step_value = step.constant_result
-            if step_value == 0:
-                # will lead to an error elsewhere
-                return node
-            if not isinstance(step, ExprNodes.IntNode):
-                step = ExprNodes.IntNode(step_pos, value=str(step_value),
-                                         constant_result=step_value)
+                if reversed:
+                    # cannot determine the last item
+                    return node
+                if not (step.type.is_int or step.type.is_pyobject):
+                    return node
+                # loop direction is determined at runtime
+                runtime_step_sign = True
+                step_value = 1
+            else:
+                step_value = step.constant_result
+                if step_value == 0:
+                    # will lead to an error elsewhere
+                    return node
+                if reversed and step_value not in (1, -1):
+                    # cannot determine the last item
+                    return node
+                if not isinstance(step, ExprNodes.IntNode):
+                    step = ExprNodes.IntNode(step_pos, value=str(step_value),
+                                             constant_result=step_value)
 
         if step_value < 0:
             step.value = str(-step_value)
@@ -519,6 +792,14 @@ class IterationTransform(Visitor.VisitorTransform):
             bound2 = args[1].coerce_to_integer(self.current_scope)
         step = step.coerce_to_integer(self.current_scope)
 
+        if reversed:
+            # run from the stop bound back to the start bound
+            bound1, bound2 = bound2, bound1
+            if step_value < 0:
+                relation1, relation2 = '<', '<='
+            else:
+                relation1, relation2 = '>', '>='
+
         if not bound2.is_literal:
             # stop bound must be immutable => keep it in a temp var
             bound2_is_temp = True
@@ -526,6 +807,10 @@ class IterationTransform(Visitor.VisitorTransform):
         else:
             bound2_is_temp = False
 
+        if runtime_step_sign:
+            # step must be immutable, too
+            step = UtilNodes.LetRefNode(step)
+
         for_node = Nodes.ForFromStatNode(
             node.pos,
             target=node.target,
@@ -533,8 +818,11 @@ class IterationTransform(Visitor.VisitorTransform):
             relation2=relation2, bound2=bound2,
             step=step, body=node.body,
             else_clause=node.else_clause,
-            from_range=True)
+            from_range=True,
+            runtime_step_sign=runtime_step_sign)
 
+        if runtime_step_sign:
+            for_node = UtilNodes.LetNode(step, for_node)
         if bound2_is_temp:
             for_node = UtilNodes.LetNode(bound2, for_node)
 
@@ -693,6 +981,10 @@ class SwitchTransform(Visitor.VisitorTransform):
     This transformation tries to turn long if statements into C switch statements.
     The requirement is that every clause be an (or of) var == value, where the var
     is common among all clauses and both var and value are ints.
+
+    If statements that compare a simple variable to string literals of the
+    same type are turned into a switch on the length and characters of
+    exact string objects, with the original comparisons as fallback.
     """
     NO_MATCH = (None, None, None)
 
@@ -804,7 +1096,7 @@ class SwitchTransform(Visitor.VisitorTransform):
                 common_var, if_clause.condition, False)
             if common_var is None:
                 self.visitchildren(node)
-                return node
+                return self.build_string_switch_statement(node)
             cases.append(Nodes.SwitchCaseNode(pos = if_clause.pos,
                                               conditions = conditions,
                                               body = if_clause.body))
@@ -823,6 +1115,104 @@ class SwitchTransform(Visitor.VisitorTransform):
                                            else_clause = node.else_clause)
         return switch_node
 
+    def extract_string_conditions(self, cond):
+        # returns the common variable and the string literals of a
+        # condition 'var == "..." or var in ("...", ...) or ...'
+        while True:
+            if isinstance(cond, (ExprNodes.CoerceToTempNode, ExprNodes.CoerceToBooleanNode)):
+                cond = cond.arg
+            elif isinstance(cond, UtilNodes.EvalWithTempExprNode):
+                cond = cond.subexpression
+            elif isinstance(cond, ExprNodes.TypecastNode):
+                cond = cond.operand
+            else:
+                break
+        if isinstance(cond, ExprNodes.PrimaryCmpNode):
+            if cond.cascade is not None or cond.operator != '==':
+                return None, None
+            for var, literal in ((cond.operand1, cond.operand2),
+                                 (cond.operand2, cond.operand1)):
+                if isinstance(literal, (ExprNodes.UnicodeNode, ExprNodes.BytesNode,
+                                        ExprNodes.StringNode)) \
+                       and literal.type.is_pyobject and is_simple_value(var):
+                    return var, [literal]
+        elif isinstance(cond, ExprNodes.BoolBinopNode) and cond.operator == 'or':
+            var1, literals1 = self.extract_string_conditions(cond.operand1)
+            var2, literals2 = self.extract_string_conditions(cond.operand2)
+            if var1 is not None and var2 is not None and is_common_value(var1, var2):
+                return var1, literals1 + literals2
+        return None, None
+
+    def string_switch_kind(self, literals):
+        # the string type of the literals and their values as byte
+        # strings, or None if they cannot be switched on in C
+        kinds = {ExprNodes.UnicodeNode : 'Unicode',
+                 ExprNodes.BytesNode : 'Bytes',
+                 ExprNodes.StringNode : 'Str'}
+        kind = None
+        values = []
+        for literal in literals:
+            literal_kind = kinds[type(literal)]
+            if kind is not None and kind != literal_kind:
+                return None, None
+            kind = literal_kind
+            value = literal.value
+            if kind == 'Bytes':
+                values.append(value)
+                continue
+            try:
+                if isinstance(value, EncodedString):
+                    text, value = value, value.encode('ASCII')
+                else:
+                    text = value.decode('ASCII')
+            except UnicodeError:
+                # non-ASCII characters differ between Py2 and Py3 str
+                # literals and between narrow and wide unicode builds
+                return None, None
+            if kind == 'Str' and literal.unicode_value is not None \
+                   and literal.unicode_value != text:
+                return None, None
+            values.append(value)
+        return kind, values
+
+    def build_string_switch_statement(self, node):
+        common_var = None
+        cases = []
+        all_literals = []
+        seen = set()
+        for if_clause in node.if_clauses:
+            var, literals = self.extract_string_conditions(if_clause.condition)
+            if var is None:
+                return node
+            if common_var is None:
+                common_var = var
+            elif not is_common_value(var, common_var):
+                return node
+            kind, values = self.string_switch_kind(literals)
+            if kind is None:
+                return node
+            all_literals.extend(literals)
+            # later duplicates can never match
+            unique_values = []
+            for value in values:
+                if value not in seen:
+                    seen.add(value)
+                    unique_values.append(value)
+            cases.append(Nodes.StringSwitchCaseNode(pos = if_clause.pos,
+                                                    condition = if_clause.condition,
+                                                    values = unique_values,
+                                                    body = if_clause.body))
+        if len(all_literals) < 2:
+            return node
+        kind, _ = self.string_switch_kind(all_literals)
+        if kind is None:
+            return node
+        return Nodes.StringSwitchStatNode(pos = node.pos,
+                                          test = unwrap_node(common_var),
+                                          kind = kind,
+                                          cases = cases,
+                                          else_clause = node.else_clause)
+
     def visit_CondExprNode(self, node):
         not_in, common_var, conditions = self.extract_common_conditions(
             None, node.test, True)
@@ -957,6 +1347,265 @@ class FlattenInListTransform(Visitor.VisitorTransform, SkipDeclarations):
     visit_Node = Visitor.VisitorTransform.recurse_to_children
 
 
+class AssignedEntriesCollector(Visitor.TreeVisitor):
+    """Collect the entries of the names that are assigned to, or whose
+    address or attributes may get modified, in a (sub-)tree.
+    """
+    def __init__(self):
+        super(AssignedEntriesCollector, self).__init__()
+        self.entries = set()
+
+    def add_assignment(self, lhs):
+        if isinstance(lhs, ExprNodes.SequenceNode):
+            for arg in lhs.args:
+                self.add_assignment(arg)
+            return
+        if isinstance(lhs, ExprNodes.IndexNode):
+            # item assignments only modify the object itself,
+            # unless the object is an attribute like 'a.shape'
+            if not isinstance(lhs.base, ExprNodes.AttributeNode):
+                return
+            lhs = lhs.base
+        while isinstance(lhs, (ExprNodes.AttributeNode, ExprNodes.IndexNode)):
+            if isinstance(lhs, ExprNodes.AttributeNode):
+                lhs = lhs.obj
+            else:
+                lhs = lhs.base
+        lhs = unwrap_node(lhs)
+        if isinstance(lhs, ExprNodes.NameNode) and lhs.entry is not None:
+            self.entries.add(lhs.entry)
+
+    def visit_SingleAssignmentNode(self, node):
+        self.add_assignment(node.lhs)
+        self._visitchildren(node, None)
+
+    def visit_CascadedAssignmentNode(self, node):
+        for lhs in node.lhs_list:
+            self.add_assignment(lhs)
+        self._visitchildren(node, None)
+
+    def visit_InPlaceAssignmentNode(self, node):
+        self.add_assignment(node.lhs)
+        self._visitchildren(node, None)
+
+    def visit_LoopNode(self, node):
+        if getattr(node, 'target', None) is not None:
+            self.add_assignment(node.target)
+        self._visitchildren(node, None)
+
+    def visit_ExceptClauseNode(self, node):
+        if node.target is not None:
+            self.add_assignment(node.target)
+        self._visitchildren(node, None)
+
+    def visit_DelStatNode(self, node):
+        for arg in node.args:
+            self.add_assignment(arg)
+        self._visitchildren(node, None)
+
+    def visit_AmpersandNode(self, node):
+        self.add_assignment(node.operand)
+        self._visitchildren(node, None)
+
+    def visit_DecrementIncrementNode(self, node):
+        self.add_assignment(node.operand)
+        self._visitchildren(node, None)
+
+    def visit_FuncDefNode(self, node):
+        pass # assignments in inner functions are local to them
+
+    def visit_Node(self, node):
+        self._visitchildren(node, None)
+
+
+class AddressTakenCollector(Visitor.TreeVisitor):
+    """Collect the entries of the names whose address is taken in a
+    (sub-)tree.  They may get modified through a pointer anywhere.
+    """
+    def __init__(self):
+        super(AddressTakenCollector, self).__init__()
+        self.entries = set()
+
+    def visit_AmpersandNode(self, node):
+        operand = node.operand
+        while isinstance(operand, (ExprNodes.AttributeNode, ExprNodes.IndexNode)):
+            if isinstance(operand, ExprNodes.AttributeNode):
+                operand = operand.obj
+            else:
+                operand = operand.base
+        operand = unwrap_node(operand)
+        if isinstance(operand, ExprNodes.NameNode) and operand.entry is not None:
+            self.entries.add(operand.entry)
+        self._visitchildren(node, None)
+
+    def visit_Node(self, node):
+        self._visitchildren(node, None)
+
+
+class BufferIndexRangeTransform(Visitor.VisitorTransform):
+    """Drop the index checks of buffer and memoryview slice item
+    accesses that are known to be unnecessary from the range of the
+    enclosing for-from, range() or prange() loops.
+
+    A loop variable that is not assigned to in the loop body keeps
+    within the loop bounds.  If the lower bound is not negative, the
+    wraparound check for negative indices is not needed, and if a
+    memoryview slice is indexed up to its own shape in the same
+    dimension, as in
+
+        for i in range(a.shape[0]):
+            a[i] ...
+
+    and is not reassigned in the loop body, the bounds check is not
+    needed either.
+    """
+    visit_Node = Visitor.VisitorTransform.recurse_to_children
+
+    def __call__(self, root):
+        # entry of a loop variable -> (entry, dim) of the memoryview
+        # slice shape that bounds it, or None if only non-negative
+        self.loop_ranges = {}
+        # entries whose address is taken in the current function
+        self.address_taken = set()
+        return super(BufferIndexRangeTransform, self).__call__(root)
+
+    def visit_ForFromStatNode(self, node):
+        if not self._is_loop_target(node.target):
+            self.visitchildren(node)
+            return node
+        nonneg, shape = self._loop_range(node)
+        return self._visit_loop(node, nonneg, shape,
+                                ['target', 'bound1', 'bound2', 'step', 'else_clause'])
+
+    def visit_ParallelRangeNode(self, node):
+        if not self._is_loop_target(node.target):
+            self.visitchildren(node)
+            return node
+        if node.step_value > 0:
+            nonneg, shape = self._bounds_range(node.start, '<=', node.stop, '<')
+        else:
+            nonneg, shape = self._bounds_range(node.stop, '<', node.start, '<=')
+        return self._visit_loop(node, nonneg, shape,
+                                ['target', 'start', 'stop', 'step', 'chunksize',
+                                 'num_threads', 'else_clause'])
+
+    def _is_loop_target(self, target):
+        return (isinstance(target, ExprNodes.NameNode) and target.type.is_int
+                and self._is_local(target.entry)
+                and target.entry not in self.address_taken)
+
+    def _visit_loop(self, node, nonneg, shape, attrs):
+        target = node.target
+        if not nonneg:
+            self.visitchildren(node)
+            return node
+        collector = AssignedEntriesCollector()
+        collector.visitchildren(node, ['body'])
+        assigned = collector.entries
+        if target.entry in assigned:
+            self.visitchildren(node)
+            return node
+        if shape is not None and (shape[0] in assigned or
+                                  shape[0] in self.address_taken):
+            shape = None
+        self.visitchildren(node, attrs)
+        saved_ranges = self.loop_ranges
+        self.loop_ranges = saved_ranges.copy()
+        self.loop_ranges[target.entry] = shape
+        self.visitchildren(node, ['body'])
+        self.loop_ranges = saved_ranges
+        return node
+
+    def visit_FuncDefNode(self, node):
+        saved_ranges = self.loop_ranges
+        saved_address_taken = self.address_taken
+        self.loop_ranges = {}
+        collector = AddressTakenCollector()
+        collector.visitchildren(node)
+        self.address_taken = collector.entries
+        self.visitchildren(node)
+        self.loop_ranges = saved_ranges
+        self.address_taken = saved_address_taken
+        return node
+
+    def visit_IndexNode(self, node):
+        self.visitchildren(node)
+        if not node.is_buffer_access or not self.loop_ranges:
+            return node
+        base = unwrap_node(node.base)
+        nonneg_indices = []
+        in_bounds_indices = []
+        for dim, index in enumerate(node.indices):
+            index = unwrap_node(index)
+            entry = None
+            if isinstance(index, ExprNodes.NameNode):
+                entry = index.entry
+            if entry is None or entry not in self.loop_ranges:
+                nonneg_indices.append(False)
+                in_bounds_indices.append(False)
+                continue
+            shape = self.loop_ranges[entry]
+            nonneg_indices.append(True)
+            in_bounds_indices.append(
+                node.memslice_index and shape is not None
+                and isinstance(base, ExprNodes.NameNode)
+                and shape == (base.entry, dim))
+        if True in nonneg_indices:
+            node.nonneg_indices = nonneg_indices
+            node.in_bounds_indices = in_bounds_indices
+        return node
+
+    def _is_local(self, entry):
+        return (entry is not None and (entry.is_local or entry.is_arg)
+                and not (entry.in_closure or entry.from_closure))
+
+    def _loop_range(self, node):
+        """Returns whether the loop variable is never negative, and the
+        (entry, dim) of the memoryview slice shape that it stays below.
+        """
+        if node.runtime_step_sign:
+            return False, None
+        if node.relation1 in ('<', '<='):
+            lower, lower_relation = node.bound1, node.relation1
+            upper, upper_relation = node.bound2, node.relation2
+        else:
+            lower, lower_relation = node.bound2, node.relation2
+            upper, upper_relation = node.bound1, node.relation1
+        if node.relation1[0] != node.relation2[0]:
+            return False, None
+        return self._bounds_range(lower, lower_relation, upper, upper_relation)
+
+    def _bounds_range(self, lower, lower_relation, upper, upper_relation):
+        lower = unwrap_temp_node(lower)
+        if lower.type.is_int and not lower.type.signed:
+            nonneg = True
+        elif isinstance(lower.constant_result, (int, long)):
+            if lower_relation in ('<', '>'):
+                nonneg = lower.constant_result >= -1
+            else:
+                nonneg = lower.constant_result >= 0
+        else:
+            nonneg = False
+        if not nonneg or upper_relation not in ('<', '>'):
+            return nonneg, None
+        return nonneg, self._memslice_shape(upper)
+
+    def _memslice_shape(self, node):
+        # a.shape[dim] of a local memoryview slice a -> (entry, dim)
+        node = unwrap_temp_node(node)
+        if not (isinstance(node, ExprNodes.IndexNode)
+                and isinstance(node.base, ExprNodes.AttributeNode)
+                and node.base.attribute == 'shape'
+                and isinstance(node.index.constant_result, (int, long))):
+            return None
+        obj = unwrap_node(node.base.obj)
+        if not (isinstance(obj, ExprNodes.NameNode)
+                and obj.type.is_memoryviewslice
+                and self._is_local(obj.entry)):
+            return None
+        return obj.entry, node.index.constant_result
+
+
 class DropRefcountingTransform(Visitor.VisitorTransform):
     """Drop ref-counting in safe places.
     """
@@ -1091,10 +1740,66 @@ class EarlyReplaceBuiltinCalls(Visitor.EnvTransform):
     def visit_SimpleCallNode(self, node):
         self.visitchildren(node)
         function = node.function
+        if function.is_attribute and function.attribute == 'join':
+            return self._optimise_string_join(node, function, node.args)
         if not self._function_is_builtin_name(function):
             return node
         return self._dispatch_to_handler(node, function, node.args)
 
+    def visit_ForInStatNode(self, node):
+        """Transform
+
+        for y in (x*2 for L in LL for x in L):
+            BODY
+
+        into
+
+        for L in LL:
+            for x in L:
+                y = x*2
+                BODY
+
+        inside of the scope of the generator expression.  The body
+        must not use any of the names of that scope.
+        """
+        self.visitchildren(node)
+        gen_expr_node = node.iterator.sequence
+        if not isinstance(gen_expr_node, ExprNodes.GeneratorExpressionNode):
+            return node
+        loop_node = gen_expr_node.loop
+        yield_expression, yield_stat_node = self._find_single_yield_expression(loop_node)
+        if yield_expression is None:
+            return node
+        if not gen_expr_node.has_local_scope:
+            return node
+        expr_scope = gen_expr_node.expr_scope
+        for name in expr_scope.entries:
+            if expr_scope.outer_scope.lookup(name) is not None:
+                # the loop target gets its type inferred from the
+                # generator expression outside of its scope
+                return node
+        collector = self.LoopBodyNameCollector()
+        collector.visitchildren(node, ['target', 'body'])
+        if collector.unsupported:
+            return node
+        for name in collector.names:
+            if name in expr_scope.entries:
+                return node
+        if not self._make_break_leave_all_loops(loop_node, yield_stat_node):
+            return node
+
+        loop_body = Nodes.StatListNode(node.pos, stats = [
+            Nodes.SingleAssignmentNode(
+                node.target.pos, lhs = node.target, rhs = yield_expression),
+            node.body])
+        Visitor.recursively_replace_node(loop_node, yield_stat_node, loop_body)
+        loop_node.else_clause = node.else_clause
+
+        return Nodes.ExprStatNode(
+            node.pos, expr = ExprNodes.InlinedGeneratorExpressionNode(
+                gen_expr_node.pos, loop = loop_node, result_node = None,
+                expr_scope = expr_scope, orig_func = None))
+
     def visit_GeneralCallNode(self, node):
         self.visitchildren(node)
         function = node.function
@@ -1182,6 +1887,28 @@ class EarlyReplaceBuiltinCalls(Visitor.EnvTransform):
             # everything below this node is out of scope
             pass
 
+    class LoopBodyNameCollector(Visitor.TreeVisitor):
+        def __init__(self):
+            Visitor.TreeVisitor.__init__(self)
+            self.names = []
+            self.unsupported = False
+
+        visit_Node = Visitor.TreeVisitor.visitchildren
+        def visit_NameNode(self, node):
+            self.names.append(node.name)
+
+        def visit_unsupported(self, node):
+            # yielding from inside of the loop would lose the local
+            # variables of the generator expression scope, local
+            # functions and classes would get declared in it
+            self.unsupported = True
+
+        visit_YieldExprNode = visit_unsupported
+        visit_FuncDefNode = visit_unsupported
+        visit_LambdaNode = visit_unsupported
+        visit_PyClassDefNode = visit_unsupported
+        visit_CClassDefNode = visit_unsupported
+
     def _find_single_yield_expression(self, node):
         collector = self.YieldNodeCollector()
         collector.visitchildren(node)
@@ -1193,6 +1920,43 @@ class EarlyReplaceBuiltinCalls(Visitor.EnvTransform):
         except KeyError:
             return None, None
 
+    def _make_break_leave_all_loops(self, loop_node, yield_stat_node):
+        """Prepare the nested loops of a generator expression so that a
+        'break' in place of its yield statement leaves all of them:
+
+        for L in LL:
+            if L:
+                for x in L:
+                    YIELD
+                else:
+                    continue
+                break
+
+        Returns False without changing the tree if the loop structure
+        is not understood.
+        """
+        path = []
+        node = loop_node
+        while node is not yield_stat_node:
+            if isinstance(node, Nodes.LoopNode):
+                parent, attr = node, 'body'
+            elif isinstance(node, Nodes.IfStatNode) and \
+                     len(node.if_clauses) == 1 and node.else_clause is None:
+                parent, attr = node.if_clauses[0], 'body'
+            else:
+                return False
+            path.append((parent, attr))
+            node = getattr(parent, attr)
+        for parent, attr in path:
+            inner_loop = getattr(parent, attr)
+            if isinstance(inner_loop, Nodes.LoopNode):
+                inner_loop.else_clause = Nodes.ContinueStatNode(inner_loop.pos)
+                setattr(parent, attr, Nodes.StatListNode(inner_loop.pos, stats = [
+                    inner_loop,
+                    Nodes.BreakStatNode(inner_loop.pos)
+                    ]))
+        return True
+
     def _handle_simple_function_all(self, node, pos_args):
         """Transform
 
@@ -1243,6 +2007,8 @@ class EarlyReplaceBuiltinCalls(Visitor.EnvTransform):
         yield_expression, yield_stat_node = self._find_single_yield_expression(loop_node)
         if yield_expression is None:
             return node
+        if not self._make_break_leave_all_loops(loop_node, yield_stat_node):
+            return node
 
         if is_any:
             condition = yield_expression
@@ -1267,15 +2033,6 @@ class EarlyReplaceBuiltinCalls(Visitor.EnvTransform):
                         Nodes.BreakStatNode(node.pos)
                         ])) ]
             )
-        loop = loop_node
-        while isinstance(loop.body, Nodes.LoopNode):
-            next_loop = loop.body
-            loop.body = Nodes.StatListNode(loop.body.pos, stats = [
-                loop.body,
-                Nodes.BreakStatNode(yield_expression.pos)
-                ])
-            next_loop.else_clause = Nodes.ContinueStatNode(yield_expression.pos)
-            loop = next_loop
         loop_node.else_clause = Nodes.SingleAssignmentNode(
             node.pos,
             lhs = result_ref,
@@ -1400,6 +2157,8 @@ class EarlyReplaceBuiltinCalls(Visitor.EnvTransform):
     def _optimise_min_max(self, node, args, operator):
         """Replace min(a,b,...) and max(a,b,...) by explicit comparison code.
         """
+        if len(args) == 1 and isinstance(args[0], ExprNodes.GeneratorExpressionNode):
+            return self._transform_min_max_genexpr(node, args[0], operator)
         if len(args) <= 1:
             # leave this to Python
             return node
@@ -1427,7 +2186,94 @@ class EarlyReplaceBuiltinCalls(Visitor.EnvTransform):
 
         return last_result
 
-    def _DISABLED_handle_simple_function_tuple(self, node, pos_args):
+    def _transform_min_max_genexpr(self, node, gen_expr_node, operator):
+        """Transform
+
+        _result = min(x for L in LL for x in L)
+
+        into
+
+        _first = True
+        _result = None
+        for L in LL:
+            for x in L:
+                _item = x
+                if _first or _item < _result:
+                    _first = False
+                    _result = _item
+        if _first:
+            raise ValueError("min() arg is an empty sequence")
+        """
+        loop_node = gen_expr_node.loop
+        yield_expression, yield_stat_node = self._find_single_yield_expression(loop_node)
+        if yield_expression is None:
+            return node
+        if operator == '<':
+            func_name = 'min'
+        else:
+            func_name = 'max'
+        pos = yield_expression.pos
+
+        result_ref = UtilNodes.ResultRefNode(pos=node.pos, type=PyrexTypes.py_object_type)
+        first_ref = UtilNodes.LetRefNode(
+            ExprNodes.BoolNode(node.pos, value=True, constant_result=True))
+        item_ref = UtilNodes.LetRefNode(yield_expression)
+
+        update_node = UtilNodes.LetNode(item_ref, Nodes.IfStatNode(
+            pos,
+            else_clause = None,
+            if_clauses = [ Nodes.IfClauseNode(
+                pos,
+                condition = ExprNodes.BoolBinopNode(
+                    pos,
+                    operator = 'or',
+                    operand1 = first_ref,
+                    operand2 = ExprNodes.PrimaryCmpNode(
+                        pos,
+                        operator = operator,
+                        operand1 = item_ref,
+                        operand2 = result_ref)),
+                body = Nodes.StatListNode(pos, stats = [
+                    Nodes.SingleAssignmentNode(
+                        pos,
+                        lhs = first_ref,
+                        rhs = ExprNodes.BoolNode(pos, value=False, constant_result=False)),
+                    Nodes.SingleAssignmentNode(pos, lhs = result_ref, rhs = item_ref)
+                    ])) ]
+            ))
+        Visitor.recursively_replace_node(loop_node, yield_stat_node, update_node)
+
+        empty_check = Nodes.IfStatNode(
+            node.pos,
+            else_clause = None,
+            if_clauses = [ Nodes.IfClauseNode(
+                node.pos,
+                condition = first_ref,
+                body = Nodes.RaiseStatNode(
+                    node.pos,
+                    exc_type = ExprNodes.NameNode(node.pos, name=EncodedString('ValueError')),
+                    exc_value = ExprNodes.StringNode(
+                        node.pos, value=EncodedString('%s() arg is an empty sequence' % func_name)),
+                    exc_tb = None)) ]
+            )
+
+        exec_code = UtilNodes.LetNode(first_ref, Nodes.StatListNode(
+            node.pos,
+            stats = [
+                Nodes.SingleAssignmentNode(
+                    node.pos,
+                    lhs = UtilNodes.ResultRefNode(pos=node.pos, expression=result_ref),
+                    rhs = ExprNodes.NoneNode(node.pos),
+                    first = True),
+                loop_node,
+                empty_check
+                ]))
+
+        return ExprNodes.InlinedGeneratorExpressionNode(
+            gen_expr_node.pos, loop = exec_code, result_node = result_ref,
+            expr_scope = gen_expr_node.expr_scope, orig_func = func_name)
+
+    def _handle_simple_function_tuple(self, node, pos_args):
         if len(pos_args) == 0:
             return ExprNodes.TupleNode(node.pos, args=[], constant_result=())
         # This is a bit special - for iterables (including genexps),
@@ -1435,8 +2281,8 @@ class EarlyReplaceBuiltinCalls(Visitor.EnvTransform):
         # tuple incrementally while reading items, which we can't
         # easily do without explicit node support. Instead, we read
         # the items into a list and then copy them into a tuple of the
-        # final size.  This takes up to twice as much memory, but will
-        # have to do until we have real support for genexps.
+        # final size.  This takes up to twice as much memory, but the
+        # list gets preallocated when the loop length is known.
         result = self._transform_list_set_genexpr(node, pos_args, ExprNodes.ListNode)
         if result is not node:
             return ExprNodes.AsTupleNode(node.pos, arg=result)
@@ -1452,6 +2298,21 @@ class EarlyReplaceBuiltinCalls(Visitor.EnvTransform):
             return ExprNodes.SetNode(node.pos, args=[], constant_result=set())
         return self._transform_list_set_genexpr(node, pos_args, ExprNodes.SetNode)
 
+    def _optimise_string_join(self, node, function, args):
+        """Replace 'sep'.join(genexpr) by 'sep'.join([listcomp]).  The
+        join() methods of the builtin string types read the iterable
+        into a sequence before joining it anyway.
+        """
+        if len(args) != 1:
+            return node
+        if not isinstance(function.obj, (ExprNodes.StringNode, ExprNodes.UnicodeNode,
+                                         ExprNodes.BytesNode)):
+            return node
+        listcomp = self._transform_list_set_genexpr(node, args, ExprNodes.ListNode)
+        if listcomp is not node:
+            node.args = [listcomp]
+        return node
+
     def _transform_list_set_genexpr(self, node, pos_args, container_node_class):
         """Replace set(genexpr) and list(genexpr) by a literal comprehension.
         """
@@ -1637,7 +2498,8 @@ class OptimizeBuiltinCalls(Visitor.EnvTransform):
         if isinstance(arg, ExprNodes.SimpleCallNode):
             if node.type.is_int or node.type.is_float:
                 return self._optimise_numeric_cast_call(node, arg)
-        elif isinstance(arg, ExprNodes.IndexNode) and not arg.is_buffer_access:
+        elif (isinstance(arg, ExprNodes.IndexNode) and not arg.is_buffer_access
+              and not arg.memslice_slice):
             index_node = arg.index
             if isinstance(index_node, ExprNodes.CoerceToPyTypeNode):
                 index_node = index_node.arg
@@ -3143,6 +4005,7 @@ class FinalOptimizePhase(Visitor.CythonTransform):
         - eliminate None assignment and refcounting for first assignment.
         - isinstance -> typecheck for cdef types
         - eliminate checks for None and/or types that became redundant after tree changes
+        - call Python methods without creating bound method objects
     """
     def visit_SingleAssignmentNode(self, node):
         """Avoid redundant initialisation of local variables before their
@@ -3160,18 +4023,25 @@ class FinalOptimizePhase(Visitor.CythonTransform):
 
     def visit_SimpleCallNode(self, node):
         """Replace generic calls to isinstance(x, type) by a more efficient
-        type check.
+        type check, and obj.method(...) calls by calls that do not create
+        a bound method.
         """
         self.visitchildren(node)
         if node.function.type.is_cfunction and isinstance(node.function, ExprNodes.NameNode):
             if node.function.name == 'isinstance':
                 type_arg = node.args[1]
                 if type_arg.type.is_builtin_type and type_arg.type.name == 'type':
-                    from CythonScope import utility_scope
+                    utility_scope = self.context.modules['cython'].utility_scope
                     node.function.entry = utility_scope.lookup('PyObject_TypeCheck')
                     node.function.type = node.function.entry.type
                     PyTypeObjectPtr = PyrexTypes.CPtrType(utility_scope.lookup('PyTypeObject').type)
                     node.args[1] = ExprNodes.CastNode(node.args[1], PyTypeObjectPtr)
+        elif (type(node) is ExprNodes.SimpleCallNode
+                  and isinstance(node.function, ExprNodes.AttributeNode)
+                  and node.function.is_py_attr
+                  and isinstance(node.arg_tuple, ExprNodes.TupleNode)
+                  and node.type is PyrexTypes.py_object_type):
+            node.py_method_call = True
         return node
 
     def visit_PyTypeTestNode(self, node):
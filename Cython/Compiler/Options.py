@@ -51,6 +51,10 @@ c_line_in_traceback = 1
 # executes the body of this module.
 embed = False
 
+# Number of deallocated closure scope objects (of each def function that
+# needs one) that are kept for reuse instead of being freed.
+closure_freelist_size = 8
+
 # Disables function redefinition, allowing all functions to be declared at
 # module creation time. For legacy code only. 
 disable_function_redefinition = False
@@ -72,6 +76,7 @@ directive_defaults = {
     'callspec' : "",
     'final' : False,
     'internal' : False,
+    'freelist' : 0,
     'profile': False,
     'infer_types': None,
     'infer_types.verbose': False,
@@ -80,6 +85,7 @@ directive_defaults = {
     'autotestdict.all': False,
     'language_level': 2,
     'fast_getattr': False, # Undocumented until we come up with a better way to handle this everywhere.
+    'cache_globals': False, # cache module global lookups per call site
 
     'warn': None,
     'warn.undeclared': False,
@@ -107,6 +113,7 @@ directive_scopes = { # defaults to available everywhere
     # 'module', 'function', 'class', 'with statement'
     'final' : ('cclass',),   # add 'method' in the future
     'internal' : ('cclass',),
+    'freelist' : ('cclass',),
     'autotestdict' : ('module',),
     'autotestdict.all' : ('module',),
     'autotestdict.cdef' : ('module',),
@@ -578,7 +578,8 @@ class InterpretCompilerDirectives(CythonTransform, SkipDeclarations):
     }
 
     special_methods = cython.set(['declare', 'union', 'struct', 'typedef', 'sizeof',
-                                  'cast', 'pointer', 'compiled', 'NULL'])
+                                  'cast', 'pointer', 'compiled', 'NULL',
+                                  'parallel', 'parallel.prange'])
     special_methods.update(unop_method_nodes.keys())
 
     def __init__(self, context, compilation_directive_defaults):
@@ -643,7 +644,7 @@ class InterpretCompilerDirectives(CythonTransform, SkipDeclarations):
                 full_name = submodule + name
                 if self.is_cython_directive(full_name):
                     if as_name is None:
-                        as_name = full_name
+                        as_name = name
                     self.directive_names[as_name] = full_name
                     if kind is not None:
                         self.context.nonfatal_error(PostParseError(pos,
@@ -741,6 +742,11 @@ class InterpretCompilerDirectives(CythonTransform, SkipDeclarations):
                 raise PostParseError(pos,
                     'The %s directive takes one compile-time boolean argument' % optname)
             return (optname, args[0].value)
+        elif directivetype is int:
+            if kwds is not None or len(args) != 1 or not isinstance(args[0], ExprNodes.IntNode):
+                raise PostParseError(pos,
+                    'The %s directive takes one compile-time integer argument' % optname)
+            return (optname, int(args[0].value, 0))
         elif directivetype is str:
             if kwds is not None or len(args) != 1 or not isinstance(args[0], (ExprNodes.StringNode,
                                                                               ExprNodes.UnicodeNode)):
@@ -863,6 +869,135 @@ class InterpretCompilerDirectives(CythonTransform, SkipDeclarations):
             return self.visit_with_directives(node.body, directive_dict)
         return self.visit_Node(node)
 
+class ParallelAssignmentCollector(TreeVisitor):
+    """
+    Collects the names that are assigned in the body of a prange()
+    loop, with their in-place operators (None for plain assignments),
+    and reports the statements that would leave the parallel loop.
+    """
+    def __init__(self):
+        super(ParallelAssignmentCollector, self).__init__()
+        self.assignments = {}
+        self.loop_depth = 0
+
+    def add_assignment(self, lhs, operator=None):
+        if isinstance(lhs, ExprNodes.NameNode):
+            self.assignments.setdefault(lhs.name, []).append(operator)
+        elif isinstance(lhs, ExprNodes.SequenceNode):
+            for arg in lhs.args:
+                self.add_assignment(arg)
+
+    def visit_SingleAssignmentNode(self, node):
+        self.add_assignment(node.lhs)
+        self._visitchildren(node, None)
+
+    def visit_CascadedAssignmentNode(self, node):
+        for lhs in node.lhs_list:
+            self.add_assignment(lhs)
+        self._visitchildren(node, None)
+
+    def visit_InPlaceAssignmentNode(self, node):
+        self.add_assignment(node.lhs, node.operator)
+        self._visitchildren(node, None)
+
+    def visit_LoopNode(self, node):
+        # break and continue in the else clause belong to the outer loop
+        if getattr(node, 'target', None) is not None:
+            self.add_assignment(node.target)
+        attrs = [attr for attr in node.child_attrs if attr != 'else_clause']
+        self.loop_depth += 1
+        self._visitchildren(node, attrs)
+        self.loop_depth -= 1
+        self._visitchildren(node, ['else_clause'])
+
+    def visit_BreakStatNode(self, node):
+        if not self.loop_depth:
+            error(node.pos, "break statement not allowed in prange() body")
+
+    def visit_ReturnStatNode(self, node):
+        error(node.pos, "return statement not allowed in prange() body")
+
+    def visit_FuncDefNode(self, node):
+        pass # assignments in inner functions are local to them
+
+    def visit_ClassDefNode(self, node):
+        pass
+
+    def visit_ScopedExprNode(self, node):
+        pass
+
+    def visit_Node(self, node):
+        self._visitchildren(node, None)
+
+
+class ParallelRangeTransform(CythonTransform, SkipDeclarations):
+    """
+    Replaces for-in loops over cython.parallel.prange() by a
+    ParallelRangeNode, which runs the iterations in parallel with
+    OpenMP:
+
+        for i in prange(start, stop, step, nogil=False, schedule=None,
+                        chunksize=None, num_threads=None):
+
+    The loop must run without the GIL; nogil=True wraps it in a
+    "with nogil" block.
+    """
+
+    valid_schedules = ('static', 'dynamic', 'guided', 'runtime')
+
+    def visit_ForInStatNode(self, node):
+        self.visitchildren(node)
+        call = node.iterator.sequence
+        if not isinstance(call, ExprNodes.CallNode) or \
+               call.function.as_cython_attribute() != u'parallel.prange':
+            return node
+        args, kwds = call.explicit_args_kwds()
+        if len(args) == 1:
+            start, stop, step = ExprNodes.IntNode(call.pos, value='0', constant_result=0), args[0], None
+        elif len(args) in (2, 3):
+            start, stop, step = (list(args) + [None])[:3]
+        else:
+            raise PostParseError(call.pos, "prange() takes 1 to 3 positional arguments")
+        if step is None:
+            step = ExprNodes.IntNode(call.pos, value='1', constant_result=1)
+        if not isinstance(node.target, ExprNodes.NameNode):
+            raise PostParseError(node.target.pos, "prange() loop variable must be a name")
+
+        nogil = False
+        options = {}
+        if kwds is not None:
+            for key, value in kwds.key_value_pairs:
+                name = key.value
+                if name == 'nogil':
+                    if not isinstance(value, ExprNodes.BoolNode):
+                        raise PostParseError(value.pos, "nogil must be a compile time boolean")
+                    nogil = value.value
+                elif name == 'schedule':
+                    if not isinstance(value, (ExprNodes.StringNode, ExprNodes.UnicodeNode)) or \
+                           value.value not in self.valid_schedules:
+                        raise PostParseError(value.pos,
+                            "schedule must be one of %s" % ", ".join(self.valid_schedules))
+                    options['schedule'] = str(value.value)
+                elif name in ('chunksize', 'num_threads'):
+                    options[str(name)] = value
+                else:
+                    raise PostParseError(key.pos, "Invalid keyword argument to prange(): %s" % name)
+        if options.get('chunksize') is not None and options.get('schedule') in (None, 'runtime'):
+            raise PostParseError(options['chunksize'].pos,
+                "chunksize requires a static, dynamic or guided schedule")
+
+        collector = ParallelAssignmentCollector()
+        collector.visitchildren(node, ['body'])
+        result = Nodes.ParallelRangeNode(
+            node.pos, target=node.target, start=start, stop=stop, step=step,
+            body=node.body, else_clause=node.else_clause,
+            assignments=collector.assignments, **options)
+        if nogil:
+            result = Nodes.GILStatNode(node.pos, state='nogil',
+                                       body=Nodes.StatListNode(node.pos, stats=[result]))
+        return result
+
+
 class WithTransform(CythonTransform, SkipDeclarations):
 
     # EXCINFO is manually set to a variable that contains
@@ -1061,6 +1196,13 @@ property NAME:
         return node
 
     def visit_FuncDefNode(self, node):
+        if node.specializations is not None:
+            # fused function: replace by its specialisations
+            stats = [self.visit(specialization)
+                     for specialization in node.specializations]
+            if node.fused_dispatcher is not None:
+                stats.append(self.visit(node.fused_dispatcher))
+            return Nodes.StatListNode(node.pos, stats=stats)
         self.seen_vars_stack.append(cython.set())
         lenv = node.local_scope
         node.body.analyse_control_flow(lenv) # this will be totally refactored
@@ -1201,6 +1343,9 @@ class ExpandInplaceOperators(EnvTransform):
         if lhs.type.is_cpp_class:
             # No getting around this exact operator here.
             return node
+        if lhs.type.is_memoryviewslice:
+            # An error has been reported.
+            return node
         if isinstance(lhs, ExprNodes.IndexNode) and lhs.is_buffer_access:
             # There is code to handle this case.
             return node
@@ -1248,6 +1393,17 @@ class ExpandInplaceOperators(EnvTransform):
             node = LetNode(t, node)
         return node
 
+    def visit_InlinedGeneratorExpressionNode(self, node):
+        # EarlyReplaceBuiltinCalls can move the body of a for-in loop
+        # into the loop of an inlined generator expression.
+        if node.has_local_scope:
+            self.env_stack.append(node.expr_scope)
+            self.visitchildren(node)
+            self.env_stack.pop()
+        else:
+            self.visitchildren(node)
+        return node
+
     def visit_ExprNode(self, node):
         # In-place assignments can't happen within an expression.
         return node
@@ -1304,22 +1460,39 @@ class AlignFunctionDefinitions(CythonTransform):
 
 
 class MarkClosureVisitor(CythonTransform):
+    # Marks functions that need a closure, i.e. that have inner
+    # functions/classes or that are generators (contain 'yield').
 
     def visit_ModuleNode(self, node):
         self.needs_closure = False
+        self.yields = []
         self.visitchildren(node)
+        self.report_misplaced_yields("'yield' outside function")
         return node
 
+    def report_misplaced_yields(self, message):
+        for yield_node in self.yields:
+            error(yield_node.pos, message)
+        self.yields = []
+
     def visit_FuncDefNode(self, node):
         self.needs_closure = False
+        outer_yields = self.yields
+        self.yields = []
         self.visitchildren(node)
         node.needs_closure = self.needs_closure
+        if self.yields:
+            node.is_generator = True
+            node.needs_closure = True
+        self.yields = outer_yields
         self.needs_closure = True
         return node
 
     def visit_CFuncDefNode(self, node):
         self.visit_FuncDefNode(node)
-        if node.needs_closure:
+        if node.is_generator:
+            error(node.pos, "cdef functions cannot be generators")
+        elif node.needs_closure:
             error(node.pos, "closures inside cdef functions not yet supported")
         return node
 
@@ -1327,14 +1500,33 @@ class MarkClosureVisitor(CythonTransform):
         self.needs_closure = False
         self.visitchildren(node)
         node.needs_closure = self.needs_closure
+        if node.def_node.is_generator:
+            error(node.pos, "'yield' inside lambda not supported")
         self.needs_closure = True
         return node
 
     def visit_ClassDefNode(self, node):
+        outer_yields = self.yields
+        self.yields = []
         self.visitchildren(node)
+        self.report_misplaced_yields("'yield' outside function")
+        self.yields = outer_yields
         self.needs_closure = True
         return node
 
+    def visit_GeneratorExpressionNode(self, node):
+        # the yield of a generator expression belongs to the expression
+        outer_yields = self.yields
+        self.yields = []
+        self.visitchildren(node)
+        self.yields = outer_yields
+        return node
+
+    def visit_YieldExprNode(self, node):
+        self.yields.append(node)
+        self.visitchildren(node)
+        return node
+
 
 class CreateClosureClasses(CythonTransform):
     # Output closure classes in module scope for all functions
@@ -1361,6 +1553,14 @@ class CreateClosureClasses(CythonTransform):
         return from_closure, in_closure
 
     def create_class_from_scope(self, node, target_module_scope, inner_node=None):
+        if node.is_generator:
+            # all local state of a generator must survive its yields
+            for entry in node.local_scope.entries.values():
+                if (entry.is_variable and not entry.from_closure
+                        and entry.scope is node.local_scope):
+                    entry.in_closure = True
+                    if entry.type.is_buffer:
+                        error(entry.pos, "Buffer types not supported in generators")
         from_closure, in_closure = self.get_scope_use(node)
         in_closure.sort()
 
@@ -1380,13 +1580,12 @@ class CreateClosureClasses(CythonTransform):
                 inner_node = node.assmt.rhs
             inner_node.needs_self_code = False
             node.needs_outer_scope = False
-        # Simple cases
-        if not in_closure and not from_closure:
-            return
-        elif not in_closure:
-            func_scope.is_passthrough = True
-            func_scope.scope_class = cscope.scope_class
-            node.needs_outer_scope = True
+        # Simple cases (generators always need their own closure)
+        if not in_closure and not node.is_generator:
+            if from_closure:
+                func_scope.is_passthrough = True
+                func_scope.scope_class = cscope.scope_class
+                node.needs_outer_scope = True
             return
 
         as_name = '%s_%s' % (target_module_scope.next_id(Naming.closure_class_prefix), node.entry.cname)
@@ -1396,7 +1595,8 @@ class CreateClosureClasses(CythonTransform):
         func_scope.scope_class = entry
         class_scope = entry.type.scope
         class_scope.is_internal = True
-        class_scope.directives = {'final': True}
+        class_scope.directives = {'final': True,
+                                  'freelist': Options.closure_freelist_size}
 
         if from_closure:
             assert cscope.is_closure_scope
@@ -1500,6 +1700,10 @@ class TransformBuiltinMethods(EnvTransform):
             elif attribute in (u'set', u'frozenset'):
                 node = ExprNodes.NameNode(node.pos, name=EncodedString(attribute),
                                           entry=self.current_env().builtin_scope().lookup_here(attribute))
+            elif attribute == u'parallel.prange':
+                error(node.pos, u"prange() can only be used as the iterable of a for loop")
+            elif attribute == u'parallel':
+                pass # reported for the attribute of the module
             elif not PyrexTypes.parse_basic_type(attribute):
                 error(node.pos, u"'%s' not a valid cython attribute or is being used incorrectly" % attribute)
         return node
@@ -1569,6 +1773,8 @@ class TransformBuiltinMethods(EnvTransform):
                     node.cdivision = True
             elif function == u'set':
                 node.function = ExprNodes.NameNode(node.pos, name=EncodedString('set'))
+            elif function == u'parallel.prange':
+                pass # reported by visit_cython_attribute()
             else:
                 error(node.function.pos, u"'%s' not a valid cython language construct" % function)
 
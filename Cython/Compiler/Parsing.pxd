@@ -129,6 +129,8 @@ cpdef p_c_base_type(PyrexScanner s, bint self_flag = *, bint nonempty = *, templ
 cdef p_calling_convention(PyrexScanner s)
 cdef p_c_complex_base_type(PyrexScanner s)
 cpdef p_c_simple_base_type(PyrexScanner s, bint self_flag, bint nonempty, templates = *)
+cdef bint is_memoryviewslice_access(PyrexScanner s) except -2
+cdef p_memoryviewslice_access(PyrexScanner s, base_type_node)
 cdef p_buffer_or_template(PyrexScanner s, base_type_node, templates)
 cdef bint looking_at_name(PyrexScanner s) except -2
 cdef bint looking_at_expr(PyrexScanner s) except -2
@@ -162,6 +164,7 @@ cdef p_visibility(PyrexScanner s, prev_visibility)
 cdef p_c_modifiers(PyrexScanner s)
 cdef p_c_func_or_var_declaration(PyrexScanner s, pos, ctx)
 cdef p_ctypedef_statement(PyrexScanner s, ctx)
+cdef p_fused_definition(PyrexScanner s, pos, ctx)
 cdef p_decorators(PyrexScanner s)
 cdef p_def_statement(PyrexScanner s, list decorators = *)
 cpdef p_varargslist(PyrexScanner s, terminator=*, bint annotated = *)
@@ -1953,7 +1953,10 @@ def p_c_simple_base_type(s, self_flag, nonempty, templates = None):
         is_self_arg = self_flag, templates = templates)
 
     if s.sy == '[':
-        type_node = p_buffer_or_template(s, type_node, templates)
+        if is_memoryviewslice_access(s):
+            type_node = p_memoryviewslice_access(s, type_node)
+        else:
+            type_node = p_buffer_or_template(s, type_node, templates)
 
     if s.sy == '.':
         s.next()
@@ -1962,6 +1965,25 @@ def p_c_simple_base_type(s, self_flag, nonempty, templates = None):
 
     return type_node
 
+def is_memoryviewslice_access(s):
+    # s.sy == '['
+    # A memoryview slice type has a slice as first axis, e.g. double[:, ::1]
+    return s.peek()[0] == ':'
+
+def p_memoryviewslice_access(s, base_type_node):
+    # s.sy == '['
+    pos = s.position()
+    s.next()
+    subscripts = p_subscript_list(s)
+    for subscript in subscripts:
+        if len(subscript) < 2:
+            s.error("An axis specification in a memoryview slice declaration must be ':' or '::1'.")
+    s.expect(']')
+    axes = make_slice_nodes(pos, subscripts)
+    return Nodes.MemoryViewSliceTypeNode(pos,
+        base_type_node = base_type_node,
+        axes = axes)
+
 def p_buffer_or_template(s, base_type_node, templates):
     # s.sy == '['
     pos = s.position()
@@ -2559,6 +2581,8 @@ def p_ctypedef_statement(s, ctx):
             return p_c_enum_definition(s, pos, ctx)
         else:
             return p_c_struct_or_union_definition(s, pos, ctx)
+    elif s.sy == 'IDENT' and s.systring == 'fused':
+        return p_fused_definition(s, pos, ctx)
     else:
         base_type = p_c_base_type(s, nonempty = 1)
         if base_type.name is None:
@@ -2570,6 +2594,36 @@ def p_ctypedef_statement(s, ctx):
             declarator = declarator, visibility = visibility,
             in_pxd = ctx.level == 'module_pxd')
 
+def p_fused_definition(s, pos, ctx):
+    # s.systring == 'fused'
+    #
+    #   ctypedef fused name:
+    #       type1
+    #       type2
+    #       ...
+    if ctx.level not in ('module', 'module_pxd'):
+        error(pos, "Fused type definition not allowed here")
+    s.next()
+    name = p_ident(s)
+    s.expect(':')
+    s.expect('NEWLINE')
+    s.expect_indent()
+    types = []
+    while s.sy != 'DEDENT':
+        if s.sy != 'pass':
+            types.append(p_c_base_type(s))
+        else:
+            s.next()
+        s.expect_newline("Expected a newline")
+    s.expect_dedent()
+    if not types:
+        error(pos, "Need at least one type")
+    return Nodes.CTypeDefNode(
+        pos, base_type = Nodes.FusedTypeNode(pos, name = name, types = types),
+        declarator = Nodes.CNameDeclaratorNode(pos, name = name, cname = None),
+        visibility = ctx.visibility,
+        in_pxd = ctx.level == 'module_pxd')
+
 def p_decorators(s):
     decorators = []
     while s.sy == 'DECORATOR':
@@ -0,0 +1,200 @@
+#
+#   Per-phase profiling of the compiler pipeline
+#
+#   Each compilation appends one JSON record (a line) to the profile
+#   file, so that the file can collect the profiles of all modules of
+#   a build, even when they are compiled by several processes.  Run
+#
+#       python -m Cython.Compiler.PipelineProfiler <profile file>...
+#
+#   to print the phases that took most of the time.
+#
+
+import os, sys
+from time import time
+
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        json = None
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+
+def usage():
+    # Returns the CPU time of the process and its peak resident set
+    # size in KB (or None).
+    if resource is None:
+        times = os.times()
+        return times[0] + times[1], None
+    rusage = resource.getrusage(resource.RUSAGE_SELF)
+    maxrss = rusage.ru_maxrss
+    if sys.platform == 'darwin':
+        maxrss = maxrss // 1024 # bytes
+    return rusage.ru_utime + rusage.ru_stime, maxrss
+
+def phase_name(phase):
+    name = getattr(phase, '__name__', None)
+    if name is None:
+        name = phase.__class__.__name__
+    return name
+
+
+class PipelineProfiler(object):
+    """
+    Records wall time, CPU time, peak memory delta and the number of
+    nodes visited for every phase that a Context runs, including the
+    phases of the .pxd pipelines that run while compiling the module.
+
+    Times are exclusive: the time spent in a nested .pxd pipeline is
+    only attributed to the phases of that pipeline, not to the phase
+    of the module that cimported it.  The peak memory delta is the
+    growth of the peak RSS of the process (in KB) during the phase.
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.modules = [] # stack of (module name, kind)
+        self.active = []  # stack of [nested wall time, nested CPU time]
+
+    def enter_module(self, module_name, kind):
+        self.modules.append((module_name, kind))
+
+    def exit_module(self):
+        self.modules.pop()
+
+    def run_phase(self, phase, data):
+        nested = [0.0, 0.0]
+        self.active.append(nested)
+        cpu, memory = usage()
+        t = time()
+        try:
+            data = phase(data)
+        finally:
+            t = time() - t
+            cpu_after, memory_after = usage()
+            cpu = cpu_after - cpu
+            self.active.pop()
+            if self.active:
+                self.active[-1][0] += t
+                self.active[-1][1] += cpu
+            module_name, kind = self.modules[-1]
+            if memory is not None:
+                memory = memory_after - memory
+            self.phases.append({
+                'module': module_name,
+                'kind': kind,
+                'phase': phase_name(phase),
+                'wall': t - nested[0],
+                'cpu': cpu - nested[1],
+                'memory': memory,
+                'nodes': getattr(phase, 'nodes_visited', None),
+                })
+        return data
+
+    def record(self, module_name, source):
+        wall = cpu = 0.0
+        for phase in self.phases:
+            wall += phase['wall']
+            cpu += phase['cpu']
+        return {
+            'module': module_name,
+            'source': source,
+            'wall': wall,
+            'cpu': cpu,
+            'phases': self.phases,
+            }
+
+    def save(self, path, module_name, source):
+        """
+        Appends the record of the compilation to the profile file.
+        """
+        if json is None:
+            raise RuntimeError("Pipeline profiles require the json module")
+        line = json.dumps(self.record(module_name, source)) + '\n'
+        # A single write in append mode keeps the lines of concurrent
+        # compilations apart.
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0666)
+        try:
+            os.write(fd, line.encode('UTF-8'))
+        finally:
+            os.close(fd)
+
+
+def load_profile(path):
+    """
+    Returns the list of compilation records in the profile file.
+    """
+    records = []
+    f = open(path)
+    try:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    finally:
+        f.close()
+    return records
+
+def aggregate(records):
+    """
+    Sums up the phases of all records by phase name and kind of
+    module ('pyx', 'py' or 'pxd').  Returns a list of dicts with
+    the keys of the phases and a 'count', sorted by wall time.
+    """
+    totals = {}
+    for record in records:
+        for phase in record['phases']:
+            key = (phase['phase'], phase['kind'])
+            total = totals.get(key)
+            if total is None:
+                total = totals[key] = {
+                    'phase': phase['phase'], 'kind': phase['kind'], 'count': 0,
+                    'wall': 0.0, 'cpu': 0.0, 'memory': 0, 'nodes': 0}
+            total['count'] += 1
+            total['wall'] += phase['wall']
+            total['cpu'] += phase['cpu']
+            total['memory'] += phase['memory'] or 0
+            total['nodes'] += phase['nodes'] or 0
+    totals = [(-total['wall'], key, total) for key, total in totals.items()]
+    totals.sort()
+    return [total for _, _, total in totals]
+
+def format_report(records, limit=None):
+    totals = aggregate(records)
+    wall = 0.0
+    for record in records:
+        wall += record['wall']
+    lines = ["%d modules compiled in %.3f seconds" % (len(records), wall),
+             "%-36s %4s %6s %9s %9s %6s %10s %9s" % (
+                'phase', 'kind', 'count', 'wall', 'cpu', '%', 'nodes', 'memory')]
+    for total in totals[:limit]:
+        if wall:
+            percent = 100.0 * total['wall'] / wall
+        else:
+            percent = 0.0
+        lines.append("%-36s %4s %6d %9.3f %9.3f %6.1f %10d %7dKB" % (
+            total['phase'], total['kind'], total['count'], total['wall'],
+            total['cpu'], percent, total['nodes'], total['memory']))
+    return '\n'.join(lines)
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    if not args:
+        sys.stderr.write("Usage: python -m Cython.Compiler.PipelineProfiler <profile file>...\n")
+        sys.exit(1)
+    records = []
+    for path in args:
+        records.extend(load_profile(path))
+    print(format_report(records))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+#
+#   Sharing analysed .pxd modules between compilations
+#
+
+import os, sys
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    import hashlib
+except ImportError:
+    import md5 as hashlib
+
+import Symtab, PyrexTypes, Code
+
+class SharedPxd(object):
+    #  An analysed .pxd file, as returned by the pxd pipeline.
+    #
+    #  qualified_name   string          Fully qualified module name
+    #  scope            ModuleScope     The analysed module scope
+    #  codenodes        StatListNode    Code from the pxd (inline functions)
+    #  pxd_pathname     string          The .pxd file
+    #  dependencies     [string]        Qualified names of all transitively
+    #                                   cimported modules
+    #  file_stamps      [(string, (int, float))]
+    #                                   Size and mtime of the .pxd file and
+    #                                   all files it includes
+
+    def __init__(self, qualified_name, scope, codenodes, pxd_pathname, dependencies):
+        self.qualified_name = qualified_name
+        self.scope = scope
+        self.codenodes = codenodes
+        self.pxd_pathname = pxd_pathname
+        self.dependencies = dependencies
+        self.file_stamps = [(path, file_stamp(path))
+                            for path in [pxd_pathname] + list(scope.included_files)]
+
+    def is_up_to_date(self):
+        for path, stamp in self.file_stamps:
+            if file_stamp(path) != stamp:
+                return False
+        return True
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except EnvironmentError:
+        return None
+    return (st.st_size, st.st_mtime)
+
+
+class PxdCache(object):
+    """
+    Keeps the module scopes of analysed .pxd files so that later
+    compilations in the same process can reuse them instead of running
+    the pxd pipeline again.  If a directory is given, the analysed
+    scopes are also pickled there by save() and loaded by later
+    processes.
+
+    A .pxd scope is only shared with a compilation if neither it nor any
+    of the modules it cimports is the module being compiled (whose scope
+    is extended by the .pyx file), and if all of those modules are either
+    not loaded yet or shared themselves.  Package scopes (__init__.pxd)
+    are never shared because further submodules get added to them.
+    Scopes are considered immutable once they are in the cache.
+    """
+
+    def __init__(self, path=None):
+        if path is not None:
+            path = os.path.abspath(os.path.expanduser(path))
+        self.path = path
+        self.pxds = {}  # {settings key : {qualified name : SharedPxd}}
+        self.modified = {} # {settings key : True} for unsaved settings
+        self.hits = self.misses = 0
+
+    def __reduce__(self):
+        # Worker processes use their own cache, possibly loaded from disk.
+        return (get_pxd_cache, (self.path,))
+
+    def settings_key(self, context):
+        directives = context.compiler_directives.items()
+        directives.sort()
+        return (context.cpp, context.language_level,
+                tuple(context.include_directories), tuple(directives))
+
+    def shared_pxds(self, context):
+        key = self.settings_key(context)
+        pxds = self.pxds.get(key)
+        if pxds is None:
+            pxds = self.pxds[key] = self.load(context, key)
+        return pxds
+
+    def lookup(self, context, qualified_name, pxd_pathname):
+        """
+        Returns a shared scope for the module if it can be used in the
+        context, after making it and its dependencies known to the
+        context.  Returns None otherwise.
+        """
+        pxds = self.shared_pxds(context)
+        shared = pxds.get(qualified_name)
+        if shared is None or shared.pxd_pathname != pxd_pathname:
+            self.misses += 1
+            return None
+        closure = []
+        for name in [qualified_name] + shared.dependencies:
+            dependency = pxds.get(name)
+            if (dependency is None or name == context.main_module_name
+                    or not dependency.is_up_to_date()):
+                self.misses += 1
+                return None
+            if name == qualified_name:
+                # the requested module is being loaded right now
+                current = None
+            else:
+                current = lookup_loaded_module(context, name)
+            if current is not None and current is not dependency.scope:
+                # already loaded separately, mixing would break type identity
+                self.misses += 1
+                return None
+            closure.append(dependency)
+        for dependency in closure:
+            add_module(context, dependency)
+        self.hits += 1
+        return shared.scope
+
+    def store(self, context, scope, codenodes, pxd_pathname):
+        """
+        Adds a freshly analysed pxd scope to the cache, if it can
+        be shared.
+        """
+        if os.path.basename(pxd_pathname).startswith('__init__.'):
+            return
+        qualified_name = scope.qualified_name
+        if qualified_name == context.main_module_name:
+            return
+        pxds = self.shared_pxds(context)
+        dependencies = []
+        for module in scope.cimported_modules:
+            name = module.qualified_name
+            if name == 'cython' or module is scope:
+                continue
+            dependency = pxds.get(name)
+            if dependency is None or dependency.scope is not module:
+                return
+            dependencies.append(name)
+        pxds[qualified_name] = SharedPxd(
+            qualified_name, scope, codenodes, pxd_pathname, dependencies)
+        self.modified[self.settings_key(context)] = True
+
+    def clear(self):
+        self.pxds.clear()
+        self.modified.clear()
+
+    def pickle_path(self, key):
+        m = hashlib.md5(repr((key, compiler_stamp())).encode('UTF-8'))
+        return os.path.join(self.path, 'pxds-%s.pickle' % m.hexdigest())
+
+    def load(self, context, key):
+        """
+        Returns the pxds pickled for the settings key, or an empty dict.
+        """
+        if self.path is None:
+            return {}
+        path = self.pickle_path(key)
+        if not os.path.exists(path):
+            return {}
+        f = open(path, 'rb')
+        try:
+            unpickler = pickle.Unpickler(f)
+            unpickler.persistent_load = GlobalObjects(context).persistent_load
+            try:
+                pxds = unpickler.load()
+            except Exception:
+                # an outdated or broken pickle, just start over
+                return {}
+        finally:
+            f.close()
+        for name, shared in pxds.items():
+            shared.scope.context = context
+        return pxds
+
+    def save(self):
+        """
+        Pickles the modified pxds to the cache directory.
+        """
+        if self.path is None:
+            return
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        for key in self.modified.keys():
+            pxds = self.pxds[key]
+            if not pxds:
+                continue
+            context = pxds.values()[0].scope.context
+            path = self.pickle_path(key)
+            tmp_path = '%s.%d.tmp' % (path, os.getpid())
+            f = open(tmp_path, 'wb')
+            try:
+                pickler = pickle.Pickler(f, 2)
+                pickler.persistent_id = GlobalObjects(context).persistent_id
+                recursion_limit = sys.getrecursionlimit()
+                sys.setrecursionlimit(max(recursion_limit, 20000))
+                try:
+                    pickler.dump(pxds)
+                finally:
+                    sys.setrecursionlimit(recursion_limit)
+                    f.close()
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            if os.path.exists(path):
+                os.unlink(path)
+            os.rename(tmp_path, path)
+        self.modified.clear()
+
+
+_pxd_caches = {}
+
+def get_pxd_cache(path=None):
+    # Returns the PxdCache of this process for the directory.
+    cache = _pxd_caches.get(path)
+    if cache is None:
+        cache = _pxd_caches[path] = PxdCache(path)
+    return cache
+
+_compiler_stamp = None
+
+def compiler_stamp():
+    # Pickles can only be used with the exact compiler that wrote them.
+    global _compiler_stamp
+    if _compiler_stamp is None:
+        import Cython
+        compiler_dir = os.path.dirname(os.path.abspath(__file__))
+        stamps = [Cython.__version__]
+        names = os.listdir(compiler_dir)
+        names.sort()
+        for name in names:
+            if os.path.splitext(name)[1] in ('.py', '.pxd', '.so', '.pyd'):
+                stamps.append((name, file_stamp(os.path.join(compiler_dir, name))))
+        _compiler_stamp = hashlib.md5(repr(stamps).encode('UTF-8')).hexdigest()
+    return _compiler_stamp
+
+
+class GlobalObjects(object):
+    """
+    Maps the types, entries, scopes and utility code that the compiler
+    keeps in module globals (and in the cython scope of the context) to
+    their access path and back, so that pickled pxd scopes refer to
+    these objects instead of copies.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.paths = {}   # {id : path}
+        self.objects = {} # {path : object}
+        self.collect(context.modules['cython'], ('cython',))
+        module_names = [name for name in sys.modules.keys()
+                        if name.startswith('Cython.Compiler.') and sys.modules[name] is not None]
+        module_names.sort()
+        for module_name in module_names:
+            module_dict = sys.modules[module_name].__dict__
+            names = module_dict.keys()
+            names.sort()
+            for name in names:
+                self.collect(module_dict[name], (module_name, name))
+
+    def collect(self, obj, path):
+        if isinstance(obj, (Symtab.Scope, Symtab.Entry, PyrexTypes.BaseType, Code.UtilityCode)):
+            if id(obj) in self.paths:
+                return
+            self.paths[id(obj)] = path
+            self.objects[path] = obj
+            self.collect(obj.__dict__, path)
+        elif isinstance(obj, dict):
+            keys = [key for key in obj.keys() if is_simple_key(key)]
+            keys.sort()
+            for key in keys:
+                self.collect(obj[key], path + (key,))
+        elif isinstance(obj, (list, tuple)):
+            for i, item in enumerate(obj):
+                self.collect(item, path + (i,))
+
+    def persistent_id(self, obj):
+        if isinstance(obj, self.context.__class__):
+            return ('context',)
+        return self.paths.get(id(obj))
+
+    def persistent_load(self, path):
+        if path == ('context',):
+            return self.context
+        try:
+            return self.objects[path]
+        except KeyError:
+            pass
+        # specialisations of utility code are created on demand
+        if len(path) > 2 and path[-2] == '_cache':
+            parent = self.persistent_load(path[:-2])
+            if isinstance(parent, Code.UtilityCode):
+                return parent.specialize(**dict(path[-1]))
+        raise pickle.UnpicklingError("Unknown global object %r" % (path,))
+
+
+def is_simple_key(key):
+    if isinstance(key, tuple):
+        for item in key:
+            if not is_simple_key(item):
+                return False
+        return True
+    return isinstance(key, (str, unicode, int, long, bool, type(None)))
+
+
+def lookup_loaded_module(context, qualified_name):
+    # Returns the loaded scope for the module, without creating one.
+    scope = context
+    for name in qualified_name.split('.'):
+        scope = scope.lookup_submodule(name)
+        if scope is None:
+            return None
+    if not scope.pxd_file_loaded:
+        return None
+    return scope
+
+def add_module(context, shared):
+    # Makes a shared module scope known to the context.
+    names = shared.qualified_name.split('.')
+    parent = context
+    for name in names[:-1]:
+        parent = parent.find_submodule(name)
+    if parent is context:
+        context.modules[names[-1]] = shared.scope
+    else:
+        parent.module_entries[names[-1]] = shared.scope
+    context.pxds[shared.qualified_name] = (shared.codenodes, shared.scope)
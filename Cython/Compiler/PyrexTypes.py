@@ -15,6 +15,11 @@ class BaseType(object):
     def can_coerce_to_pyobject(self, env):
         return False
 
+    def __deepcopy__(self, memo):
+        # Types are compared by identity in many places, so copies
+        # of parse trees (e.g. for fused functions) share them.
+        return self
+
     def cast_code(self, expr_code):
         return "((%s)%s)" % (self.declaration_code(""), expr_code)
     
@@ -52,6 +57,8 @@ class PyrexType(BaseType):
     #  is_returncode         boolean     Is used only to signal exceptions
     #  is_error              boolean     Is the dummy error type
     #  is_buffer             boolean     Is buffer access type
+    #  is_memoryviewslice    boolean     Is a typed memoryview slice
+    #  is_fused              boolean     Is a fused type (ctypedef fused)
     #  has_attributes        boolean     Has C dot-selectable attributes
     #  default_value         string      Initial value
     #
@@ -104,6 +111,8 @@ class PyrexType(BaseType):
     is_returncode = 0
     is_error = 0
     is_buffer = 0
+    is_memoryviewslice = 0
+    is_fused = 0
     has_attributes = 0
     default_value = ""
     
@@ -293,6 +302,9 @@ class CTypedefType(BaseType):
         return self.typedef_base_type.error_condition(result_code)
 
     def __getattr__(self, name):
+        if name.startswith('__'):
+            # special methods (e.g. __setstate__ for unpickling) are not delegated
+            raise AttributeError(name)
         return getattr(self.typedef_base_type, name)
 
 
@@ -325,12 +337,124 @@ class BufferType(BaseType):
         return self
 
     def __getattr__(self, name):
+        if name.startswith('__'):
+            # special methods (e.g. __setstate__ for unpickling) are not delegated
+            raise AttributeError(name)
         return getattr(self.base, name)
 
     def __repr__(self):
         return "<BufferType %r>" % self.base
 
 
+class MemoryViewSliceType(PyrexType):
+    #
+    #  A typed memoryview slice, e.g. "double[:, ::1]".  All slice types
+    #  share the C struct __Pyx_memviewslice, which is reference counted
+    #  like a Python object but can be used without the GIL.
+    #
+    #  dtype            PyrexType
+    #  ndim             int
+    #  contig           'C', 'F' or None   last or first axis has unit stride
+    #  from_py_function string
+
+    is_memoryviewslice = 1
+    has_attributes = 1
+    scope = None
+    to_py_function = None
+
+    def __init__(self, dtype, ndim, contig=None):
+        import Buffer
+        self.dtype = dtype
+        self.ndim = ndim
+        self.contig = contig
+        suffix = "%dd_%s%s" % (ndim, {'C': 'c_', 'F': 'f_', None: ''}[contig],
+                               Buffer.mangle_dtype_name(dtype))
+        self.from_py_function = "__Pyx_PyObject_to_MemoryviewSlice_%s" % suffix
+        self.copy_function = "__Pyx_MemoryviewSlice_copy_%dd_%s" % (
+            ndim, Buffer.mangle_dtype_name(dtype))
+
+    def __eq__(self, other):
+        return (isinstance(other, MemoryViewSliceType) and
+                self.ndim == other.ndim and self.contig == other.contig and
+                self.dtype.same_as(other.dtype))
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __hash__(self):
+        return hash(self.ndim) ^ hash(self.contig)
+
+    def __repr__(self):
+        return "<MemoryViewSliceType %s>" % self
+
+    def declaration_code(self, entity_code,
+            for_display = 0, dll_linkage = None, pyrex = 0):
+        if pyrex or for_display:
+            axes = [':'] * self.ndim
+            if self.contig == 'C':
+                axes[-1] = '::1'
+            elif self.contig == 'F':
+                axes[0] = '::1'
+            base_code = "%s[%s]" % (
+                self.dtype.declaration_code("", for_display, pyrex=pyrex),
+                ", ".join(axes))
+        else:
+            base_code = public_decl("__Pyx_memviewslice", dll_linkage)
+        return self.base_declaration_code(base_code, entity_code)
+
+    def cast_code(self, expr_code):
+        # all slice types have the same C type
+        return expr_code
+
+    def assignable_from_resolved_type(self, src_type):
+        if src_type is error_type:
+            return True
+        return (src_type.is_memoryviewslice and src_type.ndim == self.ndim and
+                self.dtype.same_as(src_type.dtype) and
+                (self.contig is None or self.contig == src_type.contig))
+
+    def attributes_known(self):
+        if self.scope is None:
+            import Symtab, MemoryView
+            self.scope = scope = Symtab.CClassScope(
+                    '',
+                    None,
+                    visibility="extern")
+            scope.parent_type = self
+            scope.directives = {}
+            axes_type = c_array_type(c_py_ssize_t_type, self.ndim)
+            scope.declare_var("shape", axes_type, None, "shape", is_cdef=True)
+            scope.declare_var("strides", axes_type, None, "strides", is_cdef=True)
+            copy_type = MemoryViewSliceType(self.dtype, self.ndim, 'C')
+            entry = scope.declare_cfunction(
+                    "copy",
+                    CFuncType(copy_type, [CFuncTypeArg("self", self, None)],
+                              exception_check=True, nogil=True),
+                    pos=None,
+                    defining=1,
+                    cname=self.copy_function)
+            entry.utility_code = MemoryView.get_copy_function_code(self)
+        return True
+
+    def create_declaration_utility_code(self, env):
+        import MemoryView
+        env.use_utility_code(MemoryView.memviewslice_declare_code)
+        return True
+
+    def create_to_py_utility_code(self, env):
+        return False
+
+    def create_from_py_utility_code(self, env):
+        import MemoryView, Buffer
+        self.create_declaration_utility_code(env)
+        Buffer.use_py2_buffer_functions(env)
+        env.use_utility_code(MemoryView.MemoryViewSliceFromPyUtilityCode(self))
+        return True
+
+    def error_condition(self, result_code):
+        return "(!%s.memview && PyErr_Occurred())" % result_code
+
+
 class PyObjectType(PyrexType):
     #
     #  Base class for all Python object types (reference-counted).
@@ -1572,6 +1696,9 @@ class CReferenceType(BaseType):
             return CReferenceType(base_type)
 
     def __getattr__(self, name):
+        if name.startswith('__'):
+            # special methods (e.g. __setstate__ for unpickling) are not delegated
+            raise AttributeError(name)
         return getattr(self.ref_base_type, name)
 
 
@@ -2129,6 +2256,30 @@ class TemplatePlaceholderType(CType):
         else:
             return cmp(type(self), type(other))
 
+class FusedType(CType):
+    #
+    #  A "ctypedef fused" type.  It stands for each of its member
+    #  types in turn, and never makes it into generated C code:
+    #  functions using it are specialised for every member type.
+    #
+    #  types      [PyrexType]   member types, in declaration order
+    #  name       string        name of the fused type
+
+    is_fused = 1
+
+    def __init__(self, types, name=None):
+        self.types = types
+        self.name = name
+
+    def declaration_code(self, entity_code,
+            for_display = 0, dll_linkage = None, pyrex = 0):
+        if pyrex or for_display:
+            return self.base_declaration_code(self.name, entity_code)
+        raise Exception("Fused type '%s' cannot be used in C code" % self.name)
+
+    def specialize(self, values):
+        return values.get(self, self)
+
 class CEnumType(CType):
     #  name           string
     #  cname          string or None
@@ -2490,6 +2641,20 @@ def best_match(args, functions, pos=None):
             error(pos, "no suitable method found")
     return None
 
+def fused_type_combinations(fused_types):
+    # Return a list of all the mappings of the given fused types
+    # to one of their member types, the first fused type varying
+    # the slowest.
+    if not fused_types:
+        return [{}]
+    combinations = []
+    first = fused_types[0]
+    for specific_type in first.types:
+        for mapping in fused_type_combinations(fused_types[1:]):
+            mapping[first] = specific_type
+            combinations.append(mapping)
+    return combinations
+
 def widest_numeric_type(type1, type2):
     # Given two numeric types, return the narrowest type
     # encompassing both of them.
@@ -137,6 +137,10 @@ class SourceDescriptor(object):
                 self.get_description().encode('ASCII', 'replace').decode("ASCII")
         return self._escaped_description
 
+    def __deepcopy__(self, memo):
+        # immutable, so copies of parse trees can share it
+        return self
+
     def __gt__(self, other):
         # this is only used to provide some sort of order
         try:
@@ -0,0 +1,302 @@
+#
+#   Cython - Compile server
+#
+#   A long running process that keeps the compiler imported and its
+#   lexicon, builtin scope and analysed .pxd files warm, and compiles
+#   on behalf of thin clients that connect over a local Unix socket.
+#
+#   The client side of this module must stay cheap to import, so the
+#   compiler is only imported by the server.
+#
+
+import os
+import sys
+import socket
+import struct
+import marshal
+import copy
+
+usage = """\
+Usage: cython-server [options]
+
+Options:
+  -s, --socket <path>            Listen on the given Unix socket (default:
+                                 $CYTHON_SERVER_SOCKET or ~/.cython/server.sock)
+  --pxd-cache <directory>        Also keep analysed .pxd files on disk
+  -d, --daemon                   Detach from the terminal
+  --stop                         Stop a running server
+"""
+
+def default_socket_path():
+    path = os.environ.get('CYTHON_SERVER_SOCKET')
+    if not path:
+        path = os.path.join(os.path.expanduser('~'), '.cython', 'server.sock')
+    return path
+
+def compiler_id():
+    # Clients are only served by a server running the same Cython.
+    import Cython
+    return "%s:%s" % (Cython.__version__,
+                      os.path.dirname(os.path.abspath(Cython.__file__)))
+
+#------------------------------------------------------------------------
+#
+#  Messages are marshalled dicts, prefixed by their length
+#
+#------------------------------------------------------------------------
+
+def send_message(sock, message):
+    data = marshal.dumps(message)
+    sock.sendall(struct.pack('!I', len(data)) + data)
+
+def receive_message(sock):
+    size = struct.unpack('!I', receive_bytes(sock, 4))[0]
+    return marshal.loads(receive_bytes(sock, size))
+
+def receive_bytes(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            raise EOFError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return ''.encode('ASCII').join(chunks)
+
+def request(message, socket_path=None):
+    # Sends a message to the server and returns its response.
+    if socket_path is None:
+        socket_path = default_socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        send_message(sock, message)
+        return receive_message(sock)
+    finally:
+        sock.close()
+
+#------------------------------------------------------------------------
+#
+#  Server
+#
+#------------------------------------------------------------------------
+
+class OutputCollector(object):
+    # A file-like object that collects the output of a compilation.
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, s):
+        if isinstance(s, unicode):
+            s = s.encode('UTF-8')
+        self.chunks.append(s)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(self.chunks)
+
+
+class CompileServer(object):
+    """
+    Compiles the command lines sent by clients, one at a time.
+
+    The global compiler settings in Options and DebugFlags that the
+    command line can change, and the default options in Main, are
+    restored around each compilation, so that compilations cannot
+    influence each other.  Each compilation
+    reports its errors to an ErrorState of its own.
+    """
+
+    def __init__(self, socket_path, pxd_cache_dir=None):
+        import Main, Scanning, Options, DebugFlags
+        from PxdCache import PxdCache
+        self.socket_path = socket_path
+        self.running = False
+        # Build the expensive shared state once.
+        Scanning.get_lexicon()
+        self.pxd_cache = PxdCache(pxd_cache_dir)
+        self.settings = [(module, settings_of(module)) for module in (Options, DebugFlags)]
+        self.default_options = copy_options(Main.default_options)
+
+    def restore_settings(self):
+        import Main
+        for module, settings in self.settings:
+            module.__dict__.update(settings)
+        Main.default_options.clear()
+        Main.default_options.update(copy_options(self.default_options))
+
+    def compile(self, cwd, args):
+        import Main
+        self.restore_settings()
+        Main.default_options['pxd_cache'] = self.pxd_cache
+        stdout, stderr = sys.stdout, sys.stderr
+        out = sys.stdout = OutputCollector()
+        err = sys.stderr = OutputCollector()
+        old_cwd = os.getcwd()
+        try:
+            try:
+                os.chdir(cwd)
+                status = Main.run_main(list(args), command_line = 1)
+            except SystemExit, e:
+                status = e.code
+            except KeyboardInterrupt:
+                raise
+            except:
+                import traceback
+                traceback.print_exc()
+                status = 1
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+            os.chdir(old_cwd)
+            self.restore_settings()
+        if status is None:
+            status = 0
+        elif not isinstance(status, int):
+            err.write("%s\n" % status)
+            status = 1
+        return {'status': status, 'stdout': out.getvalue(), 'stderr': err.getvalue()}
+
+    def handle(self, message):
+        command = message.get('command')
+        if message.get('compiler') != compiler_id():
+            return {'status': -1, 'error': 'compiler mismatch'}
+        if command == 'compile':
+            return self.compile(message['cwd'], message['args'])
+        elif command == 'ping':
+            return {'status': 0}
+        elif command == 'stop':
+            self.running = False
+            return {'status': 0}
+        return {'status': -1, 'error': 'unknown command %r' % command}
+
+    def serve_forever(self):
+        sock = self.listen()
+        self.running = True
+        try:
+            while self.running:
+                conn = sock.accept()[0]
+                try:
+                    try:
+                        send_message(conn, self.handle(receive_message(conn)))
+                    except (EnvironmentError, EOFError, ValueError, socket.error):
+                        pass # the client went away or sent garbage
+                finally:
+                    conn.close()
+        finally:
+            sock.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def listen(self):
+        dir = os.path.dirname(self.socket_path)
+        if dir and not os.path.exists(dir):
+            os.makedirs(dir, 0700)
+        if os.path.exists(self.socket_path):
+            if server_running(self.socket_path):
+                raise RuntimeError("A server is already listening on %s" % self.socket_path)
+            os.unlink(self.socket_path) # stale
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0077)
+        try:
+            sock.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(16)
+        return sock
+
+
+def settings_of(module):
+    settings = {}
+    for name, value in module.__dict__.items():
+        if not name.startswith('_') and isinstance(value, (int, long, float, str, unicode, type(None))):
+            settings[name] = value
+    return settings
+
+def copy_options(options):
+    # Copies the mutable option values as well, e.g. the compiler
+    # directives that the command line parser updates in place.
+    options = dict(options)
+    for name, value in options.items():
+        if isinstance(value, (dict, list)):
+            options[name] = copy.deepcopy(value)
+    return options
+
+def server_running(socket_path):
+    try:
+        return request({'command': 'ping', 'compiler': compiler_id()},
+                       socket_path)['status'] == 0
+    except (EnvironmentError, EOFError, socket.error):
+        return False
+
+def daemonize():
+    if os.fork():
+        os._exit(0)
+    os.setsid()
+    if os.fork():
+        os._exit(0)
+    null = os.open(os.devnull, os.O_RDWR)
+    for fd in range(3):
+        os.dup2(null, fd)
+
+def server_main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    socket_path = default_socket_path()
+    pxd_cache_dir = None
+    daemon = stop = False
+    while args:
+        option = args.pop(0)
+        if option in ('-s', '--socket') and args:
+            socket_path = args.pop(0)
+        elif option == '--pxd-cache' and args:
+            pxd_cache_dir = args.pop(0)
+        elif option in ('-d', '--daemon'):
+            daemon = True
+        elif option == '--stop':
+            stop = True
+        else:
+            if option not in ('-h', '--help'):
+                sys.stderr.write("Unknown option: %s\n" % option)
+            sys.stderr.write(usage)
+            sys.exit(option not in ('-h', '--help'))
+    if stop:
+        try:
+            request({'command': 'stop', 'compiler': compiler_id()}, socket_path)
+        except (EnvironmentError, EOFError, socket.error):
+            sys.stderr.write("No server running on %s\n" % socket_path)
+            sys.exit(1)
+        return
+    server = CompileServer(socket_path, pxd_cache_dir)
+    if daemon:
+        daemonize()
+    server.serve_forever()
+
+#------------------------------------------------------------------------
+#
+#  Client, a drop-in replacement for the cython command
+#
+#------------------------------------------------------------------------
+
+def client_main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    try:
+        response = request({'command': 'compile',
+                            'compiler': compiler_id(),
+                            'cwd': os.getcwd(),
+                            'args': list(args)})
+    except (EnvironmentError, EOFError, socket.error, AttributeError):
+        # No server (or no Unix sockets), compile in this process.
+        response = None
+    if response is None or response['status'] < 0:
+        from Cython.Compiler.Main import run_main
+        status = run_main(list(args), command_line = 1)
+    else:
+        sys.stdout.write(response['stdout'])
+        sys.stderr.write(response['stderr'])
+        status = response['status']
+    if status:
+        sys.exit(status)
@@ -215,6 +215,7 @@ class Scope(object):
     # is_c_class_scope  boolean            Is an extension type scope
     # is_closure_scope  boolean            Is a closure scope
     # is_passthrough    boolean            Outer scope is passed directly
+    # is_generator      boolean            Is the scope of a generator function
     # is_cpp_class_scope  boolean          Is a C++ class scope
     # is_property_scope boolean            Is a extension type property scope
     # scope_prefix      string             Disambiguator for C names
@@ -227,11 +228,15 @@ class Scope(object):
     # directives       dict                Helper variable for the recursive
     #                                      analysis, contains directive values.
     # is_internal       boolean            Is only used internally (simpler setup)
+    # fused_to_specific {FusedType : PyrexType} or None
+    #                                      Specific types of the fused function
+    #                                        specialisation being analysed
 
     is_py_class_scope = 0
     is_c_class_scope = 0
     is_closure_scope = 0
     is_passthrough = 0
+    is_generator = 0
     is_cpp_class_scope = 0
     is_property_scope = 0
     is_module_scope = 0
@@ -239,6 +244,7 @@ class Scope(object):
     scope_prefix = ""
     in_cinclude = 0
     nogil = 0
+    fused_to_specific = None
 
     def __init__(self, name, outer_scope, parent_scope):
         # The outer_scope is the next scope in the lookup chain.
@@ -289,6 +295,10 @@ class Scope(object):
     def __str__(self):
         return "<%s %s>" % (self.__class__.__name__, self.qualified_name)
 
+    def __deepcopy__(self, memo):
+        # Scopes are shared by copies of parse trees.
+        return self
+
     def qualifying_scope(self):
         return self.parent_scope
 
@@ -619,6 +629,16 @@ class Scope(object):
         self.cfunc_entries.append(entry)
         return entry
 
+    def specialize_fused(self, type):
+        # Replace a fused type by the specific type of the fused
+        # function specialisation being analysed, if any.
+        scope = self
+        while scope is not None:
+            if scope.fused_to_specific is not None:
+                return type.specialize(scope.fused_to_specific)
+            scope = scope.outer_scope
+        return type
+
     def find(self, name, pos):
         # Look up name, report error if not found.
         entry = self.lookup(name)
@@ -846,9 +866,11 @@ class ModuleScope(Scope):
     # types_imported       {PyrexType : 1}    Set of types for which import code generated
     # has_import_star      boolean            Module contains import *
     # cpp                  boolean            Compiling a C++ file
+    # py2_buffer_functions_used boolean       Buffer emulation for Python 2 generated
 
     is_module_scope = 1
     has_import_star = 0
+    py2_buffer_functions_used = 0
 
     def __init__(self, name, parent_module, context):
         self.parent_module = parent_module
@@ -1342,6 +1364,8 @@ class GeneratorExpressionScope(Scope):
         name = outer_scope.global_scope().next_id(Naming.genexpr_id_ref)
         Scope.__init__(self, name, outer_scope, outer_scope)
         self.directives = outer_scope.directives
+        # inlined loops may return from the surrounding function
+        self.return_type = outer_scope.return_type
         self.genexp_prefix = "%s%d%s" % (Naming.pyrex_prefix, len(name), name)
 
     def mangle(self, prefix, name):
@@ -1405,6 +1429,9 @@ class StructOrUnionScope(Scope):
         if type.is_pyobject and not allow_pyobject:
             error(pos,
                   "C struct/union member cannot be a Python object")
+        elif type.is_memoryviewslice:
+            error(pos,
+                  "C struct/union member cannot be a memoryview slice")
         if visibility != 'private':
             error(pos,
                   "C struct/union member cannot be declared %s" % visibility)
@@ -1480,6 +1507,7 @@ class CClassScope(ClassScope):
     #  method_table_cname    string
     #  getset_table_cname    string
     #  has_pyobject_attrs    boolean  Any PyObject attributes?
+    #  has_memoryviewslice_attrs boolean  Any memoryview slice attributes?
     #  property_entries      [Entry]
     #  defined               boolean  Defined in .pxd file
     #  implemented           boolean  Defined in .pyx file
@@ -1493,6 +1521,7 @@ class CClassScope(ClassScope):
             self.method_table_cname = outer_scope.mangle(Naming.methtab_prefix, name)
             self.getset_table_cname = outer_scope.mangle(Naming.gstab_prefix, name)
         self.has_pyobject_attrs = 0
+        self.has_memoryviewslice_attrs = 0
         self.property_entries = []
         self.inherited_var_entries = []
         self.defined = 0
@@ -1529,6 +1558,8 @@ class CClassScope(ClassScope):
             self.var_entries.append(entry)
             if type.is_pyobject:
                 self.has_pyobject_attrs = 1
+            elif type.is_memoryviewslice:
+                self.has_memoryviewslice_attrs = 1
             if visibility not in ('private', 'public', 'readonly'):
                 error(pos,
                     "Attribute of extension type cannot be declared %s" % visibility)
@@ -0,0 +1,55 @@
+import os, shutil, tempfile, threading
+
+from Cython.Compiler import Errors
+from Cython.Compiler.Main import compile
+from Cython.Compiler.Scanning import StringSourceDescriptor
+from Cython.TestUtils import CythonTest
+
+class TestErrorState(CythonTest):
+
+    def setUp(self):
+        CythonTest.setUp(self)
+        self.temp_dir = tempfile.mkdtemp(prefix='errors_test_')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        CythonTest.tearDown(self)
+
+    def write(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        f = open(path, 'w')
+        f.write(content)
+        f.close()
+        return path
+
+    def test_install_state(self):
+        outer = Errors.current_state()
+        state = Errors.ErrorState()
+        self.assert_(Errors.install_state(state) is outer)
+        Errors.hold_errors()
+        pos = (StringSourceDescriptor(u"test", u"x = 1\n"), 1, 1)
+        Errors.error(pos, u"held")
+        self.assertEqual(1, len(Errors.held_errors()))
+        Errors.release_errors(ignore=True)
+        Errors.error(pos, u"reported")
+        self.assertEqual(1, state.num_errors)
+        self.assert_(Errors.install_state(outer) is state)
+        self.assertEqual(0, outer.num_errors)
+
+    def test_threads(self):
+        sources = []
+        for i in range(4):
+            sources.append(self.write('good%d.pyx' % i, u"def f(x):\n    return x + %d\n" % i))
+            sources.append(self.write('bad%d.pyx' % i, u"".join([u"cdef int* p%d = 1\n" % j for j in range(i+1)])))
+        results = {}
+        def run(source):
+            results[source] = compile(source, errors_to_stderr=0).num_errors
+        threads = [threading.Thread(target=run, args=(source,)) for source in sources]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for i in range(4):
+            self.assertEqual(0, results[sources[2*i]])
+            self.assertEqual(i+1, results[sources[2*i+1]])
+        self.assertEqual(0, Errors.current_state().num_errors)
@@ -0,0 +1,49 @@
+import os, shutil, tempfile
+
+from Cython.Compiler.Main import compile
+from Cython.Compiler.PipelineProfiler import load_profile, aggregate, format_report
+from Cython.TestUtils import CythonTest
+
+class TestPipelineProfiler(CythonTest):
+
+    def setUp(self):
+        CythonTest.setUp(self)
+        self.temp_dir = tempfile.mkdtemp(prefix='profile_test_')
+        self.profile = os.path.join(self.temp_dir, 'profile.json')
+        self.write('shared.pxd', u"cdef inline int twice(int x):\n    return 2*x\n")
+        self.sources = [
+            self.write('user%d.pyx' % i, u"cimport shared\ndef f(x):\n    return shared.twice(x)\n")
+            for i in range(2)]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        CythonTest.tearDown(self)
+
+    def write(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        f = open(path, 'w')
+        f.write(content)
+        f.close()
+        return path
+
+    def test_profile(self):
+        for source in self.sources:
+            result = compile(source, include_path=[self.temp_dir],
+                             profile_pipeline=self.profile)
+            self.assertEqual(0, result.num_errors)
+        records = load_profile(self.profile)
+        self.assertEqual(['user0', 'user1'], [record['module'] for record in records])
+        phases = {}
+        for phase in records[0]['phases']:
+            phases[phase['module'], phase['kind'], phase['phase']] = phase
+        self.assert_(('shared', 'pxd', 'AnalyseDeclarationsTransform') in phases)
+        self.assert_(('user0', 'pyx', 'generate_pyx_code') in phases)
+        analyse = phases['user0', 'pyx', 'AnalyseExpressionsTransform']
+        self.assert_(analyse['nodes'] > 0)
+        self.assert_(analyse['wall'] >= 0)
+
+        totals = aggregate(records)
+        counts = dict([((total['phase'], total['kind']), total['count']) for total in totals])
+        self.assertEqual(2, counts['AnalyseExpressionsTransform', 'pyx'])
+        self.assertEqual(2, counts['parse_pxd', 'pxd'])
+        self.assert_('2 modules compiled' in format_report(records))
@@ -0,0 +1,89 @@
+import os, re, shutil, tempfile
+
+from Cython.Compiler.Main import compile
+from Cython.Compiler.PxdCache import PxdCache
+from Cython.TestUtils import CythonTest
+
+shared_pxd = u"""
+cdef extern from "math.h":
+    double sqrt(double x)
+
+ctypedef struct point:
+    double x, y
+
+cdef inline double norm(point p):
+    return sqrt(p.x * p.x + p.y * p.y)
+"""
+
+user_pyx = u"""
+cimport shared
+
+def length(double x, double y):
+    cdef shared.point p
+    p.x, p.y = x, y
+    return shared.norm(p)
+"""
+
+generation_time = re.compile(r'/\* Generated by Cython .* on .* \*/')
+
+class TestPxdCache(CythonTest):
+
+    def setUp(self):
+        CythonTest.setUp(self)
+        self.temp_dir = tempfile.mkdtemp(prefix='pxd_cache_test_')
+        self.write('shared.pxd', shared_pxd)
+        self.sources = [self.write('user%d.pyx' % i, user_pyx) for i in range(3)]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        CythonTest.tearDown(self)
+
+    def write(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        f = open(path, 'w')
+        f.write(content)
+        f.close()
+        return path
+
+    def compile_all(self, **kwds):
+        c_code = []
+        for source in self.sources:
+            result = compile(source, include_path=[self.temp_dir], **kwds)
+            self.assertEqual(0, result.num_errors)
+            f = open(result.c_file)
+            c_code.append(generation_time.sub('', f.read()))
+            f.close()
+        return c_code
+
+    def test_shared_in_process(self):
+        fresh = self.compile_all()
+        cache = PxdCache()
+        self.assertEqual(fresh, self.compile_all(pxd_cache=cache))
+        self.assertEqual(2, cache.hits)
+
+    def test_not_shared_with_own_module(self):
+        cache = PxdCache()
+        self.compile_all(pxd_cache=cache)
+        self.write('shared.pyx', u"cdef double twice(double x):\n    return 2*x\n")
+        result = compile(os.path.join(self.temp_dir, 'shared.pyx'),
+                         include_path=[self.temp_dir], pxd_cache=cache)
+        self.assertEqual(0, result.num_errors)
+        self.assertEqual(2, cache.hits)
+
+    def test_pxd_modified(self):
+        cache = PxdCache()
+        self.compile_all(pxd_cache=cache)
+        self.write('shared.pxd', shared_pxd + u"\nctypedef int other\n")
+        os.utime(os.path.join(self.temp_dir, 'shared.pxd'), (0, 0))
+        self.compile_all(pxd_cache=cache)
+        self.assertEqual(4, cache.hits)
+        self.assertEqual(['shared'], cache.pxds.values()[0].keys())
+
+    def test_pickled(self):
+        fresh = self.compile_all()
+        cache_dir = os.path.join(self.temp_dir, 'cache')
+        self.compile_all(pxd_cache=PxdCache(cache_dir))
+        self.assertEqual(1, len(os.listdir(cache_dir)))
+        cache = PxdCache(cache_dir)
+        self.assertEqual(fresh, self.compile_all(pxd_cache=cache))
+        self.assertEqual(3, cache.hits)
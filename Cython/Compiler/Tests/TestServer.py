@@ -0,0 +1,85 @@
+import os, shutil, tempfile, threading
+
+from Cython.Compiler import Errors, Options
+from Cython.Compiler.Server import CompileServer, request, compiler_id
+from Cython.TestUtils import CythonTest
+
+class TestServer(CythonTest):
+
+    def setUp(self):
+        CythonTest.setUp(self)
+        self.temp_dir = tempfile.mkdtemp(prefix='server_test_')
+        self.socket_path = os.path.join(self.temp_dir, 'server.sock')
+        self.write('good.pyx', u"def f(x):\n    'adds one'\n    return x + 1\n")
+        self.write('bad.pyx', u"def f(x):\n    return y +\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        CythonTest.tearDown(self)
+
+    def write(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        f = open(path, 'w')
+        f.write(content)
+        f.close()
+        return path
+
+    def read(self, name):
+        f = open(os.path.join(self.temp_dir, name))
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+    def compile(self, server, *args):
+        return server.compile(self.temp_dir, args)
+
+    def test_errors_isolated(self):
+        server = CompileServer(self.socket_path)
+        response = self.compile(server, 'bad.pyx')
+        self.assertEqual(1, response['status'])
+        self.assert_('bad.pyx:2:14' in response['stderr'])
+        response = self.compile(server, 'good.pyx')
+        self.assertEqual(0, response['status'])
+        self.assertEqual('', response['stderr'])
+        self.assert_(os.path.exists(os.path.join(self.temp_dir, 'good.c')))
+        self.assertEqual(0, Errors.current_state().num_errors)
+
+    def test_settings_restored(self):
+        server = CompileServer(self.socket_path)
+        docstrings = Options.docstrings
+        self.compile(server, '--no-docstrings', 'good.pyx')
+        self.assertEqual(docstrings, Options.docstrings)
+        self.failIf('"adds one"' in self.read('good.c'))
+        self.compile(server, 'good.pyx')
+        self.assert_('"adds one"' in self.read('good.c'))
+
+    def test_directives_restored(self):
+        from Cython.Compiler import Main
+        server = CompileServer(self.socket_path)
+        self.compile(server, '-X', 'embedsignature=True', 'good.pyx')
+        self.assert_('"f(x)' in self.read('good.c'))
+        self.assertEqual({}, Main.default_options['compiler_directives'])
+        self.compile(server, 'good.pyx')
+        self.failIf('"f(x)' in self.read('good.c'))
+
+    def test_socket(self):
+        server = CompileServer(self.socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            for i in range(50):
+                if os.path.exists(self.socket_path):
+                    break
+                thread.join(0.1)
+            response = request({'command': 'compile', 'compiler': compiler_id(),
+                                'cwd': self.temp_dir, 'args': ['good.pyx']},
+                               self.socket_path)
+            self.assertEqual(0, response['status'])
+            response = request({'command': 'ping', 'compiler': 'other'},
+                               self.socket_path)
+            self.assertEqual(-1, response['status'])
+        finally:
+            request({'command': 'stop', 'compiler': compiler_id()}, self.socket_path)
+            thread.join()
+        self.failIf(os.path.exists(self.socket_path))
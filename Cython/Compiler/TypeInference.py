@@ -94,6 +94,12 @@ class MarkAssignments(CythonTransform):
         self.visitchildren(node)
         return node
 
+    def visit_ParallelRangeNode(self, node):
+        self.mark_assignment(node.target, node.start)
+        self.mark_assignment(node.target, node.stop)
+        self.visitchildren(node)
+        return node
+
     def visit_ExceptClauseNode(self, node):
         if node.target is not None:
             self.mark_assignment(node.target, object_expr)
@@ -337,6 +343,9 @@ def safe_spanning_type(types, might_overflow):
     elif result_type.is_cpp_class:
         # These can't implicitly become Python objects either.
         return result_type
+    elif result_type.is_memoryviewslice:
+        # Neither can memoryview slices.
+        return result_type
     elif result_type.is_struct:
         # Though we have struct -> object for some structs, this is uncommonly
         # used, won't arise in pure Python, and there shouldn't be side
@@ -299,6 +299,7 @@ class ConstructorSlot(InternalMethodSlot):
     def slot_code(self, scope):
         if scope.parent_type.base_type \
             and not scope.has_pyobject_attrs \
+            and not scope.has_memoryviewslice_attrs \
             and not scope.lookup_here(self.method):
             # if the type does not have object attributes, it can
             # delegate GC methods to its parent - iff the parent
@@ -3,6 +3,7 @@ cimport cython
 cdef class TreeVisitor:
     cdef public list access_path
     cdef dict dispatch_table
+    cdef public Py_ssize_t nodes_visited
 
     cpdef visit(self, obj)
     cdef _visit(self, obj)
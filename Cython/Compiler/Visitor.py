@@ -58,6 +58,7 @@ class TreeVisitor(object):
         super(TreeVisitor, self).__init__()
         self.dispatch_table = {}
         self.access_path = []
+        self.nodes_visited = 0
 
     def dump_node(self, node, indent=0):
         ignored = list(node.child_attrs) + [u'child_attrs', u'pos',
@@ -155,6 +156,7 @@ class TreeVisitor(object):
         return self._visit(obj)
 
     def _visit(self, obj):
+        self.nodes_visited += 1
         try:
             handler_method = self.dispatch_table[type(obj)]
         except KeyError:
@@ -163,6 +165,7 @@ class TreeVisitor(object):
         return handler_method(obj)
 
     def _visitchild(self, child, parent, attrname, idx):
+        self.nodes_visited += 1
         self.access_path.append((parent, attrname, idx))
         try:
             try:
@@ -11,7 +11,7 @@ import sys
 import os
 import re
 from distutils.core import Command
-from distutils.errors import DistutilsPlatformError
+from distutils.errors import DistutilsPlatformError, DistutilsOptionError
 from distutils.sysconfig import customize_compiler, get_python_version
 from distutils.dep_util import newer, newer_group
 from distutils import log
@@ -19,6 +19,12 @@ from distutils.dir_util import mkpath
 from distutils.command import build_ext as _build_ext
 from distutils import sysconfig
 
+try:
+    import threading
+    import Queue
+except ImportError:
+    threading = None
+
 extension_name_re = _build_ext.extension_name_re
 
 show_compilers = _build_ext.show_compilers
@@ -66,6 +72,65 @@ except NameError:
         return False
 
 
+def cpu_count():
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        pass
+    try:
+        return max(1, int(os.sysconf('SC_NPROCESSORS_ONLN')))
+    except (AttributeError, ValueError, OSError):
+        return 1
+
+
+def skip_up_to_date_objects(compiler, force=False):
+    """
+    Makes compiler.compile() only compile the sources whose object
+    file is older than the source or one of the dependencies.
+    """
+    compile = compiler.compile
+    def compile_outdated(sources, output_dir=None, **kwds):
+        objects = compiler.object_filenames(sources, output_dir=output_dir)
+        depends = list(kwds.get('depends') or ())
+        outdated = []
+        for source, obj in zip(sources, objects):
+            if force or newer_group([source] + depends, obj, 'newer'):
+                outdated.append(source)
+            else:
+                log.debug("skipping '%s' (up-to-date)", obj)
+        if outdated:
+            compile(outdated, output_dir=output_dir, **kwds)
+        return objects
+    compiler.compile = compile_outdated
+
+
+class CompileJob(object):
+    #  The compilation of a single source file by a parallel build.
+
+    def __init__(self, compile, source, output_dir, kwds):
+        self.compile = compile
+        self.source = source
+        self.output_dir = output_dir
+        self.kwds = kwds
+        self.objects = None
+        self.error = None
+        self.done = threading.Event()
+
+    def run(self):
+        try:
+            self.objects = self.compile([self.source], output_dir=self.output_dir,
+                                        **self.kwds)
+        except Exception:
+            self.error = sys.exc_info()
+        self.done.set()
+
+    def result(self):
+        if self.error is not None:
+            raise self.error[0], self.error[1], self.error[2]
+        return self.objects
+
+
 class build_ext(_build_ext.build_ext):
 
     description = "build C/C++ and Cython extensions (compile/link to build directory)"
@@ -93,8 +158,16 @@ class build_ext(_build_ext.build_ext):
             "compiler directive overrides"),
         ('pyrex-gdb', None,
          "generate debug information for cygdb"),
+        ('object-cache=', None,
+         "directory of a cache for compiled objects and extension modules"),
         ])
 
+    if 'parallel=' not in [option[0] for option in user_options]:
+        user_options.append(
+            ('parallel=', 'j',
+             "number of C compiler processes to run in parallel "
+             "(default: the number of CPUs)"))
+
     boolean_options.extend([
         'pyrex-cplus', 'pyrex-create-listing', 'pyrex-line-directives',
         'pyrex-c-in-temp', 'pyrex-gdb',
@@ -110,6 +183,8 @@ class build_ext(_build_ext.build_ext):
         self.pyrex_c_in_temp = 0
         self.pyrex_gen_pxi = 0
         self.pyrex_gdb = False
+        self.parallel = None
+        self.object_cache = None
 
     def finalize_options (self):
         _build_ext.build_ext.finalize_options(self)
@@ -120,6 +195,13 @@ class build_ext(_build_ext.build_ext):
                 self.pyrex_include_dirs.split(os.pathsep)
         if self.pyrex_directives is None:
             self.pyrex_directives = {}
+        if self.parallel is None or self.parallel is True:
+            self.parallel = cpu_count()
+        else:
+            try:
+                self.parallel = int(self.parallel)
+            except ValueError:
+                raise DistutilsOptionError("parallel should be an integer")
     # finalize_options ()
 
     def run(self):
@@ -137,9 +219,110 @@ class build_ext(_build_ext.build_ext):
         # First, sanity-check the 'extensions' list
         self.check_extensions_list(self.extensions)
 
+        # Generate all C files first, the C compiler runs in parallel.
         for ext in self.extensions:
             ext.sources = self.cython_sources(ext.sources, ext)
-            self.build_extension(ext)
+
+        object_cache = None
+        if self.object_cache:
+            from Cython.Build.ObjectCache import ObjectCache, cache_compiler_output
+            object_cache = ObjectCache(self.object_cache)
+            cache_compiler_output(self.compiler, object_cache)
+        skip_up_to_date_objects(self.compiler, self.force)
+        try:
+            sources = 0
+            for ext in self.extensions:
+                sources += len(ext.sources)
+            if self.parallel > 1 and sources > 1 and threading is not None:
+                self.build_extensions_parallel()
+            else:
+                for ext in self.extensions:
+                    self.build_extension(ext)
+        finally:
+            if object_cache is not None:
+                object_cache.cleanup_cache()
+                log.info("object cache: %s", object_cache.format_stats())
+                object_cache.save_stats()
+
+    def build_extensions_parallel(self):
+        """
+        Builds the extensions on a pool of self.parallel threads, each
+        of which runs the C compiler as a separate process.  Every
+        source file is compiled as a job of its own, so that the sources
+        of a single extension compile in parallel as well, and each
+        extension is linked as soon as its objects are done.  The errors
+        of all failed extensions are logged, the first one is raised
+        after the other extensions are built.
+        """
+        if not getattr(self.compiler, 'initialized', True):
+            # MSVC looks up its environment on first use
+            self.compiler.initialize()
+        extensions = list(self.extensions)
+        jobs = Queue.Queue()
+        lock = threading.Lock()
+        errors = []
+
+        compile = self.compiler.compile
+        def compile_in_parallel(sources, output_dir=None, **kwds):
+            source_jobs = [CompileJob(compile, source, output_dir, kwds)
+                           for source in sources]
+            for job in source_jobs:
+                jobs.put(job)
+            for job in source_jobs:
+                job.done.wait()
+            objects = []
+            for job in source_jobs:
+                objects.extend(job.result())
+            return objects
+
+        def compile_worker():
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                job.run()
+
+        def extension_worker():
+            while True:
+                lock.acquire()
+                try:
+                    if not extensions:
+                        return
+                    ext = extensions.pop(0)
+                finally:
+                    lock.release()
+                try:
+                    self.build_extension(ext)
+                except Exception:
+                    error = sys.exc_info()
+                    log.error("error: building '%s' failed: %s", ext.name, error[1])
+                    lock.acquire()
+                    errors.append(error)
+                    lock.release()
+
+        compile_threads = []
+        for i in range(self.parallel):
+            thread = threading.Thread(target=compile_worker)
+            thread.start()
+            compile_threads.append(thread)
+        self.compiler.compile = compile_in_parallel
+        try:
+            # Building an extension mostly waits for its compile jobs.
+            threads = []
+            for i in range(min(self.parallel, len(extensions))):
+                thread = threading.Thread(target=extension_worker)
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+        finally:
+            self.compiler.compile = compile
+            for thread in compile_threads:
+                jobs.put(None)
+            for thread in compile_threads:
+                thread.join()
+        if errors:
+            raise errors[0][0], errors[0][1], errors[0][2]
 
     def cython_sources(self, sources, extension):
         """
@@ -154,6 +337,7 @@ class build_ext(_build_ext.build_ext):
                        default_options as pyrex_default_options, \
                        compile as cython_compile
             from Cython.Compiler.Errors import PyrexError
+            from Cython.Utils import generated_time, touch_stamp_file
         except ImportError:
             e = sys.exc_info()[1]
             print("failed to import Cython: %s" % e)
@@ -257,9 +441,15 @@ class build_ext(_build_ext.build_ext):
         for source in pyrex_sources:
             target = pyrex_targets[source]
             depends = [source] + list(extension.depends or ())
-            rebuild = self.force or newer_group(depends, target, 'newer')
-            if not rebuild and newest_dependency is not None:
-                rebuild = newer(newest_dependency, target)
+            if newest_dependency is not None:
+                depends.append(newest_dependency)
+            rebuild = self.force or not os.path.exists(target)
+            if not rebuild:
+                target_time = generated_time(target)
+                for dep in depends:
+                    if not os.path.exists(dep) or os.path.getmtime(dep) > target_time:
+                        rebuild = True
+                        break
             if rebuild:
                 log.info("cythoning %s to %s", source, target)
                 self.mkpath(os.path.dirname(target))
@@ -279,6 +469,10 @@ class build_ext(_build_ext.build_ext):
                     gdb_debug = pyrex_gdb)
                 result = cython_compile(source, options=options,
                                         full_module_name=module_name)
+                if result.c_file and not result.c_file_changed:
+                    # The compiler left the C file alone, mark it as up
+                    # to date without making distutils recompile it.
+                    touch_stamp_file(result.c_file)
             else:
                 log.info("skipping '%s' Cython extension (up-to-date)", target)
 
@@ -73,6 +73,22 @@ class _nogil(object):
 nogil = _nogil()
 del _nogil
 
+# Parallel loops, run sequentially
+
+def _prange(start, stop=None, step=1, nogil=False, schedule=None,
+            chunksize=None, num_threads=None):
+    if stop is None:
+        stop = start
+        start = 0
+    return range(start, stop, step)
+
+import sys as _sys
+from types import ModuleType as _ModuleType
+parallel = _ModuleType('cython.parallel')
+parallel.prange = _prange
+_sys.modules['cython.parallel'] = parallel
+del _prange, _sys, _ModuleType
+
 # Emulated types
 
 class CythonType(object):
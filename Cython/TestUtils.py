@@ -43,13 +43,10 @@ def treetypes(root):
 class CythonTest(unittest.TestCase):
 
     def setUp(self):
-        self.listing_file = Errors.listing_file
-        self.echo_file = Errors.echo_file
-        Errors.listing_file = Errors.echo_file = None
+        self.previous_errors = Errors.install_state(Errors.ErrorState())
 
     def tearDown(self):
-        Errors.listing_file = self.listing_file
-        Errors.echo_file = self.echo_file
+        Errors.install_state(self.previous_errors)
 
     def assertLines(self, expected, result):
         "Checks that the given strings or lists of strings are equal line by line"
@@ -0,0 +1,42 @@
+import os, re, shutil, tempfile, unittest
+
+from Cython.Utils import OutputFile
+
+class TestOutputFile(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix='output_file_test_')
+        self.path = os.path.join(self.temp_dir, 'out.c')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, *chunks):
+        f = OutputFile(self.path, ignore=re.compile(r'/\* time \d+ \*/\n'))
+        for chunk in chunks:
+            f.write(chunk)
+        f.close()
+        return f.changed
+
+    def read(self):
+        f = open(self.path, 'rb')
+        data = f.read()
+        f.close()
+        return data
+
+    def test_unchanged(self):
+        self.assertTrue(self.write('/* time 1 */\n', u'int x;\n'))
+        os.utime(self.path, (0, 0))
+        self.assertFalse(self.write('/* time 2 */\n', 'int x;\n'))
+        self.assertEqual(0, os.path.getmtime(self.path))
+        self.assertEqual('/* time 1 */\nint x;\n', self.read())
+
+    def test_changed(self):
+        self.write('/* time 1 */\n', 'int x;\n')
+        os.utime(self.path, (0, 0))
+        self.assertTrue(self.write('/* time 2 */\n', u'int y; /* \xe4 */\n'))
+        self.assertNotEqual(0, os.path.getmtime(self.path))
+        self.assertEqual('/* time 2 */\nint y; /* \xe4 */\n', self.read())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,6 +21,55 @@ def open_new_file(path):
     # characters to a byte sequence, which ISO-8859-1 provides
     return codecs.open(path, "w", encoding="ISO-8859-1")
 
+class OutputFile(object):
+    #  A generated output file.  The text written to it is collected
+    #  and close() only replaces the file if the content differs from
+    #  what is already there, so that build tools do not rebuild what
+    #  depends on an unchanged file.  A match of the regular expression
+    #  'ignore' at the start of the file (a time stamp) is not compared.
+    #
+    #  changed   boolean   Set by close(), whether the file was written
+
+    def __init__(self, path, ignore=None):
+        self.path = path
+        self.ignore = ignore
+        self.chunks = []
+        self.changed = None
+
+    def write(self, s):
+        self.chunks.append(s)
+
+    def strip_ignored(self, data):
+        if self.ignore is not None:
+            match = self.ignore.match(data)
+            if match is not None:
+                return data[match.end():]
+        return data
+
+    def close(self):
+        if self.changed is not None:
+            return
+        # see open_new_file() for the encoding
+        data = u''.join(self.chunks).encode("ISO-8859-1")
+        self.chunks = None
+        self.changed = True
+        if os.path.exists(self.path):
+            f = open(self.path, 'rb')
+            try:
+                old_data = f.read()
+            finally:
+                f.close()
+            self.changed = self.strip_ignored(old_data) != self.strip_ignored(data)
+            if not self.changed:
+                return
+            # never write into hard linked files
+            os.unlink(self.path)
+        f = open(self.path, 'wb')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+
 def castrate_file(path, st):
     #  Remove junk contents from an output file after a
     #  failed compilation.
@@ -45,6 +94,25 @@ def file_newer_than(path, time):
     ftime = modification_time(path)
     return ftime > time
 
+def stamp_file_path(path):
+    return path + '.stamp'
+
+def touch_stamp_file(path):
+    #  Records that the generated file 'path' is up to date although
+    #  it was left untouched, without changing its modification time
+    #  which the C compiler and linker steps of a build look at.
+    f = open(stamp_file_path(path), 'w')
+    f.close()
+
+def generated_time(path):
+    #  The time at which the generated file 'path' was last brought up
+    #  to date, see touch_stamp_file().
+    ftime = modification_time(path)
+    stamp = stamp_file_path(path)
+    if os.path.exists(stamp):
+        ftime = max(ftime, modification_time(stamp))
+    return ftime
+
 def path_exists(path):
     # try on the filesystem first
     if os.path.exists(path):
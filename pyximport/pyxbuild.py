@@ -48,6 +48,8 @@ def pyx_to_dll(filename, ext = None, force_rebuild = 0,
         args.append("--force")
     if HAS_CYTHON and build_in_temp:
         args.append("--pyrex-c-in-temp")
+    if HAS_CYTHON:
+        args.append("--object-cache=%s" % os.path.join(pyxbuild_dir, "object_cache"))
     sargs = setup_args.copy()
     sargs.update(
         {"script_name": None,
@@ -0,0 +1,424 @@
+#!/usr/bin/python
+
+"""
+Measures the throughput of the Cython compiler.
+
+Compiles the modules in tests/run and a few large synthetic modules to C
+(without running the C compiler) and reports the time spent in each
+compiler phase, the peak memory usage, and the size of the generated C
+code.  The results can be stored as a baseline and later runs compared
+against it, failing when a total gets worse by more than a threshold:
+
+    python runbenchmarks.py --save baseline.json
+    ... change the compiler ...
+    python runbenchmarks.py --baseline baseline.json
+
+Positional arguments select modules by regular expression, like the
+test selectors of runtests.py.
+"""
+
+import os
+import sys
+import re
+import shutil
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BENCHMARK_DIRS = ['run']
+
+# Totals that are compared against the baseline.
+COMPARED_TOTALS = ['wall', 'cpu', 'peak_rss', 'c_size', 'c_lines', 'utility_codes']
+
+
+#------------------------------------------------------------------------
+#
+#  Synthetic modules, larger than anything in tests/run
+#
+#------------------------------------------------------------------------
+
+def synthetic_functions(scale):
+    code = ["cimport cython\n"]
+    for i in range(200 * scale):
+        code.append('''
+cdef double c_func_%(i)d(double x, int n) except? -1:
+    cdef int k
+    cdef double s = %(i)d
+    for k in range(n):
+        if k %% 3 == 0:
+            s += x * k
+        elif k %% 3 == 1:
+            s -= x / (k + 1)
+        else:
+            s = s * 0.5 + k
+    return s
+
+def py_func_%(i)d(x, int n=10, *args, **kwargs):
+    """Calls c_func_%(i)d and does some Python object operations."""
+    cdef list items = [x, n, args, kwargs]
+    result = c_func_%(i)d(x, n)
+    d = {'x': x, 'n': n, 'result': result}
+    return [item for item in items if item], d.get('result', None), len(args)
+''' % {'i': i})
+    return ''.join(code)
+
+def synthetic_classes(scale):
+    code = []
+    for i in range(80 * scale):
+        code.append('''
+cdef class Base%(i)d:
+    cdef public int a
+    cdef double b
+    cdef object c
+
+    def __init__(self, int a, double b=1.0, c=None):
+        self.a = a
+        self.b = b
+        self.c = c
+
+    property b:
+        def __get__(self):
+            return self.b
+        def __set__(self, double value):
+            self.b = value
+
+    cdef int cdef_method(self, int x):
+        return self.a + x
+
+    cpdef double cpdef_method(self, double y):
+        return self.b * y + self.cdef_method(<int>y)
+
+    def __richcmp__(self, other, int op):
+        return NotImplemented
+
+class Python%(i)d(object):
+    attribute = %(i)d
+
+    def method(self, *args):
+        return [Base%(i)d(k).cpdef_method(k) for k in args]
+
+    @staticmethod
+    def static(a, b):
+        return a + b
+''' % {'i': i})
+    return ''.join(code)
+
+def synthetic_expressions(scale):
+    code = ["def big_function(int a, double b, object c, list d):\n",
+            "    cdef int i = 0\n",
+            "    cdef double x = 0\n",
+            "    r = []\n"]
+    for i in range(300 * scale):
+        code.append(
+            "    x = (a * %(i)d + b) / (i + 1) - x * 0.5\n"
+            "    i = (i + a * %(i)d) %% 1000\n"
+            "    r.append((c, d[i %% len(d)], x, 'str%(i)d', %(i)d))\n"
+            "    if x > %(i)d and a < i or c is None:\n"
+            "        c = {'key%(i)d': x, 'other': [x, i]}\n" % {'i': i})
+    code.append("    return r, x, i, c\n")
+    return ''.join(code)
+
+SYNTHETIC_MODULES = [
+    ('synthetic_functions', synthetic_functions),
+    ('synthetic_classes', synthetic_classes),
+    ('synthetic_expressions', synthetic_expressions),
+    ]
+
+
+#------------------------------------------------------------------------
+#
+#  Running the benchmarks
+#
+#------------------------------------------------------------------------
+
+def peak_rss():
+    # The peak resident set size of this process in KB, or None.
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        maxrss = maxrss // 1024
+    return maxrss
+
+def collect_sources(rootdir, workdir, selectors, with_corpus, with_synthetic, scale):
+    # Returns a list of (module name, source file) pairs.
+    sources = []
+    if with_corpus:
+        for dirname in BENCHMARK_DIRS:
+            path = os.path.join(rootdir, dirname)
+            filenames = os.listdir(path)
+            filenames.sort()
+            for filename in filenames:
+                if filename.startswith('.'):
+                    continue
+                module, ext = os.path.splitext(filename)
+                if ext in ('.pyx', '.py'):
+                    sources.append(("%s.%s" % (dirname, module),
+                                    os.path.join(path, filename)))
+    if with_synthetic:
+        path = os.path.join(workdir, 'synthetic')
+        if not os.path.exists(path):
+            os.makedirs(path)
+        for module, generate in SYNTHETIC_MODULES:
+            filename = os.path.join(path, module + '.pyx')
+            f = open(filename, 'w')
+            f.write(generate(scale))
+            f.close()
+            sources.append(("synthetic.%s" % module, filename))
+    return [(name, source) for name, source in sources
+            if [1 for match in selectors if match(name)]]
+
+def compile_sources(sources, workdir, verbose):
+    """
+    Compiles all sources to C once and returns the results as a dict.
+    """
+    from Cython.Compiler.Main import CompilationOptions, default_options, compile
+    from Cython.Compiler.PipelineProfiler import load_profile
+
+    outdir = os.path.join(workdir, 'c')
+    if not os.path.exists(outdir):
+        os.makedirs(outdir)
+    profile = os.path.join(workdir, 'profile.json')
+    if os.path.exists(profile):
+        os.unlink(profile)
+
+    modules = {}
+    for name, source in sources:
+        module = os.path.splitext(os.path.basename(source))[0]
+        if 'cpp' in module:
+            c_file = os.path.join(outdir, module + '.cpp')
+        else:
+            c_file = os.path.join(outdir, module + '.c')
+        options = CompilationOptions(
+            default_options,
+            include_path = [os.path.dirname(source)],
+            output_file = c_file,
+            cplus = 'cpp' in module,
+            errors_to_stderr = False,
+            profile_pipeline = profile,
+            )
+        if verbose:
+            sys.stderr.write("compiling %s\n" % name)
+        try:
+            result = compile(source, options, full_module_name=module)
+        except Exception:
+            # a compiler crash, leave the module out of the results
+            sys.stderr.write("failed to compile %s\n" % name)
+            continue
+        stats = {'errors': result.num_errors, 'c_size': 0, 'c_lines': 0,
+                 'utility_codes': result.utility_code_count or 0}
+        if result.c_file and not result.num_errors:
+            f = open(result.c_file, 'rb')
+            try:
+                data = f.read()
+            finally:
+                f.close()
+            stats['c_size'] = len(data)
+            stats['c_lines'] = data.count('\n'.encode('ASCII'))
+        modules[name] = stats
+
+    names = dict([(os.path.splitext(os.path.basename(source))[0], name)
+                  for name, source in sources])
+    phases = {}
+    if os.path.exists(profile):
+        for record in load_profile(profile):
+            stats = modules.get(names.get(record['module']))
+            if stats is None:
+                continue
+            stats['wall'] = record['wall']
+            stats['cpu'] = record['cpu']
+            for phase in record['phases']:
+                key = "%s (%s)" % (phase['phase'], phase['kind'])
+                total = phases.get(key)
+                if total is None:
+                    total = phases[key] = {'wall': 0.0, 'cpu': 0.0, 'nodes': 0}
+                total['wall'] += phase['wall']
+                total['cpu'] += phase['cpu']
+                total['nodes'] += phase['nodes'] or 0
+    return {'modules': modules, 'phases': phases}
+
+def run_benchmarks(sources, workdir, repeat, verbose):
+    """
+    Compiles the sources repeat times and keeps the fastest time of
+    each module and phase.
+    """
+    results = None
+    for i in range(repeat):
+        run = compile_sources(sources, workdir, verbose)
+        if results is None:
+            results = run
+            # later runs start with warm caches in a grown process
+            rss = peak_rss()
+            continue
+        for kind in ('modules', 'phases'):
+            for name, stats in run[kind].items():
+                best = results[kind].get(name)
+                if best is None:
+                    results[kind][name] = stats
+                    continue
+                for key in ('wall', 'cpu'):
+                    if key in stats:
+                        best[key] = min(best.get(key, stats[key]), stats[key])
+
+    totals = {}
+    for key in ('wall', 'cpu', 'c_size', 'c_lines', 'utility_codes', 'errors'):
+        totals[key] = 0
+        for stats in results['modules'].values():
+            totals[key] += stats.get(key, 0)
+    totals['modules'] = len(results['modules'])
+    totals['peak_rss'] = rss
+    results['totals'] = totals
+
+    from Cython.Compiler.Version import version
+    results['cython'] = version
+    results['python'] = sys.version.split()[0]
+    return results
+
+
+#------------------------------------------------------------------------
+#
+#  Reporting
+#
+#------------------------------------------------------------------------
+
+def format_results(results, limit=20):
+    totals = results['totals']
+    lines = ["Compiled %d modules (%d errors) in %.2f seconds (%.2f seconds CPU)" % (
+                totals['modules'], totals['errors'], totals['wall'], totals['cpu'])]
+    if totals['peak_rss'] is not None:
+        lines.append("Peak RSS: %d KB" % totals['peak_rss'])
+    lines.append("Generated C code: %d bytes, %d lines, %d utility code blocks" % (
+        totals['c_size'], totals['c_lines'], totals['utility_codes']))
+    lines.append("")
+    lines.append("%-44s %9s %9s %6s %10s" % ('phase', 'wall', 'cpu', '%', 'nodes'))
+    phases = [(-stats['wall'], name, stats) for name, stats in results['phases'].items()]
+    phases.sort()
+    for _, name, stats in phases[:limit]:
+        if totals['wall']:
+            percent = 100.0 * stats['wall'] / totals['wall']
+        else:
+            percent = 0.0
+        lines.append("%-44s %9.3f %9.3f %6.1f %10d" % (
+            name, stats['wall'], stats['cpu'], percent, stats['nodes']))
+    return '\n'.join(lines)
+
+def compare_results(results, baseline, threshold):
+    """
+    Returns a report of the differences to the baseline, and the list
+    of totals that regressed by more than threshold percent.
+    """
+    # Only compare the modules that were compiled in both runs.
+    common = [name for name in results['modules'] if name in baseline['modules']]
+    lines = ["Comparing %d modules against the baseline (Cython %s)" % (
+        len(common), baseline.get('cython'))]
+    regressions = []
+    for key in COMPARED_TOTALS:
+        if key == 'peak_rss':
+            old, new = baseline['totals'].get(key), results['totals'].get(key)
+        else:
+            old = new = 0
+            for name in common:
+                old += baseline['modules'][name].get(key, 0)
+                new += results['modules'][name].get(key, 0)
+        if not old or new is None:
+            continue
+        change = 100.0 * (new - old) / old
+        line = "%-14s %14.2f %14.2f %+8.1f%%" % (key, old, new, change)
+        if change > threshold:
+            line += "   REGRESSION"
+            regressions.append(key)
+        lines.append(line)
+    lines.append("")
+    lines.append("Largest changes in phase times:")
+    changes = []
+    for name, stats in results['phases'].items():
+        old = baseline['phases'].get(name)
+        if old is not None:
+            changes.append((-abs(stats['wall'] - old['wall']), name, old['wall'], stats['wall']))
+    changes.sort()
+    for _, name, old, new in changes[:10]:
+        lines.append("%-44s %9.3f %9.3f" % (name, old, new))
+    return '\n'.join(lines), regressions
+
+
+def main():
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options] [selector...]")
+    parser.add_option("--baseline", dest="baseline", metavar="FILE",
+                      help="compare with the results in FILE and fail on regressions")
+    parser.add_option("--save", dest="save", metavar="FILE",
+                      help="write the results to FILE (e.g. to use as a baseline)")
+    parser.add_option("--threshold", dest="threshold", type="float", default=10.0,
+                      help="regression threshold in percent (default: 10)")
+    parser.add_option("--repeat", dest="repeat", type="int", default=1,
+                      help="compile everything N times and keep the fastest times")
+    parser.add_option("--no-corpus", dest="with_corpus",
+                      action="store_false", default=True,
+                      help="do not compile the modules in tests/")
+    parser.add_option("--no-synthetic", dest="with_synthetic",
+                      action="store_false", default=True,
+                      help="do not compile the synthetic modules")
+    parser.add_option("--scale", dest="scale", type="int", default=1,
+                      help="size factor of the synthetic modules")
+    parser.add_option("--no-cleanup", dest="cleanup_workdir",
+                      action="store_false", default=True,
+                      help="do not delete the generated C files")
+    parser.add_option("-v", "--verbose", dest="verbose",
+                      action="store_true", default=False,
+                      help="print the names of the compiled modules")
+
+    options, cmd_args = parser.parse_args()
+
+    DISTDIR = os.path.join(os.getcwd(), os.path.dirname(sys.argv[0]))
+    ROOTDIR = os.path.join(DISTDIR, 'tests')
+    WORKDIR = os.path.join(os.getcwd(), 'BUILD', 'benchmarks')
+
+    sys.path.insert(0, DISTDIR)
+
+    selectors = [re.compile(r, re.I|re.U).search for r in cmd_args]
+    if not selectors:
+        selectors = [lambda x: True]
+
+    if os.path.exists(WORKDIR):
+        shutil.rmtree(WORKDIR)
+    os.makedirs(WORKDIR)
+
+    sources = collect_sources(ROOTDIR, WORKDIR, selectors, options.with_corpus,
+                              options.with_synthetic, options.scale)
+    try:
+        results = run_benchmarks(sources, WORKDIR, max(1, options.repeat), options.verbose)
+    finally:
+        if options.cleanup_workdir:
+            shutil.rmtree(WORKDIR, ignore_errors=True)
+    print(format_results(results))
+
+    if options.save:
+        f = open(options.save, 'w')
+        try:
+            json.dump(results, f, indent=1, sort_keys=True)
+        finally:
+            f.close()
+
+    if options.baseline:
+        f = open(options.baseline)
+        try:
+            baseline = json.load(f)
+        finally:
+            f.close()
+        report, regressions = compare_results(results, baseline, options.threshold)
+        print("")
+        print(report)
+        if regressions:
+            sys.stderr.write("\nRegressions beyond %.1f%%: %s\n" % (
+                options.threshold, ', '.join(regressions)))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
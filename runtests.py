@@ -54,6 +54,42 @@ EXT_DEP_INCLUDES = [
     (re.compile('numpy_.*').match, get_numpy_include_dirs),
 ]
 
+_openmp_flags = []
+
+def get_openmp_compiler_flags():
+    """Returns the C compiler flags that enable OpenMP, or an empty
+    list if the C compiler does not support it.
+    """
+    if _openmp_flags:
+        return _openmp_flags[0]
+    from distutils.ccompiler import new_compiler
+    from distutils.sysconfig import customize_compiler
+    flags = ['-fopenmp']
+    compiler = new_compiler()
+    customize_compiler(compiler)
+    tempdir = tempfile.mkdtemp(prefix='openmp_test_')
+    try:
+        source = os.path.join(tempdir, 'openmp.c')
+        f = open(source, 'w')
+        f.write('#include <omp.h>\nint main(void) { return omp_get_max_threads() < 1; }\n')
+        f.close()
+        try:
+            objects = compiler.compile([source], output_dir=tempdir,
+                                       extra_postargs=flags)
+            compiler.link_executable(objects, os.path.join(tempdir, 'openmp'),
+                                     extra_postargs=flags)
+        except Exception:
+            flags = []
+    finally:
+        shutil.rmtree(tempdir, ignore_errors=True)
+    _openmp_flags.append(flags)
+    return flags
+
+EXT_DEP_FLAGS = [
+    # test name matcher , callable returning list of compiler and linker flags
+    (re.compile('parallel_.*').match, get_openmp_compiler_flags),
+]
+
 VER_DEP_MODULES = {
     # tests are excluded if 'CurrentPythonVersion OP VersionTuple', i.e.
     # (2,4) : (operator.lt, ...) excludes ... when PyVer < 2.4.x
@@ -391,6 +427,10 @@ class CythonCompileTestCase(unittest.TestCase):
             for match, get_additional_include_dirs in EXT_DEP_INCLUDES:
                 if match(module):
                     ext_include_dirs += get_additional_include_dirs()
+            ext_flags = []
+            for match, get_additional_flags in EXT_DEP_FLAGS:
+                if match(module):
+                    ext_flags += get_additional_flags()
             self.copy_related_files(test_directory, workdir, module)
 
             if extra_extension_args is None:
@@ -400,7 +440,8 @@ class CythonCompileTestCase(unittest.TestCase):
                 module,
                 sources = self.find_source_files(workdir, module),
                 include_dirs = ext_include_dirs,
-                extra_compile_args = CFLAGS,
+                extra_compile_args = CFLAGS + ext_flags,
+                extra_link_args = ext_flags,
                 **extra_extension_args
                 )
             if self.language == 'cpp':
@@ -78,12 +78,14 @@ if 'setuptools' in sys.modules:
     setuptools_extra_args['entry_points'] = {
         'console_scripts': [
             'cython = Cython.Compiler.Main:setuptools_main',
+            'cython-server = Cython.Compiler.Server:server_main',
+            'cython-client = Cython.Compiler.Server:client_main',
         ]
     }
     scripts = []
 else:
     if os.name == "posix":
-        scripts = ["bin/cython"]
+        scripts = ["bin/cython", "bin/cython-server", "bin/cython-client"]
         if include_debugger:
             scripts.append('bin/cygdb')
     else:
@@ -0,0 +1,17 @@
+cimport cython
+
+cdef class Base:
+    pass
+
+@cython.freelist(8)
+cdef class Sub(Base):
+    pass
+
+@cython.freelist(-1)
+cdef class Negative:
+    pass
+
+_ERRORS = u"""
+7:5: freelist is not supported for extension types with a base class
+11:5: freelist size must not be negative
+"""
@@ -0,0 +1,20 @@
+ctypedef fused number:
+    int
+    double
+
+ctypedef fused duplicate:
+    int
+    int
+
+cdef number x
+
+def outer(int a):
+    def inner(number b):
+        return b
+    return inner
+
+_ERRORS = u"""
+7:4: Type specified multiple times
+9:5: Fused types not allowed here
+12:14: Fused types not allowed here
+"""
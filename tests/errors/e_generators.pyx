@@ -0,0 +1,22 @@
+yield 1
+
+class Foo:
+    yield 2
+
+def return_value():
+    yield 1
+    return 2
+
+cdef int cfunc():
+    yield 1
+
+def genexpr(seq):
+    return (x for x in seq)
+
+_ERRORS = u"""
+1:0: 'yield' outside function
+4:4: 'yield' outside function
+8:11: 'return' with argument inside generator
+10:5: cdef functions cannot be generators
+14:14: Generator expressions are not supported
+"""
@@ -0,0 +1,40 @@
+cdef struct Point:
+    double x
+    double y
+
+cdef object[:] a
+cdef double[:, 1:] c
+cdef double[::2] d
+cdef double[::1, ::1] e
+cdef double[:, ::1, :] f
+cdef double[:,:,:,:,:,:,:,:,:] g
+
+cdef struct WithSlice:
+    double[:] data
+
+def indexing(double[:, ::1] h, double[:] i):
+    print h[0, 0, 0]
+    print h[..., 0, ...]
+    print h == i
+    h += i
+    return h
+
+cdef double[:] exc_value() except NULL:
+    pass
+
+_ERRORS = u"""
+5:5: Invalid base type for memoryview slice: Python object
+6:12: Only the step of an axis can be specified in a memoryview slice declaration.
+7:14: Only a step of 1 ('::1') is supported in a memoryview slice declaration.
+8:12: Only one axis can be declared contiguous ('::1').
+9:12: Only the first or the last axis can be declared contiguous ('::1').
+10:12: More than 8 dimensions not supported for memoryview slices
+13:14: C struct/union member cannot be a memoryview slice
+16:11: Too many indices for memoryview slice of 2 dimensions
+17:11: Cannot convert 'double[::1]' to Python object
+17:20: More than one Ellipsis in memoryview slice index
+18:12: Invalid types for '==' (double[:, ::1], double[:])
+19:6: In-place operators not allowed on memoryview slices
+20:12: Cannot convert 'double[:, ::1]' to Python object
+22:24: Exception value not allowed for function returning memoryview slice
+"""
@@ -0,0 +1,46 @@
+# mode: error
+
+from cython.parallel cimport prange
+
+def with_gil(int n):
+    cdef int i
+    for i in prange(n):
+        pass
+
+def not_constant_step(int n, int step):
+    cdef int i
+    for i in prange(0, n, step, nogil=True):
+        pass
+
+cdef int leave_loop(int n) nogil:
+    cdef int i, j
+    for i in prange(n):
+        for j in range(n):
+            break
+        else:
+            break
+        return 1
+
+def bad_reductions(int n):
+    cdef int i, a = 0, b = 0, c = 0
+    cdef double *p = NULL
+    for i in prange(n, nogil=True):
+        a /= 2
+        b += 1
+        b *= 2
+        p += 1
+
+def outside_loop(int n):
+    return prange(n)
+
+_ERRORS = u"""
+7:4: prange() can only be used without the GIL
+12:30: prange() step must be a non-zero compile time integer constant
+21:12: break statement not allowed in prange() body
+22:8: return statement not allowed in prange() body
+27:4: 'a' can not be a reduction in prange(), only +, -, *, &, | and ^ are supported
+27:4: Conflicting reduction operators for 'b' in prange()
+27:4: Reduction variable 'p' must have a C numeric type
+34:17: prange() can only be used as the iterable of a for loop
+34:17: undeclared name not builtin: prange
+"""
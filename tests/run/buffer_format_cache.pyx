@@ -0,0 +1,104 @@
+from libc.string cimport strcpy
+
+cdef class Buffer:
+    """
+    A one-dimensional buffer of ints whose format string lives in a
+    fixed memory area that can be overwritten between acquisitions.
+    """
+    cdef char format[64]
+    cdef bytes storage
+    cdef Py_ssize_t shape[1]
+    cdef Py_ssize_t strides[1]
+    cdef public int acquired
+
+    def __init__(self, values, format=b"i"):
+        cdef Py_ssize_t i
+        self.set_format(format)
+        self.shape[0] = len(values)
+        self.strides[0] = sizeof(int)
+        self.storage = b"\0" * (len(values) * sizeof(int))
+        for i in range(len(values)):
+            (<int*><char*>self.storage)[i] = values[i]
+
+    def set_format(self, bytes format):
+        assert len(format) < 64
+        strcpy(self.format, <char*>format)
+
+    def __getbuffer__(self, Py_buffer *info, int flags):
+        info.buf = <char*>self.storage
+        info.obj = self
+        info.len = len(self.storage)
+        info.readonly = 0
+        info.format = self.format
+        info.ndim = 1
+        info.shape = self.shape
+        info.strides = self.strides
+        info.suboffsets = NULL
+        info.itemsize = sizeof(int)
+        info.internal = NULL
+        self.acquired += 1
+
+    def __releasebuffer__(self, Py_buffer *info):
+        self.acquired -= 1
+
+
+def first(object[int] buf):
+    return buf[0]
+
+def first_view(int[:] view):
+    return view[0]
+
+def repeated(obj, n):
+    """
+    >>> buf = Buffer([3, 4])
+    >>> repeated(buf, 10)
+    30
+    >>> buf.acquired
+    0
+    """
+    cdef int i, s = 0
+    for i in range(n):
+        s += first(obj)
+    return s
+
+def format_changes_in_place(f):
+    """
+    >>> format_changes_in_place(first)
+    5
+    ValueError
+    5
+    >>> format_changes_in_place(first_view)
+    5
+    ValueError
+    5
+    """
+    buf = Buffer([5], b"i")
+    print f(buf)
+    buf.set_format(b"d")
+    try:
+        f(buf)
+    except ValueError:
+        print "ValueError"
+    buf.set_format(b"i")
+    print f(buf)
+
+def many_formats():
+    """
+    >>> many_formats()
+    [1, 1, 1, 1, 1, 1, 1]
+    """
+    formats = [b"i", b"=i", b"@i", b"1i", b"T{i}", b"^i", b"i" + b" " * 40]
+    return [first(Buffer([1], format)) for format in formats]
+
+def repeated_mismatch():
+    """
+    >>> repeated_mismatch()
+    ['ValueError', 'ValueError']
+    """
+    result = []
+    for i in range(2):
+        try:
+            first(Buffer([1], b"h"))
+        except ValueError:
+            result.append("ValueError")
+    return result
@@ -0,0 +1,207 @@
+cimport cython
+from cython.operator cimport predecrement as dec
+
+cdef class Buffer:
+    """
+    A C contiguous buffer of ints.
+    """
+    cdef bytes storage
+    cdef Py_ssize_t shape[2]
+    cdef Py_ssize_t strides[2]
+    cdef int ndim
+
+    def __init__(self, shape):
+        cdef int i
+        cdef Py_ssize_t size = 1
+        self.ndim = len(shape)
+        for i in range(self.ndim - 1, -1, -1):
+            self.shape[i] = shape[i]
+            self.strides[i] = size * sizeof(int)
+            size *= shape[i]
+        self.storage = b"\0" * (size * sizeof(int))
+        for i in range(size):
+            (<int*><char*>self.storage)[i] = i
+
+    def __getbuffer__(self, Py_buffer *info, int flags):
+        info.buf = <char*>self.storage
+        info.obj = self
+        info.len = len(self.storage)
+        info.readonly = 0
+        info.format = b"i"
+        info.ndim = self.ndim
+        info.shape = self.shape
+        info.strides = self.strides
+        info.suboffsets = NULL
+        info.itemsize = sizeof(int)
+        info.internal = NULL
+
+    def __releasebuffer__(self, Py_buffer *info):
+        pass
+
+
+def memview_sum(int[:, :] a):
+    """
+    >>> memview_sum(Buffer((3, 4)))
+    66
+    """
+    cdef int i, j, s = 0
+    for i in range(a.shape[0]):
+        for j in range(a.shape[1]):
+            s += a[i, j]
+    return s
+
+def memview_reversed(int[:] a):
+    """
+    >>> memview_reversed(Buffer((4,)))
+    [3, 2, 1, 0]
+    """
+    cdef Py_ssize_t i
+    result = []
+    for i in range(a.shape[0] - 1, -1, -1):
+        result.append(a[i])
+    return result
+
+def for_from(int[:] a):
+    """
+    >>> for_from(Buffer((4,)))
+    6
+    """
+    cdef int i, s = 0
+    for i from 0 <= i < a.shape[0]:
+        s += a[i]
+    return s
+
+def buffer_sum(object[int] a, int n):
+    """
+    >>> buffer_sum(Buffer((5,)), 5)
+    10
+    >>> buffer_sum(Buffer((5,)), 6)
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 0)
+    """
+    cdef int i, s = 0
+    for i in range(n):
+        s += a[i]
+    return s
+
+def other_shape(int[:] a, int[:] b):
+    """
+    >>> other_shape(Buffer((3,)), Buffer((3,)))
+    3
+    >>> other_shape(Buffer((5,)), Buffer((3,)))
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 0)
+    """
+    cdef int i, s = 0
+    for i in range(a.shape[0]):
+        s += b[i]
+    return s
+
+def wrong_axis(int[:, :] a):
+    """
+    >>> wrong_axis(Buffer((2, 2)))
+    1
+    >>> wrong_axis(Buffer((3, 2)))
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 1)
+    """
+    cdef int i, s = 0
+    for i in range(a.shape[0]):
+        s += a[0, i]
+    return s
+
+def negative_start(int[:] a):
+    """
+    >>> negative_start(Buffer((4,)))
+    [3, 0, 1, 2]
+    """
+    cdef int i
+    return [a[i] for i in range(-1, a.shape[0] - 1)]
+
+def modified_index(int[:] a):
+    """
+    >>> modified_index(Buffer((4,)))
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 0)
+    """
+    cdef int i, s = 0
+    for i in range(a.shape[0]):
+        i += 1
+        s += a[i]
+    return s
+
+def modified_wraparound(int[:] a):
+    """
+    >>> modified_wraparound(Buffer((4,)))
+    [3, 3, 3, 3]
+    """
+    cdef int i
+    result = []
+    for i in range(a.shape[0]):
+        i = -1
+        result.append(a[i])
+    return result
+
+def modified_decrement(int[:] a):
+    """
+    >>> modified_decrement(Buffer((4,)))
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 0)
+    """
+    cdef int i
+    result = []
+    for i in range(a.shape[0]):
+        dec(i)
+        dec(i)
+        dec(i)
+        dec(i)
+        dec(i)
+        result.append(a[i])
+    return result
+
+def modified_through_pointer(int[:] a):
+    """
+    >>> modified_through_pointer(Buffer((4,)))
+    [3, 3, 3, 3]
+    """
+    cdef int i = 0
+    cdef int *p = &i
+    result = []
+    for i in range(a.shape[0]):
+        p[0] = -1
+        result.append(a[i])
+    return result
+
+def reassigned_slice(int[:] a):
+    """
+    >>> reassigned_slice(Buffer((4,)))
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 0)
+    """
+    cdef int i, s = 0
+    for i in range(a.shape[0]):
+        s += a[i]
+        a = a[1:]
+    return s
+
+@cython.wraparound(False)
+def no_wraparound(int[:] a):
+    """
+    >>> no_wraparound(Buffer((3,)))
+    3
+    """
+    cdef int i, s = 0
+    for i in range(a.shape[0]):
+        s += a[i]
+    return s
+
+def assign_items(int[:] a):
+    """
+    >>> buf = Buffer((3,))
+    >>> assign_items(buf)
+    [0, 2, 4]
+    """
+    cdef int i
+    for i in range(a.shape[0]):
+        a[i] *= 2
+    return [a[i] for i in range(3)]
@@ -0,0 +1,81 @@
+# cython: cache_globals=True
+
+import sys
+
+value = 1
+
+def helper(x):
+    return x + 1
+
+def get_value():
+    """
+    >>> get_value()
+    1
+    """
+    return value
+
+def call_helper(n):
+    """
+    >>> call_helper(5)
+    5
+    """
+    cdef int i
+    result = 0
+    for i in range(n):
+        result = helper(result)
+    return result
+
+def set_value(new):
+    global value
+    value = new
+
+def reassign():
+    """
+    >>> reassign()
+    [1, 2, 3, 4]
+    """
+    result = [get_value()]
+    set_value(2)
+    result.append(get_value())
+    setattr(sys.modules[__name__], 'value', 3)
+    result.append(get_value())
+    sys.modules[__name__].__dict__['value'] = 4
+    result.append(get_value())
+    set_value(1)
+    return result
+
+def delete_and_resize():
+    """
+    >>> delete_and_resize()
+    [1, 'NameError', 5, 5]
+    """
+    g = sys.modules[__name__].__dict__
+    result = [get_value()]
+    del g['value']
+    try:
+        get_value()
+    except NameError:
+        result.append('NameError')
+    g['value'] = 5
+    result.append(get_value())
+    for i in range(1000):
+        g['_filler_%d' % i] = i
+    result.append(get_value())
+    for i in range(1000):
+        del g['_filler_%d' % i]
+    g['value'] = 1
+    return result
+
+def replace_function():
+    """
+    >>> replace_function()
+    (3, 12)
+    """
+    global helper
+    original = helper
+    first = call_helper(3)
+    helper = lambda x: x + 4
+    try:
+        return first, call_helper(3)
+    finally:
+        helper = original
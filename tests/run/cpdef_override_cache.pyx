@@ -0,0 +1,70 @@
+cdef class Base:
+    cpdef value(self):
+        return "Base"
+
+    def call_value(self):
+        return self.value()
+
+def call_many(Base obj, int n):
+    return [obj.value() for i in range(n)]
+
+class Sub(Base):
+    pass
+
+class Override(Base):
+    def value(self):
+        return "Override"
+
+def repeated_calls():
+    """
+    >>> repeated_calls()
+    (['Base', 'Base'], ['Base', 'Base'], ['Override', 'Override'], ['Base', 'Base'])
+    """
+    return (call_many(Base(), 2), call_many(Sub(), 2),
+            call_many(Override(), 2), call_many(Sub(), 2))
+
+def patch_class():
+    """
+    >>> patch_class()
+    ['Base', 'patched', 'Base']
+    """
+    class Patched(Base):
+        pass
+    obj = Patched()
+    result = call_many(obj, 1)
+    Patched.value = lambda self: "patched"
+    result += call_many(obj, 1)
+    del Patched.value
+    result += call_many(obj, 1)
+    return result
+
+def patch_base_class():
+    """
+    >>> patch_base_class()
+    ['Base', 'middle', 'Base']
+    """
+    class Middle(Base):
+        pass
+    class Leaf(Middle):
+        pass
+    obj = Leaf()
+    result = call_many(obj, 1)
+    Middle.value = lambda self: "middle"
+    result += call_many(obj, 1)
+    del Middle.value
+    result += call_many(obj, 1)
+    return result
+
+def patch_instance():
+    """
+    >>> patch_instance()
+    ['Base', 'instance', 'Base', 'Base']
+    """
+    a, b = Sub(), Sub()
+    result = call_many(a, 1)
+    a.value = lambda: "instance"
+    result += call_many(a, 1)
+    result += call_many(b, 1)
+    del a.value
+    result += call_many(a, 1)
+    return result
@@ -0,0 +1,43 @@
+# cython: language_level=3
+
+cimport cython
+
+@cython.test_assert_path_exists("//WhileStatNode")
+@cython.test_fail_if_path_exists("//ForInStatNode")
+def zip_lists(list xs, tuple ys):
+    """
+    >>> zip_lists([1, 2, 3], ('a', 'b'))
+    [(1, 'a'), (2, 'b')]
+    >>> zip_lists(None, ())
+    Traceback (most recent call last):
+    TypeError: zip argument #1 must support iteration
+    """
+    result = []
+    for x, y in zip(xs, ys):
+        result.append((x, y))
+    return result
+
+@cython.test_assert_path_exists("//WhileStatNode")
+def zip_modified_list(list xs, list ys):
+    """
+    >>> zip_modified_list([1, 2, 3], [4, 5, 6])
+    [(1, 4), (0, 5), (3, 6)]
+    """
+    result = []
+    for x, y in zip(xs, ys):
+        result.append((x, y))
+        xs[1] = 0
+    return result
+
+@cython.test_assert_path_exists("//WhileStatNode")
+def zip_growing_list(list xs, list ys):
+    """
+    >>> zip_growing_list([1, 2], [1, 2, 3, 4])
+    [1, 2, 0, 0]
+    """
+    result = []
+    for x, y in zip(xs, ys):
+        result.append(x)
+        if len(xs) < 4:
+            xs.append(0)
+    return result
@@ -0,0 +1,228 @@
+cimport cython
+
+@cython.test_assert_path_exists("//ForFromStatNode")
+@cython.test_fail_if_path_exists("//ForInStatNode")
+def range_runtime_step(int start, int stop, int step):
+    """
+    >>> range_runtime_step(0, 10, 3)
+    ([0, 3, 6, 9], 9)
+    >>> range_runtime_step(10, 0, -3)
+    ([10, 7, 4, 1], 1)
+    >>> range_runtime_step(5, 0, 1)
+    ([], -1)
+    >>> range_runtime_step(0, 5, -1)
+    ([], -1)
+    >>> range_runtime_step(0, 5, 0)
+    Traceback (most recent call last):
+    ValueError: range() step argument must not be zero
+    """
+    cdef int i = -1
+    result = []
+    for i in range(start, stop, step):
+        result.append(i)
+    return result, i
+
+@cython.test_assert_path_exists("//ForFromStatNode")
+@cython.test_fail_if_path_exists("//ForInStatNode")
+def range_object_step(int n, step):
+    """
+    >>> range_object_step(5, -2)
+    [5, 3, 1]
+    >>> range_object_step(5, 2L)
+    []
+    """
+    cdef int i
+    result = []
+    for i in range(n, 0, step):
+        result.append(i)
+    return result
+
+def range_step_modified(int n, int step):
+    """
+    >>> range_step_modified(7, 2)
+    [0, 2, 4, 6]
+    """
+    cdef int i
+    result = []
+    for i in range(0, n, step):
+        step = 1
+        result.append(i)
+    return result
+
+@cython.test_assert_path_exists("//ForFromStatNode")
+@cython.test_fail_if_path_exists("//ForInStatNode")
+def reversed_range(int n):
+    """
+    >>> reversed_range(4)
+    ([3, 2, 1, 0], 0)
+    >>> reversed_range(0)
+    ([], 99)
+    """
+    cdef int i = 99
+    result = []
+    for i in reversed(range(n)):
+        result.append(i)
+    return result, i
+
+@cython.test_assert_path_exists("//ForFromStatNode")
+@cython.test_fail_if_path_exists("//ForInStatNode")
+def reversed_range_negative_step(int a, int b):
+    """
+    >>> reversed_range_negative_step(5, 1)
+    [2, 3, 4, 5]
+    >>> reversed_range_negative_step(1, 5)
+    []
+    """
+    cdef int i
+    return [i for i in reversed(range(a, b, -1))]
+
+def reversed_range_step(int n):
+    """
+    >>> reversed_range_step(7)
+    [6, 4, 2, 0]
+    """
+    cdef int i
+    return [i for i in reversed(range(0, n, 2))]
+
+@cython.test_assert_path_exists("//ForInStatNode")
+@cython.test_fail_if_path_exists("//SimpleCallNode")
+def reversed_list(list l):
+    """
+    >>> reversed_list([1, 2, 3])
+    [3, 2, 1]
+    >>> reversed_list([])
+    []
+    >>> reversed_list(None)
+    Traceback (most recent call last):
+    TypeError: argument to reversed() must be a sequence
+    """
+    return [x for x in reversed(l)]
+
+@cython.test_fail_if_path_exists("//IteratorNode//SimpleCallNode")
+def reversed_tuple(tuple t):
+    """
+    >>> reversed_tuple((1, 2, 3))
+    [3, 2, 1]
+    """
+    result = []
+    for x in reversed(t):
+        result.append(x)
+    return result
+
+def reversed_shrinking_list(list l):
+    """
+    >>> reversed_shrinking_list([1, 2, 3, 4, 5])
+    [5]
+    """
+    result = []
+    for x in reversed(l):
+        result.append(x)
+        del l[:2]
+    return result
+
+def reversed_object(seq):
+    """
+    >>> reversed_object([1, 2, 3])
+    [3, 2, 1]
+    >>> reversed_object(u'abc') == [u'c', u'b', u'a']
+    True
+    """
+    return [x for x in reversed(seq)]
+
+@cython.test_assert_path_exists("//ForFromStatNode")
+@cython.test_fail_if_path_exists("//ForInStatNode")
+def reversed_bytes(bytes s):
+    """
+    >>> reversed_bytes(b'abc')
+    [99, 98, 97]
+    >>> reversed_bytes(b'')
+    []
+    """
+    cdef char c
+    return [c for c in reversed(s)]
+
+@cython.test_assert_path_exists("//WhileStatNode")
+@cython.test_fail_if_path_exists("//ForInStatNode")
+def zip_tuples(tuple xs, tuple ys):
+    """
+    >>> zip_tuples((1, 2, 3), ('a', 'b'))
+    ([(1, 'a'), (2, 'b')], 2, 'b')
+    >>> zip_tuples((1,), ('a', 'b'))
+    ([(1, 'a')], 1, 'a')
+    >>> zip_tuples((), ())
+    ([], None, None)
+    >>> zip_tuples(None, ())
+    Traceback (most recent call last):
+    TypeError: zip argument #1 must support iteration
+    """
+    a = b = None
+    result = []
+    for a, b in zip(xs, ys):
+        result.append((a, b))
+    return result, a, b
+
+@cython.test_assert_path_exists("//WhileStatNode")
+def zip_typed_targets(tuple xs, tuple ys, tuple zs):
+    """
+    >>> zip_typed_targets((1, 2, 3), (4, 5, 6), (7, 8, 9))
+    45
+    >>> zip_typed_targets((1, 2), (3, 'x'), (4, 5))
+    Traceback (most recent call last):
+    TypeError: an integer is required
+    """
+    cdef int a, b, c, s = 0
+    for a, b, c in zip(xs, ys, zs):
+        s += a + b + c
+    return s
+
+@cython.test_assert_path_exists("//WhileStatNode")
+def zip_loop_control(tuple xs, tuple ys):
+    """
+    >>> zip_loop_control((1, 2, 3, 4, 5), (1, 0, 1, 9, 1))
+    ([1, 3], 'break')
+    >>> zip_loop_control((1, 2), (1, 1, 1))
+    ([1, 2], 'else')
+    """
+    result = []
+    for x, y in zip(xs, ys):
+        if not y:
+            continue
+        if y > 1:
+            exit = 'break'
+            break
+        result.append(x)
+    else:
+        exit = 'else'
+    return result, exit
+
+@cython.test_fail_if_path_exists("//WhileStatNode")
+def zip_growing_lists(list xs, list ys):
+    """
+    >>> zip_growing_lists([1, 2], [1, 2])
+    [1, 2]
+    """
+    result = []
+    for x, y in zip(xs, ys):
+        result.append(x)
+        xs.append(0)
+        ys.append(0)
+    return result
+
+@cython.test_fail_if_path_exists("//WhileStatNode")
+def zip_modified_list(list xs, tuple ys):
+    """
+    >>> zip_modified_list([1, 2, 3], (4, 5, 6))
+    [(1, 4), (2, 5), (3, 6)]
+    """
+    result = []
+    for x, y in zip(xs, ys):
+        result.append((x, y))
+        xs[1] = 'changed'
+    return result
+
+def zip_objects(xs, ys):
+    """
+    >>> zip_objects([1, 2], 'ab')
+    [(1, 'a'), (2, 'b')]
+    """
+    return [(x, y) for x, y in zip(xs, ys)]
@@ -0,0 +1,69 @@
+cimport cython
+
+@cython.freelist(4)
+cdef class Event:
+    """
+    >>> events = [Event(i) for i in range(10)]
+    >>> [e.value for e in events] == list(range(10))
+    True
+    >>> del events
+    >>> [Event(i).value for i in range(10)] == list(range(10))
+    True
+    """
+    cdef public int value
+    cdef public object payload
+    cdef double[:] data
+
+    def __init__(self, value, payload=None):
+        self.value = value
+        self.payload = payload
+
+@cython.freelist(4)
+cdef class Record:
+    """
+    >>> r = Record()
+    >>> r.name, r.count
+    (None, 0)
+    >>> r.name = 'x'; r.count = 5
+    >>> del r
+    >>> r = Record()
+    >>> r.name, r.count
+    (None, 0)
+    """
+    cdef public object name
+    cdef public long count
+
+class PySubclass(Event):
+    """
+    >>> events = [PySubclass(i) for i in range(6)]
+    >>> del events
+    >>> [PySubclass(i).value for i in range(6)] == list(range(6))
+    True
+    >>> PySubclass(1).extra = 5
+    """
+
+def cycle():
+    """
+    >>> import gc
+    >>> for i in range(10):
+    ...     cycle()
+    >>> _ = gc.collect()
+    >>> [Event(i, None).payload for i in range(3)]
+    [None, None, None]
+    """
+    e = Event(0)
+    e.payload = e
+
+def closures(n):
+    """
+    >>> closures(20)
+    [0, 1, 4, 9, 16, 25, 36, 49, 64, 81, 100, 121, 144, 169, 196, 225, 256, 289, 324, 361]
+    """
+    def make(i):
+        def f():
+            return i * i
+        return f
+    funcs = [make(i) for i in range(n)]
+    result = [f() for f in funcs]
+    funcs = None
+    return [make(i)() for i in range(n)]
@@ -0,0 +1,214 @@
+cimport cython
+
+ctypedef fused floating:
+    float
+    double
+
+ctypedef fused number:
+    int
+    long
+    double
+
+ctypedef fused sequence:
+    list
+    tuple
+
+
+cdef class Buffer:
+    """
+    A one-dimensional buffer of floats, doubles or ints.
+    """
+    cdef bytes format
+    cdef bytes storage
+    cdef Py_ssize_t shape[1]
+    cdef Py_ssize_t strides[1]
+    cdef Py_ssize_t itemsize
+    cdef public int acquired
+
+    def __init__(self, values, format):
+        cdef Py_ssize_t i
+        self.format = format
+        if format == b"f":
+            self.itemsize = sizeof(float)
+        elif format == b"d":
+            self.itemsize = sizeof(double)
+        else:
+            self.itemsize = sizeof(int)
+        self.shape[0] = len(values)
+        self.strides[0] = self.itemsize
+        self.storage = b"\0" * (len(values) * self.itemsize)
+        for i in range(len(values)):
+            if format == b"f":
+                (<float*><char*>self.storage)[i] = values[i]
+            elif format == b"d":
+                (<double*><char*>self.storage)[i] = values[i]
+            else:
+                (<int*><char*>self.storage)[i] = values[i]
+
+    def __getbuffer__(self, Py_buffer *info, int flags):
+        info.buf = <char*>self.storage
+        info.obj = self
+        info.len = len(self.storage)
+        info.readonly = 0
+        info.format = self.format
+        info.ndim = 1
+        info.shape = self.shape
+        info.strides = self.strides
+        info.suboffsets = NULL
+        info.itemsize = self.itemsize
+        info.internal = NULL
+        self.acquired += 1
+
+    def __releasebuffer__(self, Py_buffer *info):
+        self.acquired -= 1
+
+
+cdef floating twice(floating x):
+    return x * 2
+
+def cdef_specialisations():
+    """
+    >>> cdef_specialisations()
+    (3.0, 4.5, 5.0)
+    """
+    cdef float f = 1.5
+    cdef double d = 2.25
+    cdef int i = 2
+    return twice(f), twice(d), twice(<float>i) + 1
+
+cdef floating scale(floating x, number factor):
+    return x * factor
+
+def two_fused_types():
+    """
+    >>> two_fused_types()
+    (3.0, 7.5, 1.25)
+    """
+    cdef float f = 1.5
+    cdef double d = 2.5
+    return scale(f, <int>2), scale(d, <long>3), scale(d, <double>0.5)
+
+def add(number a, number b):
+    """
+    >>> add(1, 2)
+    3
+    >>> add(2 ** 40, 1) == 2 ** 40 + 1
+    True
+    >>> add(1.5, 2)
+    3.5
+    >>> add(a=0.5, b=1)
+    1.5
+    >>> add('a', 1)
+    Traceback (most recent call last):
+    TypeError: No matching signature found
+    >>> add(1)
+    Traceback (most recent call last):
+    TypeError: add() takes exactly 2 positional arguments (1 given)
+    """
+    return a + b
+
+def kind(floating x):
+    """
+    >>> kind(1.0)
+    'double'
+    >>> kind(1)
+    'double'
+    """
+    return cython.typeof(x)
+
+def total(floating[:] values):
+    """
+    >>> buf = Buffer([1, 2, 3.5], b"d")
+    >>> total(buf)
+    ('double', 6.5)
+    >>> total(Buffer([0.5, 0.25], b"f"))
+    ('float', 0.75)
+    >>> buf.acquired
+    0
+    >>> total(Buffer([1, 2], b"i"))
+    Traceback (most recent call last):
+    TypeError: No matching signature found
+    """
+    cdef floating result = 0
+    cdef Py_ssize_t i
+    for i in range(values.shape[0]):
+        result += values[i]
+    return cython.typeof(result), result
+
+def fill(floating[:] values, floating value):
+    """
+    >>> buf = Buffer([0, 0], b"f")
+    >>> fill(buf, 2)
+    >>> total(buf)
+    ('float', 4.0)
+    """
+    cdef Py_ssize_t i
+    for i in range(values.shape[0]):
+        values[i] = value
+
+def first(sequence items):
+    """
+    >>> first([1, 2])
+    ('list object', 1)
+    >>> first((3, 4))
+    ('tuple object', 3)
+    >>> first("ab")
+    Traceback (most recent call last):
+    TypeError: No matching signature found
+    """
+    return cython.typeof(items), items[0]
+
+cpdef floating half(floating x):
+    """
+    >>> half(3)
+    1.5
+    """
+    return x / 2
+
+def call_cpdef():
+    """
+    >>> call_cpdef()
+    (0.75, 1.25)
+    """
+    cdef float f = 1.5
+    cdef double d = 2.5
+    return half(f), half(d)
+
+def generator(floating start, int n):
+    """
+    >>> list(generator(0.5, 3))
+    [0.5, 1.5, 2.5]
+    """
+    cdef int i
+    for i in range(n):
+        yield start + i
+
+cdef class Shape:
+    """
+    >>> s = Shape()
+    >>> s.scaled()
+    (6, 4.5)
+    >>> s.shifted(1.5)
+    2.5
+    >>> s.identity(2), s.identity(2.5)
+    (2, 2.5)
+    """
+    cdef number times_three(self, number x):
+        return x * 3
+
+    def scaled(self):
+        return self.times_three(<int>2), self.times_three(<double>1.5)
+
+    def shifted(self, floating x):
+        return x + 1
+
+    cpdef number identity(self, number x):
+        return x
+
+class PyClass(object):
+    """
+    >>> PyClass().method(1.5), PyClass().method(2)
+    (2.5, 3)
+    """
+    def method(self, number x):
+        return x + 1
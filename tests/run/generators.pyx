@@ -0,0 +1,240 @@
+def very_simple():
+    """
+    >>> x = very_simple()
+    >>> next(x)
+    1
+    >>> next(x)
+    Traceback (most recent call last):
+    StopIteration
+    >>> next(x)
+    Traceback (most recent call last):
+    StopIteration
+    """
+    yield 1
+
+def simple():
+    """
+    >>> x = simple()
+    >>> list(x)
+    [1, 2, 3]
+    """
+    yield 1
+    yield 2
+    yield 3
+
+def simple_seq(seq):
+    """
+    >>> x = simple_seq("abc")
+    >>> list(x)
+    ['a', 'b', 'c']
+    """
+    for i in seq:
+        yield i
+
+def simple_send():
+    """
+    >>> x = simple_send()
+    >>> next(x)
+    >>> x.send(1)
+    1
+    >>> x.send(2)
+    2
+    >>> x.send(3)
+    3
+    """
+    i = None
+    while True:
+        i = yield i
+
+def raising():
+    """
+    >>> x = raising()
+    >>> next(x)
+    Traceback (most recent call last):
+    KeyError: 'foo'
+    >>> next(x)
+    Traceback (most recent call last):
+    StopIteration
+    """
+    yield {}['foo']
+
+def with_outer(*args):
+    """
+    >>> x = with_outer(1, 2, 3)
+    >>> list(x())
+    [1, 2, 3]
+    """
+    def generator():
+        for i in args:
+            yield i
+    return generator
+
+def typed_locals(int n):
+    """
+    >>> list(typed_locals(4))
+    [0, 1, 4, 9]
+    """
+    cdef int i
+    cdef double d
+    for i in range(n):
+        d = i * i
+        yield <int>d
+
+def temps_across_yield(seq):
+    """
+    >>> list(temps_across_yield([1, 2]))
+    [None, (1, 'x'), None, (2, 'x')]
+    >>> x = temps_across_yield([1, 2])
+    >>> next(x)
+    >>> x.send('y')
+    (1, 'y')
+    """
+    for x in seq:
+        yield (x, (yield None) or 'x')
+
+def send_before_start():
+    """
+    >>> x = send_before_start()
+    >>> x.send(1)
+    Traceback (most recent call last):
+    TypeError: can't send non-None value to a just-started generator
+    >>> x.send(None)
+    1
+    """
+    yield 1
+
+def check_close(log):
+    """
+    >>> log = []
+    >>> x = check_close(log)
+    >>> next(x)
+    1
+    >>> x.close()
+    >>> log
+    ['finally']
+    >>> x.close()
+    >>> next(x)
+    Traceback (most recent call last):
+    StopIteration
+    """
+    try:
+        yield 1
+        yield 2
+    finally:
+        log.append('finally')
+
+def yield_in_finally(log):
+    """
+    >>> log = []
+    >>> x = yield_in_finally(log)
+    >>> next(x)
+    1
+    >>> next(x)
+    'finally'
+    >>> next(x)
+    Traceback (most recent call last):
+    ValueError: 2
+    >>> log
+    ['finally']
+    """
+    try:
+        yield 1
+        raise ValueError(2)
+    finally:
+        yield 'finally'
+        log.append('finally')
+
+def check_close_on_dealloc(log):
+    """
+    >>> log = []
+    >>> x = check_close_on_dealloc(log)
+    >>> next(x)
+    1
+    >>> del x
+    >>> log
+    ['finally']
+    """
+    try:
+        yield 1
+    finally:
+        log.append('finally')
+
+def check_ignore_close():
+    """
+    >>> x = check_ignore_close()
+    >>> next(x)
+    1
+    >>> x.close()
+    Traceback (most recent call last):
+    RuntimeError: generator ignored GeneratorExit
+    """
+    for i in range(2):
+        try:
+            yield i + 1
+        except GeneratorExit:
+            pass
+
+def check_throw():
+    """
+    >>> x = check_throw()
+    >>> x.throw(ValueError)
+    Traceback (most recent call last):
+    ValueError
+    >>> next(x)
+    Traceback (most recent call last):
+    StopIteration
+    >>> x = check_throw()
+    >>> next(x)
+    >>> x.throw(ValueError)
+    ValueError
+    >>> x.throw(IndexError, "oops")
+    Traceback (most recent call last):
+    IndexError: oops
+    """
+    while True:
+        try:
+            yield
+        except ValueError:
+            print "ValueError"
+
+def check_return(a):
+    """
+    >>> list(check_return(0))
+    []
+    >>> list(check_return(1))
+    [1]
+    """
+    if not a:
+        return
+    yield a
+    return
+    yield 'unreachable'
+
+def already_executing():
+    """
+    >>> x = already_executing()
+    >>> next(x)
+    >>> x.send(x) is x
+    True
+    >>> next(x)
+    Traceback (most recent call last):
+    ValueError: generator already executing
+    """
+    gen = yield
+    yield gen
+    next(gen)
+
+cdef class Squares:
+    """
+    >>> list(Squares(4))
+    [0, 1, 4, 9]
+    """
+    cdef int n
+
+    def __init__(self, n):
+        self.n = n
+
+    def __iter__(self):
+        cdef int i
+        for i in range(self.n):
+            yield i * i
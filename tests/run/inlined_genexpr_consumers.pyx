@@ -0,0 +1,245 @@
+cimport cython
+
+@cython.test_assert_path_exists('//ComprehensionNode',
+                                '//ComprehensionPreallocNode',
+                                '//ForFromStatNode')
+@cython.test_fail_if_path_exists('//SimpleCallNode',
+                                 '//GeneratorExpressionNode')
+def range_tuple(int n):
+    """
+    >>> range_tuple(5)
+    (0, 2, 4, 6, 8)
+    >>> range_tuple(0)
+    ()
+    >>> range_tuple(-3)
+    ()
+    """
+    return tuple(i*2 for i in range(n))
+
+@cython.test_assert_path_exists('//ComprehensionNode')
+@cython.test_fail_if_path_exists('//ComprehensionPreallocNode',
+                                 '//GeneratorExpressionNode')
+def filtered_tuple(seq):
+    """
+    >>> filtered_tuple([1, 2, 3, 4])
+    (2, 4)
+    """
+    return tuple(x for x in seq if x % 2 == 0)
+
+@cython.test_assert_path_exists('//ComprehensionPreallocNode')
+def listcomp_typed_list(list l):
+    """
+    >>> listcomp_typed_list([1, 2, 3])
+    [2, 3, 4]
+    >>> listcomp_typed_list([])
+    []
+    >>> listcomp_typed_list(None)
+    Traceback (most recent call last):
+    TypeError: 'NoneType' object is not iterable
+    """
+    return [x+1 for x in l]
+
+@cython.test_assert_path_exists('//ComprehensionPreallocNode')
+def listcomp_typed_tuple(tuple t):
+    """
+    >>> listcomp_typed_tuple((1, 2))
+    [2, 3]
+    """
+    return [x+1 for x in t]
+
+@cython.test_assert_path_exists('//ComprehensionPreallocNode')
+def listcomp_shrinking_list(list l):
+    """
+    >>> listcomp_shrinking_list([1, 2, 3, 4])
+    [4, 3]
+    """
+    return [l.pop() for x in l]
+
+cdef grow(list l, x):
+    if x < 3:
+        l.append(x * 10)
+    return x
+
+@cython.test_assert_path_exists('//ComprehensionPreallocNode')
+def listcomp_growing_list(list l):
+    """
+    >>> listcomp_growing_list([1, 2, 3])
+    [1, 2, 3, 10, 20]
+    """
+    return [grow(l, x) for x in l]
+
+@cython.test_assert_path_exists('//ComprehensionPreallocNode')
+def listcomp_range_bounds(int a, int b):
+    """
+    >>> listcomp_range_bounds(3, 7)
+    [3, 4, 5, 6]
+    >>> listcomp_range_bounds(7, 3)
+    []
+    >>> listcomp_range_bounds(-5, -2)
+    [-5, -4, -3]
+    """
+    return [i for i in range(a, b)]
+
+@cython.test_assert_path_exists('//ComprehensionPreallocNode')
+def listcomp_negative_step(int n):
+    """
+    >>> listcomp_negative_step(7)
+    [7, 4, 1]
+    >>> listcomp_negative_step(0)
+    []
+    """
+    return [i for i in range(n, 0, -3)]
+
+@cython.test_fail_if_path_exists('//ComprehensionPreallocNode')
+def listcomp_nested(int n):
+    """
+    >>> listcomp_nested(3)
+    [(1, 0), (2, 0), (2, 1)]
+    """
+    return [(i, j) for i in range(n) for j in range(i)]
+
+@cython.test_assert_path_exists('//InlinedGeneratorExpressionNode')
+@cython.test_fail_if_path_exists('//SimpleCallNode')
+def genexpr_min_max(seq):
+    """
+    >>> genexpr_min_max([3, 1, 2])
+    (1, 3)
+    >>> genexpr_min_max([1.5])
+    (1.5, 1.5)
+    >>> genexpr_min_max([])
+    Traceback (most recent call last):
+    ValueError: min() arg is an empty sequence
+    """
+    return min(x for x in seq), max(x for x in seq)
+
+def genexpr_max_empty(seq):
+    """
+    >>> genexpr_max_empty([])
+    Traceback (most recent call last):
+    ValueError: max() arg is an empty sequence
+    """
+    return max(x for x in seq)
+
+class Ordered(object):
+    def __init__(self, key, name):
+        self.key, self.name = key, name
+    def __lt__(self, other):
+        return self.key < other.key
+    def __gt__(self, other):
+        return self.key > other.key
+
+def genexpr_min_max_first_wins():
+    """
+    >>> genexpr_min_max_first_wins()
+    ('a', 'c')
+    """
+    items = [Ordered(1, 'a'), Ordered(1, 'b'), Ordered(2, 'c'), Ordered(2, 'd')]
+    return min(x for x in items).name, max(x for x in items).name
+
+@cython.test_assert_path_exists('//InlinedGeneratorExpressionNode')
+def genexpr_min_typed(int n):
+    """
+    >>> genexpr_min_typed(5)
+    -4
+    """
+    cdef int i
+    return min(-i for i in range(n))
+
+@cython.test_assert_path_exists('//ComprehensionNode')
+@cython.test_fail_if_path_exists('//GeneratorExpressionNode')
+def genexpr_join(seq):
+    """
+    >>> genexpr_join(['a', 'b', 'c'])
+    'a-b-c'
+    >>> print(genexpr_join([]))
+    <BLANKLINE>
+    """
+    return '-'.join(x for x in seq)
+
+@cython.test_assert_path_exists('//ComprehensionNode')
+def genexpr_unicode_join(seq):
+    """
+    >>> genexpr_unicode_join([1, 2]) == u'1, 2'
+    True
+    """
+    return u', '.join(unicode(x) for x in seq)
+
+@cython.test_assert_path_exists('//InlinedGeneratorExpressionNode')
+@cython.test_fail_if_path_exists('//GeneratorExpressionNode')
+def for_in_genexpr(LL):
+    """
+    >>> for_in_genexpr([[1, 2], [], [3, 4]])
+    [2, 4, 6, 8, 'done']
+    >>> for_in_genexpr([[1, 2], [5, 4]])
+    [2, 4]
+    """
+    result = []
+    for y in (x*2 for L in LL if L for x in L):
+        if y > 8:
+            break
+        result.append(y)
+    else:
+        result.append('done')
+    return result
+
+@cython.test_assert_path_exists('//InlinedGeneratorExpressionNode')
+def for_in_genexpr_continue(seq):
+    """
+    >>> for_in_genexpr_continue(range(6))
+    [0, 4, 16]
+    """
+    result = []
+    for y in (x*x for x in seq):
+        if y % 2:
+            continue
+        result.append(y)
+    return result
+
+@cython.test_assert_path_exists('//InlinedGeneratorExpressionNode')
+def for_in_genexpr_return(seq):
+    """
+    >>> for_in_genexpr_return([1, 2, 3])
+    4
+    >>> for_in_genexpr_return([1])
+    -1
+    """
+    for y in (x*2 for x in seq):
+        if y > 3:
+            return y
+    return -1
+
+@cython.test_assert_path_exists('//InlinedGeneratorExpressionNode')
+def for_in_genexpr_inplace(int n):
+    """
+    >>> for_in_genexpr_inplace(4)
+    (10, [1, 2, 3, 4, 1, 2, 3, 4])
+    """
+    s = 0
+    l = []
+    for y in (i+1 for i in range(n)):
+        s += y
+        l += [y]
+    l *= 2
+    return s, l
+
+@cython.test_assert_path_exists('//InlinedGeneratorExpressionNode')
+def for_in_genexpr_inplace_typed(int n):
+    """
+    >>> for_in_genexpr_inplace_typed(4)
+    (10, 24)
+    """
+    cdef int y, s = 0, p = 1
+    for y in (i+1 for i in range(n)):
+        s += y
+        p *= y
+    return s, p
+
+@cython.test_assert_path_exists('//InlinedGeneratorExpressionNode')
+def any_filtered_nested(LL):
+    """
+    >>> any_filtered_nested([[0, 1], [0]])
+    True
+    >>> any_filtered_nested([[0], [], [0]])
+    False
+    """
+    return any(x for L in LL if L for x in L)
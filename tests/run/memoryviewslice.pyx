@@ -0,0 +1,359 @@
+cimport cython
+
+cdef struct Point:
+    int x
+    int y
+
+cdef class Buffer:
+    """
+    A C contiguous buffer of ints (or points) that counts its acquisitions.
+    """
+    cdef char *data
+    cdef Py_ssize_t shape[2]
+    cdef Py_ssize_t strides[2]
+    cdef int ndim
+    cdef bytes format
+    cdef Py_ssize_t itemsize
+    cdef object storage
+    cdef public int acquired
+
+    def __init__(self, shape, points=False):
+        cdef int i
+        cdef Py_ssize_t size = 1
+        self.ndim = len(shape)
+        if points:
+            self.format = b"T{ii}"
+            self.itemsize = sizeof(Point)
+        else:
+            self.format = b"i"
+            self.itemsize = sizeof(int)
+        for i in range(self.ndim - 1, -1, -1):
+            self.shape[i] = shape[i]
+            self.strides[i] = size * self.itemsize
+            size *= shape[i]
+        self.storage = b"\0" * (size * self.itemsize)
+        self.data = <char*>self.storage
+        if not points:
+            for i in range(size):
+                (<int*>self.data)[i] = i
+
+    def __getbuffer__(self, Py_buffer *info, int flags):
+        info.buf = self.data
+        info.obj = self
+        info.len = len(self.storage)
+        info.readonly = 0
+        info.format = self.format
+        info.ndim = self.ndim
+        info.shape = self.shape
+        info.strides = self.strides
+        info.suboffsets = NULL
+        info.itemsize = self.itemsize
+        info.internal = NULL
+        self.acquired += 1
+
+    def __releasebuffer__(self, Py_buffer *info):
+        self.acquired -= 1
+
+    def tolist(self):
+        cdef Py_ssize_t i
+        return [(<int*>self.data)[i] for i in range(len(self.storage) // sizeof(int))]
+
+
+def shape(int[:, :] a):
+    """
+    >>> buf = Buffer((3, 4))
+    >>> shape(buf)
+    (3, 4)
+    >>> buf.acquired
+    0
+    """
+    return a.shape[0], a.shape[1]
+
+def index(int[:, ::1] a, i, j):
+    """
+    >>> buf = Buffer((3, 4))
+    >>> index(buf, 1, 2)
+    6
+    >>> index(buf, -1, -1)
+    11
+    >>> index(buf, 3, 0)
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 0)
+    >>> index(buf, 0, -5)
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 1)
+    >>> buf.acquired
+    0
+    """
+    return a[i, j]
+
+def wrong_ndim(obj):
+    """
+    >>> wrong_ndim(Buffer((3, 4)))
+    Traceback (most recent call last):
+    ValueError: Buffer has wrong number of dimensions (expected 1, got 2)
+    """
+    cdef int[:] a = obj
+
+def wrong_dtype(obj):
+    """
+    >>> wrong_dtype(Buffer((3,)))
+    Traceback (most recent call last):
+    ValueError: Buffer dtype mismatch, expected 'double' but got 'int'
+    """
+    cdef double[:] a = obj
+
+def not_contiguous(obj):
+    """
+    >>> not_contiguous(Buffer((3, 4)))
+    Traceback (most recent call last):
+    ValueError: Buffer is not contiguous in dimension 0
+    """
+    cdef int[::1, :] a = obj
+
+cdef int nogil_sum(int[:, :] a) nogil:
+    cdef int i, j, s = 0
+    for i in range(a.shape[0]):
+        for j in range(a.shape[1]):
+            s += a[i, j]
+    return s
+
+def slicing(obj):
+    """
+    >>> buf = Buffer((3, 4))
+    >>> slicing(buf)
+    66 66
+    (2, 2) 1 28
+    (4,) 4 7
+    (3,) 3 21
+    (3, 2) 10 2
+    >>> buf.acquired
+    0
+    """
+    cdef int[:, ::1] a = obj
+    cdef int[:, :] b
+    cdef int[:] c
+    print nogil_sum(a), nogil_sum(a[...])
+    b = a[1:, ::2]
+    print (b.shape[0], b.shape[1]), obj.acquired, nogil_sum(b)
+    c = a[1]
+    print (c.shape[0],), c[0], c[-1]
+    c = a[:, -1]
+    print (c.shape[0],), c[0], nogil_sum(a[:, 3:])
+    b = a[::-1, 1:3]
+    print (b.shape[0], b.shape[1]), b[0, 1], b[-1, -1]
+
+def empty_slices(int[:] a):
+    """
+    >>> empty_slices(Buffer((5,)))
+    [0, 0, 0, 3]
+    """
+    return [a[3:1].shape[0], a[10:].shape[0], a[:-10].shape[0], a[2::-1].shape[0]]
+
+def zero_step(int[:] a):
+    """
+    >>> zero_step(Buffer((5,)))
+    Traceback (most recent call last):
+    ValueError: slice step cannot be zero
+    """
+    cdef int zero = 0
+    a = a[::zero]
+
+def nogil_slicing(int[:, ::1] a, int i):
+    """
+    >>> buf = Buffer((3, 4))
+    >>> nogil_slicing(buf, 1)
+    (4, 5)
+    >>> nogil_slicing(buf, 3)
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 0)
+    >>> buf.acquired
+    0
+    """
+    cdef int[::1] row
+    with nogil:
+        row = a[i]
+    return row[0], row[1]
+
+def copy(int[:, :] a):
+    """
+    >>> buf = Buffer((3, 4))
+    >>> copy(buf)
+    (3, 2) 1 11
+    (100, 1)
+    >>> buf.acquired
+    0
+    """
+    cdef int[:, ::1] c = a[:, 1::2].copy()
+    print (c.shape[0], c.shape[1]), c[0, 0], c[-1, -1]
+    c[0, 0] = 100
+    return c[0, 0], a[0, 1]
+
+def assign_items(obj):
+    """
+    >>> buf = Buffer((2, 3))
+    >>> assign_items(buf)
+    >>> buf.tolist()
+    [1, 1, 2, 300, 4, 10]
+    >>> buf.acquired
+    0
+    """
+    cdef int[:, :] a = obj
+    a[0, 0] = 1
+    a[1, 0] *= 100
+    a[-1, -1] += 5
+
+def assign_slice(obj):
+    """
+    >>> buf = Buffer((3, 2))
+    >>> assign_slice(buf)
+    >>> buf.tolist()
+    [4, 5, 2, 3, 3, 2]
+    >>> buf.acquired
+    0
+    """
+    cdef int[:, ::1] a = obj
+    a[0] = a[2]
+    a[2, :] = a[1, ::-1]
+
+def assign_slice_mismatch(int[:, :] a):
+    """
+    >>> assign_slice_mismatch(Buffer((3, 2)))
+    Traceback (most recent call last):
+    ValueError: memoryview slice shapes do not match
+    """
+    a[0, :] = a[:, 0]
+
+def overlapping_copy(obj):
+    """
+    >>> buf = Buffer((6,))
+    >>> overlapping_copy(buf)
+    >>> buf.tolist()
+    [0, 0, 1, 2, 3, 4]
+    """
+    cdef int[:] a = obj
+    a[1:] = a[:-1]
+
+def none_slices(int[:] a=None):
+    """
+    >>> none_slices()
+    (True, False)
+    >>> none_slices(Buffer((2,)))
+    (False, True)
+    """
+    return a is None, a is not None
+
+@cython.nonecheck(True)
+def none_index(int[:] a):
+    """
+    >>> none_index(None)
+    Traceback (most recent call last):
+    TypeError: Cannot index None memoryview slice
+    """
+    return a[0]
+
+def none_copy(int[:] a):
+    """
+    >>> none_copy(None)
+    Traceback (most recent call last):
+    AttributeError: 'NoneType' object has no attribute 'copy'
+    """
+    a.copy()
+
+def reassign(obj1, obj2):
+    """
+    >>> buf1, buf2 = Buffer((2,)), Buffer((3,))
+    >>> reassign(buf1, buf2)
+    1 0
+    0 1
+    0 0
+    >>> buf1.acquired, buf2.acquired
+    (0, 0)
+    """
+    cdef int[:] a = obj1
+    print obj1.acquired, obj2.acquired
+    a = obj2
+    print obj1.acquired, obj2.acquired
+    a = None
+    print obj1.acquired, obj2.acquired
+
+cdef int[::1] middle(int[::1] a) except *:
+    if a.shape[0] < 3:
+        raise ValueError("too short")
+    return a[1:-1]
+
+def cdef_return(obj):
+    """
+    >>> buf = Buffer((5,))
+    >>> cdef_return(buf)
+    (3, 1, 3)
+    >>> cdef_return(Buffer((2,)))
+    Traceback (most recent call last):
+    ValueError: too short
+    >>> buf.acquired
+    0
+    """
+    cdef int[::1] m = middle(obj)
+    return m.shape[0], m[0], m[-1]
+
+cdef class Holder:
+    """
+    >>> buf = Buffer((3,))
+    >>> h = Holder(buf)
+    >>> buf.acquired
+    1
+    >>> h.item(2)
+    2
+    >>> h.swap(Buffer((4,)))
+    >>> h.item(3)
+    3
+    >>> buf.acquired
+    0
+    >>> del h
+    """
+    cdef int[:] data
+
+    def __init__(self, obj):
+        self.data = obj
+
+    def item(self, i):
+        return self.data[i]
+
+    def swap(self, obj):
+        self.data = obj
+
+def closure(int[:] a):
+    """
+    >>> buf = Buffer((3,))
+    >>> f = closure(buf)
+    >>> buf.acquired
+    1
+    >>> f()
+    2
+    >>> del f
+    >>> buf.acquired
+    0
+    """
+    def inner():
+        return a[2]
+    return inner
+
+def struct_dtype(obj):
+    """
+    >>> struct_dtype(Buffer((3,), points=True))
+    (2, 5)
+    """
+    cdef Point[:] points = obj
+    points[1].x = 2
+    points[1].y = 5
+    return points[1].x, points[1].y
+
+def infer_types(obj):
+    """
+    >>> infer_types(Buffer((2, 3)))
+    (2, 5, 3)
+    """
+    cdef int[:, ::1] a = obj
+    b = a[:, 1:]
+    c = b[1]
+    return b.shape[1], c[1], c.shape[0] + 1
@@ -0,0 +1,152 @@
+cimport cython.parallel
+from cython.parallel cimport prange
+from cython cimport parallel
+
+def test_sum(int n):
+    """
+    >>> test_sum(10)
+    (45, 9)
+    >>> test_sum(0)
+    (0, -1)
+    """
+    cdef int i = -1, s = 0
+    with nogil:
+        for i in prange(n):
+            s += i
+    return s, i
+
+def test_start_stop_step(long start, long stop):
+    """
+    >>> test_start_stop_step(3, 20)
+    (63, 18)
+    >>> test_start_stop_step(20, 3)
+    (0, 0)
+    """
+    cdef long i = 0, s = 0
+    for i in prange(start, stop, 3, nogil=True):
+        s += i
+    return s, i
+
+def test_negative_step(int n):
+    """
+    >>> test_negative_step(10)
+    (55, 1)
+    """
+    cdef int i, s = 0
+    for i in prange(n, 0, -1, nogil=True):
+        s += i
+    return s, i
+
+def test_reductions(int n):
+    """
+    >>> test_reductions(5)
+    (-15, 120, 1, 7, 1)
+    """
+    cdef int i, minus = 0, prod = 1, bits = 0, flags = 0, parity = 0
+    for i in cython.parallel.prange(1, n + 1, nogil=True):
+        minus -= i
+        prod *= i
+        flags |= 1 << (i % 3)
+        parity ^= i
+    bits = flags & 7
+    return minus, prod, parity, bits, flags & 1
+
+def test_lastprivate(int n):
+    """
+    >>> test_lastprivate(10)
+    (18, 81)
+    """
+    cdef int i, double, square = 0
+    for i in parallel.prange(n, nogil=True, schedule='static'):
+        double = 2 * i
+        if double > 0:
+            square = i * i
+    return double, square
+
+def test_schedule(int n, int chunk):
+    """
+    >>> test_schedule(100, 7)
+    (4950, 4950, 4950)
+    """
+    cdef int i, s1 = 0, s2 = 0, s3 = 0
+    with nogil:
+        for i in prange(n, schedule='dynamic', chunksize=chunk):
+            s1 += i
+        for i in prange(n, schedule='guided', chunksize=3, num_threads=2):
+            s2 += i
+        for i in prange(n, schedule='runtime'):
+            s3 += i
+    return s1, s2, s3
+
+cdef double mul(double x, double y) nogil:
+    return x * y
+
+def test_nested_loops(int n):
+    """
+    >>> test_nested_loops(4)
+    (25.0, 3)
+    """
+    cdef int i, j
+    cdef double total = 0
+    for i in prange(n, nogil=True):
+        for j in range(n):
+            if j > i:
+                continue
+            total += mul(i, j)
+    return total, j
+
+def test_else(int n):
+    """
+    >>> test_else(3)
+    (3, 1)
+    """
+    cdef int i, s = 0, done = 0
+    for i in prange(n, nogil=True):
+        s += 1
+    else:
+        done = 1
+    return s, done
+
+cdef int check(int i) except -1 with gil:
+    if i == 5:
+        raise ValueError(i)
+    return i
+
+def test_exception(int n):
+    """
+    >>> test_exception(5)
+    10
+    >>> test_exception(20)
+    Traceback (most recent call last):
+    ValueError: 5
+    """
+    cdef int i, s = 0
+    for i in prange(n, nogil=True):
+        s += check(i)
+    return s
+
+def test_index_error(unsigned char[:] a, int n):
+    """
+    >>> test_index_error(bytearray(b'abc'), 3)
+    294
+    >>> test_index_error(bytearray(b'abc'), 4)
+    Traceback (most recent call last):
+    IndexError: Out of bounds on buffer access (axis 0)
+    """
+    cdef int i, s = 0
+    for i in prange(n, nogil=True):
+        s += a[i]
+    return s
+
+def test_memview_sum(unsigned char[:] a):
+    """
+    >>> test_memview_sum(bytearray(b'abc'))
+    294
+    >>> test_memview_sum(bytearray())
+    0
+    """
+    cdef Py_ssize_t i
+    cdef int s = 0
+    for i in prange(a.shape[0], nogil=True):
+        s += a[i]
+    return s
@@ -0,0 +1,170 @@
+import sys
+
+if sys.version_info[0] >= 3:
+    long = int
+
+class IntSubclass(int):
+    def __add__(self, other):
+        return 'IntSubclass.__add__'
+    def __radd__(self, other):
+        return 'IntSubclass.__radd__'
+    def __lt__(self, other):
+        return 'IntSubclass.__lt__'
+    def __eq__(self, other):
+        return 'IntSubclass.__eq__'
+
+def add_one(x):
+    """
+    >>> add_one(1)
+    2
+    >>> add_one(-1)
+    0
+    >>> add_one(sys.maxsize) == sys.maxsize + 1
+    True
+    >>> add_one(long(2) ** 70) == long(2) ** 70 + 1
+    True
+    >>> add_one(1.5)
+    2.5
+    >>> add_one(True)
+    2
+    >>> add_one(IntSubclass(3))
+    'IntSubclass.__add__'
+    >>> add_one([])
+    Traceback (most recent call last):
+    TypeError: can only concatenate list (not "int") to list
+    """
+    return x + 1
+
+def add_long_literal(x):
+    """
+    >>> add_long_literal(1) == 2
+    True
+    >>> type(add_long_literal(1)) is long
+    True
+    >>> type(add_long_literal(1.5)) is float
+    True
+    """
+    return x + 1L
+
+def one_plus(x):
+    """
+    >>> one_plus(1)
+    2
+    >>> one_plus(sys.maxsize) == sys.maxsize + 1
+    True
+    >>> one_plus(0.25)
+    1.25
+    >>> one_plus(IntSubclass(3))
+    'IntSubclass.__radd__'
+    """
+    return 1 + x
+
+def subtract(x):
+    """
+    >>> subtract(5)
+    (2, -2)
+    >>> subtract(-sys.maxsize - 1) == (-sys.maxsize - 4, sys.maxsize + 4)
+    True
+    >>> subtract(sys.maxsize) == (sys.maxsize - 3, -sys.maxsize + 3)
+    True
+    >>> subtract(3.5)
+    (0.5, -0.5)
+    """
+    return x - 3, 3 - x
+
+def inplace(x):
+    """
+    >>> inplace(1)
+    3
+    >>> inplace(0.5)
+    2.5
+    >>> inplace([1])
+    Traceback (most recent call last):
+    TypeError: 'int' object is not iterable
+    """
+    x += 2
+    return x
+
+class Counter(object):
+    def __init__(self):
+        self.values = []
+    def __iadd__(self, other):
+        self.values.append(other)
+        return self
+
+def inplace_object():
+    """
+    >>> inplace_object()
+    [5, 6]
+    """
+    c = Counter()
+    c0 = c
+    c += 5
+    c += 6
+    assert c is c0
+    return c.values
+
+def float_constant(x):
+    """
+    >>> float_constant(1)
+    (2.5, -0.5)
+    >>> float_constant(1.0)
+    (2.5, -0.5)
+    >>> float_constant(long(2) ** 70) == (2.0 ** 70 + 1.5, 2.0 ** 70 - 1.5)
+    True
+    >>> float_constant(long(10) ** 400)  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    OverflowError: ...int too large to convert to float
+    >>> float_constant('abc')  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    TypeError: ...
+    """
+    return x + 1.5, x - 1.5
+
+def compare_int(x):
+    """
+    >>> compare_int(1)
+    (True, True, False, False, False, True)
+    >>> compare_int(2)
+    (False, True, True, False, True, False)
+    >>> compare_int(2.5)
+    (False, False, True, True, False, True)
+    >>> compare_int(long(2) ** 70)
+    (False, False, True, True, False, True)
+    >>> compare_int(-long(2) ** 70)
+    (True, True, False, False, False, True)
+    >>> compare_int(IntSubclass(2))
+    ('IntSubclass.__lt__', True, True, False, 'IntSubclass.__eq__', False)
+    """
+    return x < 2, x <= 2, x >= 2, x > 2, x == 2, x != 2
+
+def compare_reversed(x):
+    """
+    >>> compare_reversed(1)
+    (False, False, True, True)
+    >>> compare_reversed(3)
+    (True, True, False, False)
+    >>> compare_reversed(2.0)
+    (False, True, True, False)
+    """
+    return 2 < x, 2 <= x, 2 >= x, 2 > x
+
+def compare_float(x):
+    """
+    >>> compare_float(0.5)
+    (True, False, True)
+    >>> compare_float(1.5)
+    (False, True, False)
+    >>> compare_float(1)
+    (True, False, True)
+    >>> compare_float(float('nan'))
+    (False, False, True)
+    """
+    return x < 1.5, x == 1.5, x != 1.5
+
+def chained(x):
+    """
+    >>> chained(1), chained(5), chained(10)
+    (False, True, False)
+    """
+    return 1 < x < 10
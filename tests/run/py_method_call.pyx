@@ -0,0 +1,121 @@
+class Counter(object):
+    def __init__(self):
+        self.count = 0
+
+    def add(self, n=1):
+        self.count += n
+        return self.count
+
+    def keywords(self, *args, **kwargs):
+        return args, sorted(kwargs.items())
+
+class OldStyle:
+    def method(self, x):
+        return x * 2
+
+cdef class Ext:
+    def method(self, a, b):
+        return a - b
+
+def python_methods():
+    """
+    >>> python_methods()
+    (1, 4, ((1, 2), []))
+    """
+    c = Counter()
+    return c.add(), c.add(3), c.keywords(1, 2)
+
+def builtin_methods(obj, value):
+    """
+    >>> builtin_methods([], 5)
+    [5, 5, 5]
+    >>> builtin_methods({}, 1)
+    Traceback (most recent call last):
+    AttributeError: 'dict' object has no attribute 'append'
+    """
+    obj.append(value)
+    obj.extend((value,))
+    obj.insert(0, value)
+    return obj
+
+def builtin_method_arg_errors(obj):
+    """
+    >>> builtin_method_arg_errors([])
+    Traceback (most recent call last):
+    TypeError: append() takes exactly one argument (0 given)
+    """
+    return obj.append()
+
+def other_methods():
+    """
+    >>> other_methods()
+    (6, 3, 'A B', 2.0)
+    """
+    import math
+    return OldStyle().method(3), Ext().method(5, 2), "a b".upper(), math.sqrt(4)
+
+def instance_attribute():
+    """
+    >>> instance_attribute()
+    (1, 'instance', 2)
+    """
+    c = Counter()
+    first = c.add()
+    c.add = lambda: "instance"
+    second = c.add()
+    del c.add
+    return first, second, c.add()
+
+def class_changes():
+    """
+    >>> class_changes()
+    [1, 'patched', 'static', 'class']
+    """
+    class C(object):
+        def f(self):
+            return 1
+    obj = C()
+    result = [obj.f()]
+    C.f = lambda self: 'patched'
+    result.append(obj.f())
+    C.f = staticmethod(lambda: 'static')
+    result.append(obj.f())
+    C.f = classmethod(lambda cls: 'class')
+    result.append(obj.f())
+    return result
+
+def evaluation_order():
+    """
+    >>> evaluation_order()
+    ['lookup', 'AttributeError']
+    """
+    log = []
+    class Obj(object):
+        def __getattr__(self, name):
+            log.append('lookup')
+            raise AttributeError(name)
+    def arg():
+        log.append('arg')
+    try:
+        Obj().missing(arg())
+    except AttributeError:
+        log.append('AttributeError')
+    return log
+
+def none_receiver(obj):
+    """
+    >>> none_receiver(None)
+    Traceback (most recent call last):
+    AttributeError: 'NoneType' object has no attribute 'method'
+    """
+    return obj.method()
+
+def foreign_method_descriptor():
+    """
+    >>> foreign_method_descriptor()
+    Traceback (most recent call last):
+    TypeError: descriptor 'append' for 'list' objects doesn't apply to 'A' object
+    """
+    class A(object):
+        app = list.append
+    return A().app(1)
@@ -0,0 +1,125 @@
+cimport cython
+
+class StrSubclass(str):
+    def __eq__(self, other):
+        return True
+
+@cython.test_assert_path_exists('//StringSwitchStatNode')
+def unicode_switch(cmd):
+    """
+    >>> unicode_switch(u'GET')
+    1
+    >>> unicode_switch(u'SET')
+    2
+    >>> unicode_switch(u'PUT'), unicode_switch(u'POST'), unicode_switch(u'HEAD')
+    (3, 3, 4)
+    >>> unicode_switch(u''), unicode_switch(u'GE'), unicode_switch(u'GETS'), unicode_switch(u'get')
+    (5, 0, 0, 0)
+    >>> unicode_switch(u'DELETE')
+    6
+    >>> unicode_switch(None), unicode_switch(1)
+    (0, 0)
+    """
+    if cmd == u'GET':
+        return 1
+    elif cmd == u'SET':
+        return 2
+    elif cmd == u'PUT' or cmd == u'POST':
+        return 3
+    elif cmd in (u'HEAD', u'GET'):
+        return 4
+    elif u'' == cmd:
+        return 5
+    elif cmd == u'DELETE':
+        return 6
+    else:
+        return 0
+
+@cython.test_assert_path_exists('//StringSwitchStatNode')
+def bytes_switch(bytes cmd):
+    """
+    >>> bytes_switch(b'ab'), bytes_switch(b'ba'), bytes_switch(b'aa'), bytes_switch(b'bb')
+    (1, 2, 3, 0)
+    >>> bytes_switch(b'\\xff\\x00'), bytes_switch(b'\\xff\\x01')
+    (4, 0)
+    >>> bytes_switch(None)
+    0
+    """
+    if cmd == b'ab':
+        return 1
+    elif cmd == b'ba':
+        return 2
+    elif cmd == b'aa':
+        return 3
+    elif cmd == b'\xff\x00':
+        return 4
+    return 0
+
+@cython.test_assert_path_exists('//StringSwitchStatNode')
+def str_switch(cmd):
+    """
+    >>> str_switch('a'), str_switch('b'), str_switch('c')
+    (1, 2, 0)
+    >>> str_switch(StrSubclass('c'))
+    1
+    """
+    if cmd == 'a':
+        return 1
+    elif cmd == 'b':
+        return 2
+    return 0
+
+def fallback_order(cmd):
+    """
+    >>> class AnyEqual(object):
+    ...     calls = 0
+    ...     def __eq__(self, other):
+    ...         AnyEqual.calls += 1
+    ...         return other == u'B'
+    >>> fallback_order(AnyEqual()), AnyEqual.calls
+    (2, 2)
+    """
+    if cmd == u'A':
+        return 1
+    elif cmd == u'B':
+        return 2
+    else:
+        return 0
+
+def loop_control(items):
+    """
+    >>> loop_control([u'a', u'skip', u'b', u'stop', u'c']) == [u'a', u'b']
+    True
+    """
+    result = []
+    for item in items:
+        if item == u'skip':
+            continue
+        elif item == u'stop':
+            break
+        result.append(item)
+    return result
+
+@cython.test_fail_if_path_exists('//StringSwitchStatNode')
+def mixed_kinds(cmd):
+    """
+    >>> mixed_kinds(b'a'), mixed_kinds(u'b'), mixed_kinds(u'c')
+    (1, 2, 0)
+    """
+    if cmd == b'a':
+        return 1
+    elif cmd == u'b':
+        return 2
+    return 0
+
+@cython.test_fail_if_path_exists('//StringSwitchStatNode')
+def non_ascii(cmd):
+    """
+    >>> non_ascii(u'\\xe4'), non_ascii(u'b'), non_ascii(u'c')
+    (1, 2, 0)
+    """
+    if cmd == u'\xe4':
+        return 1
+    elif cmd == u'b':
+        return 2
+    return 0
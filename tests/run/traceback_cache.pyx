@@ -0,0 +1,60 @@
+import sys
+
+def fail(x):
+    if x:
+        raise KeyError(x)
+    raise ValueError(x)
+
+cdef int cfail(int x) except -1:
+    if x:
+        return fail(x)
+    return fail(x)
+
+def tb_lines(tb):
+    lines = []
+    while tb is not None:
+        lines.append((tb.tb_frame.f_code.co_name.split(' ')[0].split('.')[-1], tb.tb_lineno))
+        tb = tb.tb_next
+    return lines
+
+def traceback_lines(x):
+    try:
+        cfail(x)
+    except Exception:
+        return tb_lines(sys.exc_info()[2])
+
+def code_objects(x):
+    try:
+        cfail(x)
+    except Exception:
+        tb = sys.exc_info()[2]
+    codes = []
+    while tb is not None:
+        codes.append(tb.tb_frame.f_code)
+        tb = tb.tb_next
+    return codes
+
+def code_objects_reused():
+    """
+    >>> code_objects_reused()
+    (True, False)
+    """
+    first = code_objects(1)
+    second = code_objects(1)
+    other = code_objects(0)
+    return ([a is b for a, b in zip(first, second)] == [True] * 3,
+            first[-1] is other[-1])
+
+def repeated_tracebacks():
+    """
+    >>> repeated_tracebacks()
+    [('traceback_lines', 22), ('cfail', 10), ('fail', 5)]
+    [('traceback_lines', 22), ('cfail', 11), ('fail', 6)]
+    """
+    first_key = traceback_lines(1)
+    first_value = traceback_lines(0)
+    for i in range(100):
+        assert traceback_lines(1) == first_key
+        assert traceback_lines(0) == first_value
+    print(first_key)
+    print(first_value)